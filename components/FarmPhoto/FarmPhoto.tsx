@@ -52,7 +52,7 @@ export const FarmPhoto: React.FC<FarmPhotoProps> = ({
 
       // Build the photo URL from Pi API directly
       const photoFileUrl = piApiUrl 
-        ? `${piApiUrl}/camera/latest/file?t=${Date.now()}`
+        ? `${piApiUrl}/camera/latest/file?size=pixel&t=${Date.now()}`
         : null
 
       if (!photoFileUrl) {
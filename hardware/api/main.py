@@ -5,14 +5,41 @@ FastAPI server exposing sensor readings and camera functionality
 for the Plante plant monitoring system.
 """
 import os
+import time
 from contextlib import asynccontextmanager
 from dotenv import load_dotenv
-from fastapi import FastAPI, Depends, HTTPException, Security
+from fastapi import FastAPI, Depends, HTTPException, Request, Security
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import APIKeyHeader
 
-from api.routers import health_router, sensors_router, camera_router, config_router, lid_router
-from api.services import get_sensor_service, get_camera_service
+from api.routers import (
+    health_router,
+    sensors_router,
+    camera_router,
+    config_router,
+    lid_router,
+    metrics_router,
+    debug_router,
+    timelapse_router,
+)
+from api.services import (
+    get_sensor_service,
+    get_camera_service,
+    get_capture_queue,
+    get_timelapse_service,
+    get_canopy_service,
+    get_lid_service,
+    get_config_events,
+)
+from api.middleware import ServerTimingMiddleware
+from config_store import get_config_store
+from telemetry import Histogram
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "plante_http_request_duration_seconds",
+    "API request latency by route template",
+    ["method", "route", "status"],
+)
 
 # Load environment variables
 load_dotenv()
@@ -22,6 +49,8 @@ API_VERSION = "1.0.0"
 API_TITLE = "Plante Sensor API"
 API_KEY = os.getenv("API_KEY", "")
 ALLOWED_ORIGINS = os.getenv("CORS_ORIGINS", "*").split(",")
+SERVER_TIMING = os.getenv("SERVER_TIMING", "true").lower() in ("1", "true", "yes")
+SERVER_TIMING_LOG = os.getenv("SERVER_TIMING_LOG", "false").lower() in ("1", "true", "yes")
 
 # API Key security (optional, disabled if API_KEY not set)
 api_key_header = APIKeyHeader(name="X-API-Key", auto_error=False)
@@ -41,6 +70,16 @@ async def verify_api_key(api_key: str = Security(api_key_header)):
     return True
 
 
+async def require_api_key(api_key: str = Security(api_key_header)):
+    """Require a configured and matching API key (debug endpoints)."""
+    if not API_KEY:
+        raise HTTPException(
+            status_code=403,
+            detail="Debug endpoints require API_KEY to be configured"
+        )
+    return await verify_api_key(api_key)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
@@ -53,13 +92,30 @@ async def lifespan(app: FastAPI):
     sensor_service = get_sensor_service()
     available = sensor_service.get_available_sensors()
     print(f"Available sensors: {', '.join(available) if available else 'none'}")
+    timelapse_service = get_timelapse_service()
+    timelapse_service.start()
+    canopy_service = get_canopy_service()
+    canopy_service.start()
+    # Parse config.json once and follow changes to it
+    config_store = get_config_store()
+    # Pushes config changes to main_control.py
+    config_events = get_config_events()
+    config_events.start()
+    # Opens the Arduino port once and shares it with main_control.py
+    get_lid_service().start()
     
     yield
     
     # Shutdown
     print("Shutting down...")
     sensor_service.cleanup()
+    timelapse_service.stop()
+    canopy_service.stop()
+    get_lid_service().disconnect()
+    get_capture_queue().close()
     get_camera_service().cleanup()
+    config_events.stop()
+    config_store.stop_watching()
     print("Cleanup complete")
 
 
@@ -78,14 +134,44 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Lets browser dashboards read the config version for If-Match
+    expose_headers=["ETag"],
 )
 
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    """Record per-route request latency for /metrics."""
+    start = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    # Label by route template, never the raw path, to bound cardinality
+    path = getattr(route, "path", "unmatched")
+    HTTP_REQUEST_SECONDS.labels(
+        method=request.method,
+        route=path,
+        status=response.status_code,
+    ).observe(time.perf_counter() - start)
+    return response
+
+
+# Server-Timing breakdown (outermost, so it sees every other layer)
+if SERVER_TIMING:
+    app.add_middleware(
+        ServerTimingMiddleware,
+        timing_allow_origin=", ".join(origin.strip() for origin in ALLOWED_ORIGINS),
+        log=SERVER_TIMING_LOG,
+    )
+
+
 # Include routers
 app.include_router(health_router)
+app.include_router(metrics_router)
 app.include_router(sensors_router, dependencies=[Depends(verify_api_key)])
 app.include_router(camera_router, dependencies=[Depends(verify_api_key)])
 app.include_router(config_router, dependencies=[Depends(verify_api_key)])
 app.include_router(lid_router, dependencies=[Depends(verify_api_key)])
+app.include_router(timelapse_router, dependencies=[Depends(verify_api_key)])
+app.include_router(debug_router, dependencies=[Depends(require_api_key)])
 
 
 @app.get("/")
@@ -0,0 +1,120 @@
+"""
+Request timing middleware
+
+ServerTimingMiddleware collects the spans recorded while a request is
+handled (see telemetry/timing.py) and emits them as a Server-Timing
+header, so slow calls can be broken down from browser devtools.
+TimedRoute adds the framework side: time spent in the endpoint versus
+request validation and response encoding.
+"""
+import functools
+import inspect
+import time
+from typing import Callable
+
+from fastapi.routing import APIRoute
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from telemetry.timing import current_timeline, end_timeline, record, start_timeline
+
+
+class ServerTimingMiddleware:
+    """
+    Attach a Server-Timing header to every HTTP response.
+
+    Args:
+        app: ASGI application
+        timing_allow_origin: Value for Timing-Allow-Origin so cross-origin
+            pages (the dashboard) can read the timings
+        log: Print each request's breakdown, including body send time
+    """
+
+    def __init__(self, app: ASGIApp, timing_allow_origin: str = "*", log: bool = False):
+        self.app = app
+        self.timing_allow_origin = timing_allow_origin
+        self.log = log
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = start_timeline()
+        timeline = current_timeline()
+        start = time.perf_counter()
+        state = {"status": 0, "headers_at": start}
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                now = time.perf_counter()
+                state["status"] = message["status"]
+                state["headers_at"] = now
+                timeline.add("total", now - start, "Time to response headers")
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", timeline.server_timing())
+                if self.timing_allow_origin:
+                    headers.append("Timing-Allow-Origin", self.timing_allow_origin)
+            elif message["type"] == "http.response.body" and not message.get("more_body"):
+                await send(message)
+                if self.log:
+                    self._log(scope, state, timeline)
+                return
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            end_timeline(token)
+
+    @staticmethod
+    def _log(scope: Scope, state: dict, timeline) -> None:
+        body = (time.perf_counter() - state["headers_at"]) * 1000
+        spans = " ".join(
+            f"{name}={seconds * 1000:.1f}ms" + (f"(x{count})" if count > 1 else "")
+            for name, seconds, count, _ in timeline.items()
+        )
+        print(f"[timing] {scope['method']} {scope['path']} {state['status']} {spans} body={body:.1f}ms")
+
+
+def _timed_endpoint(endpoint: Callable) -> Callable:
+    """Wrap a path operation so its own run time is recorded as 'endpoint'."""
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                record("endpoint", time.perf_counter() - start, "Endpoint incl. hardware")
+    else:
+        @functools.wraps(endpoint)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return endpoint(*args, **kwargs)
+            finally:
+                record("endpoint", time.perf_counter() - start, "Endpoint incl. hardware")
+    return timed
+
+
+class TimedRoute(APIRoute):
+    """APIRoute that splits handler time into endpoint and encode spans."""
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        super().__init__(path, _timed_endpoint(endpoint), **kwargs)
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def timed_handler(request):
+            start = time.perf_counter()
+            response = await handler(request)
+            timeline = current_timeline()
+            if timeline is not None:
+                elapsed = time.perf_counter() - start
+                timeline.add("encode", elapsed - timeline.total("endpoint"),
+                             "Validation and serialization")
+            return response
+
+        return timed_handler
@@ -5,10 +5,19 @@ from .schemas import (
     HumidityReading,
     LightReading,
     SoilMoistureReading,
+    CanopyReading,
+    CanopyResponse,
     SensorError,
     SensorResponse,
     HealthResponse,
     PhotoResponse,
+    PhotoInfo,
+    PhotoListResponse,
+    CaptureRequest,
+    CaptureJobResponse,
+    TimelapseSchedule,
+    RetentionPolicy,
+    TimelapseStatus,
 )
 
 __all__ = [
@@ -17,8 +26,17 @@ __all__ = [
     "HumidityReading",
     "LightReading",
     "SoilMoistureReading",
+    "CanopyReading",
+    "CanopyResponse",
     "SensorError",
     "SensorResponse",
     "HealthResponse",
     "PhotoResponse",
+    "PhotoInfo",
+    "PhotoListResponse",
+    "CaptureRequest",
+    "CaptureJobResponse",
+    "TimelapseSchedule",
+    "RetentionPolicy",
+    "TimelapseStatus",
 ]
@@ -2,7 +2,7 @@
 Pydantic models for Raspberry Pi sensor API responses
 """
 from datetime import datetime
-from typing import Optional, List, Literal
+from typing import Dict, Optional, List, Literal
 from pydantic import BaseModel, Field
 
 
@@ -33,6 +33,22 @@ class SoilMoistureReading(SensorReading):
     unit: Literal["percent"] = "percent"
 
 
+class CanopyReading(BaseModel):
+    """Canopy analytics of one camera frame"""
+    timestamp: datetime
+    coverage: float = Field(..., description="Fraction of the frame that is canopy (0-1)")
+    greenness: float = Field(..., description="Mean normalised excess green index (-1 to 2)")
+    change: Optional[float] = Field(None, description="Fraction of pixels that changed class since the previous sample")
+    brightness: float = Field(..., description="Mean luma (0-1)")
+
+
+class CanopyResponse(BaseModel):
+    """Latest canopy sample and the stored series"""
+    latest: Optional[CanopyReading] = None
+    series: List[CanopyReading] = Field(default_factory=list)
+    count: int = 0
+
+
 class SensorError(BaseModel):
     """Error information for a sensor"""
     sensor: str
@@ -61,7 +77,82 @@ class HealthResponse(BaseModel):
 class PhotoResponse(BaseModel):
     """Camera photo response"""
     success: bool
+    # Photo id and its /camera/photos URL, set for every photo taken
+    id: Optional[str] = None
+    url: Optional[str] = None
+    # None while the photo is only held in memory
     filepath: Optional[str] = None
     filename: Optional[str] = None
     timestamp: datetime = Field(default_factory=datetime.utcnow)
     error: Optional[str] = None
+
+
+class PhotoInfo(BaseModel):
+    """Indexed photo metadata"""
+    # Path under the photos directory without the extension
+    id: str
+    filename: str
+    timestamp: datetime
+    size_bytes: int
+
+
+class PhotoListResponse(BaseModel):
+    """Page of photos, oldest first"""
+    photos: List[PhotoInfo] = Field(default_factory=list)
+    count: int
+    has_more: bool = False
+    # Pass as `cursor` (with the same filters) for the next page: newer
+    # photos when listing with `since`, otherwise older ones
+    next_cursor: Optional[str] = None
+
+
+class CaptureRequest(BaseModel):
+    """Capture job request"""
+    filename: Optional[str] = None
+    full_resolution: bool = False
+
+
+class CaptureJobResponse(BaseModel):
+    """Capture job status"""
+    id: str
+    status: Literal["queued", "running", "done", "failed"]
+    full_resolution: bool = False
+    requests: int = Field(1, description="Requests merged into this exposure")
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    photo: Optional[PhotoResponse] = None
+    error: Optional[str] = None
+
+
+class TimelapseSchedule(BaseModel):
+    """Timelapse rule: a fixed interval or a 5-field cron expression"""
+    interval_seconds: Optional[int] = Field(None, ge=10)
+    cron: Optional[str] = Field(None, examples=["*/15 6-20 * * *"])
+    full_resolution: bool = False
+    enabled: bool = True
+    # Skip frames within this many hash bits (of 64) of the last kept frame;
+    # None keeps every frame
+    dedup_distance: Optional[int] = Field(4, ge=0, le=32)
+    # Keep a frame at least this often even when nothing changes
+    dedup_max_gap_seconds: int = Field(3600, ge=0)
+
+
+class RetentionPolicy(BaseModel):
+    """Limits on stored photos (unset = unlimited)"""
+    max_count: Optional[int] = Field(None, ge=1)
+    max_age_days: Optional[float] = Field(None, gt=0)
+    max_megabytes: Optional[float] = Field(None, gt=0)
+
+
+class TimelapseStatus(BaseModel):
+    """Timelapse schedules, retention and storage use"""
+    schedules: Dict[str, TimelapseSchedule] = Field(default_factory=dict)
+    retention: RetentionPolicy
+    # Policy for the photos outside the timelapse directory
+    photo_retention: RetentionPolicy = Field(default_factory=RetentionPolicy)
+    next_runs: Dict[str, datetime] = Field(default_factory=dict)
+    photo_count: int = 0
+    size_bytes: int = 0
+    other_photo_count: int = 0
+    other_size_bytes: int = 0
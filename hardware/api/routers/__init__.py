@@ -4,6 +4,9 @@ from .sensors import router as sensors_router
 from .camera import router as camera_router
 from .config import router as config_router
 from .lid import lid_router
+from .metrics import router as metrics_router
+from .debug import router as debug_router
+from .timelapse import router as timelapse_router
 
 __all__ = [
     "health_router",
@@ -11,5 +14,8 @@ __all__ = [
     "camera_router",
     "config_router",
     "lid_router",
+    "metrics_router",
+    "debug_router",
+    "timelapse_router",
 ]
 
@@ -1,46 +1,240 @@
 """
 Camera router - endpoints for camera operations
 """
-from typing import Optional
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import FileResponse
+import os
+from datetime import datetime
+from typing import Literal, Optional
+from fastapi import APIRouter, HTTPException, Query, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.background import BackgroundTask
 
-from api.models import PhotoResponse
-from api.services import get_camera_service
+from api.models import (
+    PhotoResponse,
+    PhotoInfo,
+    PhotoListResponse,
+    CaptureRequest,
+    CaptureJobResponse,
+)
+from api.services import get_camera_service, get_stream_service, get_capture_queue
+from api.services.capture_queue import CaptureJob, QueueFull
+from api.services.photo_index import AFTER, BEFORE, decode_cursor, encode_cursor
+from api.services.stream_service import BOUNDARY, StreamBusy
+from api.middleware import TimedRoute
+from telemetry.timing import current_timeline
 
-router = APIRouter(prefix="/camera", tags=["camera"])
+router = APIRouter(prefix="/camera", tags=["camera"], route_class=TimedRoute)
+
+PhotoSize = Literal["original", "thumb", "medium", "pixel"]
+
+# Photos and their derivatives never change under the same id + mtime
+PHOTO_CACHE_CONTROL = "public, max-age=86400"
+
+# Longest GET /camera/capture waits for its queued job
+CAPTURE_TIMEOUT = 60
+
+
+def _job_response(job: CaptureJob) -> CaptureJobResponse:
+    return CaptureJobResponse(
+        id=job.id,
+        status=job.status,
+        full_resolution=job.full_resolution,
+        requests=job.requests,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+        photo=job.photo,
+        error=job.error,
+    )
+
+
+def _add_job_timings(job: CaptureJob) -> None:
+    """Add the worker's queue and camera spans to this request's Server-Timing."""
+    timeline = current_timeline()
+    if timeline is not None and job.timeline is not None:
+        timeline.extend(job.timeline)
+
+
+def _submit(filename: Optional[str], full_resolution: bool) -> CaptureJob:
+    if not get_camera_service().is_available:
+        raise HTTPException(
+            status_code=503,
+            detail="Camera not available"
+        )
+    try:
+        return get_capture_queue().submit(filename=filename, full_resolution=full_resolution)
+    except QueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "5"})
+
+
+async def _photo_file(photo, size: str, cache_control: str = PHOTO_CACHE_CONTROL) -> Response:
+    """Serve a photo at the requested size, rendering the derivative if needed."""
+    camera_service = get_camera_service()
+    if size == "original":
+        if not os.path.exists(photo.filepath):
+            raise HTTPException(status_code=404, detail="Photo file missing")
+        return FileResponse(
+            photo.filepath,
+            media_type="image/jpeg",
+            filename=photo.filename,
+            headers={"Cache-Control": cache_control},
+        )
+    
+    # Read while the cache holds it: a path could be evicted before sending
+    try:
+        content, media_type = await run_in_threadpool(camera_service.read_derivative, photo, size)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Photo file missing")
+    
+    stem = os.path.splitext(photo.filename)[0]
+    filename = f"{stem}-{size}{'.png' if media_type == 'image/png' else '.jpg'}"
+    return Response(
+        content,
+        media_type=media_type,
+        headers={
+            "Cache-Control": cache_control,
+            "Content-Disposition": f'attachment; filename="{filename}"',
+        },
+    )
+
+
+async def _memory_file(frame, size: str, cache_control: str = PHOTO_CACHE_CONTROL) -> Response:
+    """Serve an in-memory capture at the requested size."""
+    content, media_type = await run_in_threadpool(frame.get, size)
+    
+    filename = frame.filename
+    if size != "original":
+        filename = f"{frame.id}-{size}{'.png' if media_type == 'image/png' else '.jpg'}"
+    return Response(
+        content,
+        media_type=media_type,
+        headers={
+            "Cache-Control": cache_control,
+            "Content-Disposition": f'attachment; filename="{filename}"',
+        },
+    )
+
+
+@router.post("/captures", response_model=CaptureJobResponse, status_code=202)
+async def create_capture(response: Response, request: Optional[CaptureRequest] = None) -> CaptureJobResponse:
+    """
+    Queue a photo capture.
+    
+    Identical requests within a couple of seconds share one exposure
+    (the returned job's `requests` counts them). Poll
+    GET /camera/captures/{id} for the result.
+    
+    Args:
+        request: Optional filename and full_resolution flag
+        
+    Returns:
+        The queued job (202), or 429 if the queue is full
+    """
+    request = request or CaptureRequest()
+    job = _submit(request.filename, request.full_resolution)
+    response.headers["Location"] = f"{router.prefix}/captures/{job.id}"
+    return _job_response(job)
+
+
+@router.get("/captures/{job_id}", response_model=CaptureJobResponse)
+async def get_capture(job_id: str, wait: float = Query(0, ge=0, le=30)) -> CaptureJobResponse:
+    """
+    Get a capture job's status.
+    
+    Args:
+        job_id: Id returned by POST /camera/captures
+        wait: Seconds to wait for the job to finish before answering
+        
+    Returns:
+        Job status, including the photo once done
+    """
+    job = get_capture_queue().get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=404,
+            detail="Capture job not found"
+        )
+    
+    if wait and not job.done.is_set():
+        await run_in_threadpool(job.wait, wait)
+    _add_job_timings(job)
+    
+    return _job_response(job)
 
 
 @router.get("/capture", response_model=PhotoResponse)
-async def capture_photo(filename: Optional[str] = None) -> PhotoResponse:
+async def capture_photo(filename: Optional[str] = None, full_res: bool = False) -> PhotoResponse:
     """
-    Capture a new photo.
+    Capture a new photo and wait for it.
+    
+    Kept for older clients; goes through the same queue as
+    POST /camera/captures.
     
     Args:
         filename: Optional filename for the photo
+        full_res: Capture at full sensor resolution instead of from the
+            warm stream (slower: briefly switches camera mode)
         
     Returns:
         Photo metadata including filepath
     """
-    camera_service = get_camera_service()
+    job = _submit(filename, full_res)
     
-    if not camera_service.is_available:
+    if not await run_in_threadpool(job.wait, CAPTURE_TIMEOUT):
         raise HTTPException(
-            status_code=503,
-            detail="Camera not available"
+            status_code=504,
+            detail="Timed out waiting for the camera"
         )
+    _add_job_timings(job)
+    response = job.photo
     
-    response = camera_service.capture(filename=filename)
-    
-    if not response.success:
+    if response is None or not response.success:
         raise HTTPException(
             status_code=500,
-            detail=response.error or "Failed to capture photo"
+            detail=job.error or "Failed to capture photo"
         )
     
     return response
 
 
+@router.get("/stream")
+async def stream_video():
+    """
+    Live MJPEG stream from the camera's low resolution preview stream.
+    
+    Open it directly in an <img> tag. Frame rate is shared between
+    viewers; slow connections skip frames rather than falling behind.
+    
+    Returns:
+        multipart/x-mixed-replace JPEG stream
+    """
+    camera_service = get_camera_service()
+    stream_service = get_stream_service()
+    
+    if not camera_service.supports_preview:
+        raise HTTPException(
+            status_code=503,
+            detail="Live stream requires the camera in persistent mode"
+        )
+    # Take the slot now, so a full stream is a 503 rather than a 200
+    # whose body fails
+    try:
+        viewer = stream_service.subscribe()
+    except StreamBusy:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many stream viewers"
+        )
+    
+    return StreamingResponse(
+        stream_service.frames(viewer),
+        media_type=f"multipart/x-mixed-replace; boundary={BOUNDARY}",
+        headers={"Cache-Control": "no-store"},
+        # Frees the slot if the body never started (frames() does otherwise)
+        background=BackgroundTask(stream_service.unsubscribe, viewer),
+    )
+
+
 @router.get("/latest", response_model=PhotoResponse)
 async def get_latest_photo() -> PhotoResponse:
     """
@@ -62,24 +256,112 @@ async def get_latest_photo() -> PhotoResponse:
 
 
 @router.get("/latest/file")
-async def get_latest_photo_file():
+async def get_latest_photo_file(size: PhotoSize = "original"):
     """
     Get the actual image file of the most recent photo.
     
+    Args:
+        size: original, or a cached derivative (thumb, medium, pixel)
+    
     Returns:
-        JPEG image file
+        Image file
     """
     camera_service = get_camera_service()
-    response = camera_service.get_latest()
     
-    if not response.success or not response.filepath:
+    # The latest photo changes with every capture
+    frame = camera_service.latest_frame()
+    if frame is not None:
+        # Just captured: served from memory, no disk read
+        return await _memory_file(frame, size, cache_control="no-cache")
+    
+    photo = camera_service.get_latest_photo()
+    if photo is None:
         raise HTTPException(
             status_code=404,
-            detail=response.error or "No photos found"
+            detail="No photos found"
         )
     
-    return FileResponse(
-        response.filepath,
-        media_type="image/jpeg",
-        filename=response.filename
+    return await _photo_file(photo, size, cache_control="no-cache")
+
+
+@router.get("/photos", response_model=PhotoListResponse)
+async def list_photos(
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    before: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+) -> PhotoListResponse:
+    """
+    List photos by time, oldest first.
+    
+    Args:
+        since: Only photos taken after this time
+        until: Only photos taken at or before this time
+        before: Only photos taken before this time
+        cursor: The previous page's next_cursor: the photos after it
+            when listing with since, otherwise the next older ones
+        limit: Page size; without since, the newest photos are returned
+        
+    Returns:
+        A page of photo metadata
+    """
+    camera_service = get_camera_service()
+    try:
+        photos, has_more = camera_service.list_photos(
+            since=since, until=until, limit=limit, before=before, cursor=cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if cursor:
+        forward = decode_cursor(cursor)[0] == AFTER
+    else:
+        forward = since is not None
+    next_cursor = None
+    if photos and has_more:
+        next_cursor = (encode_cursor(AFTER, photos[-1]) if forward
+                       else encode_cursor(BEFORE, photos[0]))
+    
+    return PhotoListResponse(
+        photos=[
+            PhotoInfo(
+                id=photo.id,
+                filename=photo.filename,
+                timestamp=photo.timestamp,
+                size_bytes=photo.size,
+            )
+            for photo in photos
+        ],
+        count=len(photos),
+        has_more=has_more,
+        next_cursor=next_cursor,
     )
+
+
+@router.get("/photos/{photo_id:path}")
+async def get_photo_file(photo_id: str, size: PhotoSize = "original"):
+    """
+    Get a photo by id at the requested size.
+    
+    Args:
+        photo_id: Photo id from /camera/photos
+        size: original (full JPEG), thumb (320px), medium (1280px) or
+            pixel (160px palette PNG for the dashboard tile)
+        
+    Returns:
+        Image file
+    """
+    camera_service = get_camera_service()
+    photo = camera_service.get_photo(photo_id)
+    
+    if photo is None:
+        # A capture still in memory (not written yet, or not kept on disk)
+        frame = camera_service.get_memory_photo(photo_id)
+        if frame is not None:
+            return await _memory_file(frame, size)
+        raise HTTPException(
+            status_code=404,
+            detail="Photo not found"
+        )
+    
+    return await _photo_file(photo, size)
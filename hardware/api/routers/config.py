@@ -1,16 +1,24 @@
 """
 Config router - endpoints for greenhouse configuration
 Allows frontend dashboard to read/update thresholds
+
+Reads come from the shared config store (config_store.py) without file
+I/O; writes go through it, so the lid service sees them at once, and
+the config events socket pushes them to main_control.py.
+
+Every saved config has a version, sent as the ETag. Writes may send it
+back in If-Match; if the config has changed since, the write is
+rejected with 412 instead of overwriting someone else's change. Saving
+fsyncs the file, so writes run in the threadpool, off the event loop.
 """
-import json
-from pathlib import Path
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Header, HTTPException, Response
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
-from typing import Optional
-
-router = APIRouter(prefix="/config", tags=["config"])
+from typing import Callable, Literal, Optional
+from api.middleware import TimedRoute
+from config_store import VersionConflict, get_config_store
 
-CONFIG_FILE = Path(__file__).parent.parent.parent / "config.json"
+router = APIRouter(prefix="/config", tags=["config"], route_class=TimedRoute)
 
 
 class ThresholdRange(BaseModel):
@@ -29,6 +37,10 @@ class Thresholds(BaseModel):
 class ServoConfig(BaseModel):
     lid_open: int = 90
     lid_closed: int = 0
+    # Firmware move speed (degrees/second)
+    speed: int = 60
+    # Motion profile: ease or linear; trapezoid and scurve need SERVO_DRIVER=gpio
+    profile: Literal["linear", "ease", "trapezoid", "scurve"] = "ease"
 
 
 class GreenhouseConfig(BaseModel):
@@ -36,91 +48,132 @@ class GreenhouseConfig(BaseModel):
     servo: ServoConfig
     poll_interval: int = 30
     actions_enabled: bool = True
+    # Set by the server on every save (ignored in PUT bodies)
+    version: int = 0
 
 
-def load_config() -> dict:
-    """Load config from JSON file."""
+def _etag(version: int) -> str:
+    return f'"{version}"'
+
+
+def _expected_version(if_match: Optional[str]) -> Optional[int]:
+    """The version an If-Match header asks for (None for none or *)."""
+    if if_match is None or if_match.strip() == "*":
+        return None
+    tag = if_match.split(",")[0].strip()
+    if tag.startswith("W/"):
+        tag = tag[2:]
     try:
-        with open(CONFIG_FILE, 'r') as f:
-            return json.load(f)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to load config: {e}")
+        return int(tag.strip('"'))
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid If-Match: {if_match}")
 
 
-def save_config(config: dict) -> None:
-    """Save config to JSON file."""
+def save_config(change: Callable[[dict], None], if_match: Optional[str], response: Response) -> dict:
+    """Apply change to the current config and save it, honouring If-Match (blocking)."""
     try:
-        with open(CONFIG_FILE, 'w') as f:
-            json.dump(config, f, indent=2)
-    except Exception as e:
+        version, config = get_config_store().update(change, _expected_version(if_match))
+    except VersionConflict as e:
+        raise HTTPException(status_code=412, detail=str(e), headers={"ETag": _etag(e.current)})
+    except OSError as e:
         raise HTTPException(status_code=500, detail=f"Failed to save config: {e}")
+    response.headers["ETag"] = _etag(version)
+    return config
 
 
 @router.get("", response_model=GreenhouseConfig)
-async def get_config() -> dict:
+async def get_config(response: Response) -> dict:
     """
     Get current greenhouse configuration.
     
+    The ETag header is the config's version, for If-Match on writes.
+    
     Returns:
         Current thresholds, servo positions, and settings
     """
-    return load_config()
+    version, config = get_config_store().snapshot()
+    response.headers["ETag"] = _etag(version)
+    return config
 
 
 @router.put("")
-async def update_config(config: GreenhouseConfig) -> dict:
+async def update_config(
+    config: GreenhouseConfig,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+) -> dict:
     """
     Update greenhouse configuration.
     
-    Changes take effect on the next main_control.py poll cycle.
+    The API uses the new values at once, and pushes them to
+    main_control.py on the config events socket.
     
     Args:
         config: New configuration values
+        if_match: Version (ETag) the change is based on; 412 if stale
         
     Returns:
         Updated configuration
     """
-    config_dict = config.model_dump()
-    save_config(config_dict)
-    return {"status": "ok", "config": config_dict}
+    new_config = config.model_dump(exclude={"version"})
+    
+    def replace(current: dict) -> None:
+        current.clear()
+        current.update(new_config)
+    
+    saved = await run_in_threadpool(save_config, replace, if_match, response)
+    return {"status": "ok", "config": saved}
 
 
 @router.patch("/thresholds")
-async def update_thresholds(thresholds: Thresholds) -> dict:
+async def update_thresholds(
+    thresholds: Thresholds,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+) -> dict:
     """
     Partially update just the thresholds.
     
+    The merge is applied to the config as it is when saved, so
+    concurrent patches to different fields are all kept.
+    
     Args:
         thresholds: Threshold values to update (only specified fields are updated)
+        if_match: Version (ETag) the change is based on; 412 if stale
         
     Returns:
         Updated configuration
     """
-    config = load_config()
-    
-    # Merge new thresholds with existing
     new_thresholds = thresholds.model_dump(exclude_none=True)
-    for sensor, values in new_thresholds.items():
-        if sensor not in config["thresholds"]:
-            config["thresholds"][sensor] = {}
-        config["thresholds"][sensor].update(values)
     
-    save_config(config)
-    return {"status": "ok", "thresholds": config["thresholds"]}
+    def merge(config: dict) -> None:
+        current = config.setdefault("thresholds", {})
+        for sensor, values in new_thresholds.items():
+            # A PUT stores thresholds it was not given as null
+            current[sensor] = {**(current.get(sensor) or {}), **values}
+    
+    saved = await run_in_threadpool(save_config, merge, if_match, response)
+    return {"status": "ok", "version": saved["version"], "thresholds": saved["thresholds"]}
 
 
 @router.post("/actions/toggle")
-async def toggle_actions(enabled: bool) -> dict:
+async def toggle_actions(
+    enabled: bool,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+) -> dict:
     """
     Enable or disable automatic actions (lid control).
     
     Args:
         enabled: True to enable automatic actions, False to disable
+        if_match: Version (ETag) the change is based on; 412 if stale
         
     Returns:
         Updated status
     """
-    config = load_config()
-    config["actions_enabled"] = enabled
-    save_config(config)
-    return {"status": "ok", "actions_enabled": enabled}
+    def set_enabled(config: dict) -> None:
+        config["actions_enabled"] = enabled
+    
+    saved = await run_in_threadpool(save_config, set_enabled, if_match, response)
+    return {"status": "ok", "version": saved["version"], "actions_enabled": enabled}
@@ -0,0 +1,51 @@
+"""
+Debug router - on-demand profiling of the running API
+"""
+from datetime import datetime
+from typing import Literal
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import Response
+from starlette.concurrency import run_in_threadpool
+
+from telemetry.profiler import MAX_HZ, MAX_SECONDS, ProfilerBusy, render_profile
+
+router = APIRouter(prefix="/debug", tags=["debug"])
+
+
+@router.get("/profile")
+async def get_profile(
+    seconds: float = Query(10, gt=0, le=MAX_SECONDS),
+    hz: int = Query(100, ge=1, le=MAX_HZ),
+    format: Literal["collapsed", "speedscope"] = "collapsed",
+) -> Response:
+    """
+    Sample every thread in the API process for `seconds`.
+    
+    Args:
+        seconds: Profiling duration
+        hz: Samples per second
+        format: "collapsed" (flamegraph.pl / speedscope) or "speedscope" JSON
+        
+    Returns:
+        Profile file as an attachment
+    """
+    try:
+        # Sample from a worker thread so the event loop itself gets profiled
+        body = await run_in_threadpool(render_profile, seconds, hz, format)
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    if format == "speedscope":
+        filename = f"profile_{timestamp}.speedscope.json"
+        media_type = "application/json"
+    else:
+        filename = f"profile_{timestamp}.collapsed.txt"
+        media_type = "text/plain"
+    
+    return Response(
+        content=body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -4,24 +4,95 @@ Lid Control Router
 Endpoints for controlling the greenhouse lid via servos.
 """
 
-from fastapi import APIRouter, HTTPException
+from datetime import datetime
+from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel
-from typing import Literal
+from typing import List, Literal, Optional
+from api.middleware import TimedRoute
 
-router = APIRouter(prefix="/lid", tags=["lid"])
+router = APIRouter(prefix="/lid", tags=["lid"], route_class=TimedRoute)
 
 
 class LidCommand(BaseModel):
     """Lid control command."""
     action: Literal["open", "close", "toggle"]
+    # Shown in the actuation log (e.g. "main_control: temperature too high")
+    reason: Optional[str] = None
+
+
+class LidMotionStatus(BaseModel):
+    """A lid move and its progress."""
+    id: str
+    target: int
+    from_angle: Optional[int] = None
+    status: Literal["queued", "running", "done", "cancelled", "failed"]
+    progress: float = 0.0
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = None
 
 
 class LidStatus(BaseModel):
-    """Current lid status."""
+    """Current lid status (is_open is the commanded state, angle the live one)."""
     is_open: bool
     angle: int
     message: str
+    # Whether the Arduino has confirmed the angle since the API started
+    confirmed: bool = False
     connected: bool = False
+    moving: bool = False
+    motion: Optional[LidMotionStatus] = None
+
+
+class LidTiming(BaseModel):
+    """Time a move spent on one kind of work (connect, serial, serial_wait, move)."""
+    name: str
+    seconds: float
+    count: int
+    description: Optional[str] = None
+
+
+class LidLogEntry(BaseModel):
+    """One finished move in the actuation log."""
+    id: str
+    reason: Optional[str] = None
+    direction: Literal["open", "close"]
+    from_angle: Optional[int] = None
+    target: int
+    angle: int
+    status: Literal["done", "cancelled", "failed"]
+    error: Optional[str] = None
+    driver: str
+    # move (one firmware MOVE or GPIO profile), steps, or offline
+    mode: Optional[str] = None
+    settings: dict = {}
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: datetime
+    # Waiting behind another move before this one started
+    queued_seconds: float
+    # Command to final position
+    total_seconds: float
+    timings: List[LidTiming] = []
+
+
+class LidLog(BaseModel):
+    """Recent lid moves, newest first."""
+    count: int
+    entries: List[LidLogEntry]
+
+
+def _lid_status(status: dict, message: str) -> LidStatus:
+    return LidStatus(
+        is_open=status["is_open"],
+        angle=status["angle"],
+        confirmed=status["confirmed"],
+        connected=status["connected"],
+        moving=status["moving"],
+        motion=status["motion"],
+        message=message,
+    )
 
 
 @router.get("/status", response_model=LidStatus)
@@ -32,54 +103,68 @@ async def get_lid_status():
     service = get_lid_service()
     status = service.get_status()
     
-    return LidStatus(
-        is_open=status["is_open"],
-        angle=status["angle"],
-        connected=status["connected"],
-        message="open" if status["is_open"] else "closed"
-    )
+    state = "open" if status["is_open"] else "closed"
+    if status["moving"]:
+        state = "opening" if status["is_open"] else "closing"
+    return _lid_status(status, state)
 
 
-@router.post("/control", response_model=LidStatus)
+@router.post("/control", response_model=LidStatus, status_code=202)
 async def control_lid(command: LidCommand):
     """
     Control the greenhouse lid.
     
+    The move runs in the background; this returns at once with the
+    motion, whose progress is reported by /lid/status. A new command
+    pre-empts a move in progress.
+    
     Actions:
     - open: Open the lid
     - close: Close the lid
-    - toggle: Toggle current state
+    - toggle: Toggle current state (reverses a move in progress)
     """
     from api.services.lid_service import get_lid_service
     
     service = get_lid_service()
     
-    # Execute action
-    if command.action == "open":
-        success = service.open_lid()
-        action_msg = "opened"
-    elif command.action == "close":
-        success = service.close_lid()
-        action_msg = "closed"
-    else:  # toggle
-        success = service.toggle_lid()
-        status = service.get_status()
-        action_msg = "opened" if status["is_open"] else "closed"
-    
-    if not success:
+    # Start the move
+    try:
+        if command.action == "open":
+            motion = service.open_lid(command.reason)
+        elif command.action == "close":
+            motion = service.close_lid(command.reason)
+        else:  # toggle
+            motion = service.toggle_lid(command.reason)
+    except RuntimeError as e:
         raise HTTPException(
             status_code=503,
-            detail="Failed to control lid. Arduino may not be connected."
+            detail=f"Failed to control lid: {e}"
         )
     
     status = service.get_status()
+    state = "open" if status["is_open"] else "closed"
+    if motion is None:
+        message = f"Lid already {state}"
+    else:
+        message = f"Lid {'opening' if status['is_open'] else 'closing'} ({motion.id})"
     
-    return LidStatus(
-        is_open=status["is_open"],
-        angle=status["angle"],
-        connected=status["connected"],
-        message=f"Lid {action_msg} successfully"
-    )
+    return _lid_status(status, message)
+
+
+@router.get("/log", response_model=LidLog)
+async def get_lid_log(limit: int = Query(50, ge=1, le=1000)):
+    """
+    Recent lid moves with their measured timings.
+    
+    Each entry has the end-to-end duration (command to final
+    position), the time queued behind another move, and the time
+    spent connecting, on serial round-trips, waiting for the port and
+    in the move itself.
+    """
+    from api.services.lid_service import get_lid_service
+    
+    entries = get_lid_service().get_log(limit)
+    return LidLog(count=len(entries), entries=entries)
 
 
 # Export router
@@ -0,0 +1,20 @@
+"""
+Metrics router - Prometheus scrape endpoint
+"""
+from fastapi import APIRouter
+from fastapi.responses import Response
+
+from telemetry import CONTENT_TYPE, REGISTRY
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+async def get_metrics() -> Response:
+    """
+    Prometheus metrics.
+    
+    Sensor, cache, serial, camera, lid and request latency metrics
+    in the Prometheus text exposition format.
+    """
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE)
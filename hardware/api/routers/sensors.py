@@ -1,8 +1,10 @@
 """
 Sensors router - endpoints for reading sensor data
 """
+from datetime import datetime
 from typing import Optional
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 
 from api.models import (
     SensorResponse,
@@ -10,10 +12,12 @@ from api.models import (
     HumidityReading,
     LightReading,
     SoilMoistureReading,
+    CanopyResponse,
 )
-from api.services import get_sensor_service
+from api.services import get_sensor_service, get_canopy_service
+from api.middleware import TimedRoute
 
-router = APIRouter(prefix="/sensors", tags=["sensors"])
+router = APIRouter(prefix="/sensors", tags=["sensors"], route_class=TimedRoute)
 
 
 @router.get("", response_model=SensorResponse)
@@ -92,3 +96,39 @@ async def get_soil_moisture() -> Optional[SoilMoistureReading]:
         )
     
     return soil
+
+
+@router.get("/canopy", response_model=CanopyResponse)
+async def get_canopy(
+    refresh: bool = False,
+    since: Optional[datetime] = None,
+    limit: int = Query(288, ge=1, le=2016),
+) -> CanopyResponse:
+    """
+    Get canopy coverage, greenness and change from the camera.
+    
+    Args:
+        refresh: Analyse a new frame now instead of returning the last sample
+        since: Only samples after this time (UTC)
+        limit: Maximum number of samples in the series (newest)
+        
+    Returns:
+        Latest canopy sample and the series
+    """
+    canopy_service = get_canopy_service()
+    
+    if refresh:
+        try:
+            await run_in_threadpool(canopy_service.sample)
+        except Exception as e:
+            raise HTTPException(
+                status_code=503,
+                detail=f"Canopy analytics unavailable: {e}"
+            )
+    
+    series = canopy_service.series(since=since, limit=limit)
+    return CanopyResponse(
+        latest=canopy_service.latest(),
+        series=series,
+        count=len(series),
+    )
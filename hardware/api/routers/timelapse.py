@@ -0,0 +1,149 @@
+"""
+Timelapse router - schedules and retention for timelapse captures
+"""
+from datetime import datetime
+from typing import Literal, Optional
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+
+from api.models import RetentionPolicy, TimelapseSchedule, TimelapseStatus
+from api.services import get_timelapse_service
+from api.middleware import TimedRoute
+
+router = APIRouter(prefix="/timelapse", tags=["timelapse"], route_class=TimedRoute)
+
+# MJPEG needs JPEG frames, so the PNG pixel size is not offered
+VideoSize = Literal["original", "thumb", "medium"]
+
+
+@router.get("", response_model=TimelapseStatus)
+async def get_timelapse() -> TimelapseStatus:
+    """
+    Get timelapse schedules, retention policy and storage use.
+    
+    Returns:
+        Schedules with their next run times, and frames stored
+    """
+    service = get_timelapse_service()
+    count, size = service.storage()
+    photos = service.other_photos()
+    
+    return TimelapseStatus(
+        schedules=service.schedules,
+        retention=service.retention,
+        photo_retention=service.photo_retention,
+        next_runs=service.next_runs(),
+        photo_count=count,
+        size_bytes=size,
+        other_photo_count=len(photos),
+        other_size_bytes=sum(photo.size for photo in photos),
+    )
+
+
+@router.put("/schedules/{name}", response_model=TimelapseSchedule)
+async def put_schedule(name: str, schedule: TimelapseSchedule) -> TimelapseSchedule:
+    """
+    Create or replace a timelapse schedule.
+    
+    Args:
+        name: Schedule name (a-z, 0-9, _ and -)
+        schedule: Either interval_seconds or a 5-field cron expression
+        
+    Returns:
+        The saved schedule
+    """
+    try:
+        get_timelapse_service().set_schedule(name, schedule)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return schedule
+
+
+@router.delete("/schedules/{name}")
+async def delete_schedule(name: str) -> dict:
+    """
+    Delete a timelapse schedule (its frames are kept).
+    
+    Args:
+        name: Schedule name
+    """
+    if not get_timelapse_service().delete_schedule(name):
+        raise HTTPException(
+            status_code=404,
+            detail="Schedule not found"
+        )
+    return {"status": "ok"}
+
+
+@router.put("/retention")
+async def put_retention(retention: RetentionPolicy) -> dict:
+    """
+    Set the timelapse retention policy and apply it immediately.
+    
+    Args:
+        retention: max_count, max_age_days and/or max_megabytes
+        
+    Returns:
+        Number of frames removed
+    """
+    removed = get_timelapse_service().set_retention(retention)
+    return {"status": "ok", "removed": removed, "retention": retention}
+
+
+@router.put("/retention/photos")
+async def put_photo_retention(retention: RetentionPolicy) -> dict:
+    """
+    Set the retention policy for photos outside the timelapse and apply it.
+    
+    Covers dashboard and named captures, which the timelapse policy does
+    not touch.
+    
+    Args:
+        retention: max_count, max_age_days and/or max_megabytes
+        
+    Returns:
+        Number of photos removed
+    """
+    removed = get_timelapse_service().set_photo_retention(retention)
+    return {"status": "ok", "removed": removed, "retention": retention}
+
+
+@router.get("/video")
+async def get_video(
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    schedule: Optional[str] = None,
+    size: VideoSize = "medium",
+    fps: int = Query(24, ge=1, le=60),
+):
+    """
+    Download timelapse frames as an MJPEG AVI.
+    
+    The JPEGs are packed into the container without re-encoding and
+    streamed, so any range can be downloaded in constant memory.
+    
+    Args:
+        since: First frame time (inclusive)
+        until: Last frame time (inclusive)
+        schedule: Only frames from this schedule
+        size: Frame size (original, thumb or medium)
+        fps: Playback frame rate
+    """
+    service = get_timelapse_service()
+    try:
+        video = await run_in_threadpool(service.video, since, until, schedule, size, fps)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    name = "timelapse"
+    if schedule:
+        name += f"_{schedule}"
+    return StreamingResponse(
+        video.chunks(),
+        media_type="video/x-msvideo",
+        headers={
+            "Content-Length": str(video.content_length),
+            "Content-Disposition": f'attachment; filename="{name}.avi"',
+        },
+    )
@@ -2,6 +2,11 @@
 from .sensor_service import SensorService, get_sensor_service
 from .camera_service import CameraService, get_camera_service
 from .lid_service import LidService, get_lid_service
+from .stream_service import StreamService, get_stream_service
+from .capture_queue import CaptureQueue, get_capture_queue
+from .timelapse_service import TimelapseService, get_timelapse_service
+from .canopy_service import CanopyService, get_canopy_service
+from .config_events import ConfigEvents, get_config_events
 
 __all__ = [
     "SensorService",
@@ -10,4 +15,14 @@ __all__ = [
     "get_camera_service",
     "LidService",
     "get_lid_service",
+    "StreamService",
+    "get_stream_service",
+    "CaptureQueue",
+    "get_capture_queue",
+    "TimelapseService",
+    "get_timelapse_service",
+    "CanopyService",
+    "get_canopy_service",
+    "ConfigEvents",
+    "get_config_events",
 ]
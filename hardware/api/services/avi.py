@@ -0,0 +1,209 @@
+"""
+Streaming MJPEG AVI writer
+
+Packs existing JPEG files into an AVI container as-is: each JPEG becomes
+one '00dc' video chunk, so nothing is decoded or re-encoded. All chunk
+sizes are known from the files up front, which lets the RIFF header (and
+Content-Length) be written before any frame and the index after the
+last one, so the video is produced in fixed-size pieces and memory does
+not grow with the number of frames.
+
+Layout:
+
+    RIFF 'AVI '
+      LIST 'hdrl'
+        avih                      main header
+        LIST 'strl'
+          strh                    stream header ('vids' / 'MJPG')
+          strf                    BITMAPINFOHEADER
+      LIST 'movi'
+        00dc ...                  one chunk per JPEG
+      idx1                        offset of every frame chunk
+"""
+import os
+import struct
+from typing import Callable, Iterator, List, NamedTuple, Optional, Tuple
+
+# Bytes read from a frame file at a time
+CHUNK_SIZE = 64 * 1024
+
+# RIFF sizes are 32-bit; OpenDML (AVI 2.0) is not implemented
+MAX_FILE_SIZE = 0xFFFFFFFF
+
+_AVIF_HASINDEX = 0x10
+_AVIIF_KEYFRAME = 0x10
+
+_AVIH = struct.Struct("<14I")
+_STRH = struct.Struct("<4s4sIHHIIIIIIiI4h")
+_STRF = struct.Struct("<IiiHH4sIiiII")
+_INDEX_ENTRY = struct.Struct("<4sIII")
+
+# LIST 'hdrl' with avih, LIST 'strl', strh and strf
+_HDRL_SIZE = 12 + (8 + _AVIH.size) + 12 + (8 + _STRH.size) + (8 + _STRF.size)
+
+
+class Frame(NamedTuple):
+    path: str
+    size: int
+
+
+def _chunk(fourcc: bytes, size: int) -> bytes:
+    return struct.pack("<4sI", fourcc, size)
+
+
+def _padded(size: int) -> int:
+    """Chunks are word aligned."""
+    return size + (size & 1)
+
+
+class MjpegAvi:
+    """
+    An MJPEG AVI of JPEG files, generated on the fly.
+
+    Args:
+        frames: JPEG files in display order, with their sizes in bytes
+        width: Frame width in pixels
+        height: Frame height in pixels
+        fps: Playback frame rate
+        reopen: Called with a frame index when its file is missing or has
+            changed size since planning; returns a replacement path of the
+            same size (e.g. a re-rendered derivative) or None
+
+    Raises:
+        ValueError: No frames, or the video would exceed the 4 GB AVI limit
+    """
+
+    def __init__(self, frames: List[Frame], width: int, height: int, fps: int,
+                 reopen: Optional[Callable[[int], Optional[str]]] = None):
+        if not frames:
+            raise ValueError("No frames in range")
+        self.frames = frames
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.reopen = reopen
+
+        self._movi_size = 4 + sum(8 + _padded(frame.size) for frame in frames)
+        self._index_size = _INDEX_ENTRY.size * len(frames)
+        self.content_length = 12 + _HDRL_SIZE + 8 + self._movi_size + 8 + self._index_size
+        if self.content_length > MAX_FILE_SIZE:
+            raise ValueError(
+                f"Video would be {self.content_length / 2**30:.1f} GB, over the 4 GB AVI limit; "
+                "use a smaller frame size or a shorter range"
+            )
+
+    def _header(self) -> bytes:
+        largest = max(_padded(frame.size) for frame in self.frames)
+        count = len(self.frames)
+        avih = _AVIH.pack(
+            1_000_000 // self.fps,          # microseconds per frame
+            largest * self.fps,             # max bytes per second
+            0,                              # padding granularity
+            _AVIF_HASINDEX,
+            count,                          # total frames
+            0,                              # initial frames
+            1,                              # streams
+            largest,                        # suggested buffer size
+            self.width,
+            self.height,
+            0, 0, 0, 0,
+        )
+        strh = _STRH.pack(
+            b"vids", b"MJPG",
+            0,                              # flags
+            0, 0,                           # priority, language
+            0,                              # initial frames
+            1, self.fps,                    # scale, rate: fps = rate / scale
+            0,                              # start
+            count,                          # length in frames
+            largest,                        # suggested buffer size
+            -1,                             # default quality
+            0,                              # sample size (varies)
+            0, 0, self.width, self.height,  # frame rectangle
+        )
+        strf = _STRF.pack(
+            _STRF.size, self.width, self.height,
+            1, 24,                          # planes, bit count
+            b"MJPG",
+            self.width * self.height * 3,
+            0, 0, 0, 0,
+        )
+        strl = (_chunk(b"strh", _STRH.size) + strh + _chunk(b"strf", _STRF.size) + strf)
+        hdrl = _chunk(b"avih", _AVIH.size) + avih + _chunk(b"LIST", 4 + len(strl)) + b"strl" + strl
+        return (
+            _chunk(b"RIFF", self.content_length - 8) + b"AVI "
+            + _chunk(b"LIST", 4 + len(hdrl)) + b"hdrl" + hdrl
+            + _chunk(b"LIST", self._movi_size) + b"movi"
+        )
+
+    def _open(self, position: int):
+        """Open a frame's file if it still has its planned size."""
+        frame = self.frames[position]
+        f = _open_sized(frame.path, frame.size)
+        if f is None and self.reopen is not None:
+            path = self.reopen(position)
+            if path is not None:
+                f = _open_sized(path, frame.size)
+        return f
+
+    def chunks(self) -> Iterator[bytes]:
+        """The whole file, in pieces of at most CHUNK_SIZE bytes."""
+        yield self._header()
+
+        # (offset, size) of each frame's chunk within 'movi', for idx1
+        entries: List[Tuple[int, int]] = []
+        offset = 4
+        previous: Optional[Tuple[int, int]] = None
+        for position, frame in enumerate(self.frames):
+            f = self._open(position)
+            if f is None:
+                # The file vanished (e.g. retention) after the header was
+                # written: keep the layout with a JUNK chunk and show the
+                # previous frame again (a zero-length entry drops the frame)
+                print(f"AVI frame {frame.path} changed, repeating the previous frame")
+                yield _chunk(b"JUNK", frame.size)
+                yield from _zeros(_padded(frame.size))
+                entries.append(previous or (offset, 0))
+            else:
+                yield _chunk(b"00dc", frame.size)
+                remaining = frame.size
+                with f:
+                    while remaining > 0:
+                        data = f.read(min(remaining, CHUNK_SIZE))
+                        if not data:
+                            break
+                        remaining -= len(data)
+                        yield data
+                # Truncated while reading: pad so later offsets stay valid
+                yield from _zeros(remaining + (frame.size & 1))
+                previous = (offset, frame.size)
+                entries.append(previous)
+            offset += 8 + _padded(frame.size)
+
+        yield _chunk(b"idx1", self._index_size)
+        batch = []
+        for entry_offset, size in entries:
+            batch.append(_INDEX_ENTRY.pack(b"00dc", _AVIIF_KEYFRAME, entry_offset, size))
+            if len(batch) * _INDEX_ENTRY.size >= CHUNK_SIZE:
+                yield b"".join(batch)
+                batch = []
+        if batch:
+            yield b"".join(batch)
+
+
+def _open_sized(path: str, size: int):
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return None
+    if os.fstat(f.fileno()).st_size != size:
+        f.close()
+        return None
+    return f
+
+
+def _zeros(size: int) -> Iterator[bytes]:
+    block = bytes(min(size, CHUNK_SIZE))
+    while size > 0:
+        yield block[:size]
+        size -= len(block)
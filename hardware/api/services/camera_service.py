@@ -1,15 +1,77 @@
 """
 Camera service layer - wraps camera module for API use
+
+Captures without an explicit filename (the dashboard's) are encoded into
+memory and published as the latest photo straight away, so
+/camera/latest/file serves them without an SD card write and read-back.
+They are written to the photos directory in the background, at most once
+per persist interval (full resolution captures always): the interval
+thins dashboard refreshes the way a timelapse interval would, limiting
+SD card wear. A capture skipped by it is only kept until the next one.
 """
 import os
-import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Optional
-
-# Add parent sensors directory to path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'sensors'))
+from typing import Dict, List, Optional, Tuple
 
 from api.models import PhotoResponse
+from api.services.derivatives import SIZES, DerivativeCache, render_bytes
+from api.services.photo_index import Photo, PhotoIndex, decode_cursor, to_microseconds
+from telemetry import Counter, Histogram
+
+# Where /camera serves a photo by id
+PHOTO_URL = "/camera/photos/{}"
+
+CAMERA_CAPTURE_SECONDS = Histogram(
+    "plante_camera_capture_seconds",
+    "Camera capture duration",
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.5, 5.0, 10.0),
+)
+# In-memory captures: written to the photos directory, skipped (kept in
+# memory only), or failed to write
+PHOTO_PERSIST = Counter(
+    "plante_photo_persist",
+    "In-memory captures by persistence result",
+    ["result"],
+)
+
+
+class MemoryPhoto:
+    """The latest in-memory capture, with derivatives rendered on demand."""
+
+    __slots__ = ("id", "filename", "filepath", "jpeg", "mtime_us", "persisted",
+                 "_derivatives", "_lock")
+
+    def __init__(self, filepath: str, jpeg: bytes, mtime_us: int):
+        self.filename = os.path.basename(filepath)
+        self.id = os.path.splitext(self.filename)[0]
+        self.filepath = filepath
+        self.jpeg = jpeg
+        self.mtime_us = mtime_us
+        self.persisted = False
+        self._derivatives: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def timestamp(self) -> datetime:
+        return datetime.fromtimestamp(self.mtime_us / 1e6)
+
+    def get(self, size: str = "original") -> Tuple[bytes, str]:
+        """
+        (content, media_type) at the requested size.
+
+        Raises:
+            KeyError: Unknown size
+        """
+        if size == "original":
+            return self.jpeg, "image/jpeg"
+        spec = SIZES[size]
+        with self._lock:
+            if size not in self._derivatives:
+                self._derivatives[size] = render_bytes(self.jpeg, spec)
+            return self._derivatives[size], spec.media_type
 
 
 class CameraService:
@@ -19,20 +81,54 @@ class CameraService:
     Wraps the existing camera.py script for API use.
     """
     
-    def __init__(self, save_dir: str = "~/Plante/hardware/photos"):
+    def __init__(
+        self,
+        save_dir: str = "~/Plante/hardware/photos",
+        persistent: bool = True,
+        idle_timeout: float = 300,
+        cache_dir: str = "~/Plante/hardware/cache/photos",
+        cache_bytes: int = 200 * 1024 * 1024,
+        persist_interval: float = 0,
+    ):
+        """
+        Args:
+            save_dir: Directory for captured photos
+            persistent: Keep the camera pipeline warm between captures
+            idle_timeout: Seconds of inactivity before the warm camera powers down
+            cache_dir: Directory for thumbnails and other photo derivatives
+            cache_bytes: Byte budget for the derivative cache
+            persist_interval: Minimum seconds between in-memory captures
+                written to disk (0 writes every capture)
+        """
         self.save_dir = os.path.expanduser(save_dir)
         os.makedirs(self.save_dir, exist_ok=True)
+        self.persistent = persistent
+        self.idle_timeout = idle_timeout
         
         self._camera = None
         self._available = False
         
+        # Built once here, then kept current by capture() and inotify
+        self.index = PhotoIndex(self.save_dir)
+        self.index.start_watching()
+        self.derivatives = DerivativeCache(cache_dir, max_bytes=cache_bytes)
+        
+        self.persist_interval = persist_interval
+        self._latest_frame: Optional[MemoryPhoto] = None
+        self._last_persisted: Optional[float] = None
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="photo-writer")
+        
         self._initialize_camera()
     
     def _initialize_camera(self) -> None:
         """Initialize camera if available."""
         try:
-            from camera import PlantCamera
-            self._camera = PlantCamera(save_dir=self.save_dir)
+            from sensors.camera import PlantCamera
+            self._camera = PlantCamera(
+                save_dir=self.save_dir,
+                persistent=self.persistent,
+                idle_timeout=self.idle_timeout,
+            )
             self._available = True
         except Exception as e:
             print(f"Camera not available: {e}")
@@ -42,12 +138,13 @@ class CameraService:
         """Check if camera is available."""
         return self._available
     
-    def capture(self, filename: Optional[str] = None) -> PhotoResponse:
+    def capture(self, filename: Optional[str] = None, full_resolution: bool = False) -> PhotoResponse:
         """
         Capture a photo.
         
         Args:
             filename: Optional filename, uses timestamp if not provided
+            full_resolution: Capture at full sensor resolution (mode switch)
             
         Returns:
             PhotoResponse with result
@@ -58,10 +155,21 @@ class CameraService:
                 error="Camera not available"
             )
         
+        if filename is None:
+            return self._capture_to_memory(full_resolution)
+        
         try:
-            filepath = self._camera.capture(filename=filename)
+            start = time.perf_counter()
+            filepath = self._camera.capture(filename=filename, full_resolution=full_resolution)
+            CAMERA_CAPTURE_SECONDS.observe(time.perf_counter() - start)
+            photo = self.index.add(filepath)
+            if photo is not None:
+                self.derivatives.prefetch(photo)
+            photo_id = self.index.photo_id(filepath)
             return PhotoResponse(
                 success=True,
+                id=photo_id,
+                url=PHOTO_URL.format(photo_id),
                 filepath=filepath,
                 filename=os.path.basename(filepath),
                 timestamp=datetime.utcnow()
@@ -72,6 +180,103 @@ class CameraService:
                 error=str(e)
             )
     
+    def _capture_to_memory(self, full_resolution: bool) -> PhotoResponse:
+        """Capture into memory, publish as latest, and persist if due."""
+        try:
+            start = time.perf_counter()
+            jpeg = self._camera.capture_jpeg(full_resolution=full_resolution)
+            CAMERA_CAPTURE_SECONDS.observe(time.perf_counter() - start)
+        except Exception as e:
+            return PhotoResponse(
+                success=False,
+                error=str(e)
+            )
+        
+        now = datetime.now()
+        # Milliseconds too: ids must differ for captures within one second,
+        # or the second overwrites the first and is cached under its id
+        filepath = os.path.join(
+            self.save_dir, f"plant_{now.strftime('%Y%m%d_%H%M%S')}_{now.microsecond // 1000:03d}.jpg")
+        frame = MemoryPhoto(filepath, jpeg, to_microseconds(now))
+        self._latest_frame = frame
+        
+        persist = full_resolution or self._persist_due()
+        if persist:
+            self._last_persisted = time.monotonic()
+            self._writer.submit(self._persist, frame)
+        else:
+            PHOTO_PERSIST.labels(result="skipped").inc()
+        
+        return PhotoResponse(
+            success=True,
+            id=frame.id,
+            url=PHOTO_URL.format(frame.id),
+            filepath=filepath if persist else None,
+            filename=frame.filename,
+            timestamp=datetime.utcnow()
+        )
+    
+    def _persist_due(self) -> bool:
+        if self.persist_interval <= 0 or self._last_persisted is None:
+            return True
+        return time.monotonic() - self._last_persisted >= self.persist_interval
+    
+    def _persist(self, frame: MemoryPhoto) -> None:
+        """Write an in-memory capture to the photos directory (writer thread)."""
+        # Hidden and without the .jpg extension, so the index ignores it
+        tmp = os.path.join(self.save_dir, f".{frame.filename}.tmp")
+        try:
+            with open(tmp, 'wb') as f:
+                f.write(frame.jpeg)
+            os.replace(tmp, frame.filepath)
+        except Exception as e:
+            PHOTO_PERSIST.labels(result="failed").inc()
+            print(f"Could not save {frame.filename}: {e}")
+            return
+        frame.persisted = True
+        PHOTO_PERSIST.labels(result="written").inc()
+        print(f"Photo saved: {frame.filepath}")
+        
+        photo = self.index.add(frame.filepath)
+        if photo is not None:
+            self.derivatives.prefetch(photo)
+    
+    def latest_frame(self) -> Optional[MemoryPhoto]:
+        """The in-memory capture, if it is still the most recent photo."""
+        frame = self._latest_frame
+        if frame is None:
+            return None
+        latest = self.index.latest()
+        if latest is not None and latest.id != frame.id and latest.mtime_us > frame.mtime_us:
+            # A photo with a filename (e.g. timelapse) was taken since
+            return None
+        return frame
+    
+    def get_memory_photo(self, photo_id: str) -> Optional[MemoryPhoto]:
+        """The in-memory capture, if it has this id."""
+        frame = self._latest_frame
+        return frame if frame is not None and frame.id == photo_id else None
+    
+    @property
+    def supports_preview(self) -> bool:
+        """Live view needs the warm pipeline's low resolution stream."""
+        return self._available and self.persistent
+    
+    def hold_preview(self) -> None:
+        """Start the pipeline and keep it running for live view."""
+        self._camera.hold()
+    
+    def release_preview(self) -> None:
+        self._camera.release()
+    
+    def capture_preview(self):
+        """Next low resolution YUV420 frame from the warm pipeline."""
+        return self._camera.capture_preview()
+    
+    def sample_preview(self):
+        """One low resolution frame for periodic analysis, leaving idle power-down alone."""
+        return self._camera.sample_preview()
+    
     def get_latest(self) -> PhotoResponse:
         """
         Get the most recent photo.
@@ -79,48 +284,111 @@ class CameraService:
         Returns:
             PhotoResponse with latest photo info
         """
-        if not os.path.exists(self.save_dir):
+        frame = self.latest_frame()
+        if frame is not None:
+            return PhotoResponse(
+                success=True,
+                id=frame.id,
+                url=PHOTO_URL.format(frame.id),
+                filepath=frame.filepath if frame.persisted else None,
+                filename=frame.filename,
+                timestamp=frame.timestamp
+            )
+        
+        latest = self.index.latest()
+        if latest is None:
             return PhotoResponse(
                 success=False,
-                error="No photos directory"
+                error="No photos found"
             )
         
-        try:
-            # Find most recent jpg file
-            photos = [
-                f for f in os.listdir(self.save_dir)
-                if f.endswith('.jpg')
-            ]
+        return PhotoResponse(
+            success=True,
+            id=latest.id,
+            url=PHOTO_URL.format(latest.id),
+            filepath=latest.filepath,
+            filename=latest.filename,
+            timestamp=latest.timestamp
+        )
+    
+    def list_photos(
+        self,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        limit: int = 50,
+        before: Optional[datetime] = None,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[Photo], bool]:
+        """
+        List indexed photos, oldest first.
+        
+        Args:
+            since: Only photos modified after this time (exclusive)
+            until: Only photos modified at or before this time
+            limit: Maximum number of photos; without `since` the newest
+                `limit` photos are returned
+            before: Only photos modified before this time (exclusive)
+            cursor: A previous page's cursor, to continue that listing
             
-            if not photos:
-                return PhotoResponse(
-                    success=False,
-                    error="No photos found"
-                )
+        Returns:
+            (photos, has_more)
             
-            # Sort by modification time
-            photos.sort(
-                key=lambda f: os.path.getmtime(os.path.join(self.save_dir, f)),
-                reverse=True
-            )
+        Raises:
+            ValueError: Invalid cursor
+        """
+        return self.index.between(
+            since=to_microseconds(since) if since else None,
+            until=to_microseconds(until) if until else None,
+            limit=limit,
+            before=to_microseconds(before) if before else None,
+            cursor=decode_cursor(cursor) if cursor else None,
+        )
+    
+    def get_latest_photo(self) -> Optional[Photo]:
+        """Most recent indexed photo, or None."""
+        return self.index.latest()
+    
+    def get_photo(self, photo_id: str) -> Optional[Photo]:
+        """Look up an indexed photo by id (relative path without extension)."""
+        return self.index.get(photo_id)
+    
+    def get_photo_file(self, photo: Photo, size: str = "original") -> Tuple[str, str]:
+        """
+        File to serve for a photo at the requested size.
+        
+        Args:
+            photo: Indexed photo
+            size: "original" or one of the derivative sizes
             
-            latest = photos[0]
-            filepath = os.path.join(self.save_dir, latest)
+        Returns:
+            (filepath, media_type)
             
-            return PhotoResponse(
-                success=True,
-                filepath=filepath,
-                filename=latest,
-                timestamp=datetime.fromtimestamp(os.path.getmtime(filepath))
-            )
-        except Exception as e:
-            return PhotoResponse(
-                success=False,
-                error=str(e)
-            )
+        Raises:
+            KeyError: Unknown size
+        """
+        if size == "original":
+            return photo.filepath, "image/jpeg"
+        return self.derivatives.get(photo, size), SIZES[size].media_type
+    
+    def read_derivative(self, photo: Photo, size: str) -> Tuple[bytes, str]:
+        """
+        A derivative's contents, safe from concurrent cache eviction
+        (unlike a get_photo_file() path).
+        
+        Returns:
+            (content, media_type)
+        
+        Raises:
+            KeyError: Unknown size
+        """
+        return self.derivatives.read(photo, size), SIZES[size].media_type
     
     def cleanup(self) -> None:
         """Clean up camera resources."""
+        # Finish pending photo writes before the index stops
+        self._writer.shutdown(wait=True)
+        self.index.stop_watching()
+        self.derivatives.close()
         if self._camera:
             try:
                 self._camera.close()
@@ -136,5 +404,11 @@ def get_camera_service() -> CameraService:
     """Get or create the global camera service instance."""
     global _camera_service
     if _camera_service is None:
-        _camera_service = CameraService()
+        _camera_service = CameraService(
+            persistent=os.getenv("CAMERA_PERSISTENT", "true").lower() in ("1", "true", "yes"),
+            idle_timeout=float(os.getenv("CAMERA_IDLE_TIMEOUT", "300")),
+            cache_dir=os.getenv("PHOTO_CACHE_DIR", "~/Plante/hardware/cache/photos"),
+            cache_bytes=int(float(os.getenv("PHOTO_CACHE_MB", "200")) * 1024 * 1024),
+            persist_interval=float(os.getenv("CAPTURE_PERSIST_INTERVAL", "600")),
+        )
     return _camera_service
@@ -0,0 +1,235 @@
+"""
+Canopy analytics
+
+Turns camera frames into numbers about plant growth. A sampler thread
+grabs one frame from the pipeline's low resolution YUV420 stream (the
+same one live view uses), so nothing is JPEG-decoded, and computes
+with NumPy on the quarter-resolution chroma grid (320x180):
+
+    coverage    fraction of the frame that is canopy (green pixels)
+    greenness   mean normalised excess green, ExG = (2G - R - B) / (R + G + B)
+    change      fraction of pixels whose canopy/background class changed
+                since the previous sample
+    brightness  mean luma, so dark (night) samples can be filtered out
+
+ExG needs no RGB conversion: for BT.601 YUV, 2G - R - B reduces to
+-(2.460 U' + 2.830 V') and R + G + B to 3Y + 1.428 U' + 0.688 V', where
+U' and V' are the chroma planes minus 128. The whole analysis takes a
+few milliseconds per frame.
+
+Samples are kept as a bounded series, appended to a JSON-lines file so
+it survives restarts, and exported as gauges next to the sensor metrics.
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Deque, List, Optional
+
+import numpy as np
+
+from api.models import CanopyReading
+from api.services.camera_service import get_camera_service
+from telemetry import Gauge, Histogram
+
+# Canopy analytics of low resolution camera frames
+CANOPY_COVERAGE = Gauge(
+    "plante_canopy_coverage",
+    "Fraction of the camera frame covered by canopy",
+)
+CANOPY_GREENNESS = Gauge(
+    "plante_canopy_greenness",
+    "Mean normalised excess green index of the camera frame",
+)
+CANOPY_ANALYSIS_SECONDS = Histogram(
+    "plante_canopy_analysis_seconds",
+    "Time to analyse one frame",
+    buckets=(0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1),
+)
+
+# Normalised ExG above which a pixel counts as canopy
+GREEN_THRESHOLD = 0.1
+# Luma below which a pixel is too dark to classify (0-255)
+MIN_LUMA = 24
+
+# Samples kept in memory (one week at the default interval)
+HISTORY = 2016
+
+
+def analyze(frame: np.ndarray, previous_mask: Optional[np.ndarray] = None):
+    """
+    Canopy metrics of one planar YUV420 frame (height * 3/2 rows).
+
+    Returns:
+        (coverage, greenness, change, brightness, mask) where change is
+        None without a previous mask of the same shape
+    """
+    height = frame.shape[0] * 2 // 3
+    width = frame.shape[1]
+    # Average each 2x2 luma block down to the chroma grid
+    y = frame[:height].reshape(height // 2, 2, width // 2, 2).mean(axis=(1, 3), dtype=np.float32)
+    chroma = frame[height:].reshape(2, height // 2, width // 2).astype(np.float32)
+    u = chroma[0] - 128
+    v = chroma[1] - 128
+
+    excess = -(2.460 * u + 2.830 * v)
+    total = 3 * y + 1.428 * u + 0.688 * v
+    lit = y >= MIN_LUMA
+    exg = np.divide(excess, total, out=np.zeros_like(excess), where=lit & (total > 0))
+
+    mask = (exg > GREEN_THRESHOLD) & lit
+    change = None
+    if previous_mask is not None and previous_mask.shape == mask.shape:
+        change = float(np.count_nonzero(mask ^ previous_mask)) / mask.size
+    return (
+        float(np.count_nonzero(mask)) / mask.size,
+        float(exg.mean()),
+        change,
+        float(y.mean()) / 255,
+        mask,
+    )
+
+
+class CanopyService:
+    """
+    Periodic canopy sampler with a persisted series.
+
+    Args:
+        interval: Seconds between samples (0 disables the sampler)
+        history_file: JSON-lines file the series is appended to
+    """
+
+    def __init__(self, interval: float = 300, history_file: str = "~/Plante/hardware/canopy.jsonl"):
+        self.interval = interval
+        self.history_file = os.path.expanduser(history_file)
+        self.camera_service = get_camera_service()
+
+        self._lock = threading.Lock()
+        self._series: Deque[CanopyReading] = deque(maxlen=HISTORY)
+        self._mask: Optional[np.ndarray] = None
+        self._lines = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._load()
+
+    @property
+    def is_available(self) -> bool:
+        return self.camera_service.supports_preview
+
+    # ----- persistence --------------------------------------------------
+
+    def _load(self) -> None:
+        try:
+            with open(self.history_file, 'r') as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return
+        self._lines = len(lines)
+        for line in lines[-HISTORY:]:
+            try:
+                self._series.append(CanopyReading(**json.loads(line)))
+            except Exception:
+                # Torn last line after a power cut
+                continue
+
+    def _append(self, reading: CanopyReading) -> None:
+        os.makedirs(os.path.dirname(self.history_file), exist_ok=True)
+        if self._lines >= 2 * HISTORY:
+            # Compact to the in-memory window instead of growing forever
+            tmp = f"{self.history_file}.tmp"
+            with open(tmp, 'w') as f:
+                for point in self._series:
+                    f.write(point.model_dump_json() + "\n")
+            os.replace(tmp, self.history_file)
+            self._lines = len(self._series)
+        else:
+            with open(self.history_file, 'a') as f:
+                f.write(reading.model_dump_json() + "\n")
+            self._lines += 1
+
+    # ----- sampling -----------------------------------------------------
+
+    def sample(self) -> CanopyReading:
+        """
+        Grab one frame and analyse it.
+
+        Raises:
+            RuntimeError: The camera has no live view stream
+        """
+        if not self.is_available:
+            raise RuntimeError("Canopy analytics need the warm camera pipeline")
+
+        # Unlike hold/release this does not restart the idle timer, so a
+        # sampler running as often as CAMERA_IDLE_TIMEOUT cannot keep the
+        # camera warm by itself
+        frame = self.camera_service.sample_preview()
+
+        start = time.perf_counter()
+        with self._lock:
+            coverage, greenness, change, brightness, self._mask = analyze(frame, self._mask)
+        CANOPY_ANALYSIS_SECONDS.observe(time.perf_counter() - start)
+
+        reading = CanopyReading(
+            timestamp=datetime.utcnow(),
+            coverage=round(coverage, 4),
+            greenness=round(greenness, 4),
+            change=round(change, 4) if change is not None else None,
+            brightness=round(brightness, 3),
+        )
+        CANOPY_COVERAGE.set(reading.coverage)
+        CANOPY_GREENNESS.set(reading.greenness)
+        with self._lock:
+            self._series.append(reading)
+            self._append(reading)
+        return reading
+
+    def series(self, since: Optional[datetime] = None, limit: int = HISTORY) -> List[CanopyReading]:
+        """Stored samples after `since` (UTC), oldest first, at most the newest `limit`."""
+        with self._lock:
+            points = list(self._series)
+        if since is not None:
+            if since.tzinfo is not None:
+                since = since.astimezone(timezone.utc).replace(tzinfo=None)
+            points = [point for point in points if point.timestamp > since]
+        return points[-limit:]
+
+    def latest(self) -> Optional[CanopyReading]:
+        with self._lock:
+            return self._series[-1] if self._series else None
+
+    def start(self) -> None:
+        if self._thread is not None or self.interval <= 0 or not self.is_available:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="canopy", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.sample()
+            except Exception as e:
+                print(f"Canopy sample failed: {e}")
+
+
+# Global singleton instance
+_canopy_service: Optional[CanopyService] = None
+
+
+def get_canopy_service() -> CanopyService:
+    """Get or create the global canopy analytics service."""
+    global _canopy_service
+    if _canopy_service is None:
+        _canopy_service = CanopyService(
+            interval=float(os.getenv("CANOPY_INTERVAL", "300")),
+            history_file=os.getenv("CANOPY_FILE", "~/Plante/hardware/canopy.jsonl"),
+        )
+    return _canopy_service
@@ -0,0 +1,228 @@
+"""
+Capture job queue
+
+All captures go through one worker thread that owns the camera, so two
+requests can never drive Picamera2 at once. Requests return a job id
+immediately and poll (or long-poll) for the result. Identical requests
+arriving within a short window of a job that is still queued are merged
+into it and share one exposure (never into the running job, whose frame
+may already have been exposed before they asked), and the queue refuses
+new jobs beyond a fixed depth instead of piling up minutes of captures.
+
+The worker records each job's queue wait and camera spans on the job
+(CaptureJob.timeline), since they happen outside any request; the
+router adds them to the waiting request's Server-Timing header.
+"""
+import itertools
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Deque, Optional
+
+from api.models import PhotoResponse
+from api.services.camera_service import get_camera_service
+from telemetry import Counter, Gauge
+from telemetry.timing import Timeline, current_timeline, end_timeline, start_timeline
+
+# Capture queue: jobs done / failed, requests merged into a job, or rejected
+CAPTURE_JOBS = Counter(
+    "plante_capture_jobs",
+    "Capture jobs and requests by result",
+    ["result"],
+)
+CAPTURE_QUEUE_DEPTH = Gauge(
+    "plante_capture_queue_depth",
+    "Capture jobs waiting for the camera",
+)
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+# Finished jobs kept for status lookups
+JOB_HISTORY = 100
+
+
+class QueueFull(RuntimeError):
+    """Raised when the capture queue is at its maximum depth."""
+
+
+class CaptureJob:
+    """One exposure, possibly shared by several merged requests."""
+
+    __slots__ = ("id", "filename", "full_resolution", "status", "requests", "created_at",
+                 "started_at", "finished_at", "photo", "error", "submitted", "done", "timeline")
+
+    def __init__(self, job_id: str, filename: Optional[str], full_resolution: bool):
+        self.id = job_id
+        self.filename = filename
+        self.full_resolution = full_resolution
+        self.status = QUEUED
+        self.requests = 1
+        self.created_at = datetime.utcnow()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.photo: Optional[PhotoResponse] = None
+        self.error: Optional[str] = None
+        # Monotonic submit time, for the merge window
+        self.submitted = time.monotonic()
+        self.done = threading.Event()
+        # Queue wait and camera spans, recorded by the worker
+        self.timeline: Optional[Timeline] = None
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the job finishes; returns False on timeout."""
+        return self.done.wait(timeout)
+
+
+class CaptureQueue:
+    """
+    Single-worker capture queue.
+
+    Args:
+        camera_service: CameraService that performs the captures
+        max_depth: Queued (not yet running) jobs before QueueFull
+        merge_window: Seconds within which identical requests share a job
+    """
+
+    def __init__(self, camera_service, max_depth: int = 8, merge_window: float = 2.0):
+        self.camera_service = camera_service
+        self.max_depth = max_depth
+        self.merge_window = merge_window
+
+        self._lock = threading.Lock()
+        self._work = threading.Condition(self._lock)
+        self._pending: Deque[CaptureJob] = deque()
+        self._running: Optional[CaptureJob] = None
+        self._jobs: "OrderedDict[str, CaptureJob]" = OrderedDict()
+        self._ids = itertools.count(1)
+        self._worker: Optional[threading.Thread] = None
+        self._closed = False
+
+    @property
+    def depth(self) -> int:
+        return len(self._pending)
+
+    def submit(self, filename: Optional[str] = None, full_resolution: bool = False) -> CaptureJob:
+        """
+        Queue a capture, or join an identical one submitted moments ago.
+
+        Requests with an explicit filename always get their own exposure.
+
+        Raises:
+            QueueFull: max_depth jobs are already waiting
+        """
+        with self._lock:
+            if filename is None:
+                job = self._mergeable(full_resolution)
+                if job is not None:
+                    job.requests += 1
+                    CAPTURE_JOBS.labels(result="merged").inc()
+                    return job
+
+            if len(self._pending) >= self.max_depth:
+                CAPTURE_JOBS.labels(result="rejected").inc()
+                raise QueueFull(f"Capture queue is full ({self.max_depth} jobs waiting)")
+
+            job = CaptureJob(f"cap-{int(time.time())}-{next(self._ids)}", filename, full_resolution)
+            self._pending.append(job)
+            self._remember(job)
+            CAPTURE_QUEUE_DEPTH.set(len(self._pending))
+            self._ensure_worker()
+            self._work.notify()
+            return job
+
+    def _mergeable(self, full_resolution: bool) -> Optional[CaptureJob]:
+        now = time.monotonic()
+        for job in self._pending:
+            if (job.filename is None and job.full_resolution == full_resolution
+                    and now - job.submitted <= self.merge_window):
+                return job
+        return None
+
+    def _remember(self, job: CaptureJob) -> None:
+        self._jobs[job.id] = job
+        while len(self._jobs) > JOB_HISTORY:
+            oldest = next(iter(self._jobs.values()))
+            if not oldest.done.is_set():
+                break
+            self._jobs.popitem(last=False)
+
+    def get(self, job_id: str) -> Optional[CaptureJob]:
+        return self._jobs.get(job_id)
+
+    # ----- worker -------------------------------------------------------
+
+    def _ensure_worker(self) -> None:
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._run, name="camera-worker", daemon=True)
+            self._worker.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                while not self._pending and not self._closed:
+                    self._work.wait()
+                if self._closed:
+                    return
+                job = self._pending.popleft()
+                self._running = job
+                job.status = RUNNING
+                job.started_at = datetime.utcnow()
+                CAPTURE_QUEUE_DEPTH.set(len(self._pending))
+
+            token = start_timeline()
+            timeline = current_timeline()
+            timeline.add("queue", time.monotonic() - job.submitted, "Capture queue wait")
+            try:
+                photo = self.camera_service.capture(
+                    filename=job.filename,
+                    full_resolution=job.full_resolution,
+                )
+            except Exception as e:
+                photo = PhotoResponse(success=False, error=str(e))
+            finally:
+                end_timeline(token)
+
+            with self._lock:
+                job.timeline = timeline
+                job.photo = photo
+                job.error = photo.error
+                job.status = DONE if photo.success else FAILED
+                job.finished_at = datetime.utcnow()
+                self._running = None
+            CAPTURE_JOBS.labels(result=job.status).inc()
+            job.done.set()
+
+    def close(self) -> None:
+        """Stop the worker; queued jobs are failed."""
+        with self._lock:
+            self._closed = True
+            pending, self._pending = list(self._pending), deque()
+            self._work.notify_all()
+        for job in pending:
+            job.photo = PhotoResponse(success=False, error="Shutting down")
+            job.error = job.photo.error
+            job.status = FAILED
+            job.finished_at = datetime.utcnow()
+            CAPTURE_JOBS.labels(result=FAILED).inc()
+            job.done.set()
+
+
+# Global singleton instance
+_capture_queue: Optional[CaptureQueue] = None
+
+
+def get_capture_queue() -> CaptureQueue:
+    """Get or create the global capture queue."""
+    global _capture_queue
+    if _capture_queue is None:
+        _capture_queue = CaptureQueue(
+            get_camera_service(),
+            max_depth=int(os.getenv("CAPTURE_QUEUE_DEPTH", "8")),
+            merge_window=float(os.getenv("CAPTURE_MERGE_WINDOW", "2")),
+        )
+    return _capture_queue
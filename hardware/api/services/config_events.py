@@ -0,0 +1,172 @@
+"""
+Config change events
+
+Pushes config changes to other processes on a local Unix socket
+(CONFIG_SOCKET), so main_control.py hears about a threshold change the
+moment it is saved instead of on its next look at config.json.
+
+Every change to the API's config store, whether from a /config write
+or from config.json being edited on disk, is sent to each connected
+client as one line of JSON. A client is sent the current config when
+it connects, then one line per change:
+
+    {"version": 7, "changed": ["thresholds"], "time": 1790000000.1, "config": {...}}
+
+"changed" lists the top-level settings that differ from the previous
+config (empty for the first line) and "time" is when the API saw the
+change. Clients only listen. Changes are queued and written by a
+sender thread, so the thread that made one (the event loop, for a
+/config write) never waits on a client; a client that does not keep up
+is disconnected (it reconnects and gets the current config).
+"""
+import json
+import os
+import queue
+import socket
+import threading
+import time
+from typing import List, Optional
+
+from config_store import changed_keys, config_socket_path, get_config_store
+from telemetry import Gauge
+
+CONFIG_SUBSCRIBERS = Gauge(
+    "plante_config_subscribers",
+    "Processes following config changes on the config events socket",
+)
+
+# Seconds a client may hold up a change before it is disconnected
+SEND_TIMEOUT = 1.0
+
+
+def _line(version: int, config: dict, changed: List[str], seen: float) -> bytes:
+    return (json.dumps({"version": version, "changed": changed,
+                        "time": seen, "config": config}) + "\n").encode()
+
+
+class ConfigEvents:
+    """
+    Serves config store changes on a Unix socket.
+
+    Args:
+        socket_path: Unix socket to serve (default: CONFIG_SOCKET)
+    """
+
+    def __init__(self, socket_path: Optional[str] = None):
+        self.socket_path = socket_path or config_socket_path()
+        self.store = get_config_store()
+        self._server: Optional[socket.socket] = None
+        # Only touched by the sender thread (and stop(), once it has exited)
+        self._clients: List[socket.socket] = []
+        # New clients and changes, in order, for the sender thread
+        self._outbox: queue.Queue = queue.Queue()
+        self._sender: Optional[threading.Thread] = None
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._clients)
+
+    def start(self) -> None:
+        """Serve the socket (no-op if already serving)."""
+        if self._server is not None:
+            return
+        try:
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            probe.connect(self.socket_path)
+        except OSError:
+            pass
+        else:
+            probe.close()
+            print(f"Config events: {self.socket_path} is served by another process")
+            return
+        try:
+            os.unlink(self.socket_path)  # stale, from a process that died
+        except FileNotFoundError:
+            pass
+        os.makedirs(os.path.dirname(self.socket_path), exist_ok=True)
+
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(self.socket_path)
+        os.chmod(self.socket_path, 0o660)
+        server.listen()
+        self._server = server
+        self._sender = threading.Thread(target=self._send_loop, name="config-events-send", daemon=True)
+        self._sender.start()
+        self.store.add_listener(self._publish)
+        threading.Thread(target=self._accept, args=(server,), name="config-events", daemon=True).start()
+        print(f"Config events: serving changes on {self.socket_path}")
+
+    def stop(self) -> None:
+        if self._server is None:
+            return
+        self.store.remove_listener(self._publish)
+        try:
+            self._server.shutdown(socket.SHUT_RDWR)  # wakes accept()
+        except OSError:
+            pass
+        self._server.close()
+        self._server = None
+        try:
+            os.unlink(self.socket_path)
+        except FileNotFoundError:
+            pass
+        self._outbox.put(None)
+        self._sender.join(timeout=2)
+        self._sender = None
+        for client in self._clients:
+            client.close()
+        self._clients.clear()
+        CONFIG_SUBSCRIBERS.set(0)
+
+    def _accept(self, server: socket.socket) -> None:
+        while True:
+            try:
+                client, _ = server.accept()
+            except OSError:
+                return
+            client.settimeout(SEND_TIMEOUT)
+            self._outbox.put((client, None))
+
+    def _publish(self, version: int, config: dict, previous: dict) -> None:
+        """Store listener: queue a change for every client."""
+        self._outbox.put((None, (version, config, previous, time.time())))
+
+    def _send_loop(self) -> None:
+        while True:
+            item = self._outbox.get()
+            if item is None:
+                return
+            client, change = item
+            if client is not None:
+                # Read here, in queue order: changes still queued are sent
+                # after it (one may repeat it; clients compare versions)
+                version, config = self.store.snapshot()
+                if self._send(client, _line(version, config, [], time.time())):
+                    self._clients.append(client)
+            else:
+                version, config, previous, seen = change
+                line = _line(version, config, changed_keys(previous, config), seen)
+                self._clients = [client for client in self._clients if self._send(client, line)]
+            CONFIG_SUBSCRIBERS.set(len(self._clients))
+
+    @staticmethod
+    def _send(client: socket.socket, line: bytes) -> bool:
+        try:
+            client.sendall(line)
+        except OSError:
+            # Gone, or not reading
+            client.close()
+            return False
+        return True
+
+
+# Global singleton instance
+_config_events: Optional[ConfigEvents] = None
+
+
+def get_config_events() -> ConfigEvents:
+    """Get or create the config events singleton."""
+    global _config_events
+    if _config_events is None:
+        _config_events = ConfigEvents()
+    return _config_events
@@ -0,0 +1,246 @@
+"""
+Photo derivative cache
+
+Downscaled versions of each photo for the dashboard, which only ever
+shows a small pixel-art tile but used to download the multi-megabyte
+original through the tunnel:
+
+    thumb   - 320px long edge JPEG
+    medium  - 1280px long edge JPEG
+    pixel   - 160px long edge, palette-reduced PNG (pixel-art look when
+              scaled up with image-rendering: pixelated)
+
+Derivatives are generated lazily on first request (and ahead of time for
+new captures), written to a cache directory and evicted least recently
+used first once the cache exceeds its byte budget. Cache keys include
+the photo's mtime, so a replaced photo never serves stale derivatives.
+
+A path from get() can be evicted by a concurrent request before it is
+read; read() opens the file under the cache lock instead, so eviction
+cannot remove it first (an open file outlives its unlink).
+"""
+import io
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, NamedTuple
+from urllib.parse import quote
+
+from telemetry import Counter, Gauge, record
+
+from api.services.photo_index import Photo
+
+# Photo derivatives (thumb/medium/pixel): hit, miss (rendered) or evicted
+PHOTO_CACHE = Counter(
+    "plante_photo_cache",
+    "Photo derivative cache lookups and evictions",
+    ["result"],
+)
+PHOTO_CACHE_BYTES = Gauge(
+    "plante_photo_cache_bytes",
+    "Bytes of photo derivatives on disk",
+)
+
+
+class Size(NamedTuple):
+    long_edge: int
+    format: str
+    quality: int
+    media_type: str
+
+
+SIZES: Dict[str, Size] = {
+    "thumb": Size(320, "JPEG", 70, "image/jpeg"),
+    "medium": Size(1280, "JPEG", 80, "image/jpeg"),
+    "pixel": Size(160, "PNG", 0, "image/png"),
+}
+
+# Colours in the pixel-art palette
+PIXEL_COLOURS = 48
+
+_EXTENSIONS = {"JPEG": ".jpg", "PNG": ".png"}
+
+_HIT = PHOTO_CACHE.labels(result="hit")
+_MISS = PHOTO_CACHE.labels(result="miss")
+_EVICTED = PHOTO_CACHE.labels(result="evicted")
+
+
+def _encode(source, size: Size, output) -> None:
+    """Write one derivative of a JPEG (path or file object) to output."""
+    from PIL import Image
+
+    with Image.open(source) as image:
+        target = (size.long_edge, size.long_edge)
+        # Let libjpeg decode at 1/2, 1/4 or 1/8 scale (DCT scaling) instead
+        # of decoding all 12 MP and then shrinking
+        image.draft("RGB", target)
+        image = image.convert("RGB")
+        # BOX averages whole source blocks, which suits the pixel-art look
+        resample = Image.Resampling.BOX if size.format == "PNG" else Image.Resampling.BICUBIC
+        image.thumbnail(target, resample)
+
+        if size.format == "PNG":
+            image = image.quantize(colors=PIXEL_COLOURS, method=Image.Quantize.MEDIANCUT)
+            image.save(output, format="PNG", optimize=True)
+        else:
+            image.save(output, format="JPEG", quality=size.quality, optimize=True)
+
+
+def render(source: str, size: Size, destination: str) -> None:
+    """Write one derivative of a JPEG file to destination."""
+    tmp = f"{destination}.tmp"
+    _encode(source, size, tmp)
+    os.replace(tmp, destination)
+
+
+def render_bytes(jpeg: bytes, size: Size) -> bytes:
+    """One derivative of an in-memory JPEG."""
+    output = io.BytesIO()
+    _encode(io.BytesIO(jpeg), size, output)
+    return output.getvalue()
+
+
+class DerivativeCache:
+    """
+    On-disk derivative cache with LRU eviction by total bytes.
+
+    Args:
+        cache_dir: Directory for derivative files
+        max_bytes: Byte budget before least recently used files are evicted
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = 200 * 1024 * 1024):
+        self.cache_dir = os.path.expanduser(cache_dir)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()
+        # filename -> bytes, least recently used first
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._bytes = 0
+        # Per-file locks so concurrent requests render a derivative once
+        self._rendering: Dict[str, threading.Lock] = {}
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="derive")
+
+        self._load()
+
+    def _load(self) -> None:
+        """Pick up derivatives left by a previous run, oldest first."""
+        entries = []
+        with os.scandir(self.cache_dir) as scan:
+            for entry in scan:
+                if entry.name.endswith(".tmp"):
+                    os.remove(entry.path)
+                elif entry.is_file():
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, entry.name, stat.st_size))
+        for _, name, nbytes in sorted(entries):
+            self._entries[name] = nbytes
+            self._bytes += nbytes
+        self._evict()
+
+    @staticmethod
+    def _filename(photo: Photo, size_name: str) -> str:
+        size = SIZES[size_name]
+        # Ids of photos in subdirectories contain "/"
+        name = quote(photo.id, safe="")
+        return f"{name}-{photo.mtime_us}-{size_name}{_EXTENSIONS[size.format]}"
+
+    def get(self, photo: Photo, size_name: str) -> str:
+        """
+        Path to a derivative of photo, rendering it if needed.
+
+        Raises:
+            KeyError: Unknown size name
+            OSError: The source photo could not be read
+        """
+        size = SIZES[size_name]
+        filename = self._filename(photo, size_name)
+        path = os.path.join(self.cache_dir, filename)
+
+        with self._lock:
+            if filename in self._entries:
+                self._entries.move_to_end(filename)
+                _HIT.inc()
+                return path
+            render_lock = self._rendering.setdefault(filename, threading.Lock())
+
+        with render_lock:
+            with self._lock:
+                if filename in self._entries:
+                    # Rendered by another request while we waited
+                    self._entries.move_to_end(filename)
+                    _HIT.inc()
+                    return path
+
+            _MISS.inc()
+            start = time.perf_counter()
+            try:
+                render(photo.filepath, size, path)
+                nbytes = os.path.getsize(path)
+            except Exception:
+                with self._lock:
+                    self._rendering.pop(filename, None)
+                raise
+            finally:
+                record("derive", time.perf_counter() - start, f"Render {size_name}")
+
+            with self._lock:
+                self._entries[filename] = nbytes
+                self._bytes += nbytes
+                self._rendering.pop(filename, None)
+                self._evict()
+        return path
+
+    def read(self, photo: Photo, size_name: str) -> bytes:
+        """
+        Contents of a derivative of photo, rendering it if needed.
+
+        Raises:
+            KeyError: Unknown size name
+            OSError: The source photo could not be read
+        """
+        while True:
+            path = self.get(photo, size_name)
+            with self._lock:
+                if os.path.basename(path) not in self._entries:
+                    # Evicted between get() and here: render it again
+                    continue
+                f = open(path, "rb")
+            with f:
+                return f.read()
+
+    def prefetch(self, photo: Photo, size_names: Iterable[str] = ("thumb", "pixel")) -> None:
+        """Render derivatives of a new photo in the background."""
+        for size_name in size_names:
+            self._executor.submit(self._prefetch, photo, size_name)
+
+    def _prefetch(self, photo: Photo, size_name: str) -> None:
+        try:
+            self.get(photo, size_name)
+        except FileNotFoundError:
+            # Deleted since capture (e.g. a duplicate timelapse frame)
+            pass
+        except Exception as e:
+            print(f"Derivative {size_name} of {photo.filename} failed: {e}")
+
+    def _evict(self) -> None:
+        """Drop least recently used files until within budget (lock held)."""
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            filename, nbytes = self._entries.popitem(last=False)
+            self._bytes -= nbytes
+            _EVICTED.inc()
+            try:
+                os.remove(os.path.join(self.cache_dir, filename))
+            except FileNotFoundError:
+                pass
+        PHOTO_CACHE_BYTES.set(self._bytes)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,123 @@
+"""
+Perceptual frame hashes
+
+64-bit difference hashes (dHash) for spotting near-duplicate timelapse
+frames: the frame is reduced to a 9x8 grey thumbnail and each bit
+records whether a cell is brighter than its right-hand neighbour. Hashes
+of near-identical frames differ in a few bits, while uniform brightness
+changes barely move them. Hashing a preview frame costs well under a
+millisecond, and a JPEG is only decoded at 1/8 scale.
+
+HashIndex keeps photo id -> hash for stored frames in an append-only
+file, compacted as it grows.
+"""
+import os
+import threading
+from typing import Dict, Optional
+
+import numpy as np
+
+HASH_SIZE = 8
+
+
+def dhash(image) -> int:
+    """Difference hash of a PIL image."""
+    from PIL import Image
+
+    small = image.convert("L").resize((HASH_SIZE + 1, HASH_SIZE), Image.Resampling.BOX)
+    pixels = np.asarray(small, dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hash_yuv420(frame: np.ndarray) -> int:
+    """Hash of a planar YUV420 frame's luma plane."""
+    from PIL import Image
+
+    height = frame.shape[0] * 2 // 3
+    return dhash(Image.fromarray(np.ascontiguousarray(frame[:height])))
+
+
+def hash_jpeg(path: str) -> int:
+    """Hash of a JPEG file, decoded at reduced size."""
+    from PIL import Image
+
+    with Image.open(path) as image:
+        image.draft("L", (HASH_SIZE * 8, HASH_SIZE * 8))
+        return dhash(image)
+
+
+def distance(a: int, b: int) -> int:
+    """Hamming distance between two hashes (0-64)."""
+    return bin(a ^ b).count("1")
+
+
+class HashIndex:
+    """
+    Persistent photo id -> perceptual hash map.
+
+    Args:
+        path: Append-only file of "<id> <hash hex>" lines ("<id> -" removes)
+    """
+
+    def __init__(self, path: str):
+        self.path = os.path.expanduser(path)
+        self._lock = threading.Lock()
+        self._hashes: Dict[str, int] = {}
+        self._lines = 0
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, 'r') as f:
+                for line in f:
+                    self._lines += 1
+                    parts = line.split()
+                    if len(parts) != 2:
+                        continue
+                    photo_id, value = parts
+                    if value == "-":
+                        self._hashes.pop(photo_id, None)
+                    else:
+                        try:
+                            self._hashes[photo_id] = int(value, 16)
+                        except ValueError:
+                            continue
+        except FileNotFoundError:
+            pass
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+    def get(self, photo_id: str) -> Optional[int]:
+        return self._hashes.get(photo_id)
+
+    def add(self, photo_id: str, value: int) -> None:
+        with self._lock:
+            self._hashes[photo_id] = value
+            self._write(f"{photo_id} {value:016x}\n")
+
+    def retain(self, photo_ids) -> None:
+        """Forget hashes of photos not in photo_ids (deleted elsewhere)."""
+        for photo_id in set(self._hashes) - set(photo_ids):
+            self.discard(photo_id)
+
+    def discard(self, photo_id: str) -> None:
+        with self._lock:
+            if self._hashes.pop(photo_id, None) is not None:
+                self._write(f"{photo_id} -\n")
+
+    def _write(self, line: str) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        if self._lines > 2 * len(self._hashes) + 100:
+            # Mostly removals by now: rewrite with the live entries only
+            tmp = f"{self.path}.tmp"
+            with open(tmp, 'w') as f:
+                for photo_id, value in self._hashes.items():
+                    f.write(f"{photo_id} {value:016x}\n")
+            os.replace(tmp, self.path)
+            self._lines = len(self._hashes)
+            return
+        with open(self.path, 'a') as f:
+            f.write(line)
+        self._lines += 1
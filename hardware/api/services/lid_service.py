@@ -2,137 +2,517 @@
 Lid Control Service
 
 Service for controlling the greenhouse lid via Arduino-connected servos.
+
+The Arduino is reached through the servo link (arduino/servo_link.py),
+which the API starts at boot: it keeps the serial port open across
+moves and shares it with main_control.py over a local socket.
+
+Moves run on a background motion worker, so requests return at once
+with a motion id instead of blocking for the whole multi-second sweep.
+Requesting a new target pre-empts the move in progress: the worker stops
+at the next step and heads for the new target from wherever the lid is.
+
+With firmware that supports MOVE, the whole sweep is one serial command
+interpolated on the Arduino (pre-empted with STOP), and the angle is
+estimated from the motion profile until the firmware reports where the
+servos ended up. Older firmware gets one command per 5° step.
+
+The lid state (commanded open/closed and the last known angle) is
+persisted in LID_STATE_FILE, so a restart does not assume "closed, 0°".
+The Arduino's STATUS reply overrides the stored angle whenever the link
+connects and before every move, so a move always starts from where the
+servos really are, even after something else has moved them.
+
+With SERVO_DRIVER=gpio the servos are driven straight from the Pi's GPIO
+(motors/gpio_servo.py) instead of the Arduino: each move is queued as
+lgpio servo pulses following servo.profile in config.json, and played
+without Python waking up per step.
+
+Each move's serial traffic is timed into its own telemetry Timeline
+(connect, STATUS and step round-trips, waits for the port, the firmware
+move). Finished moves go into a rolling actuation log (/lid/log) with
+those timings, so step size, delay and speed can be tuned from real
+numbers.
 """
 
-import json
+import itertools
+import os
+import threading
 import time
+from collections import deque
+from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import Deque, List, Optional, Sequence, Tuple
+
+from api.services.lid_state import LidState
+from config_store import get_config_store
+from motors.motion_profile import profile_angle
+from telemetry import Histogram, span
+from telemetry.timing import Timeline, current_timeline, end_timeline, start_timeline
+
+LID_MOVE_SECONDS = Histogram(
+    "plante_lid_move_seconds",
+    "Lid move duration from command to final position",
+    ["direction"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 3.0, 4.0, 6.0, 10.0, 20.0),
+)
+# From the lid command to the end of the move, including queueing behind
+# another move and connecting to the Arduino
+LID_ACTUATION_SECONDS = Histogram(
+    "plante_lid_actuation_seconds",
+    "Lid command to final position, by direction and outcome",
+    ["direction", "status"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 3.0, 4.0, 6.0, 10.0, 20.0),
+)
 
-# Global lid state
-_lid_state = {
-    "is_open": False,
-    "angle": 0,
-}
+# Seconds a move waits for the servo link's first connection attempt
+CONNECT_TIMEOUT = 10.0
 
-# Config file path
-CONFIG_FILE = Path(__file__).parent.parent.parent / "config.json"
+# Degrees per smooth-move step, and pause between steps (seconds)
+STEP_DEGREES = 5
+STEP_DELAY = 0.05
+
+# Firmware move speed when config.json has no servo.speed (degrees/second)
+MOVE_SPEED = 60
+
+# Motion profile when config.json has no servo.profile, or the driver lacks it
+MOVE_PROFILE = "ease"
+
+ARDUINO = "arduino"
+GPIO = "gpio"
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+CANCELLED = "cancelled"
+FAILED = "failed"
 
 
 def get_config() -> dict:
-    """Load config from JSON file."""
+    """The current config (from the shared config store, no file I/O)."""
+    return get_config_store().get()
+
+
+def _positions(response: str) -> Optional[Tuple[int, int]]:
+    """Servo positions from a STATUS:/DONE:/STOPPED: reply ("...:1=90,2=90")."""
     try:
-        with open(CONFIG_FILE, 'r') as f:
-            return json.load(f)
-    except Exception:
+        first, second = response.split(":", 1)[1].split(",")
+        return int(first.split("=")[1]), int(second.split("=")[1])
+    except (IndexError, ValueError):
+        return None
+
+
+class LidMotion:
+    """One lid move from the current angle to a target."""
+    
+    __slots__ = ("id", "target", "reason", "from_angle", "status", "created_at", "started_at",
+                 "finished_at", "error", "mode", "settings", "cancel", "done")
+    
+    def __init__(self, motion_id: str, target: int, reason: Optional[str] = None):
+        self.id = motion_id
+        self.target = target
+        # Who asked and why (e.g. "main_control: temperature too high")
+        self.reason = reason
+        self.from_angle: Optional[int] = None
+        self.status = QUEUED
+        self.created_at = datetime.utcnow()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.error: Optional[str] = None
+        # How the move was made: move (one MOVE/GPIO profile), steps, or offline
+        self.mode: Optional[str] = None
+        # Speed/profile or step size/delay the move used
+        self.settings: dict = {}
+        # Set to pre-empt the move at its next step
+        self.cancel = threading.Event()
+        self.done = threading.Event()
+    
+    def progress(self, angle: int) -> float:
+        """Fraction of the way from the start angle to the target, at angle."""
+        if self.status == DONE:
+            return 1.0
+        if self.from_angle is None or self.from_angle == self.target:
+            return 0.0
+        moved = abs(angle - self.from_angle)
+        return min(1.0, moved / abs(self.target - self.from_angle))
+    
+    def to_dict(self, angle: int) -> dict:
         return {
-            "servo": {"lid_open": 90, "lid_closed": 0}
+            "id": self.id,
+            "target": self.target,
+            "from_angle": self.from_angle,
+            "status": self.status,
+            "progress": round(self.progress(angle), 3),
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
         }
+    
+    def _finish(self, status: str, error: Optional[str] = None) -> None:
+        self.status = status
+        self.error = error
+        self.finished_at = datetime.utcnow()
+        self.done.set()
 
 
 class LidService:
-    """Service for controlling the greenhouse lid."""
+    """
+    Service for controlling the greenhouse lid.
+    
+    Args:
+        state_file: Persisted lid state
+        driver: 'arduino' (servo link) or 'gpio' (servos on the Pi's GPIO)
+        gpio_pins: Servo 1 and 2 GPIO for the gpio driver
+        log_size: Moves kept in the actuation log
+    """
+    
+    def __init__(self, state_file: str = "~/Plante/hardware/lid_state.json",
+                 driver: str = ARDUINO, gpio_pins: Sequence[int] = (18, 13), log_size: int = 100):
+        if driver not in (ARDUINO, GPIO):
+            raise ValueError(f"Unknown servo driver '{driver}'. Use '{ARDUINO}' or '{GPIO}'")
+        self.driver = driver
+        self.gpio_pins = tuple(gpio_pins)
+        self._link = None
+        self.state = LidState(state_file)
+        
+        self._lock = threading.Lock()
+        self._work = threading.Condition(self._lock)
+        self._pending: Optional[LidMotion] = None
+        self._current: Optional[LidMotion] = None
+        self._last: Optional[LidMotion] = None
+        self._ids = itertools.count(1)
+        self._worker: Optional[threading.Thread] = None
+        self._closed = False
+        # Move in progress: (from, to, monotonic start, seconds, profile)
+        self._estimate: Optional[tuple] = None
+        # Finished moves, oldest first
+        self._log: Deque[dict] = deque(maxlen=log_size)
     
-    def __init__(self):
-        self.controller = None
-        self._connected = False
+    @property
+    def controller(self):
+        """The servo link's controller (None until connected)."""
+        return self._link.controller if self._link is not None else None
+    
+    def _get_link(self):
+        if self._link is None:
+            try:
+                # Import here to avoid issues when Arduino not connected
+                import sys
+                sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+                if self.driver == GPIO:
+                    from motors.gpio_servo import GpioServoLink
+                    self._link = GpioServoLink(self.gpio_pins)
+                else:
+                    from arduino.servo_link import get_servo_link
+                    self._link = get_servo_link()
+            except ImportError as e:
+                print(f"[LidService] Import error: {e}")
+                return None
+            self._link.add_connect_listener(self._on_connect)
+        return self._link
+    
+    def start(self) -> None:
+        """Start the servo link, which connects to the Arduino in the background (or claim the GPIO)."""
+        link = self._get_link()
+        if link is not None:
+            link.start()
     
     def connect(self) -> bool:
-        """Connect to the Arduino servo controller."""
-        try:
-            # Import here to avoid issues when Arduino not connected
-            import sys
-            sys.path.insert(0, str(Path(__file__).parent.parent.parent))
-            from arduino.servo_control import DualServoController
-            
-            self.controller = DualServoController()
-            if self.controller.connect():
-                self._connected = True
-                return True
-            return False
-        except ImportError as e:
-            print(f"[LidService] Import error: {e}")
-            return False
-        except Exception as e:
-            print(f"[LidService] Connection error: {e}")
+        """Wait for the servo link's connection to the Arduino."""
+        link = self._get_link()
+        if link is None:
             return False
+        link.start()
+        return link.wait(CONNECT_TIMEOUT) is not None
     
     def disconnect(self):
-        """Disconnect from Arduino."""
-        if self.controller:
-            self.controller.close()
-            self._connected = False
+        """Stop the motion worker and the servo link."""
+        with self._lock:
+            self._closed = True
+            if self._pending is not None:
+                self._pending._finish(CANCELLED, "Shutting down")
+                self._pending = None
+            if self._current is not None:
+                self._current.cancel.set()
+            self._work.notify_all()
+        if self._worker is not None:
+            self._worker.join(timeout=5)
+            self._worker = None
+        if self._link is not None:
+            self._link.close()
     
     def is_connected(self) -> bool:
         """Check if connected to Arduino."""
-        return self._connected
+        return self._link is not None and self._link.is_connected
     
     def get_status(self) -> dict:
-        """Get current lid status."""
+        """Get current lid status, with the move in progress (or the last one)."""
+        with self._lock:
+            # Mid-move the angle is estimated for the response only; the
+            # worker alone sets state.angle
+            angle = self.state.angle
+            if self._estimate is not None:
+                start, end, started, duration, profile = self._estimate
+                elapsed = time.monotonic() - started
+                angle = round(profile_angle(profile, start, end, elapsed, duration))
+            motion = self._pending or self._current or self._last
+            moving = self._pending is not None or self._current is not None
         return {
-            "is_open": _lid_state["is_open"],
-            "angle": _lid_state["angle"],
-            "connected": self._connected,
+            "is_open": self.state.is_open,
+            "angle": angle,
+            "confirmed": self.state.confirmed,
+            "connected": self.is_connected(),
+            "moving": moving,
+            "motion": motion.to_dict(angle) if motion else None,
         }
     
-    def open_lid(self) -> bool:
-        """Open the greenhouse lid."""
-        if _lid_state["is_open"]:
-            return True  # Already open
-        
+    def get_log(self, limit: int = 50) -> List[dict]:
+        """The most recent moves in the actuation log, newest first."""
+        with self._lock:
+            entries = list(self._log)
+        return entries[::-1][:limit]
+    
+    def open_lid(self, reason: Optional[str] = None) -> Optional[LidMotion]:
+        """Start opening the lid; None if it is already open and still."""
         config = get_config()
-        target = config.get("servo", {}).get("lid_open", 90)
-        
-        success = self._move_to_angle(target)
-        if success:
-            _lid_state["is_open"] = True
-            _lid_state["angle"] = target
-        return success
-    
-    def close_lid(self) -> bool:
-        """Close the greenhouse lid."""
-        if not _lid_state["is_open"]:
-            return True  # Already closed
-        
+        return self._request(True, config.get("servo", {}).get("lid_open", 90), reason)
+    
+    def close_lid(self, reason: Optional[str] = None) -> Optional[LidMotion]:
+        """Start closing the lid; None if it is already closed and still."""
         config = get_config()
-        target = config.get("servo", {}).get("lid_closed", 0)
-        
-        success = self._move_to_angle(target)
-        if success:
-            _lid_state["is_open"] = False
-            _lid_state["angle"] = target
-        return success
-    
-    def toggle_lid(self) -> bool:
-        """Toggle the lid state."""
-        if _lid_state["is_open"]:
-            return self.close_lid()
+        return self._request(False, config.get("servo", {}).get("lid_closed", 0), reason)
+    
+    def toggle_lid(self, reason: Optional[str] = None) -> Optional[LidMotion]:
+        """Reverse the lid's direction (or start moving it)."""
+        if self.state.is_open:
+            return self.close_lid(reason)
         else:
-            return self.open_lid()
+            return self.open_lid(reason)
     
-    def _move_to_angle(self, target: int) -> bool:
-        """Move servos smoothly to target angle."""
-        if not self._connected and not self.connect():
-            # If not connected, just update state (for dev mode)
-            print(f"[LidService] Not connected, simulating move to {target}°")
-            return True
+    def _request(self, is_open: bool, target: int, reason: Optional[str]) -> Optional[LidMotion]:
+        with self._lock:
+            active = self._pending or self._current
+            if active is None and self.state.is_open == is_open and self.state.angle == target:
+                return None
+            if active is not None and active.target == target and not active.cancel.is_set():
+                # Already heading there
+                return active
+            return self._move_locked(is_open, target, reason)
+    
+    def move_to(self, target: int, is_open: Optional[bool] = None,
+                reason: Optional[str] = None) -> LidMotion:
+        """
+        Start a move to target, pre-empting any move in progress.
         
-        try:
-            current = _lid_state.get("angle", 0)
-            step = 5 if target > current else -5
+        Returns:
+            The new motion; wait on motion.done to block until it ends
+        """
+        with self._lock:
+            return self._move_locked(is_open, target, reason)
+    
+    def get_motion(self, motion_id: str) -> Optional[LidMotion]:
+        with self._lock:
+            for motion in (self._pending, self._current, self._last):
+                if motion is not None and motion.id == motion_id:
+                    return motion
+        return None
+    
+    def _move_locked(self, is_open: Optional[bool], target: int, reason: Optional[str]) -> LidMotion:
+        if self._closed:
+            raise RuntimeError("Lid service is shut down")
+        motion = LidMotion(f"lid-{int(time.time())}-{next(self._ids)}", target, reason)
+        if self._pending is not None:
+            # Superseded before it started
+            self._pending._finish(CANCELLED, f"Superseded by {motion.id}")
+            self._log_locked(self._pending, None)
+        if self._current is not None:
+            self._current.cancel.set()
+        self._pending = motion
+        if is_open is not None and is_open != self.state.is_open:
+            self.state.is_open = is_open
+            self.state.save()
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._run, name="lid-motion", daemon=True)
+            self._worker.start()
+        self._work.notify()
+        return motion
+    
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                while self._pending is None and not self._closed:
+                    self._work.wait()
+                if self._closed:
+                    return
+                motion, self._pending = self._pending, None
+                self._current = motion
             
-            if abs(target - current) > abs(step):
-                angles = range(current, target, step)
-                for angle in angles:
-                    self.controller.send_command(f"both:{angle}")
-                    time.sleep(0.05)
+            # Collects this move's connect/serial/move timings
+            token = start_timeline()
+            try:
+                self._execute(motion)
+            except Exception as e:
+                print(f"[LidService] Move error: {e}")
+                motion._finish(FAILED, str(e))
+            finally:
+                timeline = current_timeline()
+                end_timeline(token)
             
-            # Ensure we hit exact target
-            self.controller.send_command(f"both:{target}")
-            return True
+            with self._lock:
+                self._current = None
+                self._last = motion
+                self._log_locked(motion, timeline)
+            self.state.save()
+    
+    def _log_locked(self, motion: LidMotion, timeline: Optional[Timeline]) -> None:
+        """Add a finished move to the actuation log and metrics (lock held)."""
+        start = motion.from_angle if motion.from_angle is not None else self.state.angle
+        direction = "open" if motion.target > start else "close"
+        total = (motion.finished_at - motion.created_at).total_seconds()
+        LID_ACTUATION_SECONDS.labels(direction=direction, status=motion.status).observe(total)
+        self._log.append({
+            "id": motion.id,
+            "reason": motion.reason,
+            "direction": direction,
+            "from_angle": motion.from_angle,
+            "target": motion.target,
+            "angle": self.state.angle,
+            "status": motion.status,
+            "error": motion.error,
+            "driver": self.driver,
+            "mode": motion.mode,
+            "settings": motion.settings,
+            "created_at": motion.created_at,
+            "started_at": motion.started_at,
+            "finished_at": motion.finished_at,
+            "queued_seconds": (
+                (motion.started_at - motion.created_at).total_seconds() if motion.started_at else total),
+            "total_seconds": total,
+            "timings": [
+                {"name": name, "seconds": seconds, "count": count, "description": description}
+                for name, seconds, count, description in (timeline.items() if timeline else [])
+            ],
+        })
+    
+    def _read_positions(self, controller) -> Optional[Tuple[int, int]]:
+        """Ask the Arduino where the servos are (None if it does not answer)."""
+        try:
+            return _positions(controller.send_command("STATUS"))
         except Exception as e:
-            print(f"[LidService] Move error: {e}")
-            return False
+            print(f"[LidService] STATUS failed: {e}")
+            return None
+    
+    def _reconcile(self, positions: Tuple[int, int]) -> int:
+        """Take the Arduino's servo positions as the lid angle."""
+        angle, other = positions
+        if other != angle:
+            print(f"[LidService] Servos disagree: 1={angle}°, 2={other}°; using servo 1")
+        if angle != self.state.angle:
+            print(f"[LidService] Lid was at {angle}°, not the stored {self.state.angle}°")
+        self.state.angle = angle
+        self.state.confirmed = True
+        return angle
+    
+    def _on_connect(self, controller) -> None:
+        """Servo link (re)connected: reconcile the stored state with the Arduino."""
+        positions = self._read_positions(controller)
+        if positions is None:
+            return
+        with self._lock:
+            if self._current is not None:
+                # The worker reads STATUS itself before moving
+                return
+            self._reconcile(positions)
+            if self._pending is None:
+                # Nothing queued: infer open/closed from where the lid is
+                servo = get_config().get("servo", {})
+                opened = servo.get("lid_open", 90)
+                closed = servo.get("lid_closed", 0)
+                self.state.is_open = abs(self.state.angle - opened) < abs(self.state.angle - closed)
+        self.state.save()
+    
+    def _execute(self, motion: LidMotion) -> None:
+        """Move servos smoothly to the motion's target (worker thread)."""
+        motion.status = RUNNING
+        motion.started_at = datetime.utcnow()
+        target = motion.target
+        
+        if not self.is_connected():
+            with span("connect", "Servo link connect"):
+                self.connect()
+        controller = self.controller if self.is_connected() else None
+        if controller is None:
+            # If not connected, just update state (for dev mode)
+            print(f"[LidService] Not connected, simulating move to {target}°")
+            motion.mode = "offline"
+            motion.from_angle = self.state.angle
+            self.state.angle = target
+            motion._finish(DONE)
+            return
+        
+        # Start from where the servos are, not where we last left them
+        positions = self._read_positions(controller)
+        if positions is not None:
+            self._reconcile(positions)
+        current = self.state.angle
+        motion.from_angle = current
+        if current == target:
+            motion._finish(DONE)
+            return
+        
+        start = time.perf_counter()
+        direction = "open" if target > current else "close"
+        
+        servo = get_config().get("servo", {})
+        duration = abs(target - current) / max(1, servo.get("speed", MOVE_SPEED))
+        profile = servo.get("profile", MOVE_PROFILE)
+        if profile not in controller.profiles:
+            profile = MOVE_PROFILE
+        motion.mode = "move"
+        motion.settings = {"speed": servo.get("speed", MOVE_SPEED), "profile": profile}
+        with self._lock:
+            self._estimate = (current, target, time.monotonic(), duration, profile)
+        try:
+            response = controller.move("both", target, duration * 1000, profile=profile, cancel=motion.cancel)
+        except BaseException:
+            with self._lock:
+                self._estimate = None
+            raise
+        with self._lock:
+            # Together, so a status read never sees neither
+            self._estimate = None
+            if response is not None:
+                positions = _positions(response)
+                self.state.angle = positions[0] if positions is not None else target
+        if response is not None:
+            if response.startswith("STOPPED"):
+                motion._finish(CANCELLED, "Pre-empted by a new target")
+                return
+            LID_MOVE_SECONDS.labels(direction=direction).observe(time.perf_counter() - start)
+            motion._finish(DONE)
+            return
+        
+        # Firmware without MOVE: one command per step
+        motion.mode = "steps"
+        motion.settings = {"step_degrees": STEP_DEGREES, "step_delay": STEP_DELAY}
+        step = STEP_DEGREES if target > current else -STEP_DEGREES
+        if abs(target - current) > abs(step):
+            for angle in range(current + step, target, step):
+                if motion.cancel.is_set():
+                    motion._finish(CANCELLED, "Pre-empted by a new target")
+                    return
+                controller.send_command(f"both:{angle}")
+                self.state.angle = angle
+                if motion.cancel.wait(STEP_DELAY):
+                    motion._finish(CANCELLED, "Pre-empted by a new target")
+                    return
+        
+        # Ensure we hit exact target
+        controller.send_command(f"both:{target}")
+        self.state.angle = target
+        LID_MOVE_SECONDS.labels(direction=direction).observe(time.perf_counter() - start)
+        motion._finish(DONE)
 
 
 # Singleton instance
@@ -143,5 +523,10 @@ def get_lid_service() -> LidService:
     """Get singleton lid service instance."""
     global _lid_service
     if _lid_service is None:
-        _lid_service = LidService()
+        _lid_service = LidService(
+            state_file=os.getenv("LID_STATE_FILE", "~/Plante/hardware/lid_state.json"),
+            driver=os.getenv("SERVO_DRIVER", ARDUINO).strip().lower(),
+            gpio_pins=[int(pin) for pin in os.getenv("SERVO_GPIO_PINS", "18,13").split(",")],
+            log_size=int(os.getenv("LID_LOG_SIZE", "100")),
+        )
     return _lid_service
@@ -0,0 +1,73 @@
+"""
+Persisted lid state
+
+The lid's commanded state (open/closed) and last known servo angle,
+kept in a small JSON file so a restart resumes from where the lid was
+instead of assuming "closed, 0°". The file is fsynced and replaced
+atomically when a move ends or the target changes, not on every step.
+The Arduino is the authority: LidService overwrites the angle with its
+STATUS reply whenever the link connects and before every move.
+"""
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Optional
+
+
+class LidState:
+    """
+    Lid state backed by a JSON file.
+
+    Args:
+        path: State file (created on first save)
+    """
+
+    def __init__(self, path: str):
+        self.path = os.path.expanduser(path)
+        self.is_open = False
+        self.angle = 0
+        self.updated_at: Optional[datetime] = None
+        # Whether the Arduino has confirmed the angle since startup
+        self.confirmed = False
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            self.is_open = bool(data.get("is_open", False))
+            self.angle = int(data.get("angle", 0))
+            if data.get("updated_at"):
+                self.updated_at = datetime.fromisoformat(data["updated_at"])
+        except FileNotFoundError:
+            pass
+        except (ValueError, TypeError) as e:
+            print(f"[LidState] Ignoring unreadable {self.path}: {e}")
+
+    def save(self) -> None:
+        self.updated_at = datetime.utcnow()
+        data = {
+            "is_open": self.is_open,
+            "angle": self.angle,
+            "updated_at": self.updated_at.isoformat(),
+        }
+        with self._lock:
+            try:
+                directory = os.path.dirname(self.path)
+                os.makedirs(directory, exist_ok=True)
+                tmp = f"{self.path}.tmp"
+                with open(tmp, 'w') as f:
+                    json.dump(data, f)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp, self.path)
+                # Make the rename itself durable
+                dir_fd = os.open(directory, os.O_RDONLY)
+                try:
+                    os.fsync(dir_fd)
+                finally:
+                    os.close(dir_fd)
+            except OSError as e:
+                print(f"[LidState] Failed to save {self.path}: {e}")
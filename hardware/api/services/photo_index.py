@@ -0,0 +1,340 @@
+"""
+In-memory photo index
+
+Keeps the photos directory's JPEGs (including subdirectories such as
+the date-sharded timelapse tree) sorted by modification time so the
+latest photo is an O(1) lookup and time-range listings are a binary
+search, instead of listdir + getmtime + sort on every request. The tree
+is scanned once at startup; afterwards the index is updated by the
+capture path and by inotify watches (photos copied in, deleted or
+rotated by other tools). Where inotify is unavailable the watcher falls
+back to a periodic rescan.
+"""
+import os
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from inotify_watch import (
+    IN_CLOSE_WRITE, IN_CREATE, IN_DELETE, IN_DELETE_SELF, IN_IGNORED, IN_ISDIR,
+    IN_MOVED_FROM, IN_MOVED_TO, IN_Q_OVERFLOW, Event, Inotify,
+)
+
+PHOTO_EXTENSION = ".jpg"
+
+# Rescan interval when inotify cannot be used (seconds)
+RESCAN_INTERVAL = 30.0
+
+_WATCH_MASK = (IN_CLOSE_WRITE | IN_MOVED_TO | IN_MOVED_FROM
+               | IN_CREATE | IN_DELETE | IN_DELETE_SELF)
+
+# Sorts after any photo id, for bisecting on time alone
+_MAX_ID = "\uffff"
+
+# Listing cursor directions: continue after, or page back before, a photo
+AFTER = "a"
+BEFORE = "b"
+
+
+class Photo(NamedTuple):
+    """One indexed photo."""
+    id: str
+    filename: str
+    filepath: str
+    # Modification time in integer microseconds, so datetime cursors
+    # round-trip exactly
+    mtime_us: int
+    size: int
+
+    @property
+    def timestamp(self) -> datetime:
+        return datetime.fromtimestamp(self.mtime_us / 1e6)
+
+
+def to_microseconds(value: datetime) -> int:
+    """Convert a datetime (naive = local time) to index time."""
+    return round(value.timestamp() * 1e6)
+
+
+def encode_cursor(direction: str, photo: Photo) -> str:
+    """Listing cursor for continuing past a photo ("a:<mtime_us>:<id>")."""
+    return f"{direction}:{photo.mtime_us}:{photo.id}"
+
+
+def decode_cursor(cursor: str) -> Tuple[str, Tuple[int, str]]:
+    """
+    Split a cursor from encode_cursor into (direction, (mtime_us, id)).
+
+    Raises:
+        ValueError: Not a cursor
+    """
+    parts = cursor.split(":", 2)
+    if len(parts) != 3 or parts[0] not in (AFTER, BEFORE) or not parts[2] or not parts[1].isdigit():
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    direction, mtime_us, photo_id = parts
+    return direction, (int(mtime_us), photo_id)
+
+
+class PhotoIndex:
+    """
+    Sorted, thread-safe index of the JPEGs under one directory.
+
+    Photos are keyed by id, the path relative to the directory without
+    the extension ("photo_20260301_120000",
+    "timelapse/2026/03/01/tl_daily_20260301_120000"), and ordered by
+    (mtime_us, id). Hidden directories are skipped.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._photos: Dict[str, Photo] = {}
+        # Parallel sorted lists: (mtime_us, id) keys and the photos themselves
+        self._keys: List[Tuple[int, str]] = []
+        self._order: List[Photo] = []
+        self._watcher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        # inotify watch descriptor -> directory
+        self._watches: Dict[int, str] = {}
+        self.rescan()
+
+    # ----- maintenance --------------------------------------------------
+
+    def _scan(self, directory: str) -> List[Photo]:
+        """All photos under directory (recursive)."""
+        photos = []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.name.startswith("."):
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        photos.extend(self._scan(entry.path))
+                    elif entry.name.endswith(PHOTO_EXTENSION) and entry.is_file():
+                        stat = entry.stat()
+                        photos.append(self._photo(entry.path, stat.st_mtime_ns, stat.st_size))
+        except (FileNotFoundError, NotADirectoryError):
+            pass
+        return photos
+
+    def rescan(self) -> int:
+        """Rebuild the index from the directory tree; returns the photo count."""
+        photos = {photo.id: photo for photo in self._scan(self.directory)}
+
+        order = sorted(photos.values(), key=lambda p: (p.mtime_us, p.id))
+        with self._lock:
+            self._photos = photos
+            self._order = order
+            self._keys = [(p.mtime_us, p.id) for p in order]
+        return len(order)
+
+    def photo_id(self, path: str) -> str:
+        """Id of a photo from its path (absolute or relative) or id."""
+        if os.path.isabs(path):
+            path = os.path.relpath(path, self.directory)
+        if path.endswith(PHOTO_EXTENSION):
+            path = path[:-len(PHOTO_EXTENSION)]
+        return path.replace(os.sep, "/")
+
+    def _photo(self, filepath: str, mtime_ns: int, size: int) -> Photo:
+        return Photo(
+            id=self.photo_id(filepath),
+            filename=os.path.basename(filepath),
+            filepath=filepath,
+            mtime_us=mtime_ns // 1000,
+            size=size,
+        )
+
+    def add(self, filepath: str) -> Optional[Photo]:
+        """
+        Index (or re-index) a photo file; returns None if it is not one.
+
+        Relative paths are taken relative to the indexed directory.
+        """
+        filepath = os.path.join(self.directory, filepath)
+        if not filepath.endswith(PHOTO_EXTENSION):
+            return None
+        try:
+            stat = os.stat(filepath)
+        except FileNotFoundError:
+            self.discard(filepath)
+            return None
+
+        photo = self._photo(filepath, stat.st_mtime_ns, stat.st_size)
+        self._insert([photo])
+        return photo
+
+    def _insert(self, photos: List[Photo]) -> None:
+        with self._lock:
+            for photo in photos:
+                self._remove_locked(photo.id)
+                key = (photo.mtime_us, photo.id)
+                # New captures are almost always the newest, so this is an append
+                position = bisect_right(self._keys, key)
+                self._keys.insert(position, key)
+                self._order.insert(position, photo)
+                self._photos[photo.id] = photo
+
+    def discard(self, path: str) -> None:
+        """Drop a photo from the index by path or id."""
+        photo_id = self.photo_id(path)
+        with self._lock:
+            self._remove_locked(photo_id)
+
+    def _discard_under(self, directory: str) -> None:
+        prefix = directory.rstrip(os.sep) + os.sep
+        with self._lock:
+            for photo in [p for p in self._order if p.filepath.startswith(prefix)]:
+                self._remove_locked(photo.id)
+
+    def _remove_locked(self, photo_id: str) -> None:
+        existing = self._photos.pop(photo_id, None)
+        if existing is None:
+            return
+        position = bisect_left(self._keys, (existing.mtime_us, existing.id))
+        del self._keys[position]
+        del self._order[position]
+
+    # ----- queries ------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def latest(self) -> Optional[Photo]:
+        """Most recently modified photo, or None if there are none."""
+        with self._lock:
+            return self._order[-1] if self._order else None
+
+    def get(self, photo_id: str) -> Optional[Photo]:
+        return self._photos.get(photo_id)
+
+    def under(self, directory: str) -> List[Photo]:
+        """Photos inside directory (recursive, relative paths allowed), oldest first."""
+        prefix = os.path.join(self.directory, directory).rstrip(os.sep) + os.sep
+        with self._lock:
+            return [photo for photo in self._order if photo.filepath.startswith(prefix)]
+
+    def between(
+        self,
+        since: Optional[int] = None,
+        until: Optional[int] = None,
+        limit: int = 50,
+        before: Optional[int] = None,
+        cursor: Optional[Tuple[str, Tuple[int, str]]] = None,
+    ) -> Tuple[List[Photo], bool]:
+        """
+        Photos with since < mtime_us <= until and mtime_us < before,
+        oldest first.
+
+        Without `since`, returns the newest `limit` photos in the range.
+        A decoded cursor continues a listing from its (mtime_us, id) key,
+        so photos sharing a modification time are neither skipped nor
+        repeated: AFTER returns the next photos, BEFORE the next older.
+
+        Returns:
+            (photos, has_more) where has_more means more photos match
+        """
+        with self._lock:
+            lo = 0 if since is None else bisect_right(self._keys, (since, _MAX_ID))
+            hi = len(self._keys) if until is None else bisect_right(self._keys, (until, _MAX_ID))
+            if before is not None:
+                hi = min(hi, bisect_left(self._keys, (before, "")))
+            forward = since is not None
+            if cursor is not None:
+                direction, key = cursor
+                forward = direction == AFTER
+                if forward:
+                    lo = max(lo, bisect_right(self._keys, key))
+                else:
+                    hi = min(hi, bisect_left(self._keys, key))
+            hi = max(lo, hi)
+            if not forward:
+                start = max(lo, hi - limit)
+                return self._order[start:hi], start > lo
+            end = min(hi, lo + limit)
+            return self._order[lo:end], end < hi
+
+    # ----- watching -----------------------------------------------------
+
+    def start_watching(self) -> None:
+        """Follow changes made outside the API in a background thread."""
+        if self._watcher is not None:
+            return
+        self._stop.clear()
+        self._watcher = threading.Thread(target=self._watch, name="photo-index", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self) -> None:
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=2)
+            self._watcher = None
+
+    def _watch(self) -> None:
+        inotify = Inotify.open()
+        if inotify is None:
+            print("Photo index: inotify unavailable, rescanning periodically")
+            self._poll()
+            return
+
+        try:
+            if not self._add_watches(inotify, self.directory):
+                print(f"Photo index: cannot watch {self.directory}, rescanning periodically")
+                self._poll()
+                return
+
+            while not self._stop.is_set():
+                self._handle_events(inotify, inotify.read(1.0))
+        finally:
+            inotify.close()
+            self._watches.clear()
+
+    def _poll(self) -> None:
+        while not self._stop.wait(RESCAN_INTERVAL):
+            self.rescan()
+
+    def _add_watches(self, inotify: Inotify, directory: str) -> bool:
+        """Watch directory and its subdirectories; False if directory failed."""
+        wd = inotify.add_watch(directory, _WATCH_MASK)
+        if wd < 0:
+            return False
+        self._watches[wd] = directory
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if not entry.name.startswith(".") and entry.is_dir(follow_symlinks=False):
+                        self._add_watches(inotify, entry.path)
+        except FileNotFoundError:
+            pass
+        return True
+
+    def _handle_events(self, inotify: Inotify, events: List[Event]) -> None:
+        for wd, mask, name in events:
+            if mask & IN_Q_OVERFLOW:
+                self.rescan()
+                continue
+            directory = self._watches.get(wd)
+            if directory is None:
+                continue
+            if mask & (IN_DELETE_SELF | IN_IGNORED):
+                self._watches.pop(wd, None)
+                if directory == self.directory:
+                    self.rescan()
+                continue
+
+            path = os.path.join(directory, name)
+            if mask & IN_ISDIR:
+                if name.startswith("."):
+                    continue
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    # Files may land before the watch exists, so scan it too
+                    self._add_watches(inotify, path)
+                    self._insert(self._scan(path))
+                elif mask & IN_MOVED_FROM:
+                    self._discard_under(path)
+            elif mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                self.add(path)
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                if name.endswith(PHOTO_EXTENSION):
+                    self.discard(path)
@@ -1,16 +1,13 @@
 """
 Sensor service layer - wraps existing sensor scripts for API use
 """
-import sys
-import os
 import time
 import threading
 from datetime import datetime
 from typing import Optional, Dict, Any, List
 
-# Add parent sensors directory to path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'sensors'))
-
+from backends import load_backend
+from telemetry import Counter, Gauge, Histogram, record, span
 from api.models import (
     TemperatureReading,
     HumidityReading,
@@ -20,6 +17,50 @@ from api.models import (
     SensorResponse,
 )
 
+# Sensor reads: dht11 (bit-banged), bh1750 (I2C conversion), ads1256 (SPI conversion)
+SENSOR_READ_SECONDS = Histogram(
+    "plante_sensor_read_seconds",
+    "Time to read one sensor, including conversion delays",
+    ["sensor"],
+)
+SENSOR_ERRORS = Counter(
+    "plante_sensor_errors",
+    "Failed sensor reads by error type",
+    ["sensor", "type"],
+)
+# 1 if the sensor was found at startup; reads of a missing sensor are
+# not counted as errors
+SENSOR_AVAILABLE = Gauge(
+    "plante_sensor_available",
+    "Whether each sensor was found at startup",
+    ["sensor"],
+)
+# /sensors cache: hit, miss, or coalesced (waited for another request's read)
+SENSOR_CACHE = Counter(
+    "plante_sensor_cache",
+    "Sensor cache lookups by result",
+    ["result"],
+)
+
+# Pre-bound metric children keep per-read instrumentation cheap
+_DHT_READ = SENSOR_READ_SECONDS.labels(sensor="dht11")
+_LIGHT_READ = SENSOR_READ_SECONDS.labels(sensor="bh1750")
+_SOIL_READ = SENSOR_READ_SECONDS.labels(sensor="ads1256")
+_CACHE_HIT = SENSOR_CACHE.labels(result="hit")
+_CACHE_MISS = SENSOR_CACHE.labels(result="miss")
+_CACHE_COALESCED = SENSOR_CACHE.labels(result="coalesced")
+
+
+def _sensor_error(sensor: str, error_type: str, message: str) -> SensorError:
+    """Count a failed read and build its SensorError."""
+    SENSOR_ERRORS.labels(sensor=sensor, type=error_type).inc()
+    return SensorError(sensor=sensor, error=message)
+
+
+def _sensor_missing(sensor: str) -> SensorError:
+    """SensorError for a sensor not found at startup (not counted; see SENSOR_AVAILABLE)."""
+    return SensorError(sensor=sensor, error="Sensor not available")
+
 
 class SensorService:
     """
@@ -57,8 +98,8 @@ class SensorService:
         """Initialize sensor instances, tracking which are available."""
         # Try DHT11
         try:
-            import board
-            import adafruit_dht
+            board = load_backend("board")
+            adafruit_dht = load_backend("adafruit_dht")
             self._dht_device = adafruit_dht.DHT11(board.D4)
             self._dht_available = True
         except Exception as e:
@@ -66,7 +107,7 @@ class SensorService:
         
         # Try light sensor
         try:
-            from light_sensor import LightSensor
+            from sensors.light_sensor import LightSensor
             self._light_sensor = LightSensor()
             self._light_available = True
         except Exception as e:
@@ -74,11 +115,15 @@ class SensorService:
         
         # Try soil moisture sensor
         try:
-            from soil_moisture import SoilMoistureSensor
+            from sensors.soil_moisture import SoilMoistureSensor
             self._soil_sensor = SoilMoistureSensor()
             self._soil_available = True
         except Exception as e:
             print(f"Soil moisture sensor not available: {e}")
+
+        SENSOR_AVAILABLE.labels(sensor="dht11").set(int(self._dht_available))
+        SENSOR_AVAILABLE.labels(sensor="bh1750").set(int(self._light_available))
+        SENSOR_AVAILABLE.labels(sensor="soil_moisture").set(int(self._soil_available))
     
     def get_available_sensors(self) -> List[str]:
         """Return list of available sensor names."""
@@ -94,14 +139,18 @@ class SensorService:
     def _read_dht(self) -> tuple[Optional[TemperatureReading], Optional[HumidityReading], Optional[SensorError]]:
         """Read temperature and humidity from DHT11."""
         if not self._dht_available or self._dht_device is None:
-            return None, None, SensorError(sensor="dht11", error="Sensor not available")
+            return None, None, _sensor_missing("dht11")
         
+        start = time.perf_counter()
         try:
             temperature = self._dht_device.temperature
             humidity = self._dht_device.humidity
+            elapsed = time.perf_counter() - start
+            _DHT_READ.observe(elapsed)
+            record("dht11", elapsed, "DHT11 read")
             
             if temperature is None or humidity is None:
-                return None, None, SensorError(sensor="dht11", error="Failed to read sensor")
+                return None, None, _sensor_error("dht11", "no_data", "Failed to read sensor")
             
             return (
                 TemperatureReading(value=round(temperature, 1), unit="celsius"),
@@ -110,17 +159,24 @@ class SensorService:
             )
         except RuntimeError as e:
             # DHT sensors often have transient read errors
-            return None, None, SensorError(sensor="dht11", error=str(e))
+            elapsed = time.perf_counter() - start
+            _DHT_READ.observe(elapsed)
+            record("dht11", elapsed, "DHT11 read")
+            return None, None, _sensor_error("dht11", type(e).__name__, str(e))
         except Exception as e:
-            return None, None, SensorError(sensor="dht11", error=str(e))
+            return None, None, _sensor_error("dht11", type(e).__name__, str(e))
     
     def _read_light(self) -> tuple[Optional[LightReading], Optional[SensorError]]:
         """Read light intensity from BH1750."""
         if not self._light_available or self._light_sensor is None:
-            return None, SensorError(sensor="bh1750", error="Sensor not available")
+            return None, _sensor_missing("bh1750")
         
         try:
+            start = time.perf_counter()
             lux = self._light_sensor.read_light()
+            elapsed = time.perf_counter() - start
+            _LIGHT_READ.observe(elapsed)
+            record("bh1750", elapsed, "BH1750 read")
             description = self._light_sensor.get_light_level_description(lux)
             
             return (
@@ -128,22 +184,26 @@ class SensorService:
                 None
             )
         except Exception as e:
-            return None, SensorError(sensor="bh1750", error=str(e))
+            return None, _sensor_error("bh1750", type(e).__name__, str(e))
     
     def _read_soil(self) -> tuple[Optional[SoilMoistureReading], Optional[SensorError]]:
         """Read soil moisture percentage."""
         if not self._soil_available or self._soil_sensor is None:
-            return None, SensorError(sensor="soil_moisture", error="Sensor not available")
+            return None, _sensor_missing("soil_moisture")
         
         try:
+            start = time.perf_counter()
             moisture = self._soil_sensor.read_moisture_percent()
+            elapsed = time.perf_counter() - start
+            _SOIL_READ.observe(elapsed)
+            record("ads1256", elapsed, "ADS1256 conversion")
             
             return (
                 SoilMoistureReading(value=round(moisture, 1), unit="percent"),
                 None
             )
         except Exception as e:
-            return None, SensorError(sensor="soil_moisture", error=str(e))
+            return None, _sensor_error("soil_moisture", type(e).__name__, str(e))
     
     def read_all(self, use_cache: bool = True) -> SensorResponse:
         """
@@ -155,12 +215,21 @@ class SensorService:
         Returns:
             SensorResponse with all available sensor data
         """
-        with self._lock:
+        requested_at = datetime.utcnow()
+        with span("lock", "Sensor lock wait"):
+            self._lock.acquire()
+        try:
             # Check cache
             if use_cache and self._cached_data and self._last_poll:
                 age = (datetime.utcnow() - self._last_poll).total_seconds()
                 if age < self.poll_interval:
+                    if self._last_poll >= requested_at:
+                        # Another request refreshed the cache while we waited
+                        _CACHE_COALESCED.inc()
+                    else:
+                        _CACHE_HIT.inc()
                     return self._cached_data
+            _CACHE_MISS.inc()
             
             # Read all sensors
             errors: List[SensorError] = []
@@ -193,21 +262,24 @@ class SensorService:
             else:
                 status = "error"
             
-            response = SensorResponse(
-                timestamp=datetime.utcnow(),
-                temperature=temp,
-                humidity=humidity,
-                light=light,
-                soil_moisture=soil,
-                status=status,
-                errors=errors
-            )
+            with span("build", "Pydantic response build"):
+                response = SensorResponse(
+                    timestamp=datetime.utcnow(),
+                    temperature=temp,
+                    humidity=humidity,
+                    light=light,
+                    soil_moisture=soil,
+                    status=status,
+                    errors=errors
+                )
             
             # Update cache
             self._cached_data = response
             self._last_poll = datetime.utcnow()
             
             return response
+        finally:
+            self._lock.release()
     
     def read_temperature(self) -> tuple[Optional[TemperatureReading], Optional[HumidityReading]]:
         """Read just temperature and humidity."""
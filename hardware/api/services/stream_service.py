@@ -0,0 +1,236 @@
+"""
+Live MJPEG stream service
+
+One producer thread pulls frames from the camera's low resolution
+stream and JPEG-encodes each once; every viewer is served the newest
+encoded frame. A viewer that cannot keep up simply skips frames instead
+of queueing them, so one slow connection never delays the others or
+grows memory. The frame rate drops as viewers are added to bound total
+upload through the tunnel, and the producer only runs while someone is
+watching.
+"""
+import asyncio
+import io
+import os
+import threading
+import time
+from typing import AsyncIterator, List, Optional, Tuple
+
+from api.services.camera_service import get_camera_service
+from telemetry import Counter, Gauge
+
+# Live MJPEG stream: frames sent to viewers, or skipped for slow viewers
+STREAM_FRAMES = Counter(
+    "plante_stream_frames",
+    "Live stream frames by result",
+    ["result"],
+)
+STREAM_VIEWERS = Gauge(
+    "plante_stream_viewers",
+    "Connected live stream viewers",
+)
+
+try:
+    # Ships with picamera2; encodes straight from the YUV planes
+    import simplejpeg
+except ImportError:
+    simplejpeg = None
+
+BOUNDARY = "frame"
+
+_SENT = STREAM_FRAMES.labels(result="sent")
+_DROPPED = STREAM_FRAMES.labels(result="dropped")
+
+
+class StreamBusy(RuntimeError):
+    """Raised when the viewer limit is reached."""
+
+
+def encode_yuv420(frame, quality: int) -> bytes:
+    """JPEG-encode a planar YUV420 array (height * 3/2 rows)."""
+    height = frame.shape[0] * 2 // 3
+    width = frame.shape[1]
+    y = frame[:height]
+    chroma = frame[height:].reshape(2, height // 2, width // 2)
+
+    if simplejpeg is not None:
+        return simplejpeg.encode_jpeg_yuv_planes(y, chroma[0], chroma[1], quality=quality)
+
+    from PIL import Image
+    size = (width, height)
+    planes = [Image.fromarray(y)] + [
+        Image.fromarray(plane).resize(size, Image.Resampling.NEAREST) for plane in chroma
+    ]
+    buffer = io.BytesIO()
+    Image.merge("YCbCr", planes).save(buffer, format="JPEG", quality=quality)
+    return buffer.getvalue()
+
+
+class _Viewer:
+    __slots__ = ("loop", "event")
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.event = asyncio.Event()
+
+
+class StreamService:
+    """
+    Fan-out MJPEG stream from the camera's live view stream.
+
+    Args:
+        camera_service: CameraService providing preview frames
+        max_fps: Frame rate with a single viewer
+        min_fps: Floor when many viewers share the frame budget
+        frame_budget: Frames per second across all viewers
+        max_viewers: Concurrent viewer limit
+        quality: JPEG quality
+    """
+
+    def __init__(self, camera_service, max_fps: float = 15, min_fps: float = 2,
+                 frame_budget: float = 30, max_viewers: int = 8, quality: int = 70):
+        self.camera_service = camera_service
+        self.max_fps = max_fps
+        self.min_fps = min_fps
+        self.frame_budget = frame_budget
+        self.max_viewers = max_viewers
+        self.quality = quality
+
+        self._lock = threading.Lock()
+        self._viewers: List[_Viewer] = []
+        self._frame: Optional[bytes] = None
+        self._sequence = 0
+        # Set to stop the running producer (each producer gets its own)
+        self._stop: Optional[threading.Event] = None
+
+    @property
+    def viewers(self) -> int:
+        return len(self._viewers)
+
+    def frame_rate(self) -> float:
+        """Per-viewer frame rate for the current number of viewers."""
+        viewers = max(1, len(self._viewers))
+        return max(self.min_fps, min(self.max_fps, self.frame_budget / viewers))
+
+    # ----- producer -----------------------------------------------------
+
+    def _produce(self, stop: threading.Event) -> None:
+        try:
+            self.camera_service.hold_preview()
+        except Exception as e:
+            print(f"Stream could not start camera: {e}")
+            return
+        try:
+            next_frame = time.monotonic()
+            while not stop.is_set():
+                delay = next_frame - time.monotonic()
+                if delay > 0 and stop.wait(delay):
+                    break
+                next_frame = max(next_frame + 1.0 / self.frame_rate(), time.monotonic())
+
+                try:
+                    jpeg = encode_yuv420(self.camera_service.capture_preview(), self.quality)
+                except Exception as e:
+                    print(f"Stream frame failed: {e}")
+                    stop.wait(1.0)
+                    continue
+                if not stop.is_set():
+                    self._publish(jpeg)
+        finally:
+            self.camera_service.release_preview()
+
+    def _publish(self, jpeg: bytes) -> None:
+        with self._lock:
+            self._frame = jpeg
+            self._sequence += 1
+            viewers = list(self._viewers)
+        for viewer in viewers:
+            try:
+                viewer.loop.call_soon_threadsafe(viewer.event.set)
+            except RuntimeError:
+                # Loop closed under a viewer that has not unsubscribed yet
+                pass
+
+    # ----- viewers ------------------------------------------------------
+
+    def subscribe(self) -> _Viewer:
+        """
+        Reserve a viewer slot (and start the producer for the first).
+
+        Call from the event loop that will iterate frames(viewer).
+
+        Raises:
+            StreamBusy: The viewer limit is reached
+        """
+        viewer = _Viewer(asyncio.get_running_loop())
+        with self._lock:
+            if len(self._viewers) >= self.max_viewers:
+                raise StreamBusy(f"Stream is limited to {self.max_viewers} viewers")
+            self._viewers.append(viewer)
+            STREAM_VIEWERS.set(len(self._viewers))
+            if self._stop is None:
+                self._stop = threading.Event()
+                threading.Thread(target=self._produce, args=(self._stop,),
+                                 name="mjpeg-producer", daemon=True).start()
+        return viewer
+
+    def unsubscribe(self, viewer: _Viewer) -> None:
+        """Release a viewer slot; safe to call more than once."""
+        with self._lock:
+            if viewer not in self._viewers:
+                return
+            self._viewers.remove(viewer)
+            STREAM_VIEWERS.set(len(self._viewers))
+            if not self._viewers and self._stop is not None:
+                # The producer exits after its current frame
+                self._stop.set()
+                self._stop = None
+                self._frame = None
+
+    def _latest(self) -> Tuple[Optional[bytes], int]:
+        with self._lock:
+            return self._frame, self._sequence
+
+    async def frames(self, viewer: _Viewer) -> AsyncIterator[bytes]:
+        """
+        multipart/x-mixed-replace body parts for a subscribed viewer.
+
+        The viewer is unsubscribed when the generator is closed (client
+        disconnect).
+        """
+        try:
+            seen = 0
+            while True:
+                await viewer.event.wait()
+                viewer.event.clear()
+                jpeg, sequence = self._latest()
+                if jpeg is None:
+                    continue
+                if seen and sequence > seen + 1:
+                    # Frames published while this viewer was still sending
+                    _DROPPED.inc(sequence - seen - 1)
+                seen = sequence
+                _SENT.inc()
+                yield (
+                    f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\n"
+                    f"Content-Length: {len(jpeg)}\r\n\r\n"
+                ).encode() + jpeg + b"\r\n"
+        finally:
+            self.unsubscribe(viewer)
+
+
+# Global singleton instance
+_stream_service: Optional[StreamService] = None
+
+
+def get_stream_service() -> StreamService:
+    """Get or create the global stream service instance."""
+    global _stream_service
+    if _stream_service is None:
+        _stream_service = StreamService(
+            get_camera_service(),
+            max_fps=float(os.getenv("STREAM_MAX_FPS", "15")),
+            frame_budget=float(os.getenv("STREAM_FRAME_BUDGET", "30")),
+            max_viewers=int(os.getenv("STREAM_MAX_VIEWERS", "8")),
+        )
+    return _stream_service
@@ -0,0 +1,563 @@
+"""
+Timelapse scheduler
+
+Runs timelapse schedules inside the API so they share the warm camera
+(through the capture queue) with on-demand captures, instead of a CLI
+loop holding the camera for the whole series. Schedules are either a
+fixed interval or a 5-field cron expression, and are persisted to a
+JSON file so they survive restarts. Interval schedules are aligned to
+the Unix epoch, so a restart does not shift the series.
+
+Frames are written to photos/timelapse/YYYY/MM/DD/ and a retention
+policy (count, age and/or disk budget) is enforced after every frame,
+deleting the oldest frames first, so the SD card cannot fill up. A
+second policy covers the other photos (dashboard and named captures),
+checked hourly as those are not taken on a schedule.
+
+Near-duplicate frames (night, still days) are not stored: before each
+capture a perceptual hash of a live view frame is compared with the last
+kept frame of the schedule, and the capture is skipped when they are
+within the schedule's dedup_distance. A frame is still kept at least
+every dedup_max_gap_seconds. Without live view the saved JPEG is hashed
+and deleted again if it is a duplicate.
+
+Frames can be downloaded as one MJPEG AVI per time range: the stored
+JPEGs (or their cached derivatives) are packed into the container as-is
+and streamed, see api/services/avi.py.
+"""
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+
+from api.models import RetentionPolicy, TimelapseSchedule
+from api.services.camera_service import get_camera_service
+from api.services.avi import Frame, MjpegAvi
+from api.services.capture_queue import QueueFull, get_capture_queue
+from api.services.frame_hash import HashIndex, distance, hash_jpeg, hash_yuv420
+from api.services.photo_index import Photo, to_microseconds
+from telemetry import Counter
+
+# Timelapse frames: kept, duplicate (near-identical to the last kept frame,
+# not stored), failed, or dropped because the capture queue was full
+TIMELAPSE_FRAMES = Counter(
+    "plante_timelapse_frames",
+    "Scheduled timelapse frames by result",
+    ["result"],
+)
+
+# Subdirectory of the photos directory holding timelapse frames
+TIMELAPSE_DIR = "timelapse"
+
+SCHEDULE_NAME = re.compile(r"^[a-z0-9_-]{1,32}$")
+
+# Longest the scheduler waits for a frame before moving on
+FRAME_TIMEOUT = 30
+
+# Seconds between retention checks without timelapse frames
+RETENTION_INTERVAL = 3600
+
+_KEPT = TIMELAPSE_FRAMES.labels(result="kept")
+_DUPLICATE = TIMELAPSE_FRAMES.labels(result="duplicate")
+_FAILED = TIMELAPSE_FRAMES.labels(result="failed")
+_DROPPED = TIMELAPSE_FRAMES.labels(result="dropped")
+
+
+def _parse_field(field: str, low: int, high: int) -> Set[int]:
+    """Parse one cron field (*, */n, a, a-b, a-b/n, comma lists)."""
+    values = set()
+    for part in field.split(","):
+        step = 1
+        if "/" in part:
+            part, step_text = part.split("/", 1)
+            step = int(step_text)
+            if step < 1:
+                raise ValueError(f"Invalid step in '{field}'")
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start_text, end_text = part.split("-", 1)
+            start, end = int(start_text), int(end_text)
+        else:
+            start = int(part)
+            end = high if step > 1 else start
+        if not low <= start <= end <= high:
+            raise ValueError(f"Cron field '{field}' out of range {low}-{high}")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronExpression:
+    """
+    Standard 5-field cron expression: minute hour day-of-month month
+    day-of-week (0 or 7 = Sunday). Like cron, when both day fields are
+    restricted a day matching either one fires.
+    """
+
+    def __init__(self, expression: str):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError("Cron expression needs 5 fields: minute hour day month weekday")
+        try:
+            self.minutes = _parse_field(fields[0], 0, 59)
+            self.hours = _parse_field(fields[1], 0, 23)
+            self.days = _parse_field(fields[2], 1, 31)
+            self.months = _parse_field(fields[3], 1, 12)
+            weekdays = _parse_field(fields[4], 0, 7)
+        except ValueError as e:
+            raise ValueError(f"Invalid cron expression '{expression}': {e}")
+        # cron counts Sunday as 0 (or 7); datetime.weekday() counts Monday as 0
+        self.weekdays = {(day - 1) % 7 for day in weekdays}
+        self.any_day = fields[2] == "*"
+        self.any_weekday = fields[4] == "*"
+        self.next_after(datetime.now())
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day = moment.day in self.days
+        weekday = moment.weekday() in self.weekdays
+        if self.any_day or self.any_weekday:
+            return day and weekday
+        return day or weekday
+
+    def next_after(self, after: datetime) -> datetime:
+        """First matching minute strictly after `after`."""
+        moment = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = after + timedelta(days=366 * 5)
+        while moment <= limit:
+            if moment.month not in self.months:
+                year, month = divmod(moment.month, 12)
+                moment = moment.replace(year=moment.year + year, month=month + 1, day=1,
+                                        hour=0, minute=0)
+            elif not self._day_matches(moment):
+                moment = (moment + timedelta(days=1)).replace(hour=0, minute=0)
+            elif moment.hour not in self.hours:
+                moment = (moment + timedelta(hours=1)).replace(minute=0)
+            elif moment.minute not in self.minutes:
+                moment += timedelta(minutes=1)
+            else:
+                return moment
+        raise ValueError("Cron expression never fires")
+
+
+def next_run(schedule: TimelapseSchedule, after: datetime) -> datetime:
+    """Next time a schedule fires after `after` (local time)."""
+    if schedule.cron:
+        return CronExpression(schedule.cron).next_after(after)
+    interval = schedule.interval_seconds
+    seconds = (int(after.timestamp()) // interval + 1) * interval
+    return datetime.fromtimestamp(seconds)
+
+
+def validate_schedule(name: str, schedule: TimelapseSchedule) -> None:
+    """
+    Raises:
+        ValueError: Bad name, or not exactly one of interval/cron
+    """
+    if not SCHEDULE_NAME.match(name):
+        raise ValueError("Schedule names are 1-32 characters of a-z, 0-9, _ and -")
+    if (schedule.interval_seconds is None) == (schedule.cron is None):
+        raise ValueError("Set exactly one of interval_seconds or cron")
+    if schedule.cron:
+        CronExpression(schedule.cron)
+
+
+def expired(photos: List[Photo], policy: RetentionPolicy, now: Optional[float] = None) -> List[Photo]:
+    """The photos (oldest first) a retention policy would delete."""
+    photos = list(photos)
+    remove: List[Photo] = []
+
+    if policy.max_age_days is not None:
+        cutoff = ((now or time.time()) - policy.max_age_days * 86400) * 1e6
+        while photos and photos[0].mtime_us < cutoff:
+            remove.append(photos.pop(0))
+    if policy.max_count is not None and len(photos) > policy.max_count:
+        excess = len(photos) - policy.max_count
+        remove.extend(photos[:excess])
+        photos = photos[excess:]
+    if policy.max_megabytes is not None:
+        budget = policy.max_megabytes * 1024 * 1024
+        total = sum(photo.size for photo in photos)
+        while photos and total > budget:
+            photo = photos.pop(0)
+            total -= photo.size
+            remove.append(photo)
+    return remove
+
+
+class TimelapseService:
+    """
+    Persistent timelapse scheduler with retention.
+
+    Args:
+        state_file: JSON file holding schedules and retention policies
+    """
+
+    def __init__(self, state_file: str = "~/Plante/hardware/timelapse.json"):
+        self.state_file = os.path.expanduser(state_file)
+        self.camera_service = get_camera_service()
+        self.root = os.path.join(self.camera_service.save_dir, TIMELAPSE_DIR)
+
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.schedules: Dict[str, TimelapseSchedule] = {}
+        self.retention = RetentionPolicy()
+        # For photos outside the timelapse directory
+        self.photo_retention = RetentionPolicy()
+        self._next: Dict[str, datetime] = {}
+        # Perceptual hashes of stored frames, and each schedule's last kept frame
+        self.hashes = HashIndex(os.path.splitext(self.state_file)[0] + "_hashes.txt")
+        self._last_kept: Dict[str, Tuple[int, datetime]] = {}
+        self._load()
+
+    # ----- persistence --------------------------------------------------
+
+    def _load(self) -> None:
+        try:
+            with open(self.state_file, 'r') as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            print(f"Timelapse state unreadable, starting empty: {e}")
+            return
+
+        for name, data in state.get("schedules", {}).items():
+            try:
+                schedule = TimelapseSchedule(**data)
+                validate_schedule(name, schedule)
+                self.schedules[name] = schedule
+            except Exception as e:
+                print(f"Skipping timelapse schedule '{name}': {e}")
+        self.retention = RetentionPolicy(**state.get("retention", {}))
+        self.photo_retention = RetentionPolicy(**state.get("photo_retention", {}))
+
+    def _save(self) -> None:
+        """Write state atomically so a power cut never leaves half a file."""
+        state = {
+            "schedules": {name: s.model_dump() for name, s in self.schedules.items()},
+            "retention": self.retention.model_dump(),
+            "photo_retention": self.photo_retention.model_dump(),
+        }
+        os.makedirs(os.path.dirname(self.state_file), exist_ok=True)
+        tmp = f"{self.state_file}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(state, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.state_file)
+
+    # ----- management ---------------------------------------------------
+
+    def set_schedule(self, name: str, schedule: TimelapseSchedule) -> None:
+        """
+        Create or replace a schedule.
+
+        Raises:
+            ValueError: Invalid name or rule
+        """
+        validate_schedule(name, schedule)
+        with self._lock:
+            self.schedules[name] = schedule
+            self._next.pop(name, None)
+            self._save()
+        self._wake.set()
+
+    def delete_schedule(self, name: str) -> bool:
+        with self._lock:
+            if self.schedules.pop(name, None) is None:
+                return False
+            self._next.pop(name, None)
+            self._save()
+        self._wake.set()
+        return True
+
+    def set_retention(self, retention: RetentionPolicy) -> int:
+        """Replace the retention policy and apply it; returns frames removed."""
+        with self._lock:
+            self.retention = retention
+            self._save()
+        return self.enforce_retention()
+
+    def set_photo_retention(self, retention: RetentionPolicy) -> int:
+        """Replace the policy for non-timelapse photos and apply it."""
+        with self._lock:
+            self.photo_retention = retention
+            self._save()
+        return self.enforce_retention()
+
+    def next_runs(self) -> Dict[str, datetime]:
+        with self._lock:
+            return dict(self._next)
+
+    def storage(self) -> Tuple[int, int]:
+        """(frame count, total bytes) of stored timelapse frames."""
+        photos = self.camera_service.index.under(TIMELAPSE_DIR)
+        return len(photos), sum(photo.size for photo in photos)
+
+    def other_photos(self) -> List[Photo]:
+        """Indexed photos outside the timelapse directory, oldest first."""
+        prefix = self.root + os.sep
+        return [photo for photo in self.camera_service.index.under("")
+                if not photo.filepath.startswith(prefix)]
+
+    def frames(
+        self,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        schedule: Optional[str] = None,
+    ) -> List[Photo]:
+        """Stored frames with since <= time <= until, oldest first."""
+        photos = self.camera_service.index.under(TIMELAPSE_DIR)
+        if schedule is not None:
+            prefix = f"tl_{schedule}_"
+            photos = [photo for photo in photos if photo.filename.startswith(prefix)]
+        if since is not None:
+            start = to_microseconds(since)
+            photos = [photo for photo in photos if photo.mtime_us >= start]
+        if until is not None:
+            end = to_microseconds(until)
+            photos = [photo for photo in photos if photo.mtime_us <= end]
+        return photos
+
+    def video(
+        self,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        schedule: Optional[str] = None,
+        size: str = "medium",
+        fps: int = 24,
+    ) -> MjpegAvi:
+        """
+        Plan an MJPEG AVI of the frames in a range.
+
+        Missing derivatives are rendered here, before anything is sent,
+        since the container header needs every frame's size.
+
+        Args:
+            size: "original" or a JPEG derivative size ("thumb", "medium")
+
+        Raises:
+            ValueError: No frames, or the video would be too large
+        """
+        photos = self.frames(since, until, schedule)
+        files = []
+        for photo in photos:
+            try:
+                path, _ = self.camera_service.get_photo_file(photo, size)
+                files.append((photo, Frame(path, os.path.getsize(path))))
+            except OSError:
+                # Deleted since it was listed
+                continue
+        if not files:
+            raise ValueError("No timelapse frames in range")
+
+        from PIL import Image
+        with Image.open(files[0][1].path) as first:
+            width, height = first.size
+
+        def reopen(position: int) -> Optional[str]:
+            # Derivatives may be evicted mid-stream; re-rendering gives
+            # the same bytes. Originals cannot come back.
+            if size == "original":
+                return None
+            try:
+                return self.camera_service.get_photo_file(files[position][0], size)[0]
+            except OSError:
+                return None
+
+        return MjpegAvi([frame for _, frame in files], width, height, fps, reopen=reopen)
+
+    # ----- retention ----------------------------------------------------
+
+    def enforce_retention(self) -> int:
+        """Delete the oldest frames and photos beyond the retention policies."""
+        frames = expired(self.camera_service.index.under(TIMELAPSE_DIR), self.retention)
+        photos = expired(self.other_photos(), self.photo_retention)
+
+        for photo in frames + photos:
+            try:
+                os.remove(photo.filepath)
+            except FileNotFoundError:
+                pass
+            self.camera_service.index.discard(photo.id)
+            self.hashes.discard(photo.id)
+            self._remove_empty_dirs(os.path.dirname(photo.filepath))
+        if frames:
+            print(f"Timelapse retention removed {len(frames)} frame(s)")
+        if photos:
+            print(f"Photo retention removed {len(photos)} photo(s)")
+        return len(frames) + len(photos)
+
+    def _remove_empty_dirs(self, directory: str) -> None:
+        """Remove emptied day/month/year directories, stopping at the root."""
+        while directory.startswith(self.root + os.sep):
+            try:
+                os.rmdir(directory)
+            except OSError:
+                return
+            directory = os.path.dirname(directory)
+
+    # ----- scheduler ----------------------------------------------------
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="timelapse", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def _due(self, now: datetime) -> Tuple[List[str], Optional[datetime]]:
+        """Schedules due now, and the next wake-up time."""
+        due = []
+        with self._lock:
+            for name, schedule in self.schedules.items():
+                if not schedule.enabled:
+                    self._next.pop(name, None)
+                    continue
+                if name not in self._next:
+                    self._next[name] = next_run(schedule, now)
+                elif self._next[name] <= now:
+                    due.append(name)
+                    self._next[name] = next_run(schedule, now)
+            wake = min(self._next.values(), default=None)
+        return due, wake
+
+    def _run(self) -> None:
+        self.enforce_retention()
+        self.hashes.retain(photo.id for photo in self.frames())
+        next_retention = time.monotonic() + RETENTION_INTERVAL
+        while not self._stop.is_set():
+            now = datetime.now()
+            due, wake = self._due(now)
+            for name in due:
+                self._capture(name, now)
+            if time.monotonic() >= next_retention:
+                self.enforce_retention()
+                next_retention = time.monotonic() + RETENTION_INTERVAL
+
+            timeout = next_retention - time.monotonic()
+            if wake:
+                timeout = min(timeout, (wake - datetime.now()).total_seconds())
+            if timeout > 0:
+                self._wake.wait(timeout)
+            self._wake.clear()
+
+    def _capture(self, name: str, now: datetime) -> None:
+        schedule = self.schedules.get(name)
+        if schedule is None:
+            return
+        dedup = schedule.dedup_distance is not None
+
+        # Check a live view frame first so duplicates are never encoded or written
+        preview_hash = self._preview_hash() if dedup else None
+        if preview_hash is not None and self._is_duplicate(name, schedule, preview_hash, now):
+            _DUPLICATE.inc()
+            return
+
+        filename = os.path.join(
+            TIMELAPSE_DIR, now.strftime("%Y/%m/%d"),
+            f"tl_{name}_{now.strftime('%Y%m%d_%H%M%S')}.jpg",
+        )
+        try:
+            job = get_capture_queue().submit(filename=filename,
+                                             full_resolution=schedule.full_resolution)
+        except QueueFull:
+            _DROPPED.inc()
+            print(f"Timelapse '{name}' skipped a frame: capture queue full")
+            return
+        if not job.wait(FRAME_TIMEOUT) or job.error:
+            _FAILED.inc()
+            print(f"Timelapse '{name}' frame failed: {job.error or 'timed out'}")
+            return
+
+        filepath = job.photo.filepath
+        if dedup:
+            frame_hash = preview_hash
+            if frame_hash is None:
+                frame_hash = self._file_hash(filepath)
+                if frame_hash is not None and self._is_duplicate(name, schedule, frame_hash, now):
+                    _DUPLICATE.inc()
+                    self._discard_frame(filepath)
+                    return
+            if frame_hash is not None:
+                self.hashes.add(self.camera_service.index.photo_id(filepath), frame_hash)
+                self._last_kept[name] = (frame_hash, now)
+        _KEPT.inc()
+        self.enforce_retention()
+
+    def _preview_hash(self) -> Optional[int]:
+        """Hash of the current live view frame, or None without live view."""
+        if not self.camera_service.supports_preview:
+            return None
+        try:
+            self.camera_service.hold_preview()
+            try:
+                frame = self.camera_service.capture_preview()
+            finally:
+                self.camera_service.release_preview()
+            return hash_yuv420(frame)
+        except Exception as e:
+            print(f"Timelapse preview hash failed: {e}")
+            return None
+
+    @staticmethod
+    def _file_hash(filepath: str) -> Optional[int]:
+        try:
+            return hash_jpeg(filepath)
+        except Exception as e:
+            print(f"Timelapse frame hash failed: {e}")
+            return None
+
+    def _discard_frame(self, filepath: str) -> None:
+        try:
+            os.remove(filepath)
+        except FileNotFoundError:
+            pass
+        self.camera_service.index.discard(filepath)
+        self._remove_empty_dirs(os.path.dirname(filepath))
+
+    def _is_duplicate(self, name: str, schedule: TimelapseSchedule,
+                      frame_hash: int, now: datetime) -> bool:
+        """Whether a frame is too close to the schedule's last kept frame."""
+        last = self._last_kept.get(name) or self._find_last_kept(name)
+        if last is None:
+            return False
+        last_hash, last_time = last
+        if (now - last_time).total_seconds() >= schedule.dedup_max_gap_seconds:
+            return False
+        return distance(frame_hash, last_hash) <= schedule.dedup_distance
+
+    def _find_last_kept(self, name: str) -> Optional[Tuple[int, datetime]]:
+        """Newest hashed frame of a schedule, e.g. after a restart."""
+        for photo in reversed(self.frames(schedule=name)):
+            frame_hash = self.hashes.get(photo.id)
+            if frame_hash is not None:
+                self._last_kept[name] = (frame_hash, photo.timestamp)
+                return self._last_kept[name]
+        return None
+
+
+# Global singleton instance
+_timelapse_service: Optional[TimelapseService] = None
+
+
+def get_timelapse_service() -> TimelapseService:
+    """Get or create the global timelapse service instance."""
+    global _timelapse_service
+    if _timelapse_service is None:
+        _timelapse_service = TimelapseService(
+            state_file=os.getenv("TIMELAPSE_FILE", "~/Plante/hardware/timelapse.json"),
+        )
+    return _timelapse_service
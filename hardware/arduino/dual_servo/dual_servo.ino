@@ -7,8 +7,29 @@
  *   2:45    - Set servo 2 to 45 degrees
  *   BOTH:90 - Set both servos to 90 degrees
  *   STATUS  - Get current positions
+ *
+ *   MOVE:BOTH:90:1500:EASE
+ *           - Move servo(s) 1, 2 or BOTH to 90 degrees over 1500 ms,
+ *             interpolating here (profile LINEAR or EASE, default EASE).
+ *             Replies once, when the move ends: DONE:1=90,2=90
+ *   STOP    - Stop a move where it is: STOPPED:1=47,2=47
+ *             (no reply when nothing is moving)
+ *
+ * Any other command received during a move (except STATUS) stops it
+ * first and STOPPED is printed, so a new MOVE pre-empts the previous one.
+ *
+ * Sequence tags: a command may start with "#<n> " (e.g. "#17 1:90"), and
+ * every reply to it then starts with the same tag ("#17 OK:1=90"), so
+ * the Pi can have several commands in flight and match replies exactly.
+ * DONE/STOPPED carry the tag of the MOVE they finish. READY:2_SERVOS:TAGS
+ * announces support; untagged commands get untagged replies as before.
+ *
+ * Positions are saved to EEPROM once they have been still for 2 s and
+ * restored at boot, so a reset (the Pi opening the port) leaves the lid
+ * where it was instead of driving it to 0.
  */
 
+#include <EEPROM.h>
 #include <Servo.h>
 
 Servo servo1;
@@ -17,18 +38,45 @@ Servo servo2;
 int pos1 = 0;
 int pos2 = 0;
 
+// EEPROM layout: marker byte, then servo 1 and servo 2 positions
+const int EEPROM_MARKER = 0;
+const int EEPROM_POS1 = 1;
+const int EEPROM_POS2 = 2;
+const byte MARKER = 0x5A;
+const unsigned long SAVE_DELAY = 2000;
+bool unsaved = false;
+unsigned long lastChange = 0;
+
 String input = "";
 
+// Sequence tag of the command being processed ("" if untagged)
+String tag = "";
+
+// Interpolated move in progress
+bool moving = false;
+bool moveServo1 = false;
+bool moveServo2 = false;
+bool easeMove = true;
+int from1 = 0, from2 = 0, to1 = 0, to2 = 0;
+unsigned long moveStart = 0;
+unsigned long moveDuration = 0;
+String moveTag = "";
+
 void setup() {
   Serial.begin(9600);
 
+  if (EEPROM.read(EEPROM_MARKER) == MARKER) {
+    pos1 = constrain(EEPROM.read(EEPROM_POS1), 0, 180);
+    pos2 = constrain(EEPROM.read(EEPROM_POS2), 0, 180);
+  }
+
+  // Writing before attach() makes the first pulse the saved position
+  servo1.write(pos1);
+  servo2.write(pos2);
   servo1.attach(9); // Servo 1 on pin 9
   servo2.attach(3); // Servo 2 on pin 3
 
-  servo1.write(0);
-  servo2.write(0);
-
-  Serial.println("READY:2_SERVOS");
+  Serial.println("READY:2_SERVOS:TAGS");
 }
 
 void loop() {
@@ -41,14 +89,144 @@ void loop() {
       input += c;
     }
   }
+  updateMove();
+  savePositions();
+}
+
+void positionsChanged() {
+  unsaved = true;
+  lastChange = millis();
+}
+
+// EEPROM cells wear out, so only write once the servos have settled
+void savePositions() {
+  if (!unsaved || moving || millis() - lastChange < SAVE_DELAY) {
+    return;
+  }
+  EEPROM.update(EEPROM_POS1, pos1);
+  EEPROM.update(EEPROM_POS2, pos2);
+  EEPROM.update(EEPROM_MARKER, MARKER);
+  unsaved = false;
+}
+
+// Start a reply line with the command's tag
+void reply(const String &lineTag) {
+  if (lineTag.length() > 0) {
+    Serial.print(lineTag);
+    Serial.print(' ');
+  }
+}
+
+void printPositions(const char *prefix) {
+  reply(moveTag);
+  Serial.print(prefix);
+  Serial.print("1=");
+  Serial.print(pos1);
+  Serial.print(",2=");
+  Serial.println(pos2);
+}
+
+void writeServos(int angle1, int angle2) {
+  if (moveServo1 && angle1 != pos1) {
+    servo1.write(angle1);
+    pos1 = angle1;
+    positionsChanged();
+  }
+  if (moveServo2 && angle2 != pos2) {
+    servo2.write(angle2);
+    pos2 = angle2;
+    positionsChanged();
+  }
+}
+
+void updateMove() {
+  if (!moving) {
+    return;
+  }
+  unsigned long elapsed = millis() - moveStart;
+  if (elapsed >= moveDuration) {
+    writeServos(to1, to2);
+    moving = false;
+    printPositions("DONE:");
+    return;
+  }
+  float t = (float)elapsed / moveDuration;
+  if (easeMove) {
+    t = 0.5 - 0.5 * cos(PI * t);  // ease in and out
+  }
+  writeServos(from1 + (int)round((to1 - from1) * t),
+              from2 + (int)round((to2 - from2) * t));
+}
+
+void startMove(String args) {
+  // args: SERVO:ANGLE:MS[:PROFILE]
+  int first = args.indexOf(':');
+  int second = args.indexOf(':', first + 1);
+  if (first == -1 || second == -1) {
+    reply(tag);
+    Serial.println("ERROR:Use MOVE:BOTH:90:1500[:EASE|LINEAR]");
+    return;
+  }
+  int third = args.indexOf(':', second + 1);
+
+  String servo = args.substring(0, first);
+  int angle = constrain(args.substring(first + 1, second).toInt(), 0, 180);
+  long duration = args.substring(second + 1, third == -1 ? args.length() : third).toInt();
+  String profile = third == -1 ? "EASE" : args.substring(third + 1);
+
+  if (servo != "1" && servo != "2" && servo != "BOTH") {
+    reply(tag);
+    Serial.println("ERROR:Unknown servo. Use 1, 2, or BOTH");
+    return;
+  }
+
+  moveTag = tag;
+  moveServo1 = servo == "1" || servo == "BOTH";
+  moveServo2 = servo == "2" || servo == "BOTH";
+  easeMove = profile != "LINEAR";
+  from1 = pos1;
+  from2 = pos2;
+  to1 = moveServo1 ? angle : pos1;
+  to2 = moveServo2 ? angle : pos2;
+  moveDuration = constrain(duration, 0, 60000);
+  moveStart = millis();
+  moving = true;
+  updateMove();
 }
 
 void processCommand(String cmd) {
   cmd.trim();
   cmd.toUpperCase();
 
+  tag = "";
+  if (cmd.startsWith("#")) {
+    int space = cmd.indexOf(' ');
+    if (space == -1) {
+      space = cmd.length();
+    }
+    tag = cmd.substring(0, space);
+    cmd = cmd.substring(space);
+    cmd.trim();
+  }
+
+  // Any command but STATUS stops a move in progress
+  if (moving && cmd != "STATUS") {
+    moving = false;
+    printPositions("STOPPED:");
+  }
+
+  if (cmd == "STOP") {
+    return;
+  }
+
+  if (cmd.startsWith("MOVE:")) {
+    startMove(cmd.substring(5));
+    return;
+  }
+
   // STATUS command
   if (cmd == "STATUS") {
+    reply(tag);
     Serial.print("STATUS:1=");
     Serial.print(pos1);
     Serial.print(",2=");
@@ -59,6 +237,7 @@ void processCommand(String cmd) {
   // Parse command (format: "SERVO:ANGLE")
   int colonIndex = cmd.indexOf(':');
   if (colonIndex == -1) {
+    reply(tag);
     Serial.println("ERROR:Invalid format. Use 1:90 or 2:45 or BOTH:90");
     return;
   }
@@ -67,6 +246,8 @@ void processCommand(String cmd) {
   int angle = cmd.substring(colonIndex + 1).toInt();
   angle = constrain(angle, 0, 180);
 
+  reply(tag);
+  positionsChanged();
   if (servo == "1") {
     servo1.write(angle);
     pos1 = angle;
@@ -0,0 +1,350 @@
+"""
+Pipelined serial transport for dual_servo.ino
+
+A reader thread owns the port's input and hands every reply line to the
+command it answers, so a command costs one serial round-trip instead of
+a fixed sleep plus a read, and several commands can be in flight at
+once. Replies are matched by sequence tag when the firmware announces
+tag support (READY:2_SERVOS:TAGS): commands go out as "#<n> 1:90" and
+come back as "#<n> OK:1=90". Older firmware sends untagged replies, and
+an ERROR line does not say which command failed, so without tags only
+one command (MOVE included) is outstanding at a time and each reply
+goes to it.
+
+With tags, at most MAX_IN_FLIGHT commands are outstanding so they fit
+in the Uno's 64-byte receive buffer. A command that gets no reply by its deadline
+fails with TimeoutError and is forgotten; with tags its late reply is
+then dropped, without tags it may be taken as the reply to the next
+command.
+
+The time each command waits for the port, its round-trip time and its
+timeouts are recorded in telemetry.
+
+The port only needs pyserial's write(), readline() and timeout, so the
+same transport also runs over the servo link's local socket.
+"""
+import itertools
+import os
+import socket
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import CancelledError, Future, TimeoutError as FutureTimeout
+from typing import Dict, List, Optional
+
+import serial
+
+from telemetry import Counter, Histogram, record
+
+SERIAL_COMMAND_SECONDS = Histogram(
+    "plante_serial_command_seconds",
+    "Arduino serial command round-trip time",
+    ["command"],
+)
+# Time from a command being issued to it going out on the port (waiting
+# for a free in-flight slot and for other writers)
+SERIAL_WAIT_SECONDS = Histogram(
+    "plante_serial_wait_seconds",
+    "Time a serial command waited for the port before being sent",
+    ["command"],
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+SERIAL_TIMEOUTS = Counter(
+    "plante_serial_timeouts",
+    "Serial commands that got no reply in time",
+    ["command"],
+)
+# ready: another poll for the Arduino's READY; reconnect: servo link retry
+SERVO_RETRIES = Counter(
+    "plante_servo_retries",
+    "Arduino connection retries by kind",
+    ["kind"],
+)
+
+# Commands awaiting a reply at once (about 15 bytes each)
+MAX_IN_FLIGHT = 4
+
+# Tags wrap here; they only need to be unique among commands in flight
+TAG_LIMIT = 10000
+
+# Reply timeout for ordinary commands (seconds)
+DEFAULT_TIMEOUT = 2.0
+
+# Where the servo link serves the Arduino to other processes
+DEFAULT_LINK_SOCKET = "~/Plante/hardware/servo.sock"
+
+
+def link_socket_path() -> str:
+    """Servo link socket path (SERVO_SOCKET, or the default)."""
+    return os.path.expanduser(os.getenv("SERVO_SOCKET", DEFAULT_LINK_SOCKET))
+
+
+class SocketPort:
+    """A connected Unix socket with the part of pyserial's API the transport uses."""
+
+    def __init__(self, sock: socket.socket):
+        self._sock = sock
+        self._buffer = b""
+
+    @property
+    def timeout(self) -> Optional[float]:
+        return self._sock.gettimeout()
+
+    @timeout.setter
+    def timeout(self, value: Optional[float]) -> None:
+        self._sock.settimeout(value)
+
+    def write(self, data: bytes) -> int:
+        self._sock.sendall(data)
+        return len(data)
+
+    def readline(self) -> bytes:
+        """One line, or b"" if none arrives within timeout."""
+        while b"\n" not in self._buffer:
+            try:
+                chunk = self._sock.recv(4096)
+            except socket.timeout:
+                return b""
+            if not chunk:
+                raise ConnectionError("Servo link closed the connection")
+            self._buffer += chunk
+        line, _, self._buffer = self._buffer.partition(b"\n")
+        return line + b"\n"
+
+    def close(self) -> None:
+        self._sock.close()
+
+
+def connect_link(path: str, timeout: float = 1.0) -> Optional[SocketPort]:
+    """Connect to a running servo link; None if there is none at path."""
+    if not os.path.exists(path):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(path)
+    except OSError:
+        sock.close()
+        return None
+    return SocketPort(sock)
+
+
+def command_kind(command: str) -> str:
+    """Metric label for a command: 1, 2, BOTH, STATUS, MOVE or OTHER."""
+    kind = str(command).split(':')[0].strip().upper()
+    return kind if kind in ('1', '2', 'BOTH', 'STATUS', 'MOVE') else 'OTHER'
+
+
+class Request:
+    """One command awaiting its reply."""
+
+    __slots__ = ("id", "command", "kind", "sent", "deadline", "future")
+
+    def __init__(self, request_id: int, command: str, timeout: float):
+        self.id = request_id
+        self.command = command
+        self.kind = command_kind(command)
+        self.sent = 0.0
+        # time.monotonic() after which the request fails
+        self.deadline = time.monotonic() + timeout
+        # Resolves to the reply line, without its tag
+        self.future: Future = Future()
+
+
+class SerialTransport:
+    """
+    Request/reply matching over an open dual_servo.ino serial port.
+
+    Args:
+        port: Open pyserial port (or anything with its write/readline/timeout);
+            the transport takes over reading it
+        tagged: Whether the firmware echoes "#<n> " sequence tags
+        window: Most commands in flight at once (1 without tags)
+    """
+
+    def __init__(self, port, tagged: bool, window: int = MAX_IN_FLIGHT):
+        self.port = port
+        self.tagged = tagged
+        self._lock = threading.Lock()
+        # Untagged replies can't be told apart, so nothing is pipelined
+        self.window = window if tagged else 1
+        self._window = threading.BoundedSemaphore(self.window)
+        self._ids = itertools.count()
+        # Send order; request id -> request
+        self._pending: Dict[int, Request] = OrderedDict()
+        self._closed = False
+        self._reader: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        # Short reads so close() is noticed quickly
+        self.port.timeout = 0.1
+        self._reader = threading.Thread(target=self._read, name="servo-serial", daemon=True)
+        self._reader.start()
+
+    @property
+    def is_alive(self) -> bool:
+        """Whether replies are still being read (False after a port error)."""
+        return not self._closed and self._reader is not None and self._reader.is_alive()
+
+    def close(self) -> None:
+        self._closed = True
+        if self._reader is not None:
+            self._reader.join(timeout=1)
+            self._reader = None
+        self._fail_all(ConnectionError("Serial transport closed"))
+
+    # ----- sending ------------------------------------------------------
+
+    def request(self, command: str, timeout: float = DEFAULT_TIMEOUT) -> Request:
+        """
+        Send a command without waiting for its reply.
+
+        With tags, MOVE commands do not take a window slot: the firmware
+        reads them at once and only replies when the move ends. Without
+        tags a MOVE holds the only slot until its DONE/STOPPED reply.
+
+        Args:
+            command: Command line, without tag or newline
+            timeout: Seconds until the request fails with TimeoutError
+
+        Raises:
+            TimeoutError: No window slot came free within timeout
+        """
+        issued = time.perf_counter()
+        request = Request(next(self._ids), command, timeout)
+        windowed = request.kind != 'MOVE' or not self.tagged
+        if windowed and not self._window.acquire(timeout=timeout):
+            raise TimeoutError(f"{self.window} commands already awaiting replies")
+        if windowed:
+            request.future.add_done_callback(lambda _: self._window.release())
+
+        with self._lock:
+            if self._closed:
+                request.future.set_exception(ConnectionError("Serial transport closed"))
+                return request
+            line = f"#{request.id % TAG_LIMIT} {command}" if self.tagged else command
+            self._pending[request.id] = request
+            request.sent = time.perf_counter()
+            self.port.write(f"{line}\n".encode())
+        waited = request.sent - issued
+        SERIAL_WAIT_SECONDS.labels(command=request.kind).observe(waited)
+        record("serial_wait", waited, "Wait for the serial port")
+        return request
+
+    def send(self, command: str) -> None:
+        """Send a command that gets no reply (e.g. STOP)."""
+        with self._lock:
+            self.port.write(f"{command}\n".encode())
+
+    def wait(self, request: Request, timeout: float = DEFAULT_TIMEOUT) -> str:
+        """
+        The reply to a request.
+
+        Raises:
+            TimeoutError: No reply within timeout (the request is forgotten)
+        """
+        try:
+            return request.future.result(timeout)
+        except FutureTimeout:
+            # Also caught on Python 3.11+ when _expire() failed the request
+            # (TimeoutError is FutureTimeout there); it counted that one
+            if not request.future.done():
+                self.abandon(request)
+                SERIAL_TIMEOUTS.labels(command=request.kind).inc()
+            raise TimeoutError(f"No reply to {request.command}") from None
+        except CancelledError:
+            raise TimeoutError(f"No reply to {request.command}") from None
+
+    def abandon(self, request: Request) -> None:
+        """Stop waiting for a request's reply."""
+        with self._lock:
+            self._pending.pop(request.id, None)
+        if not request.future.done():
+            request.future.cancel()
+
+    def command(self, command: str, timeout: float = DEFAULT_TIMEOUT) -> str:
+        """Send a command and wait for its reply."""
+        return self.wait(self.request(command, timeout), timeout)
+
+    def pipeline(self, commands: List[str], timeout: float = DEFAULT_TIMEOUT) -> List[str]:
+        """
+        Send commands back to back and return their replies in order.
+
+        Without tags each command still waits for the one before it.
+        """
+        requests = [self.request(command, timeout) for command in commands]
+        return [self.wait(request, timeout) for request in requests]
+
+    # ----- receiving ----------------------------------------------------
+
+    def _read(self) -> None:
+        line = b""
+        while not self._closed:
+            try:
+                line += self.port.readline()
+            except (serial.SerialException, OSError, TypeError) as e:
+                # TypeError: pyserial's read on a port closed underneath it
+                if not self._closed:
+                    print(f"Serial read failed: {e}")
+                    self._fail_all(ConnectionError(str(e)))
+                return
+            self._expire()
+            if not line.endswith(b"\n"):
+                continue
+            self._dispatch(line.decode('utf-8', errors='replace').strip())
+            line = b""
+
+    def _dispatch(self, text: str) -> None:
+        if not text:
+            return
+        with self._lock:
+            request = self._match(text)
+            if request is None:
+                print(f"Unmatched serial reply: {text}")
+                return
+            del self._pending[request.id]
+        if text.startswith("#"):
+            text = text.partition(" ")[2]
+        if request.kind != 'MOVE':
+            SERIAL_COMMAND_SECONDS.labels(command=request.kind).observe(time.perf_counter() - request.sent)
+        if not request.future.done():
+            request.future.set_result(text)
+
+    def _match(self, text: str) -> Optional[Request]:
+        if text.startswith("#"):
+            tag = text[1:].partition(" ")[0]
+            for request in self._pending.values():
+                if str(request.id % TAG_LIMIT) == tag:
+                    return request
+            return None
+        if text.startswith("READY"):
+            # The board reset: whatever was in flight is lost
+            return None
+        for request in self._pending.values():
+            is_move = request.kind == 'MOVE'
+            if text.startswith(("DONE", "STOPPED")):
+                if is_move:
+                    return request
+            elif text.startswith("ERROR") or not is_move:
+                return request
+        return None
+
+    def _expire(self) -> None:
+        """Fail requests whose deadline has passed."""
+        now = time.monotonic()
+        with self._lock:
+            expired = [request for request in self._pending.values() if request.deadline < now]
+            for request in expired:
+                del self._pending[request.id]
+        for request in expired:
+            SERIAL_TIMEOUTS.labels(command=request.kind).inc()
+            if not request.future.done():
+                request.future.set_exception(TimeoutError(f"No reply to {request.command}"))
+
+    def _fail_all(self, error: Exception) -> None:
+        with self._lock:
+            pending = list(self._pending.values())
+            self._pending.clear()
+        for request in pending:
+            if not request.future.done():
+                request.future.set_exception(error)
@@ -11,23 +11,65 @@ Usage:
     python3 servo_control.py demo         # Run demo
     python3 servo_control.py test         # Run test sequence (0→90→180→90→0)
     python3 servo_control.py status       # Get current positions
+    python3 servo_control.py move both 90 1500  # Glide both to 90° over 1.5 s
+
+Firmware with the MOVE command interpolates moves on the Arduino and
+replies once when they finish; with older firmware, moves fall back to
+one serial command per step.
+
+Commands are not paced by fixed sleeps: a reader thread matches each
+reply to its command (see serial_transport.py), and send_commands()
+pipelines several at once. When the API's servo link is running (see
+servo_link.py), connect() talks to the Arduino through its local socket
+instead of opening the port, which would reset the board.
 """
 
 import serial
 import time
 import sys
+import os
+from concurrent.futures import wait as wait_futures
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from arduino.serial_transport import DEFAULT_TIMEOUT, SERVO_RETRIES, SerialTransport, connect_link, link_socket_path
+from backends import serial_port
+from telemetry import record
 
 SERIAL_PORT = '/dev/ttyACM0'
 BAUD_RATE = 9600
 
+# Longest move the firmware accepts (ms)
+MAX_MOVE_MS = 60000
+
 
 class DualServoController:
-    def __init__(self, port=SERIAL_PORT):
-        self.port = port
+    # Motion profiles the firmware's MOVE accepts
+    profiles = ("ease", "linear")
+    
+    def __init__(self, port=SERIAL_PORT, use_link=True):
+        # With PLANTE_BACKEND_SERIAL=sim this is the emulator's pty instead
+        self.port = serial_port(port)
+        # Go through a running servo link rather than opening the port
+        self.use_link = use_link
         self.serial = None
+        # Matches replies to commands; several can be in flight
+        self.transport = None
+        # Whether the firmware understands MOVE (None until tried)
+        self.supports_move = None
         
     def connect(self):
-        """Connect to Arduino."""
+        """Connect to Arduino (through the servo link if one is running)."""
+        if self.use_link:
+            path = link_socket_path()
+            link = connect_link(path)
+            if link is not None:
+                # The link keeps the port open: no reset, no READY wait
+                self.serial = link
+                self.transport = SerialTransport(link, tagged=True)
+                self.transport.start()
+                print(f"Connected to Arduino via servo link {path}")
+                return True
+        
         try:
             self.serial = serial.Serial(self.port, BAUD_RATE, timeout=2)
             time.sleep(3)  # Wait for Arduino reset (needs ~3 seconds)
@@ -35,18 +77,20 @@ class DualServoController:
             # Try multiple times to find READY signal
             for attempt in range(5):
                 # Read whatever is in the buffer
+                data = b''
                 if self.serial.in_waiting > 0:
                     data = self.serial.read(self.serial.in_waiting)
-                    if b'READY' in data:
-                        print(f"Connected to Arduino on {self.port}")
-                        return True
-                
-                # Try readline
-                raw = self.serial.readline()
-                if b'READY' in raw:
+                if b'READY' not in data:
+                    # Try readline
+                    data = self.serial.readline()
+                if b'READY' in data:
                     print(f"Connected to Arduino on {self.port}")
+                    # Firmware with sequence tags says READY:2_SERVOS:TAGS
+                    self.transport = SerialTransport(self.serial, tagged=b'TAGS' in data)
+                    self.transport.start()
                     return True
                     
+                SERVO_RETRIES.labels(kind="ready").inc()
                 time.sleep(0.2)
             
             # If we get here, no READY found
@@ -62,18 +106,41 @@ class DualServoController:
             print(f"Connection failed: {e}")
             return False
             
+    @property
+    def is_connected(self):
+        """Whether the serial link (or servo link socket) is still up."""
+        return self.transport is not None and self.transport.is_alive
+    
     def close(self):
         """Close connection."""
+        if self.transport:
+            self.transport.close()
+            self.transport = None
         if self.serial:
             self.serial.close()
             
-    def send_command(self, cmd):
-        """Send command and get response."""
-        self.serial.write(f"{cmd}\n".encode())
-        time.sleep(0.1)
-        raw = self.serial.readline()
-        response = raw.decode('utf-8', errors='replace').strip()
+    def send_command(self, cmd, timeout=DEFAULT_TIMEOUT):
+        """Send command and get response ('' if none arrives in time)."""
+        start = time.perf_counter()
+        try:
+            response = self.transport.command(str(cmd), timeout)
+        except TimeoutError as e:
+            print(f"  {e}")
+            response = ''
+        record("serial", time.perf_counter() - start, "Arduino serial round-trip")
         return response
+    
+    def send_commands(self, cmds, timeout=DEFAULT_TIMEOUT):
+        """
+        Send several commands back to back, without waiting for each reply.
+        
+        Returns:
+            The responses, in command order
+        """
+        start = time.perf_counter()
+        responses = self.transport.pipeline([str(cmd) for cmd in cmds], timeout)
+        record("serial", time.perf_counter() - start, "Arduino serial round-trips (pipelined)")
+        return responses
         
     def set_servo(self, servo, angle):
         """
@@ -88,10 +155,58 @@ class DualServoController:
         print(f"  {response}")
         return "OK" in response
     
+    def move(self, servo, target, duration_ms, profile="ease", cancel=None):
+        """
+        Move servo(s) to target over duration_ms, interpolated by the firmware.
+        
+        Blocks until the Arduino reports the move finished. Setting the
+        cancel event stops the servos where they are.
+        
+        Args:
+            servo: 1, 2, or 'both'
+            target: Target angle 0-180
+            duration_ms: Length of the move (0-60000 ms)
+            profile: 'ease' (slow start and end) or 'linear'
+            cancel: Optional threading.Event that stops the move
+            
+        Returns:
+            The firmware's DONE:/STOPPED: line with the final positions,
+            or None if the firmware has no MOVE command
+        """
+        if self.supports_move is False:
+            return None
+        duration_ms = max(0, min(MAX_MOVE_MS, int(duration_ms)))
+        cmd = f"MOVE:{servo}:{target}:{duration_ms}:{profile}".upper()
+        start = time.perf_counter()
+        request = self.transport.request(cmd, timeout=duration_ms / 1000 + DEFAULT_TIMEOUT)
+        
+        stopping = False
+        while not wait_futures([request.future], timeout=0.05).done:
+            if cancel is not None and cancel.is_set() and not stopping:
+                # The firmware answers the MOVE with STOPPED
+                self.transport.send("STOP")
+                stopping = True
+                request.deadline = time.monotonic() + DEFAULT_TIMEOUT
+        record("move", time.perf_counter() - start, "Firmware move until DONE/STOPPED")
+        # Raises TimeoutError if the transport gave up on the reply
+        response = request.future.result()
+        
+        if response.startswith("ERROR"):
+            if "Unknown servo" not in response:
+                raise RuntimeError(response)
+            # Older firmware: "MOVE" reads as an unknown servo
+            self.supports_move = False
+            print(f"  {response} (firmware has no MOVE, stepping instead)")
+            return None
+        self.supports_move = True
+        return response
+    
     def smooth_move(self, servo, target, step=5, delay=0.05):
         """
         Move servo smoothly to target position.
         
+        Uses a firmware move when available, otherwise one command per step.
+        
         Args:
             servo: 1, 2, or 'both'
             target: Target angle 0-180
@@ -113,6 +228,11 @@ class DualServoController:
         else:
             angles = range(current, target - 1, -step)
         
+        # About the pace of stepping, without a round-trip per step
+        duration_ms = len(angles) * delay * 1000
+        if self.move(servo, target, duration_ms, profile="linear") is not None:
+            return
+        
         for angle in angles:
             self.send_command(f"{servo}:{angle}")
             time.sleep(delay)
@@ -173,6 +293,7 @@ class DualServoController:
         print("  1:90    - Set servo 1 to 90°")
         print("  2:45    - Set servo 2 to 45°")
         print("  both:90 - Set both servos to 90°")
+        print("  move:both:90:1500 - Glide both to 90° over 1.5 s")
         print("  status  - Get positions")
         print("  demo    - Run full demo")
         print("  test    - Run test (0→90→180→90→0)")
@@ -191,6 +312,10 @@ class DualServoController:
                     self.demo()
                 elif cmd == 'test':
                     self.test()
+                elif cmd.startswith('move:'):
+                    _, servo, angle, duration = cmd.split(':')[:4]
+                    response = self.move(servo, int(angle), int(duration))
+                    print(f"  {response or 'MOVE not supported by this firmware'}")
                 elif ':' in cmd:
                     parts = cmd.split(':')
                     servo = parts[0]
@@ -227,6 +352,11 @@ def main():
         elif sys.argv[1] == 'status':
             controller.get_status()
             
+        elif sys.argv[1] == 'move' and len(sys.argv) == 5:
+            # python3 servo_control.py move both 90 1500
+            response = controller.move(sys.argv[2], int(sys.argv[3]), int(sys.argv[4]))
+            print(f"  {response or 'MOVE not supported by this firmware'}")
+            
         elif len(sys.argv) == 3:
             # Direct command: python3 servo_control.py 1 90
             servo = sys.argv[1]
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Servo link: the one owner of the Arduino serial port
+
+Opening /dev/ttyACM0 resets the Arduino and costs a ~3 s wait for READY,
+and two processes with the port open steal each other's replies. The
+servo link opens the port once, keeps it open, and serves it to every
+other process (main_control.py, servo_control.py) on a local Unix
+socket that speaks the firmware's own line protocol with sequence tags:
+
+    -> #5 BOTH:90
+    <- #5 OK:BOTH=90
+
+Client lines are forwarded through the link's SerialTransport, so
+commands from several processes are pipelined on the one port and each
+reply goes back to the client that asked. An untagged STOP is passed
+straight through. While the Arduino is unreachable, commands are
+answered with ERROR:Arduino not connected.
+
+A supervisor thread reconnects with exponential backoff after the port
+disappears (USB unplugged, board reset), so only reconnects pay the
+reset delay. DualServoController.connect() uses the socket when a link
+is running. The API runs the link (see LidService.start()); without
+the API, run it on its own:
+
+    python3 -m arduino.servo_link
+"""
+import os
+import socket
+import sys
+import threading
+import time
+from functools import partial
+from typing import Callable, List, Optional, Set
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from arduino.serial_transport import DEFAULT_TIMEOUT, SERVO_RETRIES, connect_link, link_socket_path
+from arduino.servo_control import SERIAL_PORT, DualServoController
+
+# Reconnect backoff (seconds)
+RECONNECT_MIN = 1.0
+RECONNECT_MAX = 60.0
+
+# Seconds between checks of a healthy connection
+HEALTH_INTERVAL = 1.0
+
+
+def _move_timeout(command: str) -> float:
+    """Reply timeout for a forwarded command (MOVE replies when it ends)."""
+    parts = command.split(":")
+    if parts[0].strip().upper() == "MOVE" and len(parts) > 3:
+        try:
+            return int(parts[3]) / 1000 + DEFAULT_TIMEOUT
+        except ValueError:
+            pass
+    return DEFAULT_TIMEOUT
+
+
+class ServoLink:
+    """
+    Long-lived Arduino connection, shared with other processes.
+
+    If another process already serves the socket, this link becomes its
+    client instead, taking the port over if that process goes away.
+
+    Args:
+        socket_path: Unix socket to serve (default: SERVO_SOCKET)
+        port: Arduino serial port
+    """
+
+    def __init__(self, socket_path: Optional[str] = None, port: str = SERIAL_PORT):
+        self.socket_path = socket_path or link_socket_path()
+        self.port = port
+        self.controller: Optional[DualServoController] = None
+        # Whether this process holds the serial port and serves the socket
+        self.owner = False
+
+        self._stop = threading.Event()
+        # Set once the first connection attempt has finished
+        self._attempted = threading.Event()
+        self._supervisor: Optional[threading.Thread] = None
+        self._server: Optional[socket.socket] = None
+        self._clients: Set[socket.socket] = set()
+        self._clients_lock = threading.Lock()
+        self._listeners: List[Callable[[DualServoController], None]] = []
+
+    @property
+    def is_connected(self) -> bool:
+        return self.controller is not None and self.controller.is_connected
+
+    def add_connect_listener(self, callback: Callable[[DualServoController], None]) -> None:
+        """Call callback(controller) after every successful (re)connect."""
+        self._listeners.append(callback)
+        if self.is_connected:
+            callback(self.controller)
+
+    def start(self) -> None:
+        """Connect in the background (no-op if already started)."""
+        if self._supervisor is not None:
+            return
+        self._stop.clear()
+        self._supervisor = threading.Thread(target=self._supervise, name="servo-link", daemon=True)
+        self._supervisor.start()
+
+    def wait(self, timeout: float) -> Optional[DualServoController]:
+        """
+        The connected controller, waiting for the first connection attempt.
+
+        Returns:
+            None if the Arduino is not connected
+        """
+        self._attempted.wait(timeout)
+        return self.controller if self.is_connected else None
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._supervisor is not None:
+            self._supervisor.join(timeout=5)
+            self._supervisor = None
+        # Release the port before the socket closes: a client that takes
+        # over opens the port at once, and our reader would eat its READY
+        if self.controller is not None:
+            self.controller.close()
+            self.controller = None
+        if self._server is not None:
+            try:
+                self._server.shutdown(socket.SHUT_RDWR)  # wakes accept()
+            except OSError:
+                pass
+            self._server.close()
+            self._server = None
+            try:
+                os.unlink(self.socket_path)
+            except FileNotFoundError:
+                pass
+        with self._clients_lock:
+            for client in self._clients:
+                try:
+                    client.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+
+    # ----- connection ---------------------------------------------------
+
+    def _supervise(self) -> None:
+        delay = RECONNECT_MIN
+        while not self._stop.is_set():
+            if self.is_connected:
+                delay = RECONNECT_MIN
+                self._stop.wait(HEALTH_INTERVAL)
+                continue
+
+            if self.controller is not None:
+                print("Servo link: connection lost, reconnecting")
+                self.controller.close()
+                self.controller = None
+            if not self.owner and not self._serve_socket():
+                print(f"Servo link: {self.socket_path} is served by another process, using it")
+
+            controller = DualServoController(self.port, use_link=not self.owner)
+            if controller.connect():
+                self.controller = controller
+                for callback in self._listeners:
+                    try:
+                        callback(controller)
+                    except Exception as e:
+                        print(f"Servo link: connect listener failed: {e}")
+            else:
+                controller.close()
+            self._attempted.set()
+
+            if not self.is_connected:
+                SERVO_RETRIES.labels(kind="reconnect").inc()
+                print(f"Servo link: retrying in {delay:g}s")
+                self._stop.wait(delay)
+                delay = min(delay * 2, RECONNECT_MAX)
+
+    # ----- socket -------------------------------------------------------
+
+    def _serve_socket(self) -> bool:
+        """Start serving the socket; False if another live process serves it."""
+        existing = connect_link(self.socket_path)
+        if existing is not None:
+            existing.close()
+            return False
+        try:
+            os.unlink(self.socket_path)  # stale, from a process that died
+        except FileNotFoundError:
+            pass
+        os.makedirs(os.path.dirname(self.socket_path), exist_ok=True)
+
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(self.socket_path)
+        os.chmod(self.socket_path, 0o660)
+        server.listen()
+        self._server = server
+        self.owner = True
+        threading.Thread(target=self._accept, args=(server,), name="servo-link-accept", daemon=True).start()
+        print(f"Servo link: serving the Arduino on {self.socket_path}")
+        return True
+
+    def _accept(self, server: socket.socket) -> None:
+        while not self._stop.is_set():
+            try:
+                client, _ = server.accept()
+            except OSError:
+                return
+            with self._clients_lock:
+                self._clients.add(client)
+            threading.Thread(target=self._serve, args=(client,), name="servo-link-client", daemon=True).start()
+
+    def _serve(self, client: socket.socket) -> None:
+        send_lock = threading.Lock()
+
+        def reply(tag: str, text: str) -> None:
+            with send_lock:
+                try:
+                    client.sendall(f"{tag}{text}\n".encode())
+                except OSError:
+                    pass  # Client went away; its replies are dropped
+
+        try:
+            with client.makefile("rb") as lines:
+                for raw in lines:
+                    line = raw.decode("utf-8", errors="replace").strip()
+                    if line:
+                        self._forward(line, reply)
+        except OSError:
+            pass
+        finally:
+            with self._clients_lock:
+                self._clients.discard(client)
+            client.close()
+
+    def _forward(self, line: str, reply) -> None:
+        tag = ""
+        if line.startswith("#"):
+            tag, _, line = line.partition(" ")
+            tag += " "
+            line = line.strip()
+
+        controller = self.controller
+        if controller is None or not controller.is_connected:
+            reply(tag, "ERROR:Arduino not connected")
+            return
+        if line.upper() == "STOP":
+            controller.transport.send("STOP")
+            return
+        try:
+            request = controller.transport.request(line, _move_timeout(line))
+        except TimeoutError as e:
+            reply(tag, f"ERROR:{e}")
+            return
+        request.future.add_done_callback(partial(_reply_with, reply, tag))
+
+
+def _reply_with(reply, tag: str, future) -> None:
+    try:
+        reply(tag, future.result())
+    except Exception as e:
+        reply(tag, f"ERROR:{str(e) or type(e).__name__}")
+
+
+# Global singleton instance
+_servo_link: Optional[ServoLink] = None
+
+
+def get_servo_link() -> ServoLink:
+    """Get or create this process's servo link."""
+    global _servo_link
+    if _servo_link is None:
+        _servo_link = ServoLink()
+    return _servo_link
+
+
+def main():
+    link = get_servo_link()
+    link.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        link.close()
+
+
+if __name__ == '__main__':
+    main()
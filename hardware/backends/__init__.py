@@ -0,0 +1,94 @@
+"""
+Hardware backend selection
+
+Drivers import their low-level libraries (spidev, lgpio, smbus2,
+adafruit_dht, board, picamera2) from this package and resolve the
+Arduino serial port through it, so the whole stack can run against
+simulators on an ordinary Linux box:
+
+    from backends import lgpio, spidev
+
+Environment:
+    PLANTE_BACKEND=hardware|sim        Default backend for every library
+    PLANTE_BACKEND_<LIBRARY>=...       Per-library override, e.g.
+                                       PLANTE_BACKEND_PICAMERA2=hardware
+                                       PLANTE_BACKEND_SERIAL=sim
+"""
+import importlib
+import os
+from types import ModuleType
+
+HARDWARE = "hardware"
+SIM = "sim"
+
+# Libraries that have a drop-in simulator module in backends/sim/
+LIBRARIES = ("spidev", "lgpio", "smbus2", "adafruit_dht", "board", "picamera2")
+
+# Everything with a selectable backend (serial is simulated by a pty emulator)
+BACKENDS = LIBRARIES + ("serial",)
+
+
+def backend_for(library: str) -> str:
+    """Return the backend name ('hardware' or 'sim') selected for a library."""
+    if library not in BACKENDS:
+        raise ValueError(f"Unknown hardware library: {library}")
+
+    default = os.getenv("PLANTE_BACKEND", HARDWARE).strip().lower()
+    backend = os.getenv(f"PLANTE_BACKEND_{library.upper()}", default).strip().lower()
+    if backend not in (HARDWARE, SIM):
+        raise ValueError(f"Invalid backend '{backend}' for {library}. Use 'hardware' or 'sim'")
+    return backend
+
+
+def is_simulated(library: str) -> bool:
+    """Check if a library is served by its simulator."""
+    return backend_for(library) == SIM
+
+
+def load_backend(library: str) -> ModuleType:
+    """
+    Import a hardware library or its simulator.
+
+    Args:
+        library: Module name of the real library (e.g. 'spidev')
+
+    Returns:
+        The real module, or backends.sim.<library> when simulated
+    """
+    if library not in LIBRARIES:
+        raise ValueError(f"No importable backend for: {library}")
+    if is_simulated(library):
+        return importlib.import_module(f"backends.sim.{library}")
+    return importlib.import_module(library)
+
+
+def __getattr__(name: str) -> ModuleType:
+    # `from backends import spidev` loads the selected spidev
+    if name in LIBRARIES:
+        return load_backend(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def serial_port(default: str) -> str:
+    """
+    Resolve the Arduino serial port.
+
+    With the simulated serial backend this starts (once per process) an
+    Arduino emulator on a pty and returns its device path, unless
+    PLANTE_SIM_SERIAL_PORT points at an emulator that is already running.
+
+    Args:
+        default: Device path used with real hardware
+
+    Returns:
+        Path to open with pyserial
+    """
+    if not is_simulated("serial"):
+        return default
+
+    external = os.getenv("PLANTE_SIM_SERIAL_PORT")
+    if external:
+        return external
+
+    from backends.sim.arduino import get_emulator
+    return get_emulator().port
@@ -0,0 +1,31 @@
+"""
+Simulated hardware
+
+Drop-in stand-ins for the Pi hardware libraries, selected via
+PLANTE_BACKEND=sim (see backends/__init__.py). Each module mirrors the
+subset of the real library's API that the drivers use, with timing
+modelled on the real parts:
+
+    spidev, lgpio  - ADS1256 register model with DRDY timing (ads1256.py)
+    smbus2         - BH1750 light sensor with conversion delay
+    adafruit_dht   - DHT11 with configurable failure rate
+    board          - Pin names for adafruit_dht
+    picamera2      - Camera producing synthetic plant frames
+    arduino        - dual_servo.ino emulator on a pty
+
+Tunables (environment):
+    PLANTE_SIM_DHT_FAILURE_RATE   Fraction of DHT11 reads that fail (default 0.1)
+    PLANTE_SIM_SOIL_PERCENT       Simulated soil moisture (default 45)
+    PLANTE_SIM_LUX                Simulated light level (default 450)
+    PLANTE_SIM_ARDUINO_BOOT       Seconds from port open to READY (default 1.5)
+    PLANTE_SIM_ARDUINO_MOVE       0 emulates firmware without MOVE or tags (default 1)
+"""
+import os
+
+
+def env_float(name: str, default: float) -> float:
+    """Read a float tunable from the environment."""
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
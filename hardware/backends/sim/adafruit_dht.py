@@ -0,0 +1,73 @@
+"""
+Simulated adafruit_dht
+
+Mirrors the CircuitPython driver's behaviour: a read blocks for the
+~250ms pulse capture, results are cached for 2 seconds, values are
+whole numbers (DHT11 resolution) and a configurable fraction of reads
+raise RuntimeError like a flaky real sensor.
+"""
+import random
+import time
+from typing import Optional
+
+from backends.sim import env_float
+
+READ_TIME = 0.25
+MIN_INTERVAL = 2.0
+
+FAILURES = (
+    "A full buffer was not returned. Try again.",
+    "Checksum did not validate. Try again.",
+    "DHT sensor not found, check wiring",
+)
+
+
+class DHTBase:
+    """Mirror of adafruit_dht.DHTBase."""
+
+    def __init__(self, pin, use_pulseio: bool = True):
+        self._pin = pin
+        self._last_called = 0.0
+        self._temperature: Optional[float] = None
+        self._humidity: Optional[float] = None
+        self._closed = False
+
+    def measure(self) -> None:
+        if self._closed:
+            raise RuntimeError("DHT sensor has been deinitialized")
+
+        now = time.monotonic()
+        if self._last_called and now - self._last_called <= MIN_INTERVAL:
+            return
+
+        self._last_called = now
+        time.sleep(READ_TIME)
+
+        if random.random() < env_float("PLANTE_SIM_DHT_FAILURE_RATE", 0.1):
+            raise RuntimeError(random.choice(FAILURES))
+
+        temperature = env_float("PLANTE_SIM_TEMPERATURE", 22.0) + random.uniform(-1, 1)
+        humidity = env_float("PLANTE_SIM_HUMIDITY", 55.0) + random.uniform(-2, 2)
+        self._temperature = float(round(temperature))
+        self._humidity = float(round(max(0.0, min(100.0, humidity))))
+
+    @property
+    def temperature(self) -> Optional[float]:
+        self.measure()
+        return self._temperature
+
+    @property
+    def humidity(self) -> Optional[float]:
+        self.measure()
+        return self._humidity
+
+    def exit(self) -> None:
+        self._closed = True
+
+
+class DHT11(DHTBase):
+    """Mirror of adafruit_dht.DHT11."""
+
+
+class DHT22(DHTBase):
+    """Mirror of adafruit_dht.DHT22."""
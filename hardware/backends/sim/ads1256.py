@@ -0,0 +1,207 @@
+"""
+ADS1256 register model
+
+Models the parts of the Waveshare AD/DA HAT that sensors/soil_moisture.py
+talks to: the register file, the SPI command set, DRDY timing driven by
+the DRATE register, self-calibration time and the hardware reset pin.
+AIN0 carries a simulated soil moisture probe; other inputs read ~0V.
+"""
+import math
+import random
+import threading
+import time
+from typing import List, Optional
+
+from backends.sim import env_float
+from backends.sim import lgpio
+
+DRDY_PIN = 17
+RST_PIN = 18
+
+# Commands
+CMD_WAKEUP = 0x00
+CMD_RDATA = 0x01
+CMD_RDATAC = 0x03
+CMD_SDATAC = 0x0F
+CMD_RREG = 0x10
+CMD_WREG = 0x50
+CMD_SELFCAL = 0xF0
+CMD_SYNC = 0xFC
+CMD_STANDBY = 0xFD
+CMD_RESET = 0xFE
+CMD_WAKEUP_ALT = 0xFF
+
+# Register addresses
+REG_STATUS = 0x00
+REG_MUX = 0x01
+REG_ADCON = 0x02
+REG_DRATE = 0x03
+
+# Power-on register values (STATUS, MUX, ADCON, DRATE, IO, OFC0-2, FSC0-2)
+RESET_REGISTERS = [0x30, 0x01, 0x20, 0xF0, 0xE0, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00]
+
+# DRATE register value -> samples per second
+DRATE_SPS = {
+    0xF0: 30000, 0xE0: 15000, 0xD0: 7500, 0xC0: 3750, 0xB0: 2000,
+    0xA1: 1000, 0x92: 500, 0x82: 100, 0x72: 60, 0x63: 50,
+    0x53: 30, 0x43: 25, 0x33: 15, 0x23: 10, 0x13: 5, 0x03: 2.5,
+}
+
+VREF = 5.0
+FULL_SCALE = 0x7FFFFF
+
+# Calibration points used by SoilMoistureSensor (raw codes)
+SOIL_DRY = 0x600000
+SOIL_WET = 0x200000
+
+
+class ADS1256Model:
+    """Behavioural model of one ADS1256."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._registers = list(RESET_REGISTERS)
+        self._pending: List[int] = []
+        self._in_reset = False
+        self._ready_at = time.monotonic()
+        self._started = time.monotonic()
+
+        lgpio.attach(DRDY_PIN, reader=self.drdy)
+        lgpio.attach(RST_PIN, writer=self._rst_pin)
+
+    # ----- timing -------------------------------------------------------
+
+    @property
+    def sample_rate(self) -> float:
+        return DRATE_SPS.get(self._registers[REG_DRATE], 30000)
+
+    @property
+    def period(self) -> float:
+        return 1.0 / self.sample_rate
+
+    def _settle_time(self) -> float:
+        # First conversion after SYNC/WAKEUP needs a full digital filter settle
+        return self.period + 0.0002
+
+    def drdy(self) -> int:
+        """DRDY pin level: 0 when a conversion result is available."""
+        with self._lock:
+            if self._in_reset:
+                return 1
+            return 0 if time.monotonic() >= self._ready_at else 1
+
+    def _consume_conversion(self, now: float) -> None:
+        # Continuous mode: the next result lands on the next period boundary
+        period = self.period
+        if now >= self._ready_at:
+            periods = int((now - self._ready_at) / period) + 1
+            self._ready_at += periods * period
+
+    def _rst_pin(self, level: int) -> None:
+        with self._lock:
+            if level == 0:
+                self._in_reset = True
+            elif self._in_reset:
+                self._in_reset = False
+                self._reset_registers()
+
+    def _reset_registers(self) -> None:
+        self._registers = list(RESET_REGISTERS)
+        self._pending = []
+        self._ready_at = time.monotonic() + 0.0006 + self._settle_time()
+
+    # ----- analog front end ---------------------------------------------
+
+    def _input_voltage(self, ain: int) -> float:
+        if ain == 0:
+            percent = env_float("PLANTE_SIM_SOIL_PERCENT", 45.0)
+            # Slow drift so repeated reads are not constant
+            elapsed = time.monotonic() - self._started
+            percent += 2.0 * math.sin(elapsed / 600.0)
+            percent = max(0.0, min(100.0, percent))
+            raw = SOIL_DRY - (SOIL_DRY - SOIL_WET) * percent / 100.0
+            return raw / FULL_SCALE * VREF + random.gauss(0, 0.0005)
+        return random.gauss(0, 0.0002)
+
+    def _convert(self) -> int:
+        mux = self._registers[REG_MUX]
+        positive, negative = mux >> 4, mux & 0x0F
+        volts = self._input_voltage(positive)
+        if negative < 8:
+            volts -= self._input_voltage(negative)
+        gain = 1 << (self._registers[REG_ADCON] & 0x07)
+        code = int(volts / VREF * FULL_SCALE * gain)
+        code = max(-FULL_SCALE - 1, min(FULL_SCALE, code))
+        return code & 0xFFFFFF
+
+    # ----- SPI ----------------------------------------------------------
+
+    def transfer(self, data: List[int]) -> List[int]:
+        """Clock bytes in, returning the bytes clocked out."""
+        with self._lock:
+            if self._in_reset:
+                return [0] * len(data)
+
+            out: List[int] = []
+            i = 0
+            while i < len(data):
+                if self._pending:
+                    out.append(self._pending.pop(0))
+                    i += 1
+                    continue
+
+                cmd = data[i]
+                out.append(0)
+                i += 1
+
+                if cmd & 0xF0 == CMD_WREG:
+                    reg = cmd & 0x0F
+                    count = (data[i] if i < len(data) else 0) + 1
+                    out.append(0)
+                    i += 1
+                    for offset in range(count):
+                        if i >= len(data):
+                            break
+                        if reg + offset < len(self._registers):
+                            self._registers[reg + offset] = data[i]
+                        out.append(0)
+                        i += 1
+                elif cmd & 0xF0 == CMD_RREG:
+                    reg = cmd & 0x0F
+                    count = (data[i] if i < len(data) else 0) + 1
+                    if i < len(data):
+                        out.append(0)
+                        i += 1
+                    self._pending = [
+                        self._registers[r] if r < len(self._registers) else 0
+                        for r in range(reg, reg + count)
+                    ]
+                elif cmd == CMD_RDATA:
+                    code = self._convert()
+                    self._pending = [(code >> 16) & 0xFF, (code >> 8) & 0xFF, code & 0xFF]
+                    self._consume_conversion(time.monotonic())
+                elif cmd == CMD_SYNC:
+                    self._ready_at = math.inf
+                elif cmd in (CMD_WAKEUP, CMD_WAKEUP_ALT):
+                    self._ready_at = time.monotonic() + self._settle_time()
+                elif cmd == CMD_SELFCAL:
+                    self._ready_at = time.monotonic() + 2 * self.period + 0.0008
+                elif cmd == CMD_STANDBY:
+                    self._ready_at = math.inf
+                elif cmd == CMD_RESET:
+                    self._reset_registers()
+                # RDATAC / SDATAC and the remaining calibration commands are no-ops
+            return out
+
+
+_chip: Optional[ADS1256Model] = None
+_chip_lock = threading.Lock()
+
+
+def get_chip() -> ADS1256Model:
+    """Get the simulated HAT's ADC (one per process, like the real board)."""
+    global _chip
+    with _chip_lock:
+        if _chip is None:
+            _chip = ADS1256Model()
+        return _chip
@@ -0,0 +1,285 @@
+"""
+Arduino dual servo emulator
+
+Speaks the arduino/dual_servo/dual_servo.ino protocol on a pseudo
+terminal, so DualServoController can open it with pyserial exactly like
+/dev/ttyACM0. Opening the port "resets" the board and READY is printed
+after the bootloader delay; positions survive the reset, as the firmware
+restores them from EEPROM (the original firmware returns to 0). Replies are delayed
+by their transmission time at 9600 baud. MOVE commands are interpolated
+in the background and report DONE when they finish, like the firmware's
+loop(), and "#<n> " sequence tags are echoed on replies.
+PLANTE_SIM_ARDUINO_MOVE=0 emulates the original firmware, without MOVE
+or tags.
+
+Run standalone to share one emulator between processes:
+
+    python3 -m backends.sim.arduino
+    PLANTE_BACKEND_SERIAL=sim PLANTE_SIM_SERIAL_PORT=/dev/pts/N ...
+"""
+import fcntl
+import math
+import os
+import select
+import struct
+import termios
+import threading
+import time
+import tty
+from typing import List, Optional
+
+from backends.sim import env_float
+
+BAUD_RATE = 9600
+BYTE_TIME = 10.0 / BAUD_RATE  # 8N1: 10 bits per byte
+
+# Control byte prefixed to every read in pty packet mode
+TIOCPKT_DATA = 0x00
+TIOCPKT_FLUSHREAD = 0x01
+
+
+class ArduinoEmulator:
+    """dual_servo.ino running on a pty."""
+
+    def __init__(self, boot_delay: Optional[float] = None, supports_move: Optional[bool] = None):
+        self.boot_delay = boot_delay if boot_delay is not None else env_float("PLANTE_SIM_ARDUINO_BOOT", 1.5)
+        self.supports_move = (supports_move if supports_move is not None
+                              else env_float("PLANTE_SIM_ARDUINO_MOVE", 1) != 0)
+        self.pos1 = 0
+        self.pos2 = 0
+        # Move in progress: (servos, from1, from2, to1, to2, start, duration, ease)
+        self._move: Optional[tuple] = None
+        self._move_tag = ""
+        self.commands_received = 0
+        self.resets = 0
+
+        self._master, slave = os.openpty()
+        tty.setraw(slave)
+        # Packet mode reports the slave's buffer flushes, which is how the
+        # emulator notices a client opening the port.
+        fcntl.ioctl(self._master, termios.TIOCPKT, struct.pack("i", 1))
+        self.port = os.ttyname(slave)
+        # Nobody holds the slave side until a client opens it, so the master
+        # sees POLLHUP while the "USB cable" is idle.
+        os.close(slave)
+
+        self._input = b""
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "ArduinoEmulator":
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="arduino-emulator", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=1)
+        os.close(self._master)
+
+    # ----- firmware -----------------------------------------------------
+
+    def _reset(self) -> None:
+        self.resets += 1
+        if not self.supports_move:
+            self.pos1 = 0
+            self.pos2 = 0
+        self._move = None
+        self._input = b""
+
+    def update_move(self) -> List[str]:
+        """Firmware updateMove(); returns DONE when the move finishes."""
+        if self._move is None:
+            return []
+        servos, from1, from2, to1, to2, start, duration, ease = self._move
+        elapsed = time.monotonic() - start
+        if elapsed >= duration:
+            t = 1.0
+        else:
+            t = elapsed / duration
+            if ease:
+                t = 0.5 - 0.5 * math.cos(math.pi * t)
+        if "1" in servos:
+            self.pos1 = from1 + round((to1 - from1) * t)
+        if "2" in servos:
+            self.pos2 = from2 + round((to2 - from2) * t)
+        if t < 1.0:
+            return []
+        self._move = None
+        return [f"{self._move_tag}DONE:1={self.pos1},2={self.pos2}"]
+
+    def _start_move(self, args: str, tag: str) -> List[str]:
+        parts = args.split(":")
+        if len(parts) < 3:
+            return [f"{tag}ERROR:Use MOVE:BOTH:90:1500[:EASE|LINEAR]"]
+        servo = parts[0]
+        angle = max(0, min(180, _to_int(parts[1])))
+        duration = max(0, min(60000, _to_int(parts[2])))
+        profile = parts[3] if len(parts) > 3 else "EASE"
+        if servo not in ("1", "2", "BOTH"):
+            return [f"{tag}ERROR:Unknown servo. Use 1, 2, or BOTH"]
+
+        servos = "12" if servo == "BOTH" else servo
+        self._move_tag = tag
+        self._move = (
+            servos, self.pos1, self.pos2,
+            angle if "1" in servos else self.pos1,
+            angle if "2" in servos else self.pos2,
+            time.monotonic(), duration / 1000, profile != "LINEAR",
+        )
+        return self.update_move()
+
+    def process_command(self, cmd: str) -> List[str]:
+        """Firmware processCommand(); returns the lines it prints."""
+        cmd = cmd.strip().upper()
+        if not self.supports_move:
+            return self._process_command(cmd)
+
+        tag = ""
+        if cmd.startswith("#"):
+            tag, _, cmd = cmd.partition(" ")
+            tag += " "
+            cmd = cmd.strip()
+
+        # loop() finishes a due move before reading the next command
+        lines = self.update_move()
+        if self._move is not None:
+            # Any command but STATUS stops a move in progress
+            if cmd == "STATUS":
+                return lines + [tag + line for line in self._process_command(cmd)]
+            self._move = None
+            lines.append(f"{self._move_tag}STOPPED:1={self.pos1},2={self.pos2}")
+
+        if cmd == "STOP":
+            return lines
+        if cmd.startswith("MOVE:"):
+            return lines + self._start_move(cmd[5:], tag)
+        return lines + [tag + line for line in self._process_command(cmd)]
+
+    def _process_command(self, cmd: str) -> List[str]:
+        if cmd == "STATUS":
+            return [f"STATUS:1={self.pos1},2={self.pos2}"]
+
+        if ":" not in cmd:
+            return ["ERROR:Invalid format. Use 1:90 or 2:45 or BOTH:90"]
+
+        servo, _, value = cmd.partition(":")
+        angle = max(0, min(180, _to_int(value)))
+
+        if servo == "1":
+            self.pos1 = angle
+            return [f"OK:1={angle}"]
+        if servo == "2":
+            self.pos2 = angle
+            return [f"OK:2={angle}"]
+        if servo == "BOTH":
+            self.pos1 = angle
+            self.pos2 = angle
+            return [f"OK:BOTH={angle}"]
+        return ["ERROR:Unknown servo. Use 1, 2, or BOTH"]
+
+    # ----- serial line --------------------------------------------------
+
+    def _write_lines(self, lines: List[str]) -> None:
+        if not lines:
+            return
+        data = "".join(f"{line}\r\n" for line in lines).encode()
+        time.sleep(len(data) * BYTE_TIME)
+        try:
+            os.write(self._master, data)
+        except OSError:
+            pass
+
+    def _run(self) -> None:
+        poller = select.poll()
+        poller.register(self._master, select.POLLIN)
+        ready_at = None
+        # When the last received byte finished arriving at 9600 baud. The
+        # UART receives while the firmware transmits, so a command that
+        # arrives during a reply is ready as soon as the reply is written.
+        rx_clock = 0.0
+
+        while self._running:
+            if ready_at is not None and time.monotonic() >= ready_at:
+                ready_at = None
+                self._write_lines(["READY:2_SERVOS:TAGS" if self.supports_move else "READY:2_SERVOS"])
+            if self._move is not None:
+                self._write_lines(self.update_move())
+
+            events = poller.poll(5 if ready_at is not None else 10)
+            if not events:
+                continue
+            if any(event & select.POLLHUP for _, event in events):
+                # No client has the port open
+                ready_at = None
+                time.sleep(0.01)
+                continue
+
+            try:
+                packet = os.read(self._master, 257)
+            except OSError:
+                continue
+            if not packet:
+                continue
+
+            flags, data = packet[0], packet[1:]
+            if flags != TIOCPKT_DATA:
+                if flags & TIOCPKT_FLUSHREAD:
+                    # pyserial flushes right after open(), when DTR resets the board
+                    self._reset()
+                    ready_at = time.monotonic() + self.boot_delay
+                continue
+
+            if ready_at is not None:
+                # Bytes sent while the bootloader runs are lost on the real board
+                continue
+
+            self._input += data
+            rx_clock = max(rx_clock, time.monotonic())
+            while b"\n" in self._input:
+                line, self._input = self._input.split(b"\n", 1)
+                self.commands_received += 1
+                rx_clock += (len(line) + 1) * BYTE_TIME
+                time.sleep(max(0.0, rx_clock - time.monotonic()))
+                self._write_lines(self.process_command(line.decode(errors="replace")))
+
+
+def _to_int(value: str) -> int:
+    """Arduino String.toInt(): leading integer, 0 if none."""
+    value = value.strip()
+    digits = ""
+    for i, ch in enumerate(value):
+        if ch.isdigit() or (i == 0 and ch in "+-"):
+            digits += ch
+        else:
+            break
+    try:
+        return int(digits)
+    except ValueError:
+        return 0
+
+
+_emulator: Optional[ArduinoEmulator] = None
+_emulator_lock = threading.Lock()
+
+
+def get_emulator() -> ArduinoEmulator:
+    """Get or start the process-wide emulator."""
+    global _emulator
+    with _emulator_lock:
+        if _emulator is None:
+            _emulator = ArduinoEmulator().start()
+        return _emulator
+
+
+if __name__ == "__main__":
+    emulator = ArduinoEmulator().start()
+    print(f"Arduino emulator on {emulator.port}")
+    print(f"  export PLANTE_BACKEND_SERIAL=sim PLANTE_SIM_SERIAL_PORT={emulator.port}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        emulator.stop()
@@ -0,0 +1,8 @@
+"""
+Simulated board
+
+Pin names used with adafruit_dht.
+"""
+D4 = 4
+D17 = 17
+D18 = 18
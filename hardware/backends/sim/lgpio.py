@@ -0,0 +1,175 @@
+"""
+Simulated lgpio
+
+Pins are plain in-memory levels. Simulated devices (e.g. the ADS1256
+model) attach callbacks to the pins they drive or listen on, so a
+driver polling DRDY sees the chip's real timing.
+
+Servo and pulse output keeps lgpio's per-GPIO queue: finite settings
+play one after another in real time, an infinite one is replaced by
+the next, and servo_width() reports the pulse width being sent now.
+"""
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class error(Exception):
+    """Mirror of lgpio.error."""
+
+
+TX_PWM = 0
+TX_WAVE = 1
+
+# Simulated PWM queue entries per GPIO
+QUEUE_SIZE = 1000
+
+
+_lock = threading.Lock()
+_next_handle = 0
+_open_chips: Dict[int, int] = {}
+
+# pin -> callable returning the level a device drives on that pin
+_readers: Dict[int, Callable[[], int]] = {}
+# pin -> callable notified with the level a driver writes
+_writers: Dict[int, Callable[[int], None]] = {}
+
+# Last written level / PWM settings per pin (inspectable by tests and tools)
+levels: Dict[int, int] = {}
+pwm: Dict[int, Tuple[float, float]] = {}
+servo_pulses: Dict[int, int] = {}
+
+# pin -> queued servo settings: [start, end or None for infinite, pulse width]
+_queues: Dict[int, List[list]] = {}
+
+
+def attach(pin: int, reader: Optional[Callable[[], int]] = None,
+           writer: Optional[Callable[[int], None]] = None) -> None:
+    """Connect a simulated device to a pin."""
+    with _lock:
+        if reader is not None:
+            _readers[pin] = reader
+        if writer is not None:
+            _writers[pin] = writer
+
+
+def gpiochip_open(gpiochip: int) -> int:
+    global _next_handle
+    with _lock:
+        _next_handle += 1
+        _open_chips[_next_handle] = gpiochip
+        return _next_handle
+
+
+def gpiochip_close(handle: int) -> int:
+    with _lock:
+        if _open_chips.pop(handle, None) is None:
+            raise error("unknown handle")
+    return 0
+
+
+def _check(handle: int) -> None:
+    if handle not in _open_chips:
+        raise error("unknown handle")
+
+
+def gpio_claim_input(handle: int, gpio: int, lFlags: int = 0) -> int:
+    _check(handle)
+    return 0
+
+
+def gpio_claim_output(handle: int, gpio: int, level: int = 0, lFlags: int = 0) -> int:
+    _check(handle)
+    gpio_write(handle, gpio, level)
+    return 0
+
+
+def gpio_free(handle: int, gpio: int) -> int:
+    _check(handle)
+    return 0
+
+
+def gpio_read(handle: int, gpio: int) -> int:
+    _check(handle)
+    reader = _readers.get(gpio)
+    if reader is not None:
+        return reader()
+    return levels.get(gpio, 0)
+
+
+def gpio_write(handle: int, gpio: int, level: int) -> int:
+    _check(handle)
+    levels[gpio] = 1 if level else 0
+    writer = _writers.get(gpio)
+    if writer is not None:
+        writer(levels[gpio])
+    return 0
+
+
+def tx_pwm(handle: int, gpio: int, pwm_frequency: float, pwm_duty_cycle: float,
+           pulse_offset: int = 0, pulse_cycles: int = 0) -> int:
+    _check(handle)
+    pwm[gpio] = (pwm_frequency, pwm_duty_cycle)
+    return 0
+
+
+def _queue(gpio: int, now: float) -> List[list]:
+    """The GPIO's queue without the settings that have finished by now."""
+    queue = [entry for entry in _queues.get(gpio, []) if entry[1] is None or entry[1] > now]
+    _queues[gpio] = queue
+    return queue
+
+
+def tx_servo(handle: int, gpio: int, pulse_width: int, servo_frequency: int = 50,
+             pulse_offset: int = 0, pulse_cycles: int = 0) -> int:
+    _check(handle)
+    now = time.monotonic()
+    with _lock:
+        queue = _queue(gpio, now)
+        if len(queue) >= QUEUE_SIZE:
+            raise error("queue full")
+        start = now
+        if queue:
+            if queue[-1][1] is None:
+                # An infinite setting gives way to the next one
+                queue[-1][1] = now
+            else:
+                start = queue[-1][1]
+        end = start + pulse_cycles / servo_frequency if pulse_cycles else None
+        queue.append([start, end, pulse_width])
+        servo_pulses[gpio] = pulse_width
+        return QUEUE_SIZE - len(queue)
+
+
+def tx_pulse(handle: int, gpio: int, pulse_on: int, pulse_off: int,
+             pulse_offset: int = 0, pulse_cycles: int = 0) -> int:
+    _check(handle)
+    with _lock:
+        if pulse_on == 0 and pulse_off == 0:
+            # Stop the active pulses and drop everything queued
+            _queues.pop(gpio, None)
+            servo_pulses.pop(gpio, None)
+            return QUEUE_SIZE
+    raise error("only pulse switch-off (0, 0) is simulated")
+
+
+def tx_room(handle: int, gpio: int, kind: int) -> int:
+    _check(handle)
+    with _lock:
+        return QUEUE_SIZE - len(_queue(gpio, time.monotonic())) if kind == TX_PWM else QUEUE_SIZE
+
+
+def tx_busy(handle: int, gpio: int, kind: int) -> int:
+    _check(handle)
+    with _lock:
+        return int(kind == TX_PWM and bool(_queue(gpio, time.monotonic())))
+
+
+def servo_width(gpio: int) -> int:
+    """Pulse width (µs) being sent on a GPIO now (0 if none)."""
+    now = time.monotonic()
+    with _lock:
+        for start, end, width in _queue(gpio, now):
+            if start <= now:
+                return width
+    return 0
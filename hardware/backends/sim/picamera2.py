@@ -0,0 +1,326 @@
+"""
+Simulated picamera2
+
+A Camera Module 3 (IMX708) stand-in that renders a synthetic plant
+scene. Timing follows the real pipeline: start() takes a moment,
+frames arrive at the configured frame rate, and auto-exposure needs a
+few frames to settle, so frames captured straight after start() come
+out dark.
+
+Requires numpy (and Pillow for capture_file), both already pulled in
+by the real picamera2.
+"""
+import io
+import math
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+SENSOR_RESOLUTION = (4608, 2592)
+
+# Time for libcamera to start streaming, and AE/AGC convergence
+START_TIME = 0.08
+AE_SETTLE_FRAMES = 6
+
+# Max frame rate by output size (the IMX708 is slower at full resolution)
+FULL_RES_FPS = 14.0
+VIDEO_FPS = 30.0
+
+# Scene is re-rendered at most this often (the plant grows slowly)
+SCENE_REFRESH = 60.0
+
+
+def _frame_rate(size: Tuple[int, int]) -> float:
+    width, height = size
+    if width * height > 2304 * 1296:
+        return FULL_RES_FPS
+    return VIDEO_FPS
+
+
+_scene_cache: Dict[Tuple[int, int], Tuple[float, np.ndarray]] = {}
+_scene_lock = threading.Lock()
+
+
+def _render_scene(size: Tuple[int, int]) -> np.ndarray:
+    """Render a plant-on-soil RGB scene of the given (width, height)."""
+    now = time.time()
+    with _scene_lock:
+        cached = _scene_cache.get(size)
+        if cached and now - cached[0] < SCENE_REFRESH:
+            return cached[1]
+
+    width, height = size
+    ys, xs = np.ogrid[0:height, 0:width]
+    cx, cy = width / 2, height * 0.55
+
+    # Canopy radius breathes over a day so change detection has something to see
+    growth = 0.22 + 0.03 * math.sin(now / 86400 * 2 * math.pi)
+    rx, ry = width * growth, height * growth * 1.3
+
+    dist = ((xs - cx) / rx) ** 2 + ((ys - cy) / ry) ** 2
+    leaf_texture = (np.sin(xs / max(width / 64, 1)) * np.cos(ys / max(height / 48, 1))) * 20
+
+    frame = np.empty((height, width, 3), dtype=np.uint8)
+    frame[..., 0] = 110
+    frame[..., 1] = 80
+    frame[..., 2] = 55
+
+    canopy = dist < 1.0
+    green = np.clip(150 + leaf_texture, 0, 255).astype(np.uint8)
+    frame[..., 0][canopy] = 40
+    frame[..., 1][canopy] = np.broadcast_to(green, (height, width))[canopy]
+    frame[..., 2][canopy] = 35
+
+    with _scene_lock:
+        _scene_cache[size] = (now, frame)
+    return frame
+
+
+def _to_format(rgb: np.ndarray, fmt: str) -> np.ndarray:
+    """Convert an RGB frame to a picamera2 pixel format's numpy layout."""
+    if fmt == "RGB888":
+        # picamera2's RGB888 is stored [B, G, R]
+        return np.ascontiguousarray(rgb[..., ::-1])
+    if fmt == "BGR888":
+        return rgb
+    if fmt in ("XRGB8888", "XBGR8888"):
+        height, width, _ = rgb.shape
+        out = np.empty((height, width, 4), dtype=np.uint8)
+        out[..., :3] = rgb[..., ::-1] if fmt == "XRGB8888" else rgb
+        out[..., 3] = 255
+        return out
+    if fmt in ("YUV420", "YVU420"):
+        height, width, _ = rgb.shape
+        r, g, b = (rgb[..., c].astype(np.float32) for c in range(3))
+        y = 0.299 * r + 0.587 * g + 0.114 * b
+        u = (b - y) * 0.564 + 128
+        v = (r - y) * 0.713 + 128
+        if fmt == "YVU420":
+            u, v = v, u
+        out = np.empty((height * 3 // 2, width), dtype=np.uint8)
+        out[:height] = np.clip(y, 0, 255)
+        quarter = (height // 2) * (width // 2)
+        chroma = out[height:].reshape(-1)
+        chroma[:quarter] = np.clip(u[::2, ::2], 0, 255).reshape(-1)[:quarter]
+        chroma[quarter:2 * quarter] = np.clip(v[::2, ::2], 0, 255).reshape(-1)[:quarter]
+        return out
+    raise ValueError(f"Unsupported simulated format: {fmt}")
+
+
+def _to_rgb(array: np.ndarray, fmt: str) -> np.ndarray:
+    """Convert a captured array back to RGB for encoding."""
+    if fmt == "RGB888":
+        return array[..., ::-1]
+    if fmt == "BGR888":
+        return array
+    if fmt == "XRGB8888":
+        return array[..., 2::-1]
+    if fmt == "XBGR8888":
+        return array[..., :3]
+    if fmt in ("YUV420", "YVU420"):
+        height = array.shape[0] * 2 // 3
+        return np.repeat(array[:height, :, None], 3, axis=2)
+    raise ValueError(f"Unsupported simulated format: {fmt}")
+
+
+class Picamera2:
+    """Mirror of picamera2.Picamera2."""
+
+    def __init__(self, camera_num: int = 0, tuning=None):
+        self.camera_num = camera_num
+        self.sensor_resolution = SENSOR_RESOLUTION
+        self.camera_properties = {
+            "Model": "imx708 (simulated)",
+            "PixelArraySize": SENSOR_RESOLUTION,
+        }
+        self.options: Dict[str, Any] = {"quality": 90, "compress_level": 1}
+        self.camera_config: Optional[Dict[str, Any]] = None
+        self.started = False
+        self._controls: Dict[str, Any] = {}
+        self._started_at = 0.0
+        self._frames_since_start = 0
+        self._lock = threading.Lock()
+        self._closed = False
+
+    # ----- configuration ------------------------------------------------
+
+    @staticmethod
+    def _stream(spec: Optional[Dict[str, Any]], size, fmt) -> Optional[Dict[str, Any]]:
+        if spec is None:
+            return None
+        stream = {"size": tuple(spec.get("size", size)), "format": spec.get("format", fmt)}
+        return stream
+
+    def _create_configuration(self, use_case, main, lores, display, buffer_count,
+                              controls, default_size, default_format) -> Dict[str, Any]:
+        main = main or {}
+        return {
+            "use_case": use_case,
+            "main": self._stream(main, default_size, default_format),
+            "lores": self._stream(lores, (320, 240), "YUV420"),
+            "raw": None,
+            "display": display,
+            "buffer_count": buffer_count,
+            "controls": dict(controls or {}),
+        }
+
+    def create_still_configuration(self, main=None, lores=None, raw=None, transform=None,
+                                   colour_space=None, buffer_count=1, controls=None,
+                                   display=None, encode="main", **kwargs) -> Dict[str, Any]:
+        return self._create_configuration("still", main, lores, display, buffer_count,
+                                          controls, SENSOR_RESOLUTION, "BGR888")
+
+    def create_preview_configuration(self, main=None, lores=None, raw=None, transform=None,
+                                     colour_space=None, buffer_count=4, controls=None,
+                                     display="main", encode="main", **kwargs) -> Dict[str, Any]:
+        return self._create_configuration("preview", main, lores, display, buffer_count,
+                                          controls, (640, 480), "XBGR8888")
+
+    def create_video_configuration(self, main=None, lores=None, raw=None, transform=None,
+                                   colour_space=None, buffer_count=6, controls=None,
+                                   display="main", encode="main", **kwargs) -> Dict[str, Any]:
+        return self._create_configuration("video", main, lores, display, buffer_count,
+                                          controls, (1280, 720), "XBGR8888")
+
+    def configure(self, camera_config: Dict[str, Any]) -> None:
+        if self.started:
+            raise RuntimeError("Camera must be stopped before configuring")
+        self.camera_config = camera_config
+        self._controls.update(camera_config.get("controls", {}))
+
+    def set_controls(self, controls: Dict[str, Any]) -> None:
+        self._controls.update(controls)
+
+    # ----- streaming ----------------------------------------------------
+
+    def start(self, config=None, show_preview=False) -> None:
+        if self._closed:
+            raise RuntimeError("Camera has been closed")
+        if config is not None:
+            self.configure(config)
+        if self.camera_config is None:
+            self.configure(self.create_preview_configuration())
+        if self.started:
+            return
+        time.sleep(START_TIME)
+        self.started = True
+        self._started_at = time.monotonic()
+        self._frames_since_start = 0
+
+    def stop(self) -> None:
+        self.started = False
+
+    def close(self) -> None:
+        self.stop()
+        self._closed = True
+
+    def start_preview(self, preview=None, **kwargs) -> None:
+        pass
+
+    def stop_preview(self) -> None:
+        pass
+
+    def _frame_period(self) -> float:
+        fps = _frame_rate(self.camera_config["main"]["size"])
+        limits = self._controls.get("FrameDurationLimits")
+        if limits:
+            return max(1.0 / fps, limits[0] / 1e6)
+        return 1.0 / fps
+
+    def _wait_for_frame(self) -> int:
+        """Block until the next frame is delivered; returns its index."""
+        if not self.started:
+            raise RuntimeError("Camera is not started")
+        period = self._frame_period()
+        elapsed = time.monotonic() - self._started_at
+        index = max(int(elapsed / period) + 1, self._frames_since_start + 1)
+        delay = self._started_at + index * period - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        self._frames_since_start = index
+        return index
+
+    def _exposure_gain(self, frame_index: int) -> float:
+        if frame_index >= AE_SETTLE_FRAMES:
+            return 1.0
+        return 0.25 + 0.75 * frame_index / AE_SETTLE_FRAMES
+
+    def _make_array(self, name: str, frame_index: int) -> np.ndarray:
+        stream = self.camera_config.get(name)
+        if stream is None:
+            raise RuntimeError(f"Stream '{name}' is not configured")
+        rgb = _render_scene(stream["size"])
+        gain = self._exposure_gain(frame_index)
+        if gain != 1.0:
+            rgb = (rgb * gain).astype(np.uint8)
+        return _to_format(rgb, stream["format"])
+
+    def capture_array(self, name: str = "main", wait=None) -> np.ndarray:
+        with self._lock:
+            index = self._wait_for_frame()
+            return self._make_array(name, index).copy()
+
+    def capture_metadata(self, wait=None) -> Dict[str, Any]:
+        with self._lock:
+            index = self._wait_for_frame()
+            return self._metadata(index)
+
+    def _metadata(self, frame_index: int) -> Dict[str, Any]:
+        period = self._frame_period()
+        return {
+            "SensorTimestamp": int(time.monotonic() * 1e9),
+            "FrameDuration": int(period * 1e6),
+            "ExposureTime": int(period * 1e6 * 0.8 * self._exposure_gain(frame_index)),
+            "AeLocked": frame_index >= AE_SETTLE_FRAMES,
+        }
+
+    def capture_file(self, file_output, name: str = "main", format: Optional[str] = None,
+                     wait=None, signal_function=None) -> Dict[str, Any]:
+        with self._lock:
+            index = self._wait_for_frame()
+            array = self._make_array(name, index)
+            metadata = self._metadata(index)
+        stream = self.camera_config[name]
+        self._encode(_to_rgb(array, stream["format"]), file_output, format)
+        return metadata
+
+    def switch_mode_and_capture_file(self, camera_config, file_output, name: str = "main",
+                                     format: Optional[str] = None, wait=None,
+                                     signal_function=None, delay: int = 0) -> Dict[str, Any]:
+        # A mode switch keeps the converged AE/AWB state, unlike a cold start
+        previous = self.camera_config
+        settled = self._frames_since_start >= AE_SETTLE_FRAMES
+        self._restart(camera_config, settled)
+        try:
+            for _ in range(delay):
+                self.capture_metadata()
+            return self.capture_file(file_output, name=name, format=format)
+        finally:
+            self._restart(previous, settled)
+
+    def _restart(self, camera_config: Dict[str, Any], settled: bool) -> None:
+        self.stop()
+        self.configure(camera_config)
+        self.start()
+        if settled:
+            self._frames_since_start = AE_SETTLE_FRAMES
+
+    def _encode(self, rgb: np.ndarray, file_output, format: Optional[str]) -> None:
+        from PIL import Image
+
+        if format is None and isinstance(file_output, (str, os.PathLike)):
+            format = os.path.splitext(str(file_output))[1].lstrip(".") or "jpeg"
+        format = (format or "jpeg").lower()
+        if format == "jpg":
+            format = "jpeg"
+
+        image = Image.fromarray(np.ascontiguousarray(rgb), "RGB")
+        if format == "jpeg":
+            image.save(file_output, format="JPEG", quality=self.options.get("quality", 90))
+        else:
+            image.save(file_output, format=format.upper())
+        if isinstance(file_output, io.IOBase):
+            file_output.flush()
@@ -0,0 +1,132 @@
+"""
+Simulated smbus2
+
+A BH1750 (GY-30) answers at 0x23 with realistic conversion delays:
+reading before a measurement completes returns the previous result,
+just like the real part. Other addresses NACK.
+"""
+import random
+import threading
+import time
+from typing import Dict, List
+
+from backends.sim import env_float
+
+BH1750_ADDR = 0x23
+
+POWER_OFF = 0x00
+POWER_ON = 0x01
+RESET = 0x07
+
+CONTINUOUS_MODES = (0x10, 0x11, 0x13)
+ONE_TIME_MODES = (0x20, 0x21, 0x23)
+LOW_RES_MODES = (0x13, 0x23)
+HALF_LUX_MODES = (0x11, 0x21)
+
+# Typical conversion times from the BH1750 datasheet
+HIGH_RES_TIME = 0.120
+LOW_RES_TIME = 0.016
+
+
+class BH1750Model:
+    """Behavioural model of a BH1750 light sensor."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._powered = False
+        self._mode = None
+        self._data = 0
+        self._done_at = None
+
+    def _conversion_time(self) -> float:
+        return LOW_RES_TIME if self._mode in LOW_RES_MODES else HIGH_RES_TIME
+
+    def _measure(self) -> int:
+        lux = max(0.0, env_float("PLANTE_SIM_LUX", 450.0) * random.uniform(0.97, 1.03))
+        count = lux * 1.2
+        if self._mode in HALF_LUX_MODES:
+            count *= 2
+        elif self._mode in LOW_RES_MODES:
+            count = (count // 4) * 4
+        return min(int(count), 0xFFFF)
+
+    def _latch(self, now: float) -> None:
+        # Move a finished conversion into the data register
+        if self._done_at is not None and now >= self._done_at:
+            self._data = self._measure()
+            if self._mode in CONTINUOUS_MODES:
+                self._done_at = now + self._conversion_time()
+            else:
+                self._done_at = None
+                self._powered = False
+
+    def command(self, value: int) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self._latch(now)
+            if value == POWER_ON:
+                self._powered = True
+            elif value == POWER_OFF:
+                self._powered = False
+                self._done_at = None
+            elif value == RESET:
+                if self._powered:
+                    self._data = 0
+            elif value in CONTINUOUS_MODES or value in ONE_TIME_MODES:
+                self._powered = True
+                self._mode = value
+                self._done_at = now + self._conversion_time()
+            else:
+                raise OSError(121, "Remote I/O error")
+
+    def read(self) -> List[int]:
+        with self._lock:
+            self._latch(time.monotonic())
+            return [(self._data >> 8) & 0xFF, self._data & 0xFF]
+
+
+_devices: Dict[int, BH1750Model] = {}
+_devices_lock = threading.Lock()
+
+
+def _device(address: int) -> BH1750Model:
+    if address != BH1750_ADDR:
+        raise OSError(121, "Remote I/O error")
+    with _devices_lock:
+        if address not in _devices:
+            _devices[address] = BH1750Model()
+        return _devices[address]
+
+
+class SMBus:
+    """Mirror of smbus2.SMBus."""
+
+    def __init__(self, bus=None, force: bool = False):
+        self.bus = bus
+        self._open = True
+
+    def _check(self) -> None:
+        if not self._open:
+            raise OSError(9, "Bad file descriptor")
+
+    def write_byte(self, i2c_addr: int, value: int, force=None) -> None:
+        self._check()
+        _device(i2c_addr).command(value)
+
+    def read_i2c_block_data(self, i2c_addr: int, register: int, length: int, force=None) -> List[int]:
+        self._check()
+        device = _device(i2c_addr)
+        # The register byte goes out first; the BH1750 has no registers and
+        # treats it as a command, after returning the latched result.
+        data = device.read()
+        device.command(register)
+        return (data + [0] * length)[:length]
+
+    def close(self) -> None:
+        self._open = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,39 @@
+"""
+Simulated spidev
+
+Every SPI device is wired to the simulated ADS1256 on the AD/DA HAT.
+"""
+from typing import List, Optional
+
+from backends.sim.ads1256 import ADS1256Model, get_chip
+
+
+class SpiDev:
+    """Mirror of spidev.SpiDev."""
+
+    def __init__(self, bus: Optional[int] = None, device: Optional[int] = None):
+        self.max_speed_hz = 500000
+        self.mode = 0
+        self.bits_per_word = 8
+        self._chip: Optional[ADS1256Model] = None
+        if bus is not None and device is not None:
+            self.open(bus, device)
+
+    def open(self, bus: int, device: int) -> None:
+        self._chip = get_chip()
+
+    def close(self) -> None:
+        self._chip = None
+
+    def xfer2(self, data: List[int]) -> List[int]:
+        if self._chip is None:
+            raise OSError(9, "Bad file descriptor")
+        return self._chip.transfer(list(data))
+
+    xfer = xfer2
+
+    def writebytes(self, data: List[int]) -> None:
+        self.xfer2(data)
+
+    def readbytes(self, count: int) -> List[int]:
+        return self.xfer2([0xFF] * count)
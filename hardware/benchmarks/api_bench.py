@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Plante API benchmark
+
+Drives the sensor, camera, lid and config endpoints at a fixed
+concurrency and reports throughput and latency percentiles. By default
+it starts the API locally with simulated hardware (PLANTE_BACKEND=sim);
+pass --url to benchmark a running server instead (e.g. the Pi).
+
+Results are written as JSON so runs can be compared between commits.
+
+Usage:
+    python3 -m benchmarks.api_bench                          # All scenarios, local sim
+    python3 -m benchmarks.api_bench -c 16 -d 20              # 16 workers, 20s each
+    python3 -m benchmarks.api_bench -s sensors_cached config # Selected scenarios
+    python3 -m benchmarks.api_bench --url http://pi:8000 --api-key KEY
+    python3 -m benchmarks.api_bench --compare benchmarks/results/api-abc1234.json
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import requests
+
+HARDWARE_DIR = Path(__file__).resolve().parent.parent
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+# name -> (method, path, json body)
+SCENARIOS = {
+    "sensors_cached": ("GET", "/sensors", None),
+    "sensors_uncached": ("GET", "/sensors?use_cache=false", None),
+    "sensors_temperature": ("GET", "/sensors/temperature", None),
+    "sensors_light": ("GET", "/sensors/light", None),
+    "sensors_soil": ("GET", "/sensors/soil", None),
+    "camera_latest": ("GET", "/camera/latest", None),
+    "camera_latest_file": ("GET", "/camera/latest/file", None),
+    "lid_control": ("POST", "/lid/control", {"action": "toggle"}),
+    "config": ("GET", "/config", None),
+}
+
+
+def percentile(sorted_values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float, nbytes: int) -> dict:
+    """Reduce raw latencies (seconds) to the reported statistics (ms)."""
+    values = sorted(latencies)
+    count = len(values)
+
+    def ms(value: Optional[float]) -> Optional[float]:
+        return round(value * 1000, 3) if value is not None else None
+
+    return {
+        "requests": count,
+        "errors": errors,
+        "duration_s": round(elapsed, 3),
+        "throughput_rps": round(count / elapsed, 2) if elapsed > 0 else 0.0,
+        "bytes_per_request": round(nbytes / count) if count else 0,
+        "latency_ms": {
+            "mean": ms(sum(values) / count) if count else None,
+            "p50": ms(percentile(values, 50)),
+            "p95": ms(percentile(values, 95)),
+            "p99": ms(percentile(values, 99)),
+            "max": ms(values[-1]) if values else None,
+        },
+    }
+
+
+def run_scenario(base_url: str, name: str, concurrency: int, duration: float,
+                 warmup: int, headers: Dict[str, str], timeout: float) -> dict:
+    """Hammer one endpoint from `concurrency` workers for `duration` seconds."""
+    method, path, body = SCENARIOS[name]
+    url = base_url + path
+    local = threading.local()
+
+    def session() -> requests.Session:
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+            local.session.headers.update(headers)
+        return local.session
+
+    def one_request():
+        start = time.perf_counter()
+        response = session().request(method, url, json=body, timeout=timeout)
+        content = response.content
+        return time.perf_counter() - start, response.status_code, len(content)
+
+    for _ in range(warmup):
+        try:
+            one_request()
+        except requests.RequestException:
+            pass
+
+    latencies: List[float] = []
+    status_counts: Dict[str, int] = {}
+    counters = {"errors": 0, "bytes": 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker():
+        while time.perf_counter() < deadline:
+            try:
+                latency, status, size = one_request()
+            except requests.RequestException:
+                with lock:
+                    counters["errors"] += 1
+                    status_counts["exception"] = status_counts.get("exception", 0) + 1
+                continue
+            with lock:
+                status_counts[str(status)] = status_counts.get(str(status), 0) + 1
+                if status < 400:
+                    latencies.append(latency)
+                    counters["bytes"] += size
+                else:
+                    counters["errors"] += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(concurrency):
+            pool.submit(worker)
+    elapsed = time.perf_counter() - started
+
+    result = summarize(latencies, counters["errors"], elapsed, counters["bytes"])
+    result["status_codes"] = status_counts
+    return result
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_local_server(port: int, workdir: str) -> subprocess.Popen:
+    """Start the API with simulated hardware; photos go under `workdir`."""
+    env = dict(os.environ)
+    env.setdefault("PLANTE_BACKEND", "sim")
+    env.setdefault("PLANTE_SIM_ARDUINO_BOOT", "0.2")
+    env["HOME"] = workdir
+    env["API_KEY"] = ""
+    env["PYTHONPATH"] = str(HARDWARE_DIR)
+
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api.main:app",
+         "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=HARDWARE_DIR,
+        env=env,
+    )
+
+    url = f"http://127.0.0.1:{port}"
+    for _ in range(300):
+        if process.poll() is not None:
+            raise RuntimeError("API server exited during startup")
+        try:
+            if requests.get(f"{url}/health", timeout=1).status_code == 200:
+                return process
+        except requests.RequestException:
+            pass
+        time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("API server did not become healthy")
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=HARDWARE_DIR,
+            stderr=subprocess.DEVNULL, text=True,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_table(results: Dict[str, dict], baseline: Optional[Dict[str, dict]] = None) -> None:
+    header = f"{'scenario':<22}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}"
+    if baseline:
+        header += f"{'Δp50':>9}{'Δp99':>9}{'Δreq/s':>9}"
+    print(header)
+    print("-" * len(header))
+
+    def delta(new, old) -> str:
+        if new is None or not old:
+            return f"{'n/a':>9}"
+        return f"{(new - old) / old * 100:>+8.1f}%"
+
+    for name, result in results.items():
+        lat = result["latency_ms"]
+        line = (f"{name:<22}{result['throughput_rps']:>10.1f}"
+                f"{_fmt(lat['p50'])}{_fmt(lat['p95'])}{_fmt(lat['p99'])}{result['errors']:>8}")
+        if baseline and name in baseline:
+            old = baseline[name]
+            line += delta(lat["p50"], old["latency_ms"]["p50"])
+            line += delta(lat["p99"], old["latency_ms"]["p99"])
+            line += delta(result["throughput_rps"], old["throughput_rps"])
+        print(line)
+
+
+def _fmt(value: Optional[float]) -> str:
+    return f"{value:>10.2f}" if value is not None else f"{'-':>10}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Plante sensor API")
+    parser.add_argument("-s", "--scenarios", nargs="+", choices=list(SCENARIOS),
+                        default=list(SCENARIOS), help="Scenarios to run (default: all)")
+    parser.add_argument("-c", "--concurrency", type=int, default=8, help="Concurrent workers")
+    parser.add_argument("-d", "--duration", type=float, default=10.0, help="Seconds per scenario")
+    parser.add_argument("-w", "--warmup", type=int, default=3, help="Warmup requests per scenario")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout (s)")
+    parser.add_argument("--url", help="Benchmark a running server instead of a local sim")
+    parser.add_argument("--api-key", default=os.getenv("API_KEY", ""), help="X-API-Key header")
+    parser.add_argument("-o", "--output", help="Result file (default: benchmarks/results/api-<rev>.json)")
+    parser.add_argument("--compare", help="Previous result file to diff against")
+    args = parser.parse_args()
+
+    headers = {"X-API-Key": args.api_key} if args.api_key else {}
+    server = None
+    workdir = tempfile.mkdtemp(prefix="plante-bench-")
+
+    if args.url:
+        base_url = args.url.rstrip("/")
+    else:
+        port = free_port()
+        print(f"Starting local API with simulated hardware on port {port}...")
+        server = start_local_server(port, workdir)
+        base_url = f"http://127.0.0.1:{port}"
+
+    try:
+        # Make sure /camera/latest has something to serve
+        if any(name.startswith("camera_latest") for name in args.scenarios):
+            requests.get(f"{base_url}/camera/capture", headers=headers, timeout=args.timeout)
+
+        results: Dict[str, dict] = {}
+        for name in args.scenarios:
+            print(f"Running {name} (c={args.concurrency}, {args.duration:g}s)...")
+            results[name] = run_scenario(base_url, name, args.concurrency, args.duration,
+                                         args.warmup, headers, args.timeout)
+    finally:
+        if server:
+            server.terminate()
+            server.wait(timeout=10)
+
+    revision = git_revision()
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_revision": revision,
+        "target": args.url or "local-sim",
+        "backend": None if args.url else os.getenv("PLANTE_BACKEND", "sim"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "concurrency": args.concurrency,
+        "duration_s": args.duration,
+        "scenarios": results,
+    }
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"api-{revision or 'local'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+
+    baseline = None
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())["scenarios"]
+
+    print()
+    print_table(results, baseline)
+    print(f"\nResults saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
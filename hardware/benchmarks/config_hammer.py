@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Config write hammer
+
+Several writer threads patch a copy of config.json while reader
+processes re-read it in a tight loop, as main_control.py used to.
+Each writer increments its own counter in the config on every write,
+so at the end the counters show how many updates were lost, and the
+readers count the times they read a file that did not parse (torn).
+
+Modes:
+    legacy  read, modify, open('w') and json.dump (the old save_config)
+    store   ConfigStore.update(): merge under the store lock, then temp
+            file, fsync and atomic rename
+
+Usage:
+    python3 -m benchmarks.config_hammer
+    python3 -m benchmarks.config_hammer -d 5 -w 8 -r 4 -m store
+"""
+import argparse
+import json
+import multiprocessing
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict
+
+from config_store import CONFIG_FILE, ConfigStore
+
+MODES = ["legacy", "store"]
+
+
+def read_loop(path: str, stop, results) -> None:
+    """Re-read and parse the file until stopped (reader process)."""
+    reads = torn = 0
+    while not stop.is_set():
+        try:
+            with open(path, 'r') as f:
+                json.load(f)
+        except ValueError:
+            torn += 1
+        except FileNotFoundError:
+            torn += 1
+        reads += 1
+    results.put((reads, torn))
+
+
+def _increment(config: dict, writer: int) -> None:
+    counters = config.setdefault("hammer", {})
+    counters[str(writer)] = counters.get(str(writer), 0) + 1
+
+
+def legacy_write(path: Path, writer: int) -> None:
+    try:
+        with open(path, 'r') as f:
+            config = json.load(f)
+    except ValueError:
+        # What main_control did: carry on with whatever it could get
+        config = {}
+    _increment(config, writer)
+    with open(path, 'w') as f:
+        json.dump(config, f, indent=2)
+
+
+def run_mode(mode: str, duration: float, writers: int, readers: int) -> dict:
+    directory = tempfile.mkdtemp(prefix="plante-config-")
+    path = Path(directory) / "config.json"
+    shutil.copy(CONFIG_FILE, path)
+    store = ConfigStore(path) if mode == "store" else None
+
+    stop = multiprocessing.Event()
+    results = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=read_loop, args=(str(path), stop, results))
+                 for _ in range(readers)]
+    for process in processes:
+        process.start()
+
+    writes = [0] * writers
+    deadline = time.perf_counter() + duration
+
+    def write_loop(writer: int) -> None:
+        while time.perf_counter() < deadline:
+            if store is not None:
+                store.update(lambda config: _increment(config, writer))
+            else:
+                legacy_write(path, writer)
+            writes[writer] += 1
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=write_loop, args=(i,)) for i in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    reads = torn = 0
+    for _ in processes:
+        r, t = results.get()
+        reads += r
+        torn += t
+    for process in processes:
+        process.join()
+
+    try:
+        final = json.loads(path.read_text())
+    except ValueError:
+        final = {}
+    kept = sum(final.get("hammer", {}).values())
+    total = sum(writes)
+    shutil.rmtree(directory)
+    return {
+        "writes": total,
+        "writes_per_s": round(total / elapsed, 1),
+        "lost_updates": total - kept,
+        "reads": reads,
+        "torn_reads": torn,
+        "final_version": final.get("version"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hammer config.json writes and reads")
+    parser.add_argument("-m", "--modes", nargs="+", choices=MODES, default=MODES)
+    parser.add_argument("-d", "--duration", type=float, default=3.0, help="Seconds per mode")
+    parser.add_argument("-w", "--writers", type=int, default=4, help="Writer threads")
+    parser.add_argument("-r", "--readers", type=int, default=2, help="Reader processes")
+    args = parser.parse_args()
+
+    results: Dict[str, dict] = {}
+    for mode in args.modes:
+        print(f"Running {mode} ({args.duration:g}s, {args.writers} writers, {args.readers} readers)...")
+        results[mode] = run_mode(mode, args.duration, args.writers, args.readers)
+
+    columns = ["writes", "writes_per_s", "lost_updates", "reads", "torn_reads", "final_version"]
+    print()
+    print(f"{'mode':<8}" + "".join(f"{column:>15}" for column in columns))
+    for mode, result in results.items():
+        print(f"{mode:<8}" + "".join(f"{str(result[column]):>15}" for column in columns))
+
+
+if __name__ == "__main__":
+    main()
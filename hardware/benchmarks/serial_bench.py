@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Arduino serial benchmark
+
+Measures servo command throughput and round-trip latency over the
+dual_servo.ino protocol. By default it runs against the pty emulator
+(backends/sim/arduino.py, 9600 baud timing); pass --port to benchmark
+the real board.
+
+Scenarios:
+    legacy      write, fixed 100 ms sleep, readline (the old send_command)
+    sequential  one command at a time, reply matched by the reader thread
+    pipelined   batches sent back to back with send_commands()
+    concurrent  several threads calling send_command() at once
+
+Every reply is checked against its command (1:<n> must get OK:1=<n>),
+so mismatched replies show up as errors.
+
+Usage:
+    python3 -m benchmarks.serial_bench
+    python3 -m benchmarks.serial_bench -d 5 -s sequential pipelined
+    python3 -m benchmarks.serial_bench --port /dev/ttyACM0
+"""
+import argparse
+import itertools
+import json
+import platform
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List
+
+from arduino.servo_control import BAUD_RATE, DualServoController
+from benchmarks.api_bench import RESULTS_DIR, git_revision, print_table, summarize
+
+SCENARIOS = ["legacy", "sequential", "pipelined", "concurrent"]
+
+
+class Counters:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies: List[float] = []
+        self.errors = 0
+
+    def add(self, latency: float, ok: bool) -> None:
+        with self.lock:
+            if ok:
+                self.latencies.append(latency)
+            else:
+                self.errors += 1
+
+
+def expected(angle: int) -> str:
+    return f"OK:1={angle}"
+
+
+def run_legacy(controller: DualServoController, duration: float, counters: Counters) -> None:
+    """The pre-transport send_command: write, sleep 100 ms, readline."""
+    controller.transport.close()
+    port = controller.serial
+    port.timeout = 2
+    angles = itertools.cycle(range(181))
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        angle = next(angles)
+        start = time.perf_counter()
+        port.write(f"1:{angle}\n".encode())
+        time.sleep(0.1)
+        response = port.readline().decode(errors="replace").strip()
+        counters.add(time.perf_counter() - start, response == expected(angle))
+
+
+def run_sequential(controller: DualServoController, duration: float, counters: Counters) -> None:
+    angles = itertools.cycle(range(181))
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        angle = next(angles)
+        start = time.perf_counter()
+        response = controller.send_command(f"1:{angle}")
+        counters.add(time.perf_counter() - start, response == expected(angle))
+
+
+def run_pipelined(controller: DualServoController, duration: float, counters: Counters,
+                  batch: int) -> None:
+    angles = itertools.cycle(range(181))
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        sent = [next(angles) for _ in range(batch)]
+        start = time.perf_counter()
+        try:
+            responses = controller.send_commands([f"1:{angle}" for angle in sent])
+        except TimeoutError:
+            counters.add(0, False)
+            continue
+        # Latency per command is the batch time spread over its commands
+        latency = (time.perf_counter() - start) / batch
+        for angle, response in zip(sent, responses):
+            counters.add(latency, response == expected(angle))
+
+
+def run_concurrent(controller: DualServoController, duration: float, counters: Counters,
+                   concurrency: int) -> None:
+    deadline = time.perf_counter() + duration
+
+    def worker(offset: int):
+        angles = itertools.cycle(range(offset, 181, concurrency))
+        while time.perf_counter() < deadline:
+            angle = next(angles)
+            start = time.perf_counter()
+            response = controller.send_command(f"1:{angle}")
+            counters.add(time.perf_counter() - start, response == expected(angle))
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for offset in range(concurrency):
+            pool.submit(worker, offset)
+
+
+def run_scenario(port: str, name: str, duration: float, batch: int, concurrency: int) -> dict:
+    controller = DualServoController(port=port)
+    if not controller.connect():
+        raise RuntimeError(f"Could not connect to {port}")
+    counters = Counters()
+    started = time.perf_counter()
+    try:
+        if name == "legacy":
+            run_legacy(controller, duration, counters)
+        elif name == "sequential":
+            run_sequential(controller, duration, counters)
+        elif name == "pipelined":
+            run_pipelined(controller, duration, counters, batch)
+        else:
+            run_concurrent(controller, duration, counters, concurrency)
+        elapsed = time.perf_counter() - started
+        tagged = controller.transport.tagged if controller.transport else None
+    finally:
+        controller.close()
+
+    result = summarize(counters.latencies, counters.errors, elapsed, 0)
+    del result["bytes_per_request"]
+    result["tagged"] = tagged
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Arduino serial protocol")
+    parser.add_argument("-s", "--scenarios", nargs="+", choices=SCENARIOS,
+                        default=SCENARIOS, help="Scenarios to run (default: all)")
+    parser.add_argument("-d", "--duration", type=float, default=5.0, help="Seconds per scenario")
+    parser.add_argument("-b", "--batch", type=int, default=16, help="Commands per pipelined batch")
+    parser.add_argument("-c", "--concurrency", type=int, default=4, help="Threads for 'concurrent'")
+    parser.add_argument("--port", help="Benchmark this serial port instead of the emulator")
+    parser.add_argument("-o", "--output", help="Result file (default: benchmarks/results/serial-<rev>.json)")
+    parser.add_argument("--compare", help="Previous result file to diff against")
+    args = parser.parse_args()
+
+    emulator = None
+    if args.port:
+        port = args.port
+    else:
+        from backends.sim.arduino import ArduinoEmulator
+        emulator = ArduinoEmulator(boot_delay=0.2).start()
+        port = emulator.port
+        print(f"Arduino emulator on {port}")
+
+    try:
+        results: Dict[str, dict] = {}
+        for name in args.scenarios:
+            print(f"Running {name} ({args.duration:g}s)...")
+            results[name] = run_scenario(port, name, args.duration, args.batch, args.concurrency)
+    finally:
+        if emulator:
+            emulator.stop()
+
+    revision = git_revision()
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_revision": revision,
+        "target": args.port or "emulator",
+        "firmware_tags": None if args.port else emulator.supports_move,
+        "baud_rate": BAUD_RATE,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "duration_s": args.duration,
+        "batch": args.batch,
+        "concurrency": args.concurrency,
+        "scenarios": results,
+    }
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"serial-{revision or 'local'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+
+    baseline = None
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())["scenarios"]
+
+    print()
+    print_table(results, baseline)
+    print(f"\nResults saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,359 @@
+"""
+Shared greenhouse config store
+
+config.json used to be opened and parsed by every reader: each control
+loop cycle of main_control.py read it three or more times, and the
+lid service and /config routes once per call. The store parses it
+once, so reads cost no I/O. get() hands out a copy, so a reader that
+changes it (to write() it back, say) cannot change anyone else's config.
+
+A background watcher reloads the file when it changes on disk: inotify
+on its directory (which also sees editors and tools that replace the
+file by renaming), or, where inotify is unavailable, a check of its
+mtime every WATCH_INTERVAL seconds. A file that fails to parse (e.g.
+caught half-written) is ignored and the last good config is kept.
+
+Writes are atomic and durable: the new config goes to a temporary file
+in the same directory, is fsync'd, and is renamed over config.json (and
+the directory fsync'd), so a concurrent reader sees either the old or
+the new file, never a truncated one, and a power cut cannot leave an
+empty config. The in-memory copy is updated at once, so the writer's
+own reads never see the old config.
+
+Every write stores a version number in the file ("version"), one more
+than the last. update() takes the version the caller last read and
+fails with VersionConflict if the config has changed since, and applies
+its change to the current config under the store lock, so concurrent
+read-modify-write cycles cannot lose updates. A hand edit that does not
+raise the version still gets a new one in memory.
+
+Listeners (add_listener()) are called after every change, whether it
+came from a write or from the file. The API pushes them to other
+processes on CONFIG_SOCKET (api/services/config_events.py), and those
+take them with adopt() instead of re-reading the file.
+
+    store = get_config_store()
+    poll_interval = store.get().get("poll_interval", 30)
+"""
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+from inotify_watch import IN_CLOSE_WRITE, IN_CREATE, IN_MOVED_TO, IN_Q_OVERFLOW, Event, Inotify
+from telemetry import Counter
+
+# config.json (re)parsed after a change on disk (file), or replaced by
+# the API (write)
+CONFIG_RELOADS = Counter(
+    "plante_config_reloads",
+    "Config store updates by source",
+    ["source"],
+)
+
+CONFIG_FILE = Path(__file__).parent / "config.json"
+
+# Used when config.json is missing or unreadable at startup
+DEFAULT_CONFIG = {
+    "thresholds": {
+        "temperature": {"min": 15, "max": 28},
+        "humidity": {"min": 30, "max": 70},
+        "soil_moisture": {"min": 20},
+        "light": {"min": 200}
+    },
+    "servo": {"lid_open": 90, "lid_closed": 0},
+    "poll_interval": 30,
+    "actions_enabled": True
+}
+
+# Where the API pushes config changes to other processes
+DEFAULT_CONFIG_SOCKET = "~/Plante/hardware/config.sock"
+
+# mtime check interval when inotify cannot be used (seconds)
+WATCH_INTERVAL = 2.0
+
+_WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+
+class VersionConflict(Exception):
+    """The config changed since the version a writer based its change on."""
+
+    def __init__(self, expected: int, current: int):
+        super().__init__(f"Config is at version {current}, not {expected}")
+        self.expected = expected
+        self.current = current
+
+
+def _version(config: dict) -> int:
+    version = config.get("version", 0)
+    return version if isinstance(version, int) and version >= 0 else 0
+
+
+def config_socket_path() -> str:
+    """Config events socket path (CONFIG_SOCKET, or the default)."""
+    return os.path.expanduser(os.getenv("CONFIG_SOCKET", DEFAULT_CONFIG_SOCKET))
+
+
+def _copy(config: dict) -> dict:
+    return json.loads(json.dumps(config))
+
+
+def changed_keys(previous: dict, config: dict) -> List[str]:
+    """Top-level settings that differ between two configs (not the version)."""
+    keys = (set(previous) | set(config)) - {"version"}
+    return sorted(key for key in keys if previous.get(key) != config.get(key))
+
+
+class ConfigStore:
+    """
+    Parsed config.json, reloaded when the file changes.
+
+    Args:
+        path: Config file
+    """
+
+    def __init__(self, path: Path = CONFIG_FILE):
+        self.path = Path(path)
+        self.version = 0
+        self._config: dict = DEFAULT_CONFIG
+        # (mtime_ns, size, inode) of the file the config was parsed from
+        self._stamp: Optional[Tuple[int, int, int]] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+        self._listeners: List[Callable[[int, dict, dict], None]] = []
+        if not self.reload():
+            print(f"[Config] Using defaults until {self.path} can be read")
+
+    def get(self) -> dict:
+        """A copy of the current config."""
+        return _copy(self._config)
+
+    def snapshot(self) -> Tuple[int, dict]:
+        """(version, config) read together (the config is shared: do not modify it)."""
+        with self._lock:
+            return self.version, self._config
+
+    def add_listener(self, callback: Callable[[int, dict, dict], None]) -> None:
+        """
+        Call callback(version, config, previous) after every change.
+
+        Called from the thread that made the change (a writer or the
+        watcher), outside the store lock, so keep it short. Changes made
+        at the same time may be reported out of order; compare versions.
+        """
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback: Callable[[int, dict, dict], None]) -> None:
+        try:
+            self._listeners.remove(callback)
+        except ValueError:
+            pass
+
+    def _notify(self, version: int, config: dict, previous: dict) -> None:
+        for callback in list(self._listeners):
+            try:
+                callback(version, config, previous)
+            except Exception as e:
+                print(f"[Config] Change listener failed: {e}")
+
+    def adopt(self, version: int, config: dict, resync: bool = False) -> bool:
+        """
+        Take a config another process has already saved (e.g. pushed by
+        the API), without reading the file.
+
+        Args:
+            version: Its version
+            config: The config (copied)
+            resync: Take it even if the version is not newer (the other
+                process restarted, and may number from the file again)
+
+        Returns:
+            False if it is not newer (or, resyncing, is the same)
+        """
+        config = _copy(config)
+        with self._lock:
+            if resync:
+                if version == self.version and config == self._config:
+                    return False
+            elif version <= self.version:
+                return False
+            previous = self._config
+            self._config = config
+            self.version = version
+        self._notify(version, config, previous)
+        return True
+
+    def _file_stamp(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def reload(self) -> bool:
+        """
+        Re-read the file if it changed since it was last parsed.
+
+        Returns:
+            False if the file could not be read or parsed
+        """
+        # Under the lock, so the watcher sees write()'s own change as done
+        with self._lock:
+            stamp = self._file_stamp()
+            if stamp is None:
+                return False
+            if stamp == self._stamp:
+                return True
+            try:
+                with open(self.path, 'r') as f:
+                    config = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"[Config] Keeping the previous config, {self.path} is unreadable: {e}")
+                return False
+            # The dict always carries the store's version, so GET
+            # /config's body matches its ETag
+            version = config["version"] = _version(config)
+            if version <= self.version and not changed_keys(self._config, config):
+                # Touched, or already adopted from a push: nothing new
+                self._stamp = stamp
+                return True
+            if self._stamp is not None and version <= self.version:
+                # Edited without raising the version: still a new one
+                version = config["version"] = self.version + 1
+            previous = self._config
+            self._stamp = stamp
+            self._config = config
+            self.version = version
+        CONFIG_RELOADS.labels(source="file").inc()
+        self._notify(version, config, previous)
+        return True
+
+    def update(self, change: Callable[[dict], None],
+               expected_version: Optional[int] = None) -> Tuple[int, dict]:
+        """
+        Change the config and save it.
+
+        Args:
+            change: Called with a copy of the current config to modify
+            expected_version: Version the change was based on (None: any)
+
+        Returns:
+            (version, config) as saved
+
+        Raises:
+            VersionConflict: The config is no longer at expected_version
+            OSError: The file could not be written
+        """
+        with self._lock:
+            if expected_version is not None and expected_version != self.version:
+                raise VersionConflict(expected_version, self.version)
+            previous = self._config
+            config = _copy(previous)
+            change(config)
+            config["version"] = version = self.version + 1
+            self._write_file(config)
+            self._config = config
+            self._stamp = self._file_stamp()
+            self.version = version
+        CONFIG_RELOADS.labels(source="write").inc()
+        self._notify(version, config, previous)
+        return version, config
+
+    def write(self, config: dict, expected_version: Optional[int] = None) -> Tuple[int, dict]:
+        """Replace the whole config (see update())."""
+        def replace(current: dict) -> None:
+            current.clear()
+            current.update(config)
+        return self.update(replace, expected_version)
+
+    def _write_file(self, config: dict) -> None:
+        """Write to a temporary file, fsync it, and rename it over the config."""
+        directory = self.path.parent
+        fd, tmp = tempfile.mkstemp(prefix=f".{self.path.name}.", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(config, f, indent=2)
+                f.write("\n")
+                f.flush()
+                os.fsync(f.fileno())
+            try:
+                os.chmod(tmp, os.stat(self.path).st_mode & 0o777)
+            except FileNotFoundError:
+                os.chmod(tmp, 0o644)
+            os.replace(tmp, self.path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except FileNotFoundError:
+                pass
+            raise
+        # Make the rename itself durable
+        dir_fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+    # ----- watching -----------------------------------------------------
+
+    def start_watching(self) -> None:
+        """Reload on file changes in a background thread."""
+        if self._watcher is not None:
+            return
+        self._stop.clear()
+        self._watcher = threading.Thread(target=self._watch, name="config-watch", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self) -> None:
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=2)
+            self._watcher = None
+
+    def _watch(self) -> None:
+        inotify = Inotify.open()
+        if inotify is None:
+            print("[Config] inotify unavailable, checking config.json's mtime")
+            self._poll()
+            return
+
+        try:
+            # The directory, not the file: renames replace the file's inode
+            if inotify.add_watch(str(self.path.parent), _WATCH_MASK) < 0:
+                print(f"[Config] Cannot watch {self.path.parent}, checking config.json's mtime")
+                self._poll()
+                return
+
+            name = self.path.name
+            while not self._stop.is_set():
+                if self._names_file(inotify.read(1.0), name):
+                    self.reload()
+        finally:
+            inotify.close()
+
+    @staticmethod
+    def _names_file(events: List[Event], name: str) -> bool:
+        """Whether a batch of inotify events touches the config file."""
+        return any(event.mask & IN_Q_OVERFLOW or event.name == name for event in events)
+
+    def _poll(self) -> None:
+        while not self._stop.wait(WATCH_INTERVAL):
+            self.reload()
+
+
+# Global singleton instance
+_config_store: Optional[ConfigStore] = None
+_config_store_lock = threading.Lock()
+
+
+def get_config_store() -> ConfigStore:
+    """Get this process's config store (watching config.json)."""
+    global _config_store
+    with _config_store_lock:
+        if _config_store is None:
+            _config_store = ConfigStore()
+            _config_store.start_watching()
+    return _config_store
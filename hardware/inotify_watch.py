@@ -0,0 +1,102 @@
+"""
+Minimal inotify(7) binding
+
+ctypes calls into libc (no third-party package), shared by the photo
+index (api/services/photo_index.py) and the config store
+(config_store.py):
+
+    inotify = Inotify.open()
+    if inotify is None:
+        ...  # not Linux, or no inotify: fall back to polling
+    inotify.add_watch(directory, IN_CLOSE_WRITE | IN_MOVED_TO)
+    for event in inotify.read(timeout=1.0):
+        print(event.wd, event.mask, event.name)
+"""
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+from typing import List, NamedTuple, Optional
+
+# inotify(7) constants
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+
+# struct inotify_event header: wd, mask, cookie, len
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class Event(NamedTuple):
+    """One inotify event."""
+    wd: int
+    mask: int
+    # File name within the watched directory ("" for the directory itself)
+    name: str
+
+
+def _libc():
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+def parse_events(data: bytes) -> List[Event]:
+    """Split a read() from an inotify descriptor into events."""
+    events = []
+    offset = 0
+    while offset + _EVENT_HEADER.size <= len(data):
+        wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+        offset += _EVENT_HEADER.size
+        name = data[offset:offset + length].rstrip(b"\0").decode(errors="replace")
+        offset += length
+        events.append(Event(wd, mask, name))
+    return events
+
+
+class Inotify:
+    """A non-blocking inotify descriptor."""
+
+    def __init__(self, libc, fd: int):
+        self._libc = libc
+        self.fd = fd
+
+    @classmethod
+    def open(cls) -> Optional["Inotify"]:
+        """A new inotify instance, or None where inotify is unavailable."""
+        libc = _libc()
+        if libc is None:
+            return None
+        fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if fd < 0:
+            return None
+        return cls(libc, fd)
+
+    def add_watch(self, path: str, mask: int) -> int:
+        """Watch path; returns the watch descriptor (negative on failure)."""
+        return self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+
+    def read(self, timeout: float) -> List[Event]:
+        """Events that arrive within timeout seconds (empty if none)."""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+        try:
+            return parse_events(os.read(self.fd, 64 * 1024))
+        except BlockingIOError:
+            return []
+
+    def close(self) -> None:
+        os.close(self.fd)
@@ -6,7 +6,17 @@ Continuously monitors sensors and controls the greenhouse lid
 based on configurable thresholds for Kalanchoe care.
 
 This script reads sensor data via the HTTP API (plante-api service)
-to avoid GPIO conflicts. The API must be running.
+to avoid GPIO conflicts, and opens and closes the lid through the API's
+/lid endpoints, so there is one lid state (persisted and checked against
+the Arduino by the API) rather than a copy here that drifts. The API
+must be running.
+
+Config changes are pushed by the API on its config events socket
+(CONFIG_SOCKET) rather than polled: a threshold or actions_enabled
+change saved from the dashboard is checked against the last sensor
+readings within milliseconds, and a new poll_interval applies to the
+current wait. config.json is only read at startup, and again while the
+API cannot be reached.
 
 Usage:
     python3 main_control.py           # Run control loop
@@ -17,53 +27,99 @@ import json
 import time
 import sys
 import os
+import socket
+import threading
 from datetime import datetime
-from pathlib import Path
+from typing import Optional
 
 import requests
 
-# Add current directory to path for imports
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from config_store import ConfigStore, changed_keys, config_socket_path
 
-from arduino.servo_control import DualServoController
+API_URL = os.getenv("PLANTE_API_URL", "http://localhost:8000")
 
+# Settings the threshold rules use: a change re-checks them at once
+RULE_KEYS = ("thresholds", "actions_enabled")
 
-CONFIG_FILE = Path(__file__).parent / "config.json"
-API_URL = os.getenv("PLANTE_API_URL", "http://localhost:8000")
+# Reconnect delay for the config events socket, doubling up to the max (s)
+EVENTS_RETRY = 1.0
+EVENTS_RETRY_MAX = 30.0
 
 
 class GreenhouseController:
     """Main greenhouse automation controller."""
     
     def __init__(self):
-        self.servo_controller = None
-        self.lid_is_open = False
-        self.config = {}
+        # Parsed once; changes arrive on the API's config events socket
+        self.store = ConfigStore()
+        self.config = self.store.get()
         self.api_url = API_URL
+        # Last sensor readings, re-checked when the thresholds change
+        self.readings: Optional[dict] = None
+        self._check_lock = threading.Lock()
+        # Set to cut the wait between readings short
+        self._wake = threading.Event()
+        self._events: Optional[threading.Thread] = None
+        self.store.add_listener(self._config_changed)
         
     def load_config(self) -> dict:
-        """Load config from JSON file (reloads on each call for live updates)."""
-        try:
-            with open(CONFIG_FILE, 'r') as f:
-                self.config = json.load(f)
-            return self.config
-        except Exception as e:
-            print(f"[ERROR] Failed to load config: {e}")
-            # Return defaults if config fails
-            return {
-                "thresholds": {
-                    "temperature": {"min": 15, "max": 28},
-                    "humidity": {"min": 30, "max": 70},
-                    "soil_moisture": {"min": 20},
-                    "light": {"min": 200}
-                },
-                "servo": {"lid_open": 90, "lid_closed": 0},
-                "poll_interval": 30,
-                "actions_enabled": True
-            }
+        """The current config (no file I/O; changes are pushed by the API)."""
+        self.config = self.store.get()
+        return self.config
+    
+    def subscribe(self) -> None:
+        """Follow the API's config changes in a background thread."""
+        if self._events is None:
+            self._events = threading.Thread(target=self._follow_events,
+                                            name="config-events", daemon=True)
+            self._events.start()
+    
+    def _follow_events(self) -> None:
+        path = config_socket_path()
+        retry = EVENTS_RETRY
+        while True:
+            try:
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                    sock.connect(path)
+                    print(f"[INFO] Following config changes on {path}")
+                    retry = EVENTS_RETRY
+                    # The first line is the API's current config
+                    resync = True
+                    with sock.makefile("rb") as lines:
+                        for line in lines:
+                            self._config_event(json.loads(line), resync)
+                            resync = False
+                print("[WARNING] Config events closed by the API")
+            except OSError as e:
+                print(f"[WARNING] Config events unavailable ({path}): {e}")
+            except (ValueError, KeyError) as e:
+                print(f"[ERROR] Bad config event: {e}")
+            
+            # Meanwhile, pick up edits made to config.json by hand
+            self.store.reload()
+            time.sleep(retry)
+            retry = min(retry * 2, EVENTS_RETRY_MAX)
+    
+    def _config_event(self, event: dict, resync: bool) -> None:
+        if self.store.adopt(event["version"], event["config"], resync):
+            # From the API saving it to the rules having been re-checked
+            delay = (time.time() - event["time"]) * 1000
+            print(f"[CONFIG] Version {event['version']} applied {delay:.0f} ms after it was saved")
+    
+    def _config_changed(self, version: int, config: dict, previous: dict) -> None:
+        """Store listener: act on a new config at once."""
+        self.config = config
+        changed = changed_keys(previous, config)
+        if not changed:
+            return
+        print(f"[CONFIG] Version {version}: {', '.join(changed)} changed")
+        if "poll_interval" in changed:
+            self._wake.set()
+        if self.readings is not None and any(key in changed for key in RULE_KEYS):
+            self.check_thresholds(self.readings)
     
     def connect(self) -> bool:
-        """Initialize servo connection and verify API is available."""
+        """Verify the API is available."""
         print(f"[INFO] Checking API at {self.api_url}...")
         try:
             response = requests.get(f"{self.api_url}/health", timeout=5)
@@ -82,41 +138,63 @@ class GreenhouseController:
             print(f"[ERROR] API timeout at {self.api_url}")
             return False
         
-        print("[INFO] Connecting to Arduino...")
-        self.servo_controller = DualServoController()
-        if not self.servo_controller.connect():
-            print("[ERROR] Failed to connect to Arduino")
-            return False
-        
         print("[INFO] Greenhouse controller ready!")
         return True
     
+    def lid_status(self) -> Optional[dict]:
+        """Lid state as the API tracks it (None if the API did not answer)."""
+        try:
+            response = requests.get(f"{self.api_url}/lid/status", timeout=5)
+            if response.status_code == 200:
+                return response.json()
+            print(f"[ERROR] Lid status returned {response.status_code}")
+        except requests.exceptions.RequestException as e:
+            print(f"[ERROR] Lid status failed: {e}")
+        return None
+    
+    def _lid_command(self, action: str, reason: str) -> None:
+        """Ask the API to move the lid; the move is timed in its /lid/log."""
+        start = time.perf_counter()
+        try:
+            response = requests.post(
+                f"{self.api_url}/lid/control",
+                json={"action": action, "reason": f"main_control: {reason}"},
+                timeout=10,
+            )
+            if response.status_code >= 400:
+                print(f"[ERROR] Lid {action} returned {response.status_code}")
+                return
+            motion = response.json().get("motion") or {}
+            print(f"[INFO] Lid {action} accepted in {(time.perf_counter() - start) * 1000:.0f} ms"
+                  f" ({motion.get('id', 'no move')})")
+        except requests.exceptions.RequestException as e:
+            print(f"[ERROR] Lid {action} failed: {e}")
+    
     def open_lid(self, reason: str):
-        """Open greenhouse lid using both servos."""
-        if self.lid_is_open:
+        """Open greenhouse lid (the API moves both servos)."""
+        status = self.lid_status()
+        if status is not None and status["is_open"]:
             return
         
-        config = self.load_config()
-        angle = config.get("servo", {}).get("lid_open", 90)
-        
         print(f"[ACTION] Opening lid ({reason})")
-        self.servo_controller.set_servo("both", angle)
-        self.lid_is_open = True
+        self._lid_command("open", reason)
         
     def close_lid(self, reason: str):
-        """Close greenhouse lid using both servos."""
-        if not self.lid_is_open:
+        """Close greenhouse lid (the API moves both servos)."""
+        status = self.lid_status()
+        if status is not None and not status["is_open"]:
             return
         
-        config = self.load_config()
-        angle = config.get("servo", {}).get("lid_closed", 0)
-        
         print(f"[ACTION] Closing lid ({reason})")
-        self.servo_controller.set_servo("both", angle)
-        self.lid_is_open = False
+        self._lid_command("close", reason)
     
     def check_thresholds(self, readings: dict) -> None:
         """Check sensor readings against thresholds and take action."""
+        # Called by the loop and on config changes: one check at a time
+        with self._check_lock:
+            self._check_thresholds(readings)
+    
+    def _check_thresholds(self, readings: dict) -> None:
         config = self.load_config()
         thresholds = config.get("thresholds", {})
         actions_enabled = config.get("actions_enabled", True)
@@ -202,16 +280,31 @@ class GreenhouseController:
         """Single control loop iteration (for testing)."""
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         readings = self.read_sensors()
+        lid = self.lid_status()
+        if lid is None:
+            lid_text = "N/A"
+        else:
+            lid_text = f"{'OPEN' if lid['is_open'] else 'CLOSED'} ({lid['angle']}°)"
         
         print(f"\n[{timestamp}] Sensor Readings:")
         print(f"  Temperature: {readings.get('temperature', 'N/A')}°C")
         print(f"  Humidity:    {readings.get('humidity', 'N/A')}%")
         print(f"  Soil:        {readings.get('soil_moisture', 'N/A')}%")
         print(f"  Light:       {readings.get('light', 'N/A')} lux")
-        print(f"  Lid:         {'OPEN' if self.lid_is_open else 'CLOSED'}")
+        print(f"  Lid:         {lid_text}")
         
+        self.readings = readings
         self.check_thresholds(readings)
     
+    def wait(self, started: float) -> None:
+        """Sleep until poll_interval after started, re-timed if it changes."""
+        while True:
+            self._wake.clear()
+            interval = self.load_config().get("poll_interval", 30)
+            remaining = started + interval - time.monotonic()
+            if remaining <= 0 or not self._wake.wait(remaining):
+                return
+    
     def run(self) -> None:
         """Main control loop."""
         print("\n" + "="*50)
@@ -219,22 +312,16 @@ class GreenhouseController:
         print("  Press Ctrl+C to exit")
         print("="*50 + "\n")
         
+        self.subscribe()
         try:
             while True:
+                started = time.monotonic()
                 self.run_once()
-                
-                config = self.load_config()
-                interval = config.get("poll_interval", 30)
-                time.sleep(interval)
+                self.wait(started)
                 
         except KeyboardInterrupt:
             print("\n[INFO] Shutting down...")
             self.close_lid("shutdown")
-            
-    def cleanup(self) -> None:
-        """Clean up resources."""
-        if self.servo_controller:
-            self.servo_controller.close()
 
 
 def main():
@@ -244,13 +331,10 @@ def main():
         print("[FATAL] Failed to initialize. Exiting.")
         sys.exit(1)
     
-    try:
-        if "--once" in sys.argv:
-            controller.run_once()
-        else:
-            controller.run()
-    finally:
-        controller.cleanup()
+    if "--once" in sys.argv:
+        controller.run_once()
+    else:
+        controller.run()
 
 
 if __name__ == "__main__":
@@ -0,0 +1 @@
+# Servo drivers package
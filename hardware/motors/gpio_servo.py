@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Direct-GPIO servo driver
+
+Drives the lid servos straight from the Pi's GPIO instead of through the
+Arduino. servo.py moves by calling set_angle() in a Python loop, so every
+step waits on a time.sleep() wakeup and the motion jitters with the
+scheduler. Here a move is planned up front: the motion profile (see
+motion_profile.py) is sampled once per 50 Hz servo frame and the pulse
+widths are queued on lgpio's per-GPIO servo queue in one burst, ending
+with an infinite setting that holds the target. lgpio then plays the
+queue frame by frame, and Python only wakes once, when the move ends
+or is pre-empted. Equal consecutive widths share one queue entry; a move
+longer than the queue has room for is queued in coarser steps.
+
+Pre-empting a move switches the GPIO's pulses off, which drops the
+rest of the queue, and holds the angle the profile had reached. (lgpio
+waves cannot be cut short once queued, so moves use the servo queue.)
+
+GpioServoController answers the same calls LidService makes on the
+Arduino's DualServoController (STATUS, <servo>:<angle>, move()), so it
+can take the Arduino's place: set SERVO_DRIVER=gpio. Without feedback
+from the servos, positions are unknown until the first command.
+
+Usage:
+    python3 -m motors.gpio_servo both 90 1500     # S-curve to 90° over 1.5 s
+    python3 -m motors.gpio_servo 1 0 800 trapezoid
+"""
+import math
+import sys
+import threading
+import time
+from typing import Callable, List, Optional, Sequence
+
+from backends import lgpio
+from motors.motion_profile import PROFILES, profile_angle, sample
+from telemetry import record
+
+# Servo 1 and servo 2 (GPIO 18 = physical pin 12, GPIO 13 = pin 33)
+SERVO_PINS = (18, 13)
+
+# Servo frames per second
+SERVO_FREQ = 50
+
+# SG90: 500µs = 0°, 2500µs = 180°
+MIN_PULSE = 500
+MAX_PULSE = 2500
+
+# Longest move accepted (ms), as with the Arduino's MOVE
+MAX_MOVE_MS = 60000
+
+
+def pulse_width(angle: float) -> int:
+    """Servo pulse width (µs) for an angle (0-180)."""
+    angle = max(0.0, min(180.0, angle))
+    return round(MIN_PULSE + angle / 180 * (MAX_PULSE - MIN_PULSE))
+
+
+def _entries(widths: List[int], room: int) -> List[List[int]]:
+    """Queue entries [width, frames] for per-frame widths, at most room of them."""
+    step = max(1, math.ceil(len(widths) / max(1, room)))
+    entries: List[List[int]] = []
+    for i in range(0, len(widths), step):
+        group = widths[i:i + step]
+        if entries and entries[-1][0] == group[-1]:
+            entries[-1][1] += len(group)
+        else:
+            entries.append([group[-1], len(group)])
+    return entries
+
+
+class GpioServoController:
+    """
+    Servos on GPIO pins, moved by queued lgpio servo pulses.
+
+    Args:
+        pins: GPIO of servo 1, servo 2, ...
+        frequency: Servo frames per second
+    """
+
+    profiles = tuple(PROFILES)
+    # Moves are always played from the queue (no stepping fallback)
+    supports_move = True
+
+    def __init__(self, pins: Sequence[int] = SERVO_PINS, frequency: int = SERVO_FREQ):
+        self.pins = tuple(pins)
+        self.frequency = frequency
+        self.handle: Optional[int] = None
+        # Last commanded angle per servo (None until first commanded)
+        self.positions: List[Optional[float]] = [None] * len(self.pins)
+        self._lock = threading.Lock()
+
+    def connect(self) -> bool:
+        """Claim the servo GPIO."""
+        try:
+            self.handle = lgpio.gpiochip_open(0)
+            for pin in self.pins:
+                lgpio.gpio_claim_output(self.handle, pin)
+        except lgpio.error as e:
+            print(f"GPIO servo setup failed: {e}")
+            self.close()
+            return False
+        print(f"Servos on GPIO {', '.join(str(pin) for pin in self.pins)}")
+        return True
+
+    @property
+    def is_connected(self) -> bool:
+        return self.handle is not None
+
+    def close(self) -> None:
+        """Stop the pulses and release the GPIO."""
+        if self.handle is None:
+            return
+        for pin in self.pins:
+            try:
+                lgpio.tx_pulse(self.handle, pin, 0, 0)
+            except lgpio.error:
+                pass
+        lgpio.gpiochip_close(self.handle)
+        self.handle = None
+
+    def _servos(self, servo) -> List[int]:
+        name = str(servo).strip().lower()
+        if name == "both":
+            return list(range(len(self.pins)))
+        if name.isdigit() and 1 <= int(name) <= len(self.pins):
+            return [int(name) - 1]
+        raise ValueError(f"Unknown servo {servo}")
+
+    def _status(self, prefix: str) -> str:
+        return f"{prefix}:" + ",".join(
+            f"{i + 1}={'?' if angle is None else round(angle)}"
+            for i, angle in enumerate(self.positions))
+
+    def _hold(self, index: int, angle: float) -> None:
+        """Replace whatever the servo is doing with a steady pulse for angle."""
+        pin = self.pins[index]
+        lgpio.tx_pulse(self.handle, pin, 0, 0)
+        lgpio.tx_servo(self.handle, pin, pulse_width(angle), self.frequency)
+        self.positions[index] = angle
+
+    def set_servo(self, servo, angle: int) -> None:
+        """Jump servo(s) to an angle (0-180)."""
+        angle = max(0, min(180, int(angle)))
+        with self._lock:
+            for index in self._servos(servo):
+                self._hold(index, angle)
+
+    def send_command(self, cmd, timeout: Optional[float] = None) -> str:
+        """
+        Handle a dual_servo.ino command (STATUS or <servo>:<angle>).
+
+        Returns:
+            The reply the firmware would give
+        """
+        cmd = str(cmd).strip()
+        if cmd.upper() == "STATUS":
+            return self._status("STATUS")
+        servo, _, angle = cmd.partition(":")
+        try:
+            self.set_servo(servo, int(angle))
+        except ValueError as e:
+            return f"ERROR:{e}"
+        return f"OK:{servo.upper()}={max(0, min(180, int(angle)))}"
+
+    def move(self, servo, target: int, duration_ms: float, profile: str = "scurve",
+             cancel: Optional[threading.Event] = None) -> str:
+        """
+        Move servo(s) to target over duration_ms along a motion profile.
+
+        Blocks until the move ends. Setting the cancel event stops the
+        servos where the profile had got to.
+
+        Args:
+            servo: 1, 2, or 'both'
+            target: Target angle 0-180
+            duration_ms: Length of the move (0-60000 ms)
+            profile: Name from motion_profile.PROFILES
+            cancel: Optional threading.Event that stops the move
+
+        Returns:
+            DONE:/STOPPED: with the final positions, like the firmware
+        """
+        profile = str(profile).lower()
+        if profile not in PROFILES:
+            raise ValueError(f"Unknown motion profile {profile}")
+        target = max(0, min(180, int(target)))
+        duration = max(0, min(MAX_MOVE_MS, int(duration_ms))) / 1000
+        indices = self._servos(servo)
+
+        with self._lock:
+            # Unknown position: nothing to interpolate from, go straight there
+            starts = {i: target if self.positions[i] is None else self.positions[i] for i in indices}
+            started = time.monotonic()
+            for index in indices:
+                pin = self.pins[index]
+                widths = [pulse_width(angle) for angle in
+                          sample(profile, starts[index], target, duration, self.frequency)]
+                lgpio.tx_pulse(self.handle, pin, 0, 0)
+                # One entry is kept for the final hold
+                room = lgpio.tx_room(self.handle, pin, lgpio.TX_PWM) - 1
+                for width, frames in _entries(widths, room):
+                    lgpio.tx_servo(self.handle, pin, width, self.frequency, 0, frames)
+                lgpio.tx_servo(self.handle, pin, pulse_width(target), self.frequency)
+
+        wait: Callable[[float], bool] = cancel.wait if cancel is not None else _sleep
+        stopped = wait(duration)
+        record("move", time.monotonic() - started, "GPIO move")
+        if stopped:
+            elapsed = time.monotonic() - started
+            with self._lock:
+                for index in indices:
+                    self._hold(index, profile_angle(profile, starts[index], target, elapsed, duration))
+                return self._status("STOPPED")
+
+        with self._lock:
+            for index in indices:
+                self.positions[index] = target
+            return self._status("DONE")
+
+
+def _sleep(seconds: float) -> bool:
+    time.sleep(seconds)
+    return False
+
+
+class GpioServoLink:
+    """
+    Stands in for the Arduino's servo link when LidService drives the
+    servos from GPIO: same controller/wait/listener calls, no socket.
+    """
+
+    def __init__(self, pins: Sequence[int] = SERVO_PINS):
+        self.pins = tuple(pins)
+        self.controller: Optional[GpioServoController] = None
+        self._listeners: List[Callable[[GpioServoController], None]] = []
+
+    @property
+    def is_connected(self) -> bool:
+        return self.controller is not None and self.controller.is_connected
+
+    def add_connect_listener(self, callback: Callable[[GpioServoController], None]) -> None:
+        """Call callback(controller) once the GPIO is claimed."""
+        self._listeners.append(callback)
+        if self.is_connected:
+            callback(self.controller)
+
+    def start(self) -> None:
+        """Claim the GPIO (no-op if already claimed)."""
+        if self.is_connected:
+            return
+        controller = GpioServoController(self.pins)
+        if not controller.connect():
+            return
+        self.controller = controller
+        for callback in self._listeners:
+            try:
+                callback(controller)
+            except Exception as e:
+                print(f"GPIO servos: connect listener failed: {e}")
+
+    def wait(self, timeout: float) -> Optional[GpioServoController]:
+        self.start()
+        return self.controller if self.is_connected else None
+
+    def close(self) -> None:
+        if self.controller is not None:
+            self.controller.close()
+            self.controller = None
+
+
+def main():
+    if len(sys.argv) < 4:
+        print(__doc__)
+        return
+    controller = GpioServoController()
+    if not controller.connect():
+        return
+    try:
+        profile = sys.argv[4] if len(sys.argv) > 4 else "scurve"
+        start = time.perf_counter()
+        print(controller.move(sys.argv[1], int(sys.argv[2]), int(sys.argv[3]), profile))
+        print(f"  {time.perf_counter() - start:.2f}s")
+    except KeyboardInterrupt:
+        print("\nExiting...")
+    finally:
+        controller.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Servo motion profiles
+
+A profile maps the fraction of a move's time that has passed (0-1) to
+the fraction of the distance covered (0-1):
+
+    linear     constant speed (jerks at both ends)
+    ease       half-cosine, the same curve the Arduino firmware's EASE uses
+    trapezoid  constant acceleration, cruise, constant deceleration
+    scurve     minimum-jerk quintic: acceleration also starts and ends at
+               zero, so the lid never gets a sudden push
+
+The GPIO servo driver (gpio_servo.py) samples these once per servo
+frame and queues the whole move up front; LidService uses the same
+curves to estimate where the lid is during a move.
+"""
+import math
+from typing import List
+
+# Fraction of a trapezoid move spent accelerating (and again decelerating)
+TRAPEZOID_ACCEL = 0.25
+
+
+def linear(t: float) -> float:
+    return t
+
+
+def ease(t: float) -> float:
+    return 0.5 - 0.5 * math.cos(math.pi * t)
+
+
+def trapezoid(t: float, accel: float = TRAPEZOID_ACCEL) -> float:
+    # Cruise speed that covers the whole distance in unit time
+    peak = 1 / (1 - accel)
+    if t < accel:
+        return 0.5 * peak / accel * t * t
+    if t > 1 - accel:
+        return 1 - 0.5 * peak / accel * (1 - t) ** 2
+    return peak * (t - accel / 2)
+
+
+def scurve(t: float) -> float:
+    return t * t * t * (10 - 15 * t + 6 * t * t)
+
+
+PROFILES = {
+    "linear": linear,
+    "ease": ease,
+    "trapezoid": trapezoid,
+    "scurve": scurve,
+}
+
+
+def profile_angle(profile: str, start: float, end: float, elapsed: float, duration: float) -> float:
+    """
+    Angle of a move elapsed seconds after it started.
+
+    Args:
+        profile: Name from PROFILES
+        start: Angle at the start of the move
+        end: Target angle
+        elapsed: Seconds since the move started
+        duration: Length of the move in seconds
+    """
+    if duration <= 0 or elapsed >= duration:
+        return end
+    t = max(0.0, elapsed) / duration
+    return start + (end - start) * PROFILES[profile](t)
+
+
+def sample(profile: str, start: float, end: float, duration: float, rate: float) -> List[float]:
+    """
+    Angles at the end of each of a move's frames.
+
+    Args:
+        rate: Frames per second (the servo pulse frequency)
+
+    Returns:
+        One angle per frame; the last is always end
+    """
+    frames = max(1, round(duration * rate))
+    curve = PROFILES[profile]
+    return [start + (end - start) * curve(i / frames) for i in range(1, frames + 1)]
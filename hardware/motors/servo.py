@@ -5,7 +5,8 @@
 # Hardware    : SG90 Micro Servo on GPIO 18
 ########################################################################
 import time
-import lgpio
+
+from backends import lgpio
 
 SERVO_PIN = 18  # GPIO 18 (Physical Pin 12)
 
@@ -58,8 +58,7 @@ def read_from_api(api_url: str = API_URL):
 
 def read_direct_gpio():
     """Read directly from GPIO (only use when API is stopped)."""
-    import board
-    import adafruit_dht
+    from backends import adafruit_dht, board
     
     # Initialize the DHT11 sensor on GPIO 17 (board.D4)
     dht_device = adafruit_dht.DHT11(board.D4)
@@ -4,43 +4,173 @@
 # Description : Capture photos with Raspberry Pi Camera Module 3
 # Hardware    : Pi Camera Module 3 (IMX708) via CSI connector
 #############################################################################
+import io
 import os
+import threading
 import time
 from datetime import datetime
 
+from telemetry import span
+
 try:
-    from picamera2 import Picamera2
-    import libcamera
+    from backends import picamera2
+    Picamera2 = picamera2.Picamera2
 except ImportError:
     print("picamera2 not installed. Run: pip install picamera2")
     Picamera2 = None
-    libcamera = None
+
+
+# Full sensor resolution for stills
+STILL_SIZE = (4608, 2592)
+# 2x2 binned full field of view; the warm pipeline streams at this size
+STREAM_SIZE = (2304, 1296)
+# Low resolution secondary stream for live view
+PREVIEW_SIZE = (640, 360)
+# Longest we wait for auto-exposure to settle after starting
+AE_SETTLE_TIMEOUT = 1.0
 
 
 class PlantCamera:
     """Raspberry Pi Camera for greenhouse monitoring."""
     
-    def __init__(self, save_dir="~/Plante/hardware/photos"):
+    def __init__(self, save_dir="~/Plante/hardware/photos", persistent=False, idle_timeout=300):
+        """
+        Args:
+            save_dir: Directory for captured photos
+            persistent: Keep the pipeline running between captures with
+                auto-exposure settled (warm mode), instead of starting and
+                stopping the camera for every photo
+            idle_timeout: Seconds without a capture before a warm camera
+                is powered down (restarted on the next capture)
+        """
         if Picamera2 is None:
             raise ImportError("picamera2 library is not installed")
             
         self.save_dir = os.path.expanduser(save_dir)
         os.makedirs(self.save_dir, exist_ok=True)
         
+        self.persistent = persistent
+        self.idle_timeout = idle_timeout
+        self._lock = threading.RLock()
+        self._idle_timer = None
+        self._running = False
+        # Live stream viewers keep the pipeline from idling down
+        self._holds = 0
+        
         self.camera = Picamera2()
         # Configure for still photos
-        config = self.camera.create_still_configuration(
-            main={"size": (4608, 2592)},  # Full resolution
+        self.still_config = self.camera.create_still_configuration(
+            main={"size": STILL_SIZE},  # Full resolution
+            display=None
+        )
+        # Continuous stream for warm captures, plus a small YUV stream for live view
+        self.stream_config = self.camera.create_video_configuration(
+            main={"size": STREAM_SIZE, "format": "RGB888"},
+            lores={"size": PREVIEW_SIZE, "format": "YUV420"},
             display=None
         )
-        self.camera.configure(config)
+        self.camera.configure(self.stream_config if persistent else self.still_config)
+    
+    @property
+    def is_warm(self):
+        """True while the pipeline is running with exposure settled."""
+        return self._running
+    
+    def _settle_exposure(self):
+        """Wait until auto-exposure reports locked (or the timeout passes)."""
+        deadline = time.monotonic() + AE_SETTLE_TIMEOUT
+        while time.monotonic() < deadline:
+            metadata = self.camera.capture_metadata()
+            if metadata.get("AeLocked"):
+                return
+    
+    def warm_up(self):
+        """Start the persistent pipeline if it is not already running."""
+        with self._lock:
+            if self._running:
+                return
+            with span("warmup", "Camera start and exposure settle"):
+                self.camera.start()
+                self._settle_exposure()
+            self._running = True
+            print("Camera pipeline warm")
+    
+    def power_down(self):
+        """Stop the persistent pipeline (the sensor powers down)."""
+        with self._lock:
+            if self._idle_timer:
+                self._idle_timer.cancel()
+                self._idle_timer = None
+            if self._running:
+                self.camera.stop()
+                self._running = False
+                print("Camera pipeline stopped")
+    
+    def _arm_idle_timer(self):
+        if self._idle_timer:
+            self._idle_timer.cancel()
+        if self.idle_timeout and self.idle_timeout > 0:
+            self._idle_timer = threading.Timer(self.idle_timeout, self._idle_power_down)
+            self._idle_timer.daemon = True
+            self._idle_timer.start()
+    
+    def _idle_power_down(self):
+        with self._lock:
+            if self._holds == 0:
+                self.power_down()
+    
+    def hold(self):
+        """Keep the warm pipeline running (live view); pair with release()."""
+        if not self.persistent:
+            raise RuntimeError("Live view requires the persistent (warm) pipeline")
+        with self._lock:
+            self._holds += 1
+            self.warm_up()
+    
+    def release(self):
+        """Drop a hold; the idle timer restarts once nothing holds the camera."""
+        with self._lock:
+            self._holds = max(0, self._holds - 1)
+            if self._holds == 0:
+                self._arm_idle_timer()
+    
+    def capture_preview(self):
+        """
+        Grab the next low resolution frame from the warm pipeline.
         
-    def capture(self, filename=None):
+        Returns:
+            YUV420 numpy array of PREVIEW_SIZE (planar, height * 3/2 rows)
+        """
+        with self._lock:
+            self.warm_up()
+            return self.camera.capture_array("lores")
+    
+    def sample_preview(self):
+        """
+        Grab one low resolution frame without keeping the camera awake.
+        
+        A warm pipeline keeps its idle deadline; a cold one is started
+        for the frame and stopped again.
+        
+        Returns:
+            YUV420 numpy array, as capture_preview()
+        """
+        with self._lock:
+            was_running = self._running
+            try:
+                return self.capture_preview()
+            finally:
+                if not was_running and self._holds == 0:
+                    self.power_down()
+    
+    def capture(self, filename=None, full_resolution=False):
         """
         Capture a single photo.
         
         Args:
             filename: Optional filename. If None, uses timestamp.
+            full_resolution: In warm mode, briefly switch to the full
+                resolution still mode instead of grabbing from the stream
             
         Returns:
             Path to saved image
@@ -50,15 +180,58 @@ class PlantCamera:
             filename = f"plant_{timestamp}.jpg"
         
         filepath = os.path.join(self.save_dir, filename)
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
         
-        self.camera.start()
-        time.sleep(0.5)  # Let camera adjust exposure
-        self.camera.capture_file(filepath)
-        self.camera.stop()
+        with self._lock:
+            if self.persistent:
+                self._capture_warm(filepath, full_resolution)
+            else:
+                self._capture_cold(filepath)
         
         print(f"Photo saved: {filepath}")
         return filepath
     
+    def capture_jpeg(self, full_resolution=False):
+        """
+        Capture a single photo into memory instead of a file.
+        
+        Args:
+            full_resolution: As for capture()
+            
+        Returns:
+            JPEG bytes
+        """
+        # A fresh buffer each time: getvalue() then hands over the
+        # buffer's own bytes object instead of copying the JPEG
+        buffer = io.BytesIO()
+        with self._lock:
+            if self.persistent:
+                self._capture_warm(buffer, full_resolution, format="jpeg")
+            else:
+                self._capture_cold(buffer, format="jpeg")
+            return buffer.getvalue()
+    
+    def _capture_warm(self, output, full_resolution, format=None):
+        """Capture from the running pipeline, starting it if needed."""
+        self.warm_up()
+        if full_resolution:
+            with span("capture", "Mode switch, full resolution capture and encode"):
+                self.camera.switch_mode_and_capture_file(self.still_config, output, format=format)
+        else:
+            with span("capture", "Stream capture and encode"):
+                self.camera.capture_file(output, format=format)
+        self._arm_idle_timer()
+    
+    def _capture_cold(self, output, format=None):
+        """Start the camera, capture one full resolution still, stop."""
+        with span("warmup", "Camera start and exposure settle"):
+            self.camera.start()
+            time.sleep(0.5)  # Let camera adjust exposure
+        with span("capture", "Still capture and encode"):
+            self.camera.capture_file(output, format=format)
+        with span("camera_stop", "Camera stop"):
+            self.camera.stop()
+    
     def capture_timelapse(self, count=10, interval=5, prefix="timelapse"):
         """
         Capture a series of photos for timelapse.
@@ -70,21 +243,28 @@ class PlantCamera:
         """
         print(f"Starting timelapse: {count} photos, {interval}s interval")
         
-        self.camera.start()
-        time.sleep(1)  # Initial warmup
+        if self.persistent:
+            self.warm_up()
+        else:
+            self.camera.start()
+            time.sleep(1)  # Initial warmup
         
         for i in range(count):
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             filename = f"{prefix}_{i:04d}_{timestamp}.jpg"
             filepath = os.path.join(self.save_dir, filename)
             
-            self.camera.capture_file(filepath)
+            with self._lock:
+                self.camera.capture_file(filepath)
             print(f"[{i+1}/{count}] Captured: {filename}")
             
             if i < count - 1:
                 time.sleep(interval)
         
-        self.camera.stop()
+        if self.persistent:
+            self._arm_idle_timer()
+        else:
+            self.camera.stop()
         print("Timelapse complete!")
         
     def preview(self, duration=5):
@@ -103,6 +283,7 @@ class PlantCamera:
         
     def close(self):
         """Clean up camera resources."""
+        self.power_down()
         self.camera.close()
 
 
@@ -137,8 +318,8 @@ if __name__ == '__main__':
             camera.close()
         elif sys.argv[1] == '--help':
             print("Usage:")
-            print("  python3 camera.py              # Take single photo")
-            print("  python3 camera.py --timelapse [count] [interval]")
-            print("                                  # Take timelapse photos")
+            print("  python3 -m sensors.camera              # Take single photo")
+            print("  python3 -m sensors.camera --timelapse [count] [interval]")
+            print("                                         # Take timelapse photos")
     else:
         main()
@@ -5,9 +5,10 @@
 # Hardware    : GY-30 on I2C (SDA=GPIO2, SCL=GPIO3)
 ########################################################################
 import time
-import smbus2
 import os
 
+from backends import smbus2
+
 # BH1750 I2C address (ADDR pin low or unconnected = 0x23, ADDR pin high = 0x5C)
 BH1750_ADDR = 0x23
 
@@ -7,11 +7,12 @@
 # Notes       : The HAT uses SPI, not regular GPIO pins!
 #             : Make sure SPI is enabled: sudo raspi-config -> Interface Options -> SPI
 #############################################################################
+import sys
 import time
-import spidev
-import lgpio
 import requests
 
+from backends import lgpio, spidev
+
 # ============================================================================
 # ADS1256 Configuration (Waveshare High-Precision AD/DA HAT)
 # ============================================================================
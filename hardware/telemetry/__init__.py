@@ -0,0 +1,36 @@
+"""
+Telemetry
+
+Process-wide metrics for the sensors, camera, servos and API, exposed
+by the API at /metrics in the Prometheus text format, plus per-request
+timing spans rendered as Server-Timing headers.
+"""
+from .metrics import (
+    CONTENT_TYPE,
+    DEFAULT_BUCKETS,
+    REGISTRY,
+    Counter,
+    Gauge,
+    Histogram,
+    Registry,
+)
+from .timing import (
+    Timeline,
+    current_timeline,
+    record,
+    span,
+)
+
+__all__ = [
+    "CONTENT_TYPE",
+    "DEFAULT_BUCKETS",
+    "REGISTRY",
+    "Counter",
+    "Gauge",
+    "Histogram",
+    "Registry",
+    "Timeline",
+    "current_timeline",
+    "record",
+    "span",
+]
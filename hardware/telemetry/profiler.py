@@ -0,0 +1,178 @@
+"""
+On-demand sampling profiler
+
+Samples the stacks of every thread (sensor workers, the event loop,
+serial readers, ...) with sys._current_frames() from a background
+thread for a fixed duration. Nothing runs and nothing is hooked while
+idle, so it is safe to leave compiled into the API.
+
+Output formats:
+    collapsed   - "thread;outer;...;inner count" lines (flamegraph.pl,
+                  speedscope, inferno)
+    speedscope  - speedscope.app JSON, one sampled profile per thread
+"""
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Tuple
+
+MAX_SECONDS = 300
+MAX_HZ = 1000
+
+FORMATS = ("collapsed", "speedscope")
+
+# (filename, function, first line) - identifies a frame in a stack
+FrameKey = Tuple[str, str, int]
+
+_HARDWARE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Only one profile may run at a time
+_busy = threading.Lock()
+
+
+class ProfilerBusy(RuntimeError):
+    """Raised when a profile is already being collected."""
+
+
+class Profile:
+    """Aggregated stack samples from one profiling run."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.duration = 0.0
+        self.sample_count = 0
+        self.thread_names: Dict[int, str] = {}
+        # (thread id, stack root->leaf) -> samples
+        self.stacks: Counter = Counter()
+
+    @staticmethod
+    def _label(frame: FrameKey) -> str:
+        filename, function, line = frame
+        if filename.startswith(_HARDWARE_DIR):
+            filename = os.path.relpath(filename, _HARDWARE_DIR)
+        else:
+            filename = os.path.basename(filename)
+        return f"{function} ({filename}:{line})"
+
+    def _thread_label(self, ident: int) -> str:
+        return f"{self.thread_names.get(ident, 'thread')}-{ident}"
+
+    def collapsed(self) -> str:
+        """Brendan Gregg's collapsed stack format."""
+        lines = []
+        for (ident, stack), count in sorted(self.stacks.items(), key=lambda item: -item[1]):
+            frames = [self._thread_label(ident)] + [self._label(frame) for frame in stack]
+            lines.append(";".join(name.replace(";", ":") for name in frames) + f" {count}")
+        return "\n".join(lines) + "\n"
+
+    def speedscope(self, name: str = "plante-api") -> dict:
+        """speedscope.app file format (sampled profiles, one per thread)."""
+        frame_index: Dict[FrameKey, int] = {}
+        frames: List[dict] = []
+        by_thread: Dict[int, Tuple[List[List[int]], List[float]]] = {}
+
+        for (ident, stack), count in self.stacks.items():
+            indices = []
+            for frame in stack:
+                if frame not in frame_index:
+                    frame_index[frame] = len(frames)
+                    frames.append({"name": self._label(frame), "file": frame[0], "line": frame[2]})
+                indices.append(frame_index[frame])
+            samples, weights = by_thread.setdefault(ident, ([], []))
+            samples.append(indices)
+            weights.append(count * self.interval)
+
+        profiles = []
+        for ident, (samples, weights) in sorted(by_thread.items()):
+            profiles.append({
+                "type": "sampled",
+                "name": self._thread_label(ident),
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights,
+            })
+
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "plante-profiler",
+            "activeProfileIndex": 0,
+            "shared": {"frames": frames},
+            "profiles": profiles,
+        }
+
+    def render(self, fmt: str) -> str:
+        if fmt == "speedscope":
+            return json.dumps(self.speedscope())
+        return self.collapsed()
+
+
+def _stack(frame) -> Tuple[FrameKey, ...]:
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append((code.co_filename, code.co_name, code.co_firstlineno))
+        frame = frame.f_back
+    stack.reverse()
+    return tuple(stack)
+
+
+def profile(seconds: float, hz: int = 100) -> Profile:
+    """
+    Sample all threads for `seconds` at `hz` samples per second.
+
+    Blocks the calling thread for the duration; call it from a worker
+    thread when used inside the event loop.
+
+    Raises:
+        ProfilerBusy: Another profile is in progress
+        ValueError: seconds or hz out of range
+    """
+    if not 0 < seconds <= MAX_SECONDS:
+        raise ValueError(f"seconds must be between 0 and {MAX_SECONDS}")
+    if not 0 < hz <= MAX_HZ:
+        raise ValueError(f"hz must be between 1 and {MAX_HZ}")
+    if not _busy.acquire(blocking=False):
+        raise ProfilerBusy("A profile is already running")
+
+    try:
+        interval = 1.0 / hz
+        result = Profile(interval)
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        own = threading.get_ident()
+        start = time.perf_counter()
+        deadline = start + seconds
+        next_sample = start
+
+        while True:
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            if now < next_sample:
+                time.sleep(next_sample - now)
+            # Skip missed ticks rather than bursting to catch up
+            next_sample = max(next_sample + interval, now)
+
+            for ident, frame in sys._current_frames().items():
+                if ident != own:
+                    result.stacks[(ident, _stack(frame))] += 1
+            result.sample_count += 1
+
+        result.duration = time.perf_counter() - start
+        names.update({thread.ident: thread.name for thread in threading.enumerate()})
+        result.thread_names = names
+        return result
+    finally:
+        _busy.release()
+
+
+def render_profile(seconds: float, hz: int = 100, fmt: str = "collapsed") -> str:
+    """Profile and render in one call."""
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of {', '.join(FORMATS)}")
+    return profile(seconds, hz).render(fmt)
@@ -0,0 +1,106 @@
+"""
+Per-request timing spans
+
+Code on the request path records named durations (lock wait, sensor
+reads, camera warmup, file I/O, ...) into the current request's
+Timeline, which the API renders as a Server-Timing header. Outside a
+request (control loop, CLI scripts) recording is a no-op costing one
+context variable lookup.
+
+    with span("lock", "Sensor lock wait"):
+        ...
+    record("dht11", elapsed, "DHT11 read")
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Dict, Iterator, List, Optional
+
+
+class Timeline:
+    """Spans recorded during one request, aggregated by name."""
+
+    __slots__ = ("_spans", "_order")
+
+    def __init__(self):
+        # name -> [total seconds, count, description]
+        self._spans: Dict[str, list] = {}
+        self._order: List[str] = []
+
+    def add(self, name: str, duration: float, description: Optional[str] = None) -> None:
+        entry = self._spans.get(name)
+        if entry is None:
+            self._spans[name] = [duration, 1, description]
+            self._order.append(name)
+        else:
+            entry[0] += duration
+            entry[1] += 1
+
+    def extend(self, other: "Timeline") -> None:
+        """Add another timeline's spans (e.g. from a worker thread)."""
+        for name, seconds, count, description in other.items():
+            entry = self._spans.get(name)
+            if entry is None:
+                self._spans[name] = [seconds, count, description]
+                self._order.append(name)
+            else:
+                entry[0] += seconds
+                entry[1] += count
+
+    def total(self, name: str) -> float:
+        """Total seconds recorded under a name (0 if none)."""
+        entry = self._spans.get(name)
+        return entry[0] if entry else 0.0
+
+    def items(self) -> List[tuple]:
+        """(name, seconds, count, description) in first-recorded order."""
+        return [(name, *self._spans[name]) for name in self._order]
+
+    def server_timing(self) -> str:
+        """Render as a Server-Timing header value (durations in ms)."""
+        parts = []
+        for name, seconds, count, description in self.items():
+            part = f"{name};dur={seconds * 1000:.2f}"
+            if description:
+                if count > 1:
+                    description = f"{description} (x{count})"
+                part += f';desc="{description}"'
+            parts.append(part)
+        return ", ".join(parts)
+
+
+_current: ContextVar[Optional[Timeline]] = ContextVar("plante_timeline", default=None)
+
+
+def start_timeline() -> Token:
+    """Begin collecting spans for the current context (one per request)."""
+    return _current.set(Timeline())
+
+
+def end_timeline(token: Token) -> None:
+    _current.reset(token)
+
+
+def current_timeline() -> Optional[Timeline]:
+    return _current.get()
+
+
+def record(name: str, duration: float, description: Optional[str] = None) -> None:
+    """Record an already measured duration (seconds) if a request is active."""
+    timeline = _current.get()
+    if timeline is not None:
+        timeline.add(name, duration, description)
+
+
+@contextmanager
+def span(name: str, description: Optional[str] = None) -> Iterator[None]:
+    """Time a block into the current request's timeline."""
+    timeline = _current.get()
+    if timeline is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timeline.add(name, time.perf_counter() - start, description)
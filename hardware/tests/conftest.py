@@ -0,0 +1,49 @@
+"""
+Shared pytest setup
+
+The services import each other as top-level packages (api, telemetry,
+motors, ...), the way the API runs from hardware/, so put that
+directory on the path whichever directory pytest is started from.
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+import types
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+
+@pytest.fixture
+def arduino():
+    """dual_servo.ino emulator on a pty, quick to boot."""
+    from backends.sim.arduino import ArduinoEmulator
+
+    emulator = ArduinoEmulator(boot_delay=0.05).start()
+    yield emulator
+    emulator.stop()
+
+
+@pytest.fixture
+def serial_env(monkeypatch):
+    """
+    Serial code set up for a test emulator.
+
+    The servo link socket goes in a fresh short directory (Unix socket
+    paths are limited to about 100 bytes), the serial port is used as
+    given, and connect() waits out the emulator's quick boot instead of
+    a real board's 3 s reset. Yields the socket path.
+    """
+    from arduino import servo_control
+
+    directory = tempfile.mkdtemp(prefix="plante-")
+    monkeypatch.setenv("SERVO_SOCKET", os.path.join(directory, "servo.sock"))
+    monkeypatch.setenv("PLANTE_BACKEND_SERIAL", "hardware")
+    clock = types.SimpleNamespace(**vars(time))
+    clock.sleep = lambda seconds: time.sleep(min(seconds, 0.1))
+    monkeypatch.setattr(servo_control, "time", clock)
+    yield os.path.join(directory, "servo.sock")
+    shutil.rmtree(directory, ignore_errors=True)
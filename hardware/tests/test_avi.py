@@ -0,0 +1,139 @@
+"""MJPEG AVI layout: sizes, chunk offsets, index and missing frames."""
+import os
+import struct
+
+import pytest
+
+from api.services import avi
+from api.services.avi import Frame, MjpegAvi
+
+
+def _frames(tmp_path, payloads):
+    frames = []
+    for i, data in enumerate(payloads):
+        path = tmp_path / f"frame{i}.jpg"
+        path.write_bytes(data)
+        frames.append(Frame(str(path), len(data)))
+    return frames
+
+
+def _chunks(data, start, end):
+    """(fourcc, offset of the chunk, payload) of each chunk in data[start:end]."""
+    chunks = []
+    offset = start
+    while offset < end:
+        fourcc, size = struct.unpack_from("<4sI", data, offset)
+        chunks.append((fourcc, offset, data[offset + 8:offset + 8 + size]))
+        offset += 8 + size + (size & 1)
+    assert offset == end
+    return chunks
+
+
+def _parse(data):
+    """Top-level RIFF layout: hdrl payload, movi chunks and idx1 entries."""
+    riff, size, form = struct.unpack_from("<4sI4s", data)
+    assert (riff, form) == (b"RIFF", b"AVI ")
+    assert size == len(data) - 8
+    (hdrl_fourcc, _, hdrl), (movi_fourcc, movi_offset, movi), (idx_fourcc, _, idx1) = \
+        _chunks(data, 12, len(data))
+    assert (hdrl_fourcc, hdrl[:4]) == (b"LIST", b"hdrl")
+    assert (movi_fourcc, movi[:4]) == (b"LIST", b"movi")
+    assert idx_fourcc == b"idx1"
+    movi_start = movi_offset + 8
+    frames = _chunks(data, movi_start + 4, movi_start + len(movi))
+    index = [struct.unpack_from("<4sIII", idx1, i) for i in range(0, len(idx1), 16)]
+    return hdrl, movi_start, frames, index
+
+
+def _render(video):
+    pieces = list(video.chunks())
+    assert all(len(piece) <= avi.CHUNK_SIZE for piece in pieces[1:])
+    return b"".join(pieces)
+
+
+def test_layout_matches_content_length_and_index(tmp_path):
+    payloads = [b"\xff\xd8one\xff\xd9", b"\xff\xd8three!\xff\xd9", b"\xff\xd8\xff\xd9"]
+    video = MjpegAvi(_frames(tmp_path, payloads), width=640, height=480, fps=12)
+
+    data = _render(video)
+    hdrl, movi_start, frames, index = _parse(data)
+
+    assert len(data) == video.content_length
+    assert [(fourcc, payload) for fourcc, _, payload in frames] == [(b"00dc", p) for p in payloads]
+    # idx1 offsets are relative to the 'movi' fourcc and point at each chunk header
+    assert [(fourcc, flags, size) for fourcc, flags, _, size in index] == \
+        [(b"00dc", 0x10, len(p)) for p in payloads]
+    assert [movi_start + offset for _, _, offset, _ in index] == [offset for _, offset, _ in frames]
+
+
+def test_headers_describe_the_stream(tmp_path):
+    payloads = [b"x" * 100, b"y" * 301]
+    video = MjpegAvi(_frames(tmp_path, payloads), width=320, height=240, fps=10)
+
+    hdrl, _, _, _ = _parse(_render(video))
+
+    _, _, avih = _chunks(hdrl, 4, len(hdrl))[0]
+    micro_per_frame, _, _, flags, total_frames, _, streams, buffer_size, width, height = \
+        struct.unpack_from("<10I", avih)
+    assert micro_per_frame == 100_000
+    assert flags & 0x10
+    assert (total_frames, streams, width, height) == (2, 1, 320, 240)
+    assert buffer_size == 302
+    assert b"vidsMJPG" in hdrl
+
+
+def test_odd_sized_frames_are_padded(tmp_path):
+    video = MjpegAvi(_frames(tmp_path, [b"abc", b"de"]), width=2, height=2, fps=1)
+
+    data = _render(video)
+    _, _, frames, _ = _parse(data)
+
+    assert [payload for _, _, payload in frames] == [b"abc", b"de"]
+    assert len(data) % 2 == 0
+
+
+def test_missing_frame_becomes_junk_and_repeats_the_previous(tmp_path):
+    frames = _frames(tmp_path, [b"first", b"second", b"third"])
+    video = MjpegAvi(frames, width=2, height=2, fps=1)
+    os.remove(frames[1].path)
+
+    data = _render(video)
+    _, _, chunks, index = _parse(data)
+
+    assert len(data) == video.content_length
+    assert [fourcc for fourcc, _, _ in chunks] == [b"00dc", b"JUNK", b"00dc"]
+    assert index[1] == index[0]
+
+
+def test_resized_frame_is_reopened(tmp_path):
+    frames = _frames(tmp_path, [b"first", b"second"])
+    replacement = tmp_path / "replacement.jpg"
+    replacement.write_bytes(b"SECOND")
+    (tmp_path / "frame1.jpg").write_bytes(b"changed size")
+    asked = []
+
+    def reopen(position):
+        asked.append(position)
+        return str(replacement)
+
+    data = _render(MjpegAvi(frames, width=2, height=2, fps=1, reopen=reopen))
+    _, _, chunks, _ = _parse(data)
+
+    assert asked == [1]
+    assert [payload for _, _, payload in chunks] == [b"first", b"SECOND"]
+
+
+def test_large_frames_are_streamed_in_pieces(tmp_path, monkeypatch):
+    monkeypatch.setattr(avi, "CHUNK_SIZE", 16)
+    payload = bytes(range(100))
+
+    data = _render(MjpegAvi(_frames(tmp_path, [payload]), width=2, height=2, fps=1))
+
+    assert _parse(data)[2][0][2] == payload
+
+
+def test_rejects_empty_and_oversized_videos(tmp_path):
+    with pytest.raises(ValueError):
+        MjpegAvi([], width=2, height=2, fps=1)
+    with pytest.raises(ValueError, match="4 GB"):
+        MjpegAvi([Frame("big.jpg", 3 * 2**30)] * 2, width=2, height=2, fps=1)
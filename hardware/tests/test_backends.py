@@ -0,0 +1,128 @@
+"""Backend selection and the hardware simulators."""
+import importlib
+import sys
+import time
+
+import pytest
+import serial
+
+import backends
+from backends import backend_for, is_simulated, load_backend, serial_port
+
+
+@pytest.fixture
+def sim(monkeypatch):
+    """Every library simulated; drivers imported afterwards bind the simulators."""
+    monkeypatch.setenv("PLANTE_BACKEND", "sim")
+
+    def driver(name):
+        monkeypatch.delitem(sys.modules, name, raising=False)
+        return importlib.import_module(name)
+
+    return driver
+
+
+def test_hardware_is_the_default(monkeypatch):
+    monkeypatch.delenv("PLANTE_BACKEND", raising=False)
+    monkeypatch.delenv("PLANTE_BACKEND_LGPIO", raising=False)
+
+    assert backend_for("lgpio") == "hardware"
+    assert not is_simulated("serial")
+
+
+def test_per_library_override(monkeypatch):
+    monkeypatch.setenv("PLANTE_BACKEND", "sim")
+    monkeypatch.setenv("PLANTE_BACKEND_PICAMERA2", " Hardware ")
+
+    assert backend_for("picamera2") == "hardware"
+    assert backend_for("spidev") == "sim"
+
+
+def test_invalid_selection(monkeypatch):
+    monkeypatch.setenv("PLANTE_BACKEND", "mock")
+
+    with pytest.raises(ValueError, match="Invalid backend"):
+        backend_for("lgpio")
+    with pytest.raises(ValueError, match="Unknown hardware library"):
+        backend_for("gpiozero")
+    # serial is selectable but not importable
+    with pytest.raises(ValueError, match="No importable backend"):
+        load_backend("serial")
+
+
+def test_simulated_libraries_load_from_backends_sim(monkeypatch):
+    monkeypatch.setenv("PLANTE_BACKEND", "sim")
+
+    for library in backends.LIBRARIES:
+        assert load_backend(library).__name__ == f"backends.sim.{library}"
+    from backends import smbus2
+    assert smbus2 is load_backend("smbus2")
+    with pytest.raises(ImportError):
+        from backends import gpiozero  # noqa: F401
+
+
+def test_serial_port(monkeypatch):
+    monkeypatch.setenv("PLANTE_BACKEND", "hardware")
+    assert serial_port("/dev/ttyACM0") == "/dev/ttyACM0"
+
+    monkeypatch.setenv("PLANTE_BACKEND_SERIAL", "sim")
+    monkeypatch.setenv("PLANTE_SIM_SERIAL_PORT", "/dev/pts/9")
+    assert serial_port("/dev/ttyACM0") == "/dev/pts/9"
+
+
+def test_light_sensor_reads_the_simulated_lux(sim, monkeypatch):
+    monkeypatch.setenv("PLANTE_SIM_LUX", "800")
+    sensor = sim("sensors.light_sensor").LightSensor()
+
+    assert sensor.read_light() == pytest.approx(800, rel=0.05)
+    sensor.cleanup()
+
+
+def test_soil_sensor_reads_the_simulated_moisture(sim, monkeypatch):
+    monkeypatch.setenv("PLANTE_SIM_SOIL_PERCENT", "30")
+    sensor = sim("sensors.soil_moisture").SoilMoistureSensor()
+    try:
+        assert sensor.read_moisture_percent() == pytest.approx(30, abs=3)
+    finally:
+        sensor.close()
+
+
+def test_dht_reads_and_fails_at_the_configured_rate(sim, monkeypatch):
+    adafruit_dht, board = load_backend("adafruit_dht"), load_backend("board")
+    monkeypatch.setenv("PLANTE_SIM_TEMPERATURE", "25")
+    monkeypatch.setenv("PLANTE_SIM_DHT_FAILURE_RATE", "0")
+    assert abs(adafruit_dht.DHT11(board.D4).temperature - 25) <= 1
+
+    monkeypatch.setenv("PLANTE_SIM_DHT_FAILURE_RATE", "1")
+    with pytest.raises(RuntimeError):
+        adafruit_dht.DHT11(board.D4).temperature
+
+
+def test_camera_produces_frames(sim):
+    Picamera2 = sim("sensors.camera").Picamera2
+    camera = Picamera2()
+    camera.configure(camera.create_preview_configuration(main={"size": (320, 240), "format": "RGB888"}))
+    camera.start()
+    try:
+        assert camera.capture_array().shape[:2] == (240, 320)
+    finally:
+        camera.close()
+
+
+def _readline(port, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    line = b""
+    while not line.endswith(b"\n") and time.monotonic() < deadline:
+        line += port.readline()
+    return line.decode().strip()
+
+
+def test_arduino_emulator_speaks_the_firmware_protocol(arduino):
+    with serial.Serial(arduino.port, 9600, timeout=0.5) as port:
+        assert _readline(port) == "READY:2_SERVOS:TAGS"
+        port.write(b"BOTH:90\n")
+        assert _readline(port) == "OK:BOTH=90"
+        port.write(b"#7 STATUS\n")
+        assert _readline(port) == "#7 STATUS:1=90,2=90"
+        port.write(b"3:10\n")
+        assert _readline(port).startswith("ERROR:Unknown servo")
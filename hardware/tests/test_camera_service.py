@@ -0,0 +1,84 @@
+"""In-memory captures against the simulated camera."""
+import os
+
+import pytest
+
+from api.services import camera_service as camera_module
+from api.services.camera_service import CameraService
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    monkeypatch.setenv("PLANTE_BACKEND", "sim")
+    service = CameraService(
+        save_dir=str(tmp_path / "photos"),
+        cache_dir=str(tmp_path / "cache"),
+        persist_interval=600,
+    )
+    assert service.is_available
+    yield service
+    service.cleanup()
+
+
+def _written(service):
+    """Wait for background writes, then list the photos on disk."""
+    service._writer.submit(lambda: None).result()
+    return sorted(os.listdir(service.save_dir))
+
+
+def test_first_capture_is_written_and_later_ones_skipped(service):
+    skipped = camera_module.PHOTO_PERSIST.labels(result="skipped").value
+
+    first = service.capture()
+    second = service.capture()
+
+    assert first.success and second.success
+    assert first.filepath == os.path.join(service.save_dir, first.filename)
+    assert _written(service) == [first.filename]
+    assert service.get_photo(first.id) is not None
+    # Skipped by the persist interval, but still has an id and URL
+    assert second.filepath is None
+    assert second.id != first.id
+    assert second.url == f"/camera/photos/{second.id}"
+    assert camera_module.PHOTO_PERSIST.labels(result="skipped").value == skipped + 1
+
+
+def test_unwritten_capture_is_served_from_memory_until_replaced(service):
+    service.capture()
+    skipped = service.capture()
+
+    frame = service.get_memory_photo(skipped.id)
+    content, media_type = frame.get()
+    assert media_type == "image/jpeg" and content[:2] == b"\xff\xd8"
+    thumb, media_type = frame.get("thumb")
+    assert media_type == "image/jpeg" and len(thumb) < len(content)
+    assert service.get_latest().id == skipped.id
+    assert service.get_latest().filepath is None
+
+    service.capture()
+    assert service.get_memory_photo(skipped.id) is None
+
+
+def test_full_resolution_captures_are_always_written(service):
+    service.capture()
+    full = service.capture(full_resolution=True)
+
+    assert full.filepath is not None
+    assert full.filename in _written(service)
+    assert service.get_latest().filepath == full.filepath
+
+
+def test_zero_interval_writes_every_capture(service):
+    service.persist_interval = 0
+
+    names = [service.capture().filename for _ in range(3)]
+
+    assert _written(service) == sorted(names)
+
+
+def test_named_capture_ids_are_relative_paths(service):
+    photo = service.capture(filename="timelapse/2026/03/01/tl_daily.jpg")
+
+    assert photo.id == "timelapse/2026/03/01/tl_daily"
+    assert photo.url == "/camera/photos/timelapse/2026/03/01/tl_daily"
+    assert service.get_photo(photo.id).filepath == photo.filepath
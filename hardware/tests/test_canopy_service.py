@@ -0,0 +1,88 @@
+"""Canopy sampling against the simulated camera."""
+import time
+
+import numpy as np
+import pytest
+
+from api.services import canopy_service as canopy_module
+from api.services.camera_service import CameraService
+from api.services.canopy_service import CanopyService, analyze
+
+
+@pytest.fixture
+def camera(tmp_path, monkeypatch):
+    monkeypatch.setenv("PLANTE_BACKEND", "sim")
+    service = CameraService(
+        save_dir=str(tmp_path / "photos"),
+        cache_dir=str(tmp_path / "cache"),
+        idle_timeout=0.4,
+    )
+    monkeypatch.setattr(canopy_module, "get_camera_service", lambda: service)
+    yield service
+    service.cleanup()
+
+
+@pytest.fixture
+def canopy(camera, tmp_path):
+    service = CanopyService(interval=0.05, history_file=str(tmp_path / "canopy.jsonl"))
+    yield service
+    service.stop()
+
+
+def _warm(camera):
+    return camera._camera.is_warm
+
+
+def test_camera_idles_while_the_sampler_runs(camera, canopy):
+    camera.capture()
+    assert _warm(camera)
+
+    canopy.start()
+    time.sleep(1.0)
+    canopy.stop()
+
+    # Sampled every 50 ms, yet the 0.4 s idle timeout still powered it down
+    assert len(canopy.series()) >= 5
+    assert not _warm(camera)
+
+
+def test_cold_camera_is_stopped_again_after_a_sample(camera, canopy):
+    assert not _warm(camera)
+
+    reading = canopy.sample()
+
+    assert 0 <= reading.coverage <= 1
+    assert not _warm(camera)
+
+
+def test_sampling_leaves_live_view_running(camera, canopy):
+    camera.hold_preview()
+    try:
+        canopy.sample()
+        assert _warm(camera)
+    finally:
+        camera.release_preview()
+
+
+def test_series_survives_a_restart(camera, canopy, tmp_path):
+    first = canopy.sample()
+    second = canopy.sample()
+
+    restarted = CanopyService(interval=0, history_file=str(tmp_path / "canopy.jsonl"))
+
+    assert restarted.series() == [first, second]
+    assert second.change is not None
+
+
+def test_green_frame_is_all_canopy():
+    # Mid luma with chroma pushed towards green (low U and V)
+    frame = np.concatenate([
+        np.full((36, 64), 120, dtype=np.uint8),
+        np.full((18, 64), 90, dtype=np.uint8),
+    ])
+
+    coverage, greenness, change, brightness, mask = analyze(frame)
+
+    assert coverage == 1.0 and greenness > 0.1
+    assert change is None
+    assert analyze(frame, mask)[2] == 0.0
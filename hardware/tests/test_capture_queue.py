@@ -0,0 +1,126 @@
+"""Capture queue: merge rules, depth limit and shutdown."""
+import threading
+
+import pytest
+
+from api.models import PhotoResponse
+from api.services.capture_queue import DONE, FAILED, QUEUED, CaptureQueue, QueueFull
+
+
+class FakeCamera:
+    """Captures block until released, so tests control what is running."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.started = threading.Event()
+        self.captures = []
+
+    def capture(self, filename=None, full_resolution=False):
+        self.captures.append((filename, full_resolution))
+        self.started.set()
+        self.release.wait(5)
+        return PhotoResponse(success=True, filename=filename or f"photo{len(self.captures)}.jpg")
+
+
+@pytest.fixture
+def camera():
+    camera = FakeCamera()
+    yield camera
+    camera.release.set()
+
+
+@pytest.fixture
+def queue(camera):
+    queue = CaptureQueue(camera, max_depth=2, merge_window=60)
+    yield queue
+    queue.close()
+
+
+def _start_one(queue, camera):
+    """Submit a job and wait until the worker is running it."""
+    job = queue.submit()
+    assert camera.started.wait(5)
+    return job
+
+
+def test_identical_requests_share_a_queued_job(queue, camera):
+    running = _start_one(queue, camera)
+    first = queue.submit()
+    second = queue.submit()
+
+    assert second is first
+    assert first is not running
+    assert first.requests == 2
+    assert queue.depth == 1
+
+
+def test_running_job_is_never_merged_into(queue, camera):
+    running = _start_one(queue, camera)
+
+    job = queue.submit()
+
+    assert job is not running
+    assert running.requests == 1
+    assert job.status == QUEUED
+
+
+def test_filename_requests_get_their_own_exposure(queue, camera):
+    _start_one(queue, camera)
+    first = queue.submit(filename="a.jpg")
+    second = queue.submit()
+
+    assert second is not first
+    with pytest.raises(QueueFull):
+        queue.submit(filename="a.jpg")
+
+
+def test_resolution_must_match_to_merge(queue, camera):
+    _start_one(queue, camera)
+    preview = queue.submit()
+
+    assert queue.submit(full_resolution=True) is not preview
+
+
+def test_no_merge_outside_the_window(camera):
+    queue = CaptureQueue(camera, max_depth=4, merge_window=0)
+    try:
+        _start_one(queue, camera)
+        first = queue.submit()
+        first.submitted -= 1
+
+        assert queue.submit() is not first
+    finally:
+        queue.close()
+
+
+def test_full_queue_rejects_new_jobs_but_still_merges(queue, camera):
+    _start_one(queue, camera)
+    queue.submit()
+    queue.submit(filename="a.jpg")
+
+    with pytest.raises(QueueFull):
+        queue.submit(filename="b.jpg")
+    assert queue.submit().requests == 2
+
+
+def test_jobs_finish_with_their_photo(queue, camera):
+    camera.release.set()
+    job = queue.submit(filename="a.jpg")
+
+    assert job.wait(5)
+    assert job.status == DONE
+    assert job.photo.filename == "a.jpg"
+    assert queue.get(job.id) is job
+    assert [span[0] for span in job.timeline.items()][0] == "queue"
+
+
+def test_close_fails_queued_jobs_with_a_photo(queue, camera):
+    _start_one(queue, camera)
+    job = queue.submit()
+
+    queue.close()
+
+    assert job.done.is_set()
+    assert job.status == FAILED
+    assert job.photo is not None and not job.photo.success
+    assert job.error == "Shutting down"
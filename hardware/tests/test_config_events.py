@@ -0,0 +1,123 @@
+"""Config changes pushed on the events socket, and followed by another process's store."""
+import json
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+
+import pytest
+
+from api.services import config_events as events_module
+from api.services.config_events import ConfigEvents
+from config_store import ConfigStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps({"poll_interval": 5, "actions_enabled": True}))
+    return ConfigStore(path)
+
+
+@pytest.fixture
+def events(store, monkeypatch):
+    monkeypatch.setattr(events_module, "get_config_store", lambda: store)
+    # Unix socket paths are limited to about 100 bytes
+    directory = tempfile.mkdtemp(prefix="plante-")
+    events = ConfigEvents(os.path.join(directory, "config.sock"))
+    events.start()
+    yield events
+    events.stop()
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+def _subscribe(events):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(5)
+    sock.connect(events.socket_path)
+    return sock, sock.makefile("rb")
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "Timed out"
+        time.sleep(0.01)
+
+
+def test_client_gets_the_current_config_then_each_change(events, store):
+    sock, lines = _subscribe(events)
+    first = json.loads(lines.readline())
+
+    store.update(lambda c: c.update(poll_interval=10))
+    change = json.loads(lines.readline())
+
+    assert (first["version"], first["changed"], first["config"]["poll_interval"]) == (0, [], 5)
+    assert (change["version"], change["changed"]) == (1, ["poll_interval"])
+    assert change["config"]["poll_interval"] == 10
+    assert events.subscribers == 1
+    sock.close()
+
+
+def test_writer_does_not_wait_for_clients(events, store, monkeypatch):
+    sock, lines = _subscribe(events)
+    lines.readline()
+    sending = threading.Event()
+    release = threading.Event()
+    real_send = ConfigEvents._send
+
+    def stuck_send(client, line):
+        sending.set()
+        release.wait(5)
+        return real_send(client, line)
+
+    monkeypatch.setattr(ConfigEvents, "_send", staticmethod(stuck_send))
+
+    started = time.monotonic()
+    store.update(lambda c: c.update(poll_interval=10))
+    store.update(lambda c: c.update(poll_interval=20))
+    elapsed = time.monotonic() - started
+    assert sending.wait(5)
+    release.set()
+
+    assert elapsed < 1
+    assert [json.loads(lines.readline())["version"] for _ in range(2)] == [1, 2]
+    sock.close()
+
+
+def test_client_that_stops_reading_is_dropped(events, store, monkeypatch):
+    monkeypatch.setattr(events_module, "SEND_TIMEOUT", 0.2)
+    stalled, _ = _subscribe(events)
+    reader, lines = _subscribe(events)
+    _wait_for(lambda: events.subscribers == 2)
+    lines.readline()
+    # Far more than a socket buffer holds
+    big = {str(i): "x" * 1000 for i in range(2000)}
+
+    store.update(lambda c: c.update(big=big))
+
+    assert json.loads(lines.readline())["changed"] == ["big"]
+    _wait_for(lambda: events.subscribers == 1)
+    stalled.close()
+    reader.close()
+
+
+def test_follower_resyncs_then_adopts_changes(events, store, tmp_path):
+    # The follower has seen higher versions from before the API restarted
+    (tmp_path / "follower.json").write_text(json.dumps({"poll_interval": 60, "version": 9}))
+    follower = ConfigStore(tmp_path / "follower.json")
+    sock, lines = _subscribe(events)
+
+    first = json.loads(lines.readline())
+    assert follower.adopt(first["version"], first["config"], resync=True)
+    store.update(lambda c: c.update(poll_interval=10))
+    change = json.loads(lines.readline())
+    assert follower.adopt(change["version"], change["config"])
+    # The same version again is not a change
+    assert not follower.adopt(change["version"], change["config"])
+
+    assert follower.snapshot()[0] == 1
+    assert follower.get()["poll_interval"] == 10
+    sock.close()
@@ -0,0 +1,230 @@
+"""Config store versions, conflicts, reloads and If-Match handling."""
+import asyncio
+import json
+import os
+
+import pytest
+from fastapi import FastAPI, HTTPException, Response
+from fastapi.testclient import TestClient
+
+from api.routers import config as config_router
+from config_store import ConfigStore, VersionConflict, changed_keys
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps({"poll_interval": 5, "actions_enabled": True}))
+    return path
+
+
+@pytest.fixture
+def store(path):
+    return ConfigStore(path)
+
+
+def _edit(path, config):
+    """Change the file the way an editor would, with a new mtime."""
+    stat = os.stat(path)
+    path.write_text(json.dumps(config))
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_file_without_a_version_starts_at_zero(store):
+    version, config = store.snapshot()
+
+    assert version == 0
+    assert config["version"] == 0
+    assert config["poll_interval"] == 5
+
+
+def test_update_saves_the_next_version(store, path):
+    version, config = store.update(lambda c: c.update(poll_interval=10))
+
+    assert version == 1
+    assert config == {"poll_interval": 10, "actions_enabled": True, "version": 1}
+    assert json.loads(path.read_text()) == config
+    assert store.get() == config
+
+
+def test_update_works_on_a_copy(store):
+    before = store.get()
+
+    def fail(config):
+        config["poll_interval"] = 99
+        raise RuntimeError("rejected")
+
+    with pytest.raises(RuntimeError):
+        store.update(fail)
+    assert store.get() == before
+    assert store.version == 0
+
+
+def test_stale_expected_version_conflicts(store, path):
+    store.update(lambda c: c.update(poll_interval=10), expected_version=0)
+
+    with pytest.raises(VersionConflict) as e:
+        store.update(lambda c: c.update(poll_interval=20), expected_version=0)
+    assert (e.value.expected, e.value.current) == (0, 1)
+    assert json.loads(path.read_text())["poll_interval"] == 10
+
+
+def test_write_replaces_the_whole_config(store):
+    version, config = store.write({"poll_interval": 60, "version": 42})
+
+    assert version == 1
+    assert config == {"poll_interval": 60, "version": 1}
+
+
+def test_hand_edit_without_a_version_gets_a_new_one(store, path):
+    store.update(lambda c: c.update(poll_interval=10))
+    _edit(path, {"poll_interval": 15, "version": 1})
+
+    assert store.reload()
+    version, config = store.snapshot()
+    assert version == 2
+    assert config["version"] == 2
+    assert config["poll_interval"] == 15
+
+
+def test_hand_edit_that_raises_the_version_keeps_it(store, path):
+    _edit(path, {"poll_interval": 15, "version": 7})
+
+    store.reload()
+
+    assert store.snapshot()[0] == 7
+
+
+def test_touch_does_not_change_the_version(store, path):
+    store.update(lambda c: c.update(poll_interval=10))
+    changes = []
+    store.add_listener(lambda *change: changes.append(change))
+    _edit(path, json.loads(path.read_text()))
+
+    assert store.reload()
+    assert store.version == 1
+    assert changes == []
+
+
+def test_unreadable_file_keeps_the_last_config(store, path):
+    before = store.get()
+    path.write_text("{half written")
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1_000_000_000))
+
+    assert not store.reload()
+    assert store.get() == before
+
+
+def test_listeners_get_each_change(store, path):
+    changes = []
+    store.add_listener(lambda version, config, previous: changes.append(
+        (version, changed_keys(previous, config))))
+
+    store.update(lambda c: c.update(poll_interval=10))
+    _edit(path, {"poll_interval": 10, "actions_enabled": False})
+    store.reload()
+
+    assert changes == [(1, ["poll_interval"]), (2, ["actions_enabled"])]
+
+
+def test_adopt_takes_only_newer_versions(store):
+    assert store.adopt(3, {"poll_interval": 30, "version": 3})
+    assert not store.adopt(3, {"poll_interval": 40, "version": 3})
+    assert not store.adopt(2, {"poll_interval": 40, "version": 2})
+    assert store.get()["poll_interval"] == 30
+    # After the API restarts it may number from the file again
+    assert store.adopt(1, {"poll_interval": 40, "version": 1}, resync=True)
+    assert store.version == 1
+    assert not store.adopt(1, {"poll_interval": 40, "version": 1}, resync=True)
+
+
+def test_get_and_adopt_copy_the_config(store):
+    mine = store.get()
+    mine["poll_interval"] = 99
+    assert store.get()["poll_interval"] == 5
+
+    pushed = {"poll_interval": 30, "thresholds": {"light": {"min": 100}}, "version": 3}
+    store.adopt(3, pushed)
+    pushed["thresholds"]["light"]["min"] = 0
+
+    assert store.get()["poll_interval"] == 30
+    assert store.get()["thresholds"]["light"]["min"] == 100
+    assert store.snapshot()[1] is not pushed
+
+
+def test_changed_keys_ignores_the_version():
+    assert changed_keys({"a": 1, "version": 1}, {"a": 1, "b": 2, "version": 2}) == ["b"]
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, None),
+    ("*", None),
+    ('"3"', 3),
+    ('W/"3"', 3),
+    ('"3", "4"', 3),
+    ("5", 5),
+])
+def test_if_match_versions(header, expected):
+    assert config_router._expected_version(header) == expected
+
+
+def test_invalid_if_match_is_a_bad_request():
+    with pytest.raises(HTTPException) as e:
+        config_router._expected_version('"abc"')
+    assert e.value.status_code == 400
+
+
+def test_save_config_sets_the_etag_and_rejects_stale_writes(store, monkeypatch):
+    monkeypatch.setattr(config_router, "get_config_store", lambda: store)
+    response = Response()
+
+    saved = config_router.save_config(lambda c: c.update(poll_interval=10), '"0"', response)
+
+    assert saved["version"] == 1
+    assert response.headers["ETag"] == '"1"'
+    with pytest.raises(HTTPException) as e:
+        config_router.save_config(lambda c: c.update(poll_interval=20), '"0"', Response())
+    assert e.value.status_code == 412
+    assert e.value.headers["ETag"] == '"1"'
+    assert store.get()["poll_interval"] == 10
+
+
+@pytest.fixture
+def client(store, monkeypatch):
+    monkeypatch.setattr(config_router, "get_config_store", lambda: store)
+    app = FastAPI()
+    app.include_router(config_router.router)
+    return TestClient(app)
+
+
+def _body(**servo):
+    return {"thresholds": {}, "servo": servo, "poll_interval": 30}
+
+
+def test_writes_are_saved_off_the_event_loop(client, store, monkeypatch):
+    on_loop = []
+    real_write = store._write_file
+
+    def write_file(config):
+        try:
+            asyncio.get_running_loop()
+            on_loop.append(True)
+        except RuntimeError:
+            on_loop.append(False)
+        real_write(config)
+
+    monkeypatch.setattr(store, "_write_file", write_file)
+
+    assert client.put("/config", json=_body(profile="scurve")).status_code == 200
+    assert client.patch("/config/thresholds", json={"light": {"min": 150}}).status_code == 200
+    assert client.post("/config/actions/toggle", params={"enabled": False}).status_code == 200
+
+    assert on_loop == [False, False, False]
+    assert store.get()["servo"]["profile"] == "scurve"
+
+
+def test_unknown_motion_profile_is_rejected(client, store):
+    response = client.put("/config", json=_body(profile="bounce"))
+
+    assert response.status_code == 422
+    assert store.version == 0
@@ -0,0 +1,140 @@
+"""Photo derivative rendering and the LRU cache."""
+import os
+import threading
+import time
+
+import pytest
+from PIL import Image
+
+from api.services import derivatives
+from api.services.derivatives import SIZES, DerivativeCache
+from api.services.photo_index import PhotoIndex
+
+
+@pytest.fixture
+def photos(tmp_path):
+    directory = tmp_path / "photos"
+    directory.mkdir()
+    for i in range(4):
+        image = Image.effect_noise((1600, 1200), 60 + i * 10).convert("RGB")
+        image.save(directory / f"photo_{i}.jpg", quality=85)
+    return sorted(PhotoIndex(str(directory)).between()[0], key=lambda p: p.id)
+
+
+def _cache(tmp_path, max_bytes=10**9):
+    return DerivativeCache(str(tmp_path / "cache"), max_bytes=max_bytes)
+
+
+def _cached(cache):
+    return sorted(os.listdir(cache.cache_dir))
+
+
+def test_sizes_and_formats(tmp_path, photos):
+    cache = _cache(tmp_path)
+
+    with Image.open(cache.get(photos[0], "thumb")) as thumb:
+        assert (thumb.format, max(thumb.size)) == ("JPEG", 320)
+    with Image.open(cache.get(photos[0], "pixel")) as pixel:
+        assert (pixel.format, pixel.mode, max(pixel.size)) == ("PNG", "P", 160)
+        assert len(pixel.getcolors()) <= derivatives.PIXEL_COLOURS
+    with pytest.raises(KeyError):
+        cache.get(photos[0], "huge")
+
+
+def test_least_recently_used_is_evicted_first(tmp_path, photos):
+    probe = _cache(tmp_path / "probe")
+    sizes = [os.path.getsize(probe.get(photo, "thumb")) for photo in photos]
+    # Room for the first three thumbs only
+    cache = _cache(tmp_path, max_bytes=sum(sizes[:3]) + min(sizes[3], sizes[1]) - 1)
+
+    for photo in photos[:3]:
+        cache.get(photo, "thumb")
+    cache.get(photos[0], "thumb")  # now most recent
+    cache.get(photos[3], "thumb")
+
+    names = _cached(cache)
+    assert not any(name.startswith("photo_1-") for name in names)
+    assert sum(name.startswith(("photo_0-", "photo_2-", "photo_3-")) for name in names) == 3
+
+
+def test_cache_stays_within_its_budget(tmp_path, photos):
+    cache = _cache(tmp_path, max_bytes=60_000)
+
+    for photo in photos:
+        for size in SIZES:
+            cache.get(photo, size)
+            on_disk = sum(os.path.getsize(os.path.join(cache.cache_dir, n)) for n in _cached(cache))
+            assert cache.size_bytes == on_disk
+            assert on_disk <= cache.max_bytes or len(_cached(cache)) == 1
+
+
+def test_read_renders_an_evicted_entry_again(tmp_path, photos):
+    cache = _cache(tmp_path, max_bytes=1)
+    expected = open(cache.get(photos[0], "thumb"), "rb").read()
+    cache.get(photos[1], "thumb")  # evicts photos[0]
+    assert len(_cached(cache)) == 1
+    misses = derivatives._MISS.value
+
+    assert cache.read(photos[0], "thumb") == expected
+    assert derivatives._MISS.value == misses + 1
+
+
+def test_concurrent_requests_render_once(tmp_path, photos, monkeypatch):
+    cache = _cache(tmp_path)
+    renders = []
+    real_render = derivatives.render
+
+    def slow_render(*args):
+        renders.append(args)
+        time.sleep(0.05)
+        real_render(*args)
+
+    monkeypatch.setattr(derivatives, "render", slow_render)
+    threads = [threading.Thread(target=cache.read, args=(photos[0], "medium")) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(renders) == 1
+
+
+def test_restart_picks_up_cached_files(tmp_path, photos):
+    cache = _cache(tmp_path)
+    cache.get(photos[0], "thumb")
+    cache.get(photos[1], "pixel")
+    size = cache.size_bytes
+    open(os.path.join(cache.cache_dir, "half.jpg.tmp"), "wb").close()
+
+    restarted = _cache(tmp_path)
+
+    assert restarted.size_bytes == size
+    assert len(_cached(restarted)) == 2
+    hits = derivatives._HIT.value
+    restarted.get(photos[0], "thumb")
+    assert derivatives._HIT.value == hits + 1
+
+
+def test_prefetch_renders_in_the_background(tmp_path, photos):
+    cache = _cache(tmp_path)
+    missing = photos[2]._replace(filepath=str(tmp_path / "gone.jpg"), id="gone")
+
+    cache.prefetch(missing)
+    cache.prefetch(photos[0])
+    deadline = time.monotonic() + 10
+    while len(_cached(cache)) < 2 and time.monotonic() < deadline:
+        time.sleep(0.02)
+    cache.close()
+
+    assert len(_cached(cache)) == 2
+    assert all(name.startswith("photo_0-") for name in _cached(cache))
+
+
+def test_subdirectory_ids_make_flat_cache_names(tmp_path, photos):
+    cache = _cache(tmp_path)
+    nested = photos[0]._replace(id="timelapse/2026/03/01/photo_0")
+
+    path = cache.get(nested, "thumb")
+
+    assert os.path.dirname(path) == cache.cache_dir
+    assert cache.read(nested, "thumb") == open(path, "rb").read()
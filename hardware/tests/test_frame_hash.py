@@ -0,0 +1,108 @@
+"""Perceptual frame hashes and the persistent hash index."""
+import numpy as np
+from PIL import Image
+
+from api.services.frame_hash import HashIndex, dhash, distance, hash_jpeg, hash_yuv420
+
+
+def _gradient(width=96, height=64, offset=0):
+    row = np.linspace(0, 200, width, dtype=np.float32)
+    return np.clip(np.tile(row, (height, 1)) + offset, 0, 255).astype(np.uint8)
+
+
+def _noise(seed, width=96, height=64):
+    return np.random.default_rng(seed).integers(0, 256, (height, width), dtype=np.uint8)
+
+
+def test_distance():
+    assert distance(0, 0) == 0
+    assert distance(0b1011, 0b0001) == 2
+    assert distance(0, 2**64 - 1) == 64
+
+
+def test_bits_record_brighter_right_neighbours():
+    # Brightness rises left to right: every cell is darker than its neighbour
+    assert dhash(Image.fromarray(_gradient())) == 2**64 - 1
+    assert dhash(Image.fromarray(_gradient()[:, ::-1].copy())) == 0
+
+
+def test_uniform_brightness_change_barely_moves_the_hash():
+    image = _noise(1)
+    brighter = np.clip(image.astype(np.int16) + 20, 0, 255).astype(np.uint8)
+
+    assert distance(dhash(Image.fromarray(image)), dhash(Image.fromarray(brighter))) <= 6
+
+
+def test_different_scenes_are_far_apart():
+    assert distance(dhash(Image.fromarray(_noise(1))), dhash(Image.fromarray(_noise(2)))) > 16
+
+
+def test_yuv420_uses_the_luma_plane():
+    luma = _noise(3)
+    chroma = np.full((luma.shape[0] // 2, luma.shape[1]), 128, dtype=np.uint8)
+
+    assert hash_yuv420(np.vstack([luma, chroma])) == dhash(Image.fromarray(luma))
+
+
+def test_jpeg_hash_matches_the_decoded_frame(tmp_path):
+    image = Image.fromarray(np.kron(_noise(4, 12, 8), np.ones((80, 80), dtype=np.uint8)))
+    path = tmp_path / "frame.jpg"
+    image.save(path, quality=90)
+
+    assert distance(hash_jpeg(str(path)), dhash(image)) <= 4
+
+
+def test_index_persists_adds_and_removals(tmp_path):
+    path = tmp_path / "hashes" / "index"
+    index = HashIndex(str(path))
+    index.add("a", 0x1234)
+    index.add("b", 2**64 - 1)
+    index.add("a", 0x5678)
+    index.discard("b")
+    index.discard("missing")
+
+    reloaded = HashIndex(str(path))
+
+    assert len(reloaded) == 1
+    assert reloaded.get("a") == 0x5678
+    assert reloaded.get("b") is None
+
+
+def test_index_skips_malformed_lines(tmp_path):
+    path = tmp_path / "index"
+    path.write_text("a 00000000000000ff\nbroken\nb zz\nc 0000000000000001 extra\n")
+
+    index = HashIndex(str(path))
+
+    assert len(index) == 1
+    assert index.get("a") == 0xff
+
+
+def test_retain_forgets_deleted_photos(tmp_path):
+    path = tmp_path / "index"
+    index = HashIndex(str(path))
+    for photo_id in ("a", "b", "c"):
+        index.add(photo_id, 1)
+
+    index.retain(["b", "missing"])
+
+    assert HashIndex(str(path)).get("b") == 1
+    assert len(HashIndex(str(path))) == 1
+
+
+def test_index_file_is_compacted(tmp_path):
+    path = tmp_path / "index"
+    index = HashIndex(str(path))
+    for i in range(300):
+        index.add(f"photo{i}", i)
+        if i >= 2:
+            index.discard(f"photo{i - 2}")
+    index.add("last", 7)
+
+    lines = path.read_text().splitlines()
+    reloaded = HashIndex(str(path))
+
+    assert len(lines) < 150
+    assert {f"photo{i}": reloaded.get(f"photo{i}") for i in (298, 299)} == {"photo298": 298, "photo299": 299}
+    assert reloaded.get("last") == 7
+    assert len(reloaded) == 3
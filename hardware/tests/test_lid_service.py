@@ -0,0 +1,119 @@
+"""Lid moves against the Arduino emulator: pre-emption, reconciling, the log and the state file."""
+import json
+import os
+import time
+
+import pytest
+
+from api.services import lid_service as lid_module
+from api.services.lid_service import CANCELLED, DONE, RUNNING, LidService
+from api.services.lid_state import LidState
+from arduino import servo_link as servo_link_module
+from arduino.servo_link import ServoLink
+
+
+@pytest.fixture
+def state_file(tmp_path):
+    return tmp_path / "lid_state.json"
+
+
+@pytest.fixture
+def service(arduino, serial_env, state_file, monkeypatch):
+    link = ServoLink(port=arduino.port)
+    monkeypatch.setattr(servo_link_module, "get_servo_link", lambda: link)
+    # 180°/s: a full sweep takes half a second
+    config = {"servo": {"speed": 180, "profile": "linear", "lid_open": 90, "lid_closed": 0}}
+    monkeypatch.setattr(lid_module, "get_config", lambda: config)
+    service = LidService(state_file=str(state_file))
+    yield service
+    service.disconnect()
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "Timed out"
+        time.sleep(0.01)
+
+
+def test_move_is_logged_with_its_timings(service, arduino, state_file):
+    motion = service.move_to(90, is_open=True, reason="test: too warm")
+    assert motion.done.wait(10)
+
+    assert motion.status == DONE
+    assert (arduino.pos1, arduino.pos2) == (90, 90)
+    [entry] = service.get_log()
+    assert entry["id"] == motion.id
+    assert entry["reason"] == "test: too warm"
+    assert (entry["direction"], entry["from_angle"], entry["angle"]) == ("open", 0, 90)
+    assert (entry["status"], entry["mode"], entry["driver"]) == (DONE, "move", "arduino")
+    assert entry["settings"] == {"speed": 180, "profile": "linear"}
+    assert entry["total_seconds"] >= 0.5
+    assert {"connect", "serial", "move"} <= {timing["name"] for timing in entry["timings"]}
+    # Saved by the worker once the move is logged
+    _wait_for(lambda: json.loads(state_file.read_text())["angle"] == 90)
+    assert json.loads(state_file.read_text())["is_open"] is True
+
+
+def test_new_target_preempts_the_running_move(service, arduino):
+    first = service.move_to(90, is_open=True)
+    _wait_for(lambda: first.status == RUNNING and arduino._move is not None)
+    time.sleep(0.2)
+
+    second = service.move_to(0, is_open=False)
+    assert second.done.wait(10)
+
+    assert first.status == CANCELLED
+    assert first.error == "Pre-empted by a new target"
+    assert second.status == DONE
+    assert (arduino.pos1, arduino.pos2) == (0, 0)
+    newest, oldest = service.get_log()
+    assert (newest["id"], oldest["id"]) == (second.id, first.id)
+    # Stopped part way, and the next move started from there
+    assert 0 < oldest["angle"] < 90
+    assert newest["from_angle"] == oldest["angle"]
+    assert newest["direction"] == "close"
+
+
+def test_connect_reconciles_a_stale_stored_angle(service, arduino, state_file):
+    state_file.write_text(json.dumps({"is_open": False, "angle": 45}))
+    arduino.pos1 = arduino.pos2 = 90
+    service.state = LidState(str(state_file))
+    assert not service.state.confirmed
+
+    service.start()
+    # Saved once open/closed has been inferred too
+    _wait_for(lambda: json.loads(state_file.read_text())["angle"] == 90)
+
+    assert service.state.confirmed
+    assert (service.state.angle, service.state.is_open) == (90, True)
+
+
+def test_each_move_starts_from_the_arduinos_status(service, arduino):
+    assert service.connect()
+    # Something else moved the servos since the last reconcile
+    arduino.pos1 = arduino.pos2 = 30
+
+    motion = service.move_to(60)
+    assert motion.done.wait(10)
+
+    [entry] = service.get_log()
+    assert (entry["from_angle"], entry["direction"], entry["angle"]) == (30, "open", 60)
+
+
+def test_state_file_is_fsynced_with_its_directory(state_file, monkeypatch):
+    synced = []
+    real_fsync = os.fsync
+
+    def fsync(fd):
+        synced.append(os.path.isdir(f"/proc/self/fd/{fd}"))
+        real_fsync(fd)
+
+    monkeypatch.setattr(os, "fsync", fsync)
+    state = LidState(str(state_file))
+    state.angle = 70
+    state.save()
+
+    assert synced == [False, True]
+    assert LidState(str(state_file)).angle == 70
+    assert not os.path.exists(f"{state_file}.tmp")
@@ -0,0 +1,137 @@
+"""Prometheus text exposition of the metric primitives."""
+import math
+import re
+
+import pytest
+
+from telemetry import CONTENT_TYPE, Counter, Gauge, Histogram, Registry
+
+# name{labels} value
+SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{(.*)\})? (\S+)$')
+LABEL = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)"(?:,|$)')
+
+
+def _unescape(value):
+    return re.sub(r'\\(.)', lambda m: "\n" if m.group(1) == "n" else m.group(1), value)
+
+
+def parse(text):
+    """Exposition text to ({name: type}, [(name, labels, value)])."""
+    assert text.endswith("\n")
+    types, samples = {}, []
+    for line in text.splitlines():
+        if line.startswith("# TYPE "):
+            _, _, name, kind = line.split(" ")
+            types[name] = kind
+        elif line.startswith("# HELP "):
+            continue
+        else:
+            match = SAMPLE.match(line)
+            assert match, f"not a sample line: {line!r}"
+            name, labels, value = match.groups()
+            parsed = {k: _unescape(v) for k, v in LABEL.findall(labels or "")}
+            samples.append((name, parsed, float(value)))
+    return types, samples
+
+
+def values(samples, name, **labels):
+    return [v for n, l, v in samples if n == name and all(l.get(k) == x for k, x in labels.items())]
+
+
+@pytest.fixture
+def registry():
+    return Registry()
+
+
+def test_counter_is_exposed_as_total(registry):
+    jobs = Counter("plante_test_jobs", "Jobs", ["result"], registry=registry)
+    jobs.labels(result="done").inc()
+    jobs.labels("done").inc(2)
+    jobs.labels(result="failed").inc()
+
+    types, samples = parse(registry.render())
+
+    assert types == {"plante_test_jobs_total": "counter"}
+    assert values(samples, "plante_test_jobs_total", result="done") == [3]
+    assert values(samples, "plante_test_jobs_total", result="failed") == [1]
+
+
+def test_gauge_without_labels(registry):
+    depth = Gauge("plante_test_depth", "Depth", registry=registry)
+    depth.set(2.5)
+
+    types, samples = parse(registry.render())
+
+    assert types == {"plante_test_depth": "gauge"}
+    assert samples == [("plante_test_depth", {}, 2.5)]
+
+
+def test_label_values_are_escaped(registry):
+    errors = Counter("plante_test_errors", "Errors", ["type"], registry=registry)
+    awkward = 'say "hi"\\\nbye'
+    errors.labels(type=awkward).inc()
+
+    text = registry.render()
+    _, samples = parse(text)
+
+    assert r'type="say \"hi\"\\\nbye"' in text
+    assert samples == [("plante_test_errors_total", {"type": awkward}, 1)]
+
+
+def test_histogram_buckets_are_cumulative(registry):
+    seconds = Histogram("plante_test_seconds", "Latency", ["sensor"],
+                        buckets=(0.1, 1.0, 0.5), registry=registry)
+    for value in (0.05, 0.1, 0.3, 0.7, 2.0):
+        seconds.labels(sensor="dht11").observe(value)
+
+    types, samples = parse(registry.render())
+    buckets = {l["le"]: v for n, l, v in samples if n == "plante_test_seconds_bucket"}
+
+    assert types == {"plante_test_seconds": "histogram"}
+    # Sorted bounds, le is inclusive, +Inf counts everything
+    assert list(buckets) == ["0.1", "0.5", "1", "+Inf"]
+    assert list(buckets.values()) == [2, 3, 4, 5]
+    assert values(samples, "plante_test_seconds_count", sensor="dht11") == [5]
+    assert values(samples, "plante_test_seconds_sum", sensor="dht11") == [pytest.approx(3.15)]
+    assert all(l["sensor"] == "dht11" for _, l, _ in samples)
+
+
+def test_empty_histogram(registry):
+    Histogram("plante_test_idle_seconds", "Idle", buckets=(1.0,), registry=registry)
+
+    _, samples = parse(registry.render())
+
+    assert [(n, l.get("le"), v) for n, l, v in samples] == [
+        ("plante_test_idle_seconds_bucket", "1", 0),
+        ("plante_test_idle_seconds_bucket", "+Inf", 0),
+        ("plante_test_idle_seconds_sum", None, 0),
+        ("plante_test_idle_seconds_count", None, 0),
+    ]
+    assert not any(math.isnan(v) for _, _, v in samples)
+
+
+def test_labels_are_checked(registry):
+    retries = Counter("plante_test_retries", "Retries", ["kind"], registry=registry)
+
+    with pytest.raises(ValueError):
+        retries.labels("ready", "extra")
+    with pytest.raises(ValueError):
+        retries.inc()
+
+
+def test_duplicate_names_are_rejected(registry):
+    Gauge("plante_test_viewers", "Viewers", registry=registry)
+
+    with pytest.raises(ValueError, match="Duplicate metric"):
+        Counter("plante_test_viewers", "Viewers again", registry=registry)
+
+
+def test_process_metrics_render_in_the_text_format():
+    import api.main  # noqa: F401 - defines the service metrics
+    from telemetry import REGISTRY
+
+    types, samples = parse(REGISTRY.render())
+
+    assert types["plante_sensor_cache_total"] == "counter"
+    assert types["plante_http_request_duration_seconds"] == "histogram"
+    assert CONTENT_TYPE.startswith("text/plain; version=0.0.4")
@@ -0,0 +1,86 @@
+"""Server-Timing middleware and TimedRoute spans."""
+import re
+import time
+
+import pytest
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+
+from api.middleware import ServerTimingMiddleware, TimedRoute
+from telemetry import record, span
+
+ORIGINS = "https://dash.example, http://localhost:3000"
+
+
+def _spans(header):
+    """Server-Timing value to {name: (ms, desc)}."""
+    spans = {}
+    for part in header.split(", "):
+        match = re.fullmatch(r'([\w-]+);dur=([\d.]+)(?:;desc="([^"]*)")?', part)
+        assert match, f"bad Server-Timing entry: {part!r}"
+        spans[match.group(1)] = (float(match.group(2)), match.group(3))
+    return spans
+
+
+@pytest.fixture
+def client():
+    router = APIRouter(route_class=TimedRoute)
+
+    @router.get("/async")
+    async def read_async():
+        with span("lock", "Sensor lock wait"):
+            time.sleep(0.01)
+        return {"ok": True}
+
+    @router.get("/sync")
+    def read_sync():
+        record("dht11", 0.002, "DHT11 read")
+        record("dht11", 0.003, "DHT11 read")
+        return {"ok": True}
+
+    app = FastAPI()
+    app.include_router(router)
+    app.add_middleware(ServerTimingMiddleware, timing_allow_origin=ORIGINS)
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("path", ["/async", "/sync"])
+def test_handler_time_is_split_into_endpoint_and_encode(client, path):
+    response = client.get(path)
+
+    spans = _spans(response.headers["Server-Timing"])
+    assert list(spans)[-3:] == ["endpoint", "encode", "total"]
+    assert spans["endpoint"][1] == "Endpoint incl. hardware"
+    assert spans["total"][0] >= spans["endpoint"][0]
+
+
+def test_spans_recorded_by_the_endpoint_are_included(client):
+    spans = _spans(client.get("/async").headers["Server-Timing"])
+    assert spans["lock"][0] >= 10
+    assert spans["endpoint"][0] >= spans["lock"][0]
+
+    spans = _spans(client.get("/sync").headers["Server-Timing"])
+    assert spans["dht11"] == (5.0, "DHT11 read (x2)")
+
+
+def test_timings_are_readable_from_the_allowed_origins(client):
+    response = client.get("/sync")
+
+    assert response.headers["Timing-Allow-Origin"] == ORIGINS
+    # Comma-separated origin list, as the header requires
+    assert all(re.fullmatch(r"https?://[\w.:-]+", o) for o in response.headers["Timing-Allow-Origin"].split(", "))
+
+
+def test_unrouted_requests_still_get_a_total(client):
+    response = client.get("/missing")
+
+    assert response.status_code == 404
+    assert list(_spans(response.headers["Server-Timing"])) == ["total"]
+
+
+def test_api_lists_its_cors_origins_for_timing():
+    from api import main
+
+    options = next(m.kwargs for m in main.app.user_middleware if m.cls is ServerTimingMiddleware)
+
+    assert options["timing_allow_origin"] == ", ".join(o.strip() for o in main.ALLOWED_ORIGINS)
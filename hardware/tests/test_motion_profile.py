@@ -0,0 +1,71 @@
+"""Servo motion profiles."""
+import pytest
+
+from motors.motion_profile import PROFILES, TRAPEZOID_ACCEL, profile_angle, sample
+
+
+@pytest.mark.parametrize("name", sorted(PROFILES))
+def test_profiles_run_from_start_to_end_monotonically(name):
+    curve = PROFILES[name]
+    points = [curve(i / 200) for i in range(201)]
+
+    assert points[0] == pytest.approx(0, abs=1e-9)
+    assert points[-1] == pytest.approx(1)
+    assert all(b >= a - 1e-12 for a, b in zip(points, points[1:]))
+
+
+@pytest.mark.parametrize("name", ["ease", "trapezoid", "scurve"])
+def test_smooth_profiles_are_symmetric_and_start_slowly(name):
+    curve = PROFILES[name]
+
+    assert curve(0.5) == pytest.approx(0.5)
+    for t in (0.1, 0.2, 0.3):
+        assert curve(t) == pytest.approx(1 - curve(1 - t))
+    # Slower than constant speed at the start
+    assert curve(0.05) < 0.05
+
+
+def test_trapezoid_cruises_at_constant_speed():
+    curve = PROFILES["trapezoid"]
+    peak = 1 / (1 - TRAPEZOID_ACCEL)
+    step = 0.01
+
+    for t in (0.3, 0.5, 0.7):
+        assert (curve(t + step) - curve(t)) / step == pytest.approx(peak)
+    # Continuous where acceleration ends
+    assert curve(TRAPEZOID_ACCEL - 1e-9) == pytest.approx(curve(TRAPEZOID_ACCEL))
+
+
+def test_scurve_starts_and_ends_with_zero_speed():
+    curve = PROFILES["scurve"]
+    step = 1e-4
+
+    assert curve(step) / step == pytest.approx(0, abs=1e-6)
+    assert (1 - curve(1 - step)) / step == pytest.approx(0, abs=1e-6)
+
+
+def test_profile_angle():
+    assert profile_angle("linear", 0, 90, 1, 2) == pytest.approx(45)
+    assert profile_angle("linear", 90, 0, 0.5, 2) == pytest.approx(67.5)
+    assert profile_angle("ease", 10, 50, 1, 2) == pytest.approx(30)
+    # Before the start, after the end, and zero-length moves
+    assert profile_angle("ease", 10, 50, -1, 2) == pytest.approx(10)
+    assert profile_angle("ease", 10, 50, 3, 2) == 50
+    assert profile_angle("scurve", 10, 50, 0, 0) == 50
+
+
+def test_sample_has_one_angle_per_frame_ending_at_the_target():
+    angles = sample("linear", 0, 90, duration=1.0, rate=50)
+
+    assert len(angles) == 50
+    assert angles[0] == pytest.approx(1.8)
+    assert angles[-1] == 90
+
+
+def test_sample_of_a_short_move_is_one_frame():
+    assert sample("scurve", 20, 80, duration=0, rate=50) == [80]
+
+
+def test_unknown_profile():
+    with pytest.raises(KeyError):
+        profile_angle("bounce", 0, 90, 1, 2)
@@ -0,0 +1,113 @@
+"""Photo index ids and cursor paging."""
+import os
+
+import pytest
+
+from api.services.photo_index import AFTER, BEFORE, PhotoIndex, decode_cursor, encode_cursor
+
+SECOND_US = 1_000_000
+
+
+def _photo(directory, relpath, mtime_s):
+    path = directory / relpath
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"\xff\xd8jpeg")
+    os.utime(path, ns=(mtime_s * 10**9, mtime_s * 10**9))
+    return path
+
+
+@pytest.fixture
+def photos(tmp_path):
+    return tmp_path
+
+
+def test_ids_are_paths_relative_to_the_directory(photos):
+    _photo(photos, "photo_1.jpg", 1000)
+    _photo(photos, "timelapse/2026/03/01/tl_daily_0800.jpg", 1001)
+    _photo(photos, "timelapse/2026/03/02/tl_daily_0800.jpg", 1002)
+
+    index = PhotoIndex(str(photos))
+
+    assert len(index) == 3
+    assert [p.id for p in index.between()[0]] == [
+        "photo_1",
+        "timelapse/2026/03/01/tl_daily_0800",
+        "timelapse/2026/03/02/tl_daily_0800",
+    ]
+    first = index.get("timelapse/2026/03/01/tl_daily_0800")
+    assert first.filename == "tl_daily_0800.jpg"
+    assert first.filepath == str(photos / "timelapse/2026/03/01/tl_daily_0800.jpg")
+
+
+def test_duplicate_basenames_are_added_and_discarded_separately(photos):
+    index = PhotoIndex(str(photos))
+    a = _photo(photos, "timelapse/2026/03/01/tl_daily_0800.jpg", 1000)
+    b = _photo(photos, "timelapse/2026/03/02/tl_daily_0800.jpg", 1001)
+
+    index.add(str(a))
+    index.add("timelapse/2026/03/02/tl_daily_0800.jpg")
+    assert len(index) == 2
+
+    index.discard(str(a))
+    assert [p.filepath for p in index.between()[0]] == [str(b)]
+    index.discard("timelapse/2026/03/02/tl_daily_0800")
+    assert len(index) == 0
+
+
+def _page_forward(index, since, limit):
+    seen, cursor = [], None
+    while True:
+        page, more = index.between(since=since, limit=limit,
+                                   cursor=decode_cursor(cursor) if cursor else None)
+        seen += [p.id for p in page]
+        if not more:
+            return seen
+        cursor = encode_cursor(AFTER, page[-1])
+
+
+def _page_back(index, limit):
+    seen, cursor = [], None
+    while True:
+        page, more = index.between(limit=limit, cursor=decode_cursor(cursor) if cursor else None)
+        seen = [p.id for p in page] + seen
+        if not more:
+            return seen
+        cursor = encode_cursor(BEFORE, page[0])
+
+
+@pytest.fixture
+def same_second(photos):
+    """Seven photos, five of them sharing one mtime."""
+    _photo(photos, "a.jpg", 999)
+    for name in ("b", "c", "d", "e", "f"):
+        _photo(photos, f"burst/{name}.jpg", 1000)
+    _photo(photos, "g.jpg", 1001)
+    return PhotoIndex(str(photos))
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 10])
+def test_paging_forward_through_equal_mtimes(same_second, limit):
+    expected = ["a", "burst/b", "burst/c", "burst/d", "burst/e", "burst/f", "g"]
+
+    assert _page_forward(same_second, since=0, limit=limit) == expected
+    # since stays exclusive of its whole microsecond
+    assert _page_forward(same_second, since=1000 * SECOND_US, limit=limit) == ["g"]
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 10])
+def test_paging_back_through_equal_mtimes(same_second, limit):
+    expected = ["a", "burst/b", "burst/c", "burst/d", "burst/e", "burst/f", "g"]
+
+    assert _page_back(same_second, limit=limit) == expected
+
+
+def test_cursor_round_trip_keeps_slashes_and_colons():
+    direction, key = decode_cursor("a:1000000:timelapse/2026/x:y")
+
+    assert (direction, key) == (AFTER, (1000000, "timelapse/2026/x:y"))
+
+
+@pytest.mark.parametrize("cursor", ["", "x:1:a", "a:soon:a", "a:1:", "a:1"])
+def test_invalid_cursors(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
@@ -0,0 +1,104 @@
+"""Sampling profiler output and limits."""
+import json
+import threading
+import time
+
+import pytest
+
+from telemetry import profiler
+from telemetry.profiler import MAX_HZ, MAX_SECONDS, ProfilerBusy, profile, render_profile
+
+
+def _spin_here(stop):
+    while not stop.is_set():
+        sum(range(100))
+
+
+@pytest.fixture
+def busy_thread():
+    stop = threading.Event()
+    thread = threading.Thread(target=_spin_here, args=(stop,), name="spinner")
+    thread.start()
+    yield thread
+    stop.set()
+    thread.join()
+
+
+def test_samples_other_threads_at_the_requested_rate(busy_thread):
+    result = profile(0.2, hz=100)
+
+    assert 10 <= result.sample_count <= 21
+    assert result.duration == pytest.approx(0.2, abs=0.05)
+    assert result.thread_names[busy_thread.ident] == "spinner"
+    # The sampling thread itself is left out
+    assert threading.get_ident() not in {ident for ident, _ in result.stacks}
+
+
+def test_collapsed_lines_name_the_thread_and_frames(busy_thread):
+    text = render_profile(0.1, hz=200, fmt="collapsed")
+
+    lines = text.splitlines()
+    spinner = [line for line in lines if line.startswith(f"spinner-{busy_thread.ident};")]
+    assert spinner
+    stack, count = spinner[0].rsplit(" ", 1)
+    assert int(count) > 0
+    # Root to leaf, files relative to hardware/
+    assert stack.split(";")[-1].startswith("_spin_here (tests/test_profiler.py:")
+    counts = [int(line.rsplit(" ", 1)[1]) for line in lines]
+    assert counts == sorted(counts, reverse=True)
+
+
+def test_speedscope_profiles_reference_shared_frames(busy_thread):
+    document = json.loads(render_profile(0.1, hz=200, fmt="speedscope"))
+
+    frames = document["shared"]["frames"]
+    names = [p["name"] for p in document["profiles"]]
+    assert f"spinner-{busy_thread.ident}" in names
+    for entry in document["profiles"]:
+        assert entry["type"] == "sampled"
+        assert len(entry["samples"]) == len(entry["weights"])
+        assert entry["endValue"] == pytest.approx(sum(entry["weights"]))
+        assert all(0 <= i < len(frames) for sample in entry["samples"] for i in sample)
+
+
+def test_frame_names_escape_the_separator():
+    result = profiler.Profile(interval=0.01)
+    result.thread_names = {1: "a;b"}
+    result.stacks[(1, (("/x/mod.py", "f", 3),))] = 2
+
+    assert result.collapsed() == "a:b-1;f (mod.py:3) 2\n"
+
+
+def test_one_profile_at_a_time():
+    started = threading.Event()
+
+    def long_profile():
+        started.set()
+        profile(0.3, hz=10)
+
+    thread = threading.Thread(target=long_profile)
+    thread.start()
+    started.wait()
+    time.sleep(0.05)
+    try:
+        with pytest.raises(ProfilerBusy):
+            profile(0.1)
+    finally:
+        thread.join()
+    assert profile(0.01).sample_count >= 1
+
+
+@pytest.mark.parametrize("seconds, hz", [
+    (0, 100),
+    (MAX_SECONDS + 1, 100),
+    (1, 0),
+    (1, MAX_HZ + 1),
+])
+def test_limits(seconds, hz):
+    with pytest.raises(ValueError):
+        profile(seconds, hz)
+
+
+def test_unknown_format():
+    with pytest.raises(ValueError, match="format"):
+        render_profile(0.01, fmt="pprof")
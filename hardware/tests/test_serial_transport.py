@@ -0,0 +1,95 @@
+"""Serial reply matching, with and without sequence tags."""
+import queue
+import threading
+
+import pytest
+
+from arduino import serial_transport
+from arduino.serial_transport import SerialTransport
+
+
+class FakeFirmware:
+    """Answers each command a little later (a MOVE when it ends); servo 9 is an error."""
+
+    timeout = None
+
+    def __init__(self, tagged):
+        self.tagged = tagged
+        self.lines = queue.Queue()
+        self.outstanding = 0
+        self.most_outstanding = 0
+        self._lock = threading.Lock()
+
+    def write(self, data):
+        line = data.decode().strip()
+        tag, command = line.split(" ", 1) if self.tagged else ("", line)
+        with self._lock:
+            self.outstanding += 1
+            self.most_outstanding = max(self.most_outstanding, self.outstanding)
+        if command.startswith("MOVE"):
+            delay, reply = 0.2, "DONE:1=0"
+        elif command.startswith("9"):
+            delay, reply = 0.02, "ERROR:Unknown servo"
+        else:
+            delay, reply = 0.02, f"OK:{command}"
+        threading.Timer(delay, self._reply, args=(f"{tag} {reply}".strip(),)).start()
+        return len(data)
+
+    def _reply(self, text):
+        with self._lock:
+            self.outstanding -= 1
+        self.lines.put(f"{text}\n".encode())
+
+    def readline(self):
+        try:
+            return self.lines.get(timeout=self.timeout)
+        except queue.Empty:
+            return b""
+
+
+@pytest.fixture(params=[True, False], ids=["tagged", "untagged"])
+def link(request):
+    firmware = FakeFirmware(request.param)
+    transport = SerialTransport(firmware, tagged=request.param)
+    transport.start()
+    yield firmware, transport
+    transport.close()
+
+
+def test_error_goes_to_the_command_that_failed(link):
+    _, transport = link
+
+    replies = transport.pipeline(["1:90", "MOVE:1:0:200:EASE", "9:45", "2:45"])
+
+    assert replies == ["OK:1:90", "DONE:1=0", "ERROR:Unknown servo", "OK:2:45"]
+
+
+def test_untagged_commands_are_not_pipelined(link):
+    firmware, transport = link
+
+    transport.pipeline(["1:90", "2:45", "STATUS", "1:0"])
+
+    assert (firmware.most_outstanding > 1) == firmware.tagged
+
+
+class SilentFirmware(FakeFirmware):
+    """Reads commands and never answers."""
+
+    def write(self, data):
+        return len(data)
+
+
+@pytest.mark.parametrize("deadline, wait", [(0.1, 1.0), (5.0, 0.1)], ids=["expired", "waited"])
+def test_a_timeout_is_counted_once(deadline, wait):
+    transport = SerialTransport(SilentFirmware(tagged=True), tagged=True)
+    transport.start()
+    timeouts = serial_transport.SERIAL_TIMEOUTS.labels(command="STATUS")
+    before = timeouts.value
+    try:
+        request = transport.request("STATUS", deadline)
+        with pytest.raises(TimeoutError):
+            transport.wait(request, wait)
+    finally:
+        transport.close()
+
+    assert timeouts.value == before + 1
@@ -0,0 +1,65 @@
+"""Firmware moves, STOP on cancel and the stepped fallback, against the Arduino emulator."""
+import threading
+
+import pytest
+
+from arduino.servo_control import DualServoController
+from backends.sim.arduino import ArduinoEmulator
+
+
+@pytest.fixture
+def old_arduino():
+    """The original firmware: no MOVE, no tags."""
+    emulator = ArduinoEmulator(boot_delay=0.05, supports_move=False).start()
+    yield emulator
+    emulator.stop()
+
+
+def _controller(emulator):
+    controller = DualServoController(emulator.port, use_link=False)
+    assert controller.connect()
+    return controller
+
+
+def test_move_runs_on_the_firmware(arduino, serial_env):
+    controller = _controller(arduino)
+    try:
+        response = controller.move("both", 90, 300)
+    finally:
+        controller.close()
+
+    assert response == "DONE:1=90,2=90"
+    assert controller.supports_move is True
+
+
+def test_cancel_stops_the_move_where_it_is(arduino, serial_env):
+    controller = _controller(arduino)
+    cancel = threading.Event()
+    threading.Timer(0.3, cancel.set).start()
+    try:
+        response = controller.move("both", 180, 2000, profile="linear", cancel=cancel)
+    finally:
+        controller.close()
+
+    assert response.startswith("STOPPED:")
+    assert 0 < arduino.pos1 < 180
+    assert response == f"STOPPED:1={arduino.pos1},2={arduino.pos2}"
+
+
+def test_unknown_servo_reply_falls_back_to_steps(old_arduino, serial_env):
+    controller = _controller(old_arduino)
+    try:
+        assert controller.move("both", 90, 300) is None
+        assert controller.supports_move is False
+        received = old_arduino.commands_received
+        # Known to be missing now: not even asked
+        assert controller.move("both", 90, 300) is None
+        assert old_arduino.commands_received == received
+
+        controller.smooth_move("both", 20, step=5, delay=0.01)
+    finally:
+        controller.close()
+
+    # STATUS, then 0, 5, 10, 15, 20, and the exact target again
+    assert old_arduino.commands_received == received + 7
+    assert (old_arduino.pos1, old_arduino.pos2) == (20, 20)
@@ -0,0 +1,133 @@
+"""Servo link reconnects, socket forwarding and sharing between processes, against the Arduino emulator."""
+import threading
+import time
+
+import pytest
+
+from arduino import serial_transport, servo_link as servo_link_module
+from arduino.serial_transport import connect_link
+from arduino.servo_link import RECONNECT_MAX, RECONNECT_MIN, ServoLink
+
+
+@pytest.fixture
+def link(arduino, serial_env, monkeypatch):
+    # Notice a dead connection quickly
+    monkeypatch.setattr(servo_link_module, "HEALTH_INTERVAL", 0.05)
+    link = ServoLink(port=arduino.port)
+    yield link
+    link.close()
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "Timed out"
+        time.sleep(0.01)
+
+
+class _RecordedStop(threading.Event):
+    """Stop event that records the supervisor's waits instead of sleeping."""
+
+    def __init__(self, waits):
+        super().__init__()
+        self.waits = []
+        self._limit = waits
+
+    def wait(self, timeout=None):
+        self.waits.append(timeout)
+        if len(self.waits) >= self._limit:
+            self.set()
+        return self.is_set()
+
+
+def test_reconnect_backs_off_exponentially(serial_env, tmp_path):
+    link = ServoLink(port=str(tmp_path / "ttyACM0"))
+    link._stop = _RecordedStop(waits=9)
+    retries = serial_transport.SERVO_RETRIES.labels(kind="reconnect")
+    before = retries.value
+
+    link._supervise()
+    link.close()
+
+    assert link._stop.waits == [1, 2, 4, 8, 16, 32, 60, 60, 60]
+    assert (link._stop.waits[0], link._stop.waits[-1]) == (RECONNECT_MIN, RECONNECT_MAX)
+    assert retries.value == before + 9
+    assert link.wait(0) is None
+
+
+def test_lost_connection_is_reopened(link, arduino):
+    connects = []
+    link.add_connect_listener(connects.append)
+    link.start()
+    first = link.wait(5)
+    assert first is not None and link.owner
+
+    # The port goes away under the reader, as when the USB cable is pulled
+    first.serial.close()
+    _wait_for(lambda: len(connects) == 2 and link.is_connected)
+
+    assert connects == [first, link.controller]
+    assert link.controller is not first
+    assert arduino.resets == 2
+    assert link.controller.send_command("STATUS") == "STATUS:1=0,2=0"
+
+
+def test_socket_clients_get_their_own_tagged_replies(link, arduino):
+    link.start()
+    assert link.wait(5) is not None
+    clients = [connect_link(link.socket_path) for _ in range(2)]
+
+    clients[0].write(b"#7 BOTH:40\n")
+    clients[1].write(b"#7 STATUS\n")
+    clients[0].write(b"#8 1:50\n")
+
+    assert clients[0].readline() == b"#7 OK:BOTH=40\n"
+    assert clients[1].readline().startswith(b"#7 STATUS:")
+    assert clients[0].readline() == b"#8 OK:1=50\n"
+    for client in clients:
+        client.close()
+
+
+def test_untagged_stop_is_passed_through(link, arduino):
+    link.start()
+    assert link.wait(5) is not None
+    client = connect_link(link.socket_path)
+
+    client.write(b"#3 MOVE:BOTH:180:2000:LINEAR\n")
+    _wait_for(lambda: arduino._move is not None)
+    client.write(b"STOP\n")
+
+    assert client.readline().startswith(b"#3 STOPPED:1=")
+    assert arduino._move is None
+    client.close()
+
+
+def test_commands_are_refused_while_disconnected(serial_env, tmp_path):
+    link = ServoLink(port=str(tmp_path / "ttyACM0"))
+    replies = []
+
+    link._forward("#4 STATUS", lambda tag, text: replies.append(tag + text))
+
+    assert replies == ["#4 ERROR:Arduino not connected"]
+
+
+def test_second_link_uses_the_first_and_takes_over_when_it_goes(link, arduino):
+    link.start()
+    assert link.wait(5) is not None
+    second = ServoLink(port=arduino.port)
+    try:
+        second.start()
+        controller = second.wait(5)
+
+        assert controller is not None and not second.owner
+        assert controller.use_link
+        assert controller.send_command("BOTH:30") == "OK:BOTH=30"
+        assert arduino.resets == 1
+
+        link.close()
+        _wait_for(lambda: second.owner and second.is_connected)
+
+        assert second.controller.send_command("STATUS") == "STATUS:1=30,2=30"
+        assert arduino.resets == 2
+    finally:
+        second.close()
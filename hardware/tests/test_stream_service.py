@@ -0,0 +1,150 @@
+"""Live stream fan-out, frame budget and the viewer limit."""
+import asyncio
+import threading
+
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api.routers import camera as camera_router
+from api.services import stream_service as stream_module
+from api.services.stream_service import BOUNDARY, StreamBusy, StreamService
+
+
+class FakeCamera:
+    """Preview frames as YUV420 arrays, counting holds and captures."""
+
+    supports_preview = True
+
+    def __init__(self):
+        self.held = 0
+        self.most_held = 0
+        self.captures = 0
+        self.released = threading.Event()
+
+    def hold_preview(self):
+        self.held += 1
+        self.most_held = max(self.most_held, self.held)
+        self.released.clear()
+
+    def release_preview(self):
+        self.held -= 1
+        self.released.set()
+
+    def capture_preview(self):
+        self.captures += 1
+        return np.full((72, 64), self.captures % 256, dtype=np.uint8)
+
+
+@pytest.fixture
+def camera():
+    return FakeCamera()
+
+
+def _part(chunk):
+    head, jpeg = chunk.split(b"\r\n\r\n", 1)
+    assert head.startswith(f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\n".encode())
+    length = int(head.rsplit(b"Content-Length: ", 1)[1])
+    assert jpeg[:2] == b"\xff\xd8" and len(jpeg) == length + 2
+    return jpeg
+
+
+async def _watch(service, count):
+    viewer = service.subscribe()
+    frames = service.frames(viewer)
+    try:
+        return [_part(await frames.__anext__()) for _ in range(count)]
+    finally:
+        await frames.aclose()
+
+
+def test_one_producer_fans_out_to_every_viewer(camera):
+    service = StreamService(camera, max_fps=50, frame_budget=200)
+
+    async def main():
+        return await asyncio.gather(*(_watch(service, 3) for _ in range(4)))
+
+    results = asyncio.run(main())
+
+    assert all(len(frames) == 3 for frames in results)
+    # One camera user, each frame encoded once and shared
+    assert camera.most_held == 1
+    assert camera.captures < 4 * 3
+    assert camera.released.wait(2) and camera.held == 0
+    assert service.viewers == 0
+
+
+def test_frame_rate_shares_the_budget():
+    service = StreamService(FakeCamera(), max_fps=15, min_fps=2, frame_budget=30)
+
+    rates = []
+    for viewers in (0, 1, 2, 4, 20):
+        service._viewers = [object()] * viewers
+        rates.append(service.frame_rate())
+
+    assert rates == [15, 15, 15, 7.5, 2]
+
+
+def test_producer_runs_at_the_shared_rate(camera):
+    service = StreamService(camera, max_fps=40, frame_budget=40)
+
+    async def main():
+        viewers = [service.subscribe() for _ in range(4)]
+        await asyncio.sleep(1.0)
+        for viewer in viewers:
+            service.unsubscribe(viewer)
+
+    asyncio.run(main())
+
+    # 40 fps across 4 viewers: 10 frames a second
+    assert 7 <= camera.captures <= 13
+
+
+def test_viewer_limit(camera):
+    service = StreamService(camera, max_viewers=1)
+
+    async def main():
+        viewer = service.subscribe()
+        with pytest.raises(StreamBusy):
+            service.subscribe()
+        service.unsubscribe(viewer)
+        service.unsubscribe(viewer)
+        assert service.viewers == 0
+        service.unsubscribe(service.subscribe())
+
+    asyncio.run(main())
+
+
+def test_slow_viewer_skips_frames(camera):
+    service = StreamService(camera, max_fps=50, frame_budget=50)
+    dropped = stream_module._DROPPED.value
+
+    async def main():
+        viewer = service.subscribe()
+        frames = service.frames(viewer)
+        try:
+            await frames.__anext__()
+            # Miss a few frames while "sending"
+            await asyncio.sleep(0.2)
+            await frames.__anext__()
+        finally:
+            await frames.aclose()
+
+    asyncio.run(main())
+
+    assert stream_module._DROPPED.value > dropped
+
+
+def test_full_stream_is_rejected_before_streaming(camera, monkeypatch):
+    service = StreamService(camera, max_viewers=0)
+    monkeypatch.setattr(camera_router, "get_stream_service", lambda: service)
+    monkeypatch.setattr(camera_router, "get_camera_service", lambda: camera)
+    app = FastAPI()
+    app.include_router(camera_router.router)
+
+    response = TestClient(app).get("/camera/stream")
+
+    assert response.status_code == 503
+    assert response.json()["detail"] == "Too many stream viewers"
+    assert service.viewers == 0
@@ -0,0 +1,164 @@
+"""Timelapse cron expressions and retention."""
+import json
+import os
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from api.models import RetentionPolicy
+from api.services import timelapse_service
+from api.services.photo_index import PhotoIndex
+from api.services.timelapse_service import CronExpression, TimelapseService, expired
+
+
+def _next(expression, after):
+    return CronExpression(expression).next_after(after)
+
+
+def test_every_minute_is_strictly_after():
+    assert _next("* * * * *", datetime(2026, 3, 1, 12, 0, 0)) == datetime(2026, 3, 1, 12, 1)
+    assert _next("* * * * *", datetime(2026, 3, 1, 12, 0, 59, 999)) == datetime(2026, 3, 1, 12, 1)
+
+
+def test_steps_ranges_and_lists():
+    cron = CronExpression("*/15 8-10,20 * * *")
+
+    assert cron.minutes == {0, 15, 30, 45}
+    assert cron.hours == {8, 9, 10, 20}
+    assert cron.next_after(datetime(2026, 3, 1, 10, 50)) == datetime(2026, 3, 1, 20, 0)
+    assert cron.next_after(datetime(2026, 3, 1, 20, 45)) == datetime(2026, 3, 2, 8, 0)
+
+
+def test_value_with_step_runs_to_the_end_of_the_range():
+    assert CronExpression("5/20 * * * *").minutes == {5, 25, 45}
+    assert CronExpression("10-30/10 * * * *").minutes == {10, 20, 30}
+
+
+def test_rolls_over_month_and_year():
+    assert _next("0 0 1 * *", datetime(2026, 12, 15)) == datetime(2027, 1, 1)
+    assert _next("30 6 * 2 *", datetime(2026, 3, 1)) == datetime(2027, 2, 1, 6, 30)
+
+
+def test_skips_months_without_the_day():
+    assert _next("0 12 31 * *", datetime(2026, 4, 1)) == datetime(2026, 5, 31, 12, 0)
+    assert _next("0 0 29 2 *", datetime(2026, 1, 1)) == datetime(2028, 2, 29)
+
+
+def test_sunday_is_zero_or_seven():
+    # 2026-03-01 is a Sunday
+    for expression in ("0 9 * * 0", "0 9 * * 7"):
+        assert _next(expression, datetime(2026, 2, 26)) == datetime(2026, 3, 1, 9, 0)
+    assert _next("0 9 * * 1-5", datetime(2026, 2, 27, 10)) == datetime(2026, 3, 2, 9, 0)
+
+
+def test_both_day_fields_restricted_match_either():
+    # The 10th, or any Monday: Monday 2026-03-02 comes first
+    assert _next("0 0 10 * 1", datetime(2026, 3, 1)) == datetime(2026, 3, 2)
+    # With one field left as *, only the other restricts
+    assert _next("0 0 10 * *", datetime(2026, 3, 1)) == datetime(2026, 3, 10)
+    assert _next("0 0 * * 1", datetime(2026, 3, 3)) == datetime(2026, 3, 9)
+
+
+@pytest.mark.parametrize("expression", [
+    "* * * *",
+    "60 * * * *",
+    "* 24 * * *",
+    "* * 0 * *",
+    "* * * 13 *",
+    "* * * * 8",
+    "*/0 * * * *",
+    "5-1 * * * *",
+    "a * * * *",
+])
+def test_invalid_expressions(expression):
+    with pytest.raises(ValueError):
+        CronExpression(expression)
+
+
+def test_expression_that_never_fires():
+    with pytest.raises(ValueError, match="never fires"):
+        CronExpression("0 0 31 2 *")
+
+
+DAY = 86400
+
+
+def _photo(directory, relpath, age_days, size=1000):
+    path = directory / relpath
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"\xff" * size)
+    mtime = time.time() - age_days * DAY
+    os.utime(path, (mtime, mtime))
+
+
+@pytest.fixture
+def photos(tmp_path, monkeypatch):
+    """Photos directory with three timelapse frames and three other photos."""
+    directory = tmp_path / "photos"
+    for age in (3, 2, 1):
+        _photo(directory, f"timelapse/2026/03/0{4 - age}/tl_daily_{age}.jpg", age)
+        _photo(directory, f"photo_{age}.jpg", age + 0.5)
+    camera = SimpleNamespace(save_dir=str(directory), index=PhotoIndex(str(directory)))
+    monkeypatch.setattr(timelapse_service, "get_camera_service", lambda: camera)
+    return directory
+
+
+@pytest.fixture
+def service(photos, tmp_path):
+    return TimelapseService(str(tmp_path / "timelapse.json"))
+
+
+def _remaining(directory):
+    return sorted(str(p.relative_to(directory)) for p in directory.rglob("*.jpg"))
+
+
+def test_expired_applies_age_count_and_size_in_turn():
+    photos = [SimpleNamespace(mtime_us=(1000 - age * DAY) * 1e6, size=100) for age in (0.02, 5, 4, 3, 2, 1)]
+    photos.sort(key=lambda p: p.mtime_us)
+    now = 1000
+
+    assert expired(photos, RetentionPolicy(), now) == []
+    assert expired(photos, RetentionPolicy(max_age_days=2.5), now) == photos[:3]
+    assert expired(photos, RetentionPolicy(max_count=2), now) == photos[:4]
+    assert expired(photos, RetentionPolicy(max_megabytes=250 / 2**20), now) == photos[:4]
+    assert expired(photos, RetentionPolicy(max_age_days=4.5, max_count=4,
+                                           max_megabytes=250 / 2**20), now) == photos[:4]
+
+
+def test_timelapse_policy_leaves_other_photos(service, photos):
+    removed = service.set_retention(RetentionPolicy(max_count=1))
+
+    assert removed == 2
+    assert _remaining(photos) == [
+        "photo_1.jpg", "photo_2.jpg", "photo_3.jpg", "timelapse/2026/03/03/tl_daily_1.jpg",
+    ]
+    # Emptied day directories go too
+    assert not (photos / "timelapse/2026/03/01").exists()
+    assert service.storage() == (1, 1000)
+
+
+def test_photo_policy_covers_the_photos_outside_the_timelapse(service, photos):
+    removed = service.set_photo_retention(RetentionPolicy(max_age_days=2))
+
+    assert removed == 2
+    assert _remaining(photos) == [
+        "photo_1.jpg",
+        "timelapse/2026/03/01/tl_daily_3.jpg",
+        "timelapse/2026/03/02/tl_daily_2.jpg",
+        "timelapse/2026/03/03/tl_daily_1.jpg",
+    ]
+    assert [p.id for p in service.other_photos()] == ["photo_1"]
+    assert service.camera_service.index.get("photo_3") is None
+
+
+def test_policies_are_saved(service, photos, tmp_path):
+    service.set_retention(RetentionPolicy(max_count=10))
+    service.set_photo_retention(RetentionPolicy(max_megabytes=512))
+
+    state = json.loads((tmp_path / "timelapse.json").read_text())
+    assert state["photo_retention"]["max_megabytes"] == 512
+    reloaded = TimelapseService(str(tmp_path / "timelapse.json"))
+    assert reloaded.retention.max_count == 10
+    assert reloaded.photo_retention.max_megabytes == 512
@@ -38,6 +38,17 @@ interface PiPhotoResponse {
   error?: string;
 }
 
+interface PiCaptureJob {
+  id: string;
+  status: 'queued' | 'running' | 'done' | 'failed';
+  requests: number;
+  photo: PiPhotoResponse | null;
+  error: string | null;
+}
+
+// Long-poll rounds (5s each) before giving up on a capture job
+const CAPTURE_POLL_ROUNDS = 6;
+
 export class PiApiError extends Error {
   constructor(
     message: string,
@@ -176,11 +187,29 @@ export class PiApiClient {
   }
 
   /**
-   * Capture a photo
+   * Capture a photo (queued on the Pi, then long-polled until taken)
    */
   async capturePhoto(filename?: string): Promise<PiPhotoResponse> {
-    const query = filename ? `?filename=${encodeURIComponent(filename)}` : '';
-    return this.request<PiPhotoResponse>(`/camera/capture${query}`);
+    let job = await this.request<PiCaptureJob>('/camera/captures', {
+      method: 'POST',
+      body: JSON.stringify(filename ? { filename } : {}),
+    });
+
+    for (let round = 0; round < CAPTURE_POLL_ROUNDS; round++) {
+      if (job.status === 'done' || job.status === 'failed') {
+        break;
+      }
+      job = await this.request<PiCaptureJob>(`/camera/captures/${job.id}?wait=5`);
+    }
+
+    if (job.photo) {
+      return job.photo;
+    }
+    return {
+      success: false,
+      error: job.error || `Capture still ${job.status}`,
+      timestamp: new Date().toISOString(),
+    };
   }
 
   /**
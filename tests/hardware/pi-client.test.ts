@@ -5,7 +5,7 @@
  * Gracefully skips if hardware is not available.
  */
 
-import { describe, it, expect, beforeAll } from 'vitest';
+import { describe, it, expect, beforeAll, afterEach, vi } from 'vitest';
 import { PiApiClient, PiApiError } from '../../lib/pi-client';
 import { PI_TIMEOUT } from '../setup';
 
@@ -113,6 +113,111 @@ describe('Pi Hardware Integration', { timeout: PI_TIMEOUT }, () => {
   });
 });
 
+// Capture job flow against a mocked Pi API (no hardware needed)
+describe('capturePhoto job polling', () => {
+  const photo = {
+    success: true,
+    filename: 'plant_20260101_120000.jpg',
+    timestamp: '2026-01-01T12:00:00',
+  };
+
+  const job = (status: string, extra: Record<string, unknown> = {}) => ({
+    id: 'cap-1-1',
+    status,
+    requests: 1,
+    photo: null,
+    error: null,
+    ...extra,
+  });
+
+  const mockFetch = (...bodies: unknown[]) => {
+    const fetchMock = vi.fn();
+    for (const body of bodies) {
+      fetchMock.mockResolvedValueOnce(
+        new Response(JSON.stringify(body), { status: 200 })
+      );
+    }
+    vi.stubGlobal('fetch', fetchMock);
+    return fetchMock;
+  };
+
+  const client = () => new PiApiClient({ baseUrl: 'http://pi.test:8000' });
+
+  afterEach(() => {
+    vi.unstubAllGlobals();
+  });
+
+  it('POSTs the capture, then long-polls the job until it is done', async () => {
+    const fetchMock = mockFetch(
+      job('queued'),
+      job('running'),
+      job('done', { photo })
+    );
+
+    const result = await client().capturePhoto('test.jpg');
+
+    expect(result).toEqual(photo);
+    expect(fetchMock).toHaveBeenCalledTimes(3);
+    const [postUrl, postInit] = fetchMock.mock.calls[0];
+    expect(postUrl).toBe('http://pi.test:8000/camera/captures');
+    expect(postInit.method).toBe('POST');
+    expect(JSON.parse(postInit.body)).toEqual({ filename: 'test.jpg' });
+    expect(fetchMock.mock.calls[1][0]).toBe('http://pi.test:8000/camera/captures/cap-1-1?wait=5');
+    expect(fetchMock.mock.calls[2][0]).toBe('http://pi.test:8000/camera/captures/cap-1-1?wait=5');
+  });
+
+  it('does not poll a job that finished before the POST returned', async () => {
+    const fetchMock = mockFetch(job('done', { photo }));
+
+    const result = await client().capturePhoto();
+
+    expect(result).toEqual(photo);
+    expect(fetchMock).toHaveBeenCalledTimes(1);
+    expect(JSON.parse(fetchMock.mock.calls[0][1].body)).toEqual({});
+  });
+
+  it('returns the job error when the capture fails', async () => {
+    mockFetch(job('queued'), job('failed', { error: 'Camera not available' }));
+
+    const result = await client().capturePhoto();
+
+    expect(result.success).toBe(false);
+    expect(result.error).toBe('Camera not available');
+  });
+
+  it('gives up after the last long-poll round', async () => {
+    const fetchMock = mockFetch(
+      job('queued'),
+      ...Array.from({ length: 6 }, () => job('running'))
+    );
+
+    const result = await client().capturePhoto();
+
+    // The POST plus six 5 s rounds
+    expect(fetchMock).toHaveBeenCalledTimes(7);
+    expect(result.success).toBe(false);
+    expect(result.error).toBe('Capture still running');
+  });
+
+  it('reports a poll that exceeds the client timeout', async () => {
+    const fetchMock = vi.fn()
+      .mockResolvedValueOnce(new Response(JSON.stringify(job('queued')), { status: 200 }))
+      .mockImplementationOnce((_url: string, init: RequestInit) =>
+        new Promise((_resolve, reject) => {
+          init.signal?.addEventListener('abort', () =>
+            reject(new DOMException('The operation was aborted.', 'AbortError'))
+          );
+        })
+      );
+    vi.stubGlobal('fetch', fetchMock);
+
+    const slow = new PiApiClient({ baseUrl: 'http://pi.test:8000', timeout: 20 });
+
+    await expect(slow.capturePhoto()).rejects.toThrow('Pi API request timed out');
+    expect(fetchMock).toHaveBeenCalledTimes(2);
+  });
+});
+
 // Summary for hardware tests
 describe('Hardware Summary', () => {
   it('Pi client is properly implemented', () => {